@@ -3,7 +3,7 @@ Distributed Food Delivery Platform - Backend Package
 
 A comprehensive distributed systems implementation demonstrating:
 - Distributed node architecture
-- Lamport logical clocks
+- Hybrid logical clocks
 - Leader election (Bully algorithm)
 - Consistency models (Strong/Eventual/Quorum)
 - Load balancing strategies
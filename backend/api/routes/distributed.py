@@ -1,11 +1,19 @@
 # FILE: backend/api/routes/distributed.py
 # ============================================================================
 
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Header, HTTPException, Response
+from typing import List, Dict, Any, Optional
 from zwiggy.backend import config
+from zwiggy.backend.concurrency.lock_manager import lock_manager
+from zwiggy.backend.core.event_query import query_events, parse_time
+from zwiggy.backend.core.message_queue import message_queue
 from zwiggy.backend.distributed.leader_election import BullyLeaderElection
-from zwiggy.backend.distributed.consistency import ConsistencyManager
+from zwiggy.backend.distributed.consistency import (ConsistencyManager, QuorumNotReached,
+                                                    connect_replicas)
+from zwiggy.backend.distributed.hinted_handoff import HintedHandoff
 from zwiggy.backend.distributed.load_balancer import LoadBalancer
 from zwiggy.backend.distributed.mapreduce import MapReduceEngine
 
@@ -14,6 +22,39 @@ router = APIRouter(prefix="/distributed", tags=["distributed"])
 # Global instances
 load_balancer = LoadBalancer(strategy="round_robin")
 consistency_mode = "strong"
+# node_id -> that node's consistency manager; all managers are peers
+consistency_managers: Dict[int, ConsistencyManager] = {}
+
+# Upper bound on writes per /consistency/test call
+MAX_CONSISTENCY_TEST_ITERATIONS = 1000
+
+ELECTION_EVENT_TYPES = ['ELECTION_START', 'ELECTION_COMPLETE', 'LEADER_ELECTED']
+
+# Read-your-writes token: sent with every /replication/test response,
+# echoed back by the client on its next request
+SESSION_TOKEN_HEADER = "X-Session-Token"
+
+def get_consistency_managers() -> Dict[int, ConsistencyManager]:
+    """Consistency managers of the registered nodes, created on first use"""
+    node_ids = {node.node_id for node in config.Config.REGISTERED_NODES}
+    if set(consistency_managers) != node_ids:
+        for node_id in set(consistency_managers) - node_ids:
+            del consistency_managers[node_id]
+        for node in config.Config.REGISTERED_NODES:
+            if node.node_id not in consistency_managers:
+                handoff = HintedHandoff(os.path.join(config.Config.HINTS_DIR, f"node_{node.node_id}"),
+                                        max_hints=config.Config.HINTS_PER_REPLICA)
+                consistency_managers[node.node_id] = ConsistencyManager(node, consistency_mode,
+                                                                        handoff=handoff)
+        for manager in consistency_managers.values():
+            manager.peers.clear()
+        connect_replicas(list(consistency_managers.values()))
+    return consistency_managers
+
+def get_db_manager():
+    """Primary/replica database manager; its databases are opened on first use"""
+    from zwiggy.backend.database.manager import db_manager
+    return db_manager
 
 @router.get("/nodes")
 async def get_nodes():
@@ -116,22 +157,24 @@ async def trigger_election():
     return await run_election()
 
 @router.get("/election/history")
-async def get_election_history():
+async def get_election_history(limit: int = 50, cursor: str = None):
     """Get election history from event logs"""
     try:
-        election_events = []
-        for node in config.Config.REGISTERED_NODES:
-            if hasattr(node, 'event_log'):
-                for event in node.event_log:
-                    if event.get('event_type') in ['ELECTION_START', 'ELECTION_COMPLETE', 'LEADER_ELECTED']:
-                        election_events.append(event)
-        
-        election_events.sort(key=lambda x: x.get('physical_time', 0), reverse=True)
+        page = query_events(
+            config.Config.REGISTERED_NODES,
+            event_types=ELECTION_EVENT_TYPES,
+            order_by="logical_time",
+            limit=limit,
+            cursor=cursor
+        )
         
         return {
             "success": True,
-            "history": election_events[:50]
+            "history": page["events"],
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -144,7 +187,7 @@ async def get_clock_state():
             if hasattr(node, 'clock'):
                 clock_state[f"node_{node.node_id}"] = {
                     "node_id": node.node_id,
-                    "logical_time": node.clock.get_time(),
+                    "logical_time": str(node.clock.get_time()),
                     "is_leader": node.is_leader
                 }
         
@@ -177,22 +220,23 @@ async def sync_clocks():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/clock/history")
-async def get_clock_history(limit: int = 50):
-    """Get Lamport clock history"""
+async def get_clock_history(limit: int = 50, cursor: str = None):
+    """Get logical clock history"""
     try:
-        clock_events = []
-        for node in config.Config.REGISTERED_NODES:
-            if hasattr(node, 'event_log'):
-                for event in node.event_log:
-                    if 'logical_time' in event:
-                        clock_events.append(event)
-        
-        clock_events.sort(key=lambda x: x.get('logical_time', 0), reverse=True)
+        page = query_events(
+            config.Config.REGISTERED_NODES,
+            order_by="logical_time",
+            limit=limit,
+            cursor=cursor
+        )
         
         return {
             "success": True,
-            "events": clock_events[:limit]
+            "events": page["events"],
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -200,9 +244,13 @@ async def get_clock_history(limit: int = 50):
 async def get_consistency_mode():
     """Get current consistency mode"""
     global consistency_mode
+    leader = next((n for n in config.Config.REGISTERED_NODES if n.is_leader), None)
+    manager = consistency_managers.get(leader.node_id) if leader else None
     return {
         "success": True,
-        "mode": consistency_mode
+        "mode": consistency_mode,
+        "latency": manager.get_latency_stats() if manager else {},
+        "hinted_handoff": manager.handoff.get_stats() if manager else {}
     }
 
 @router.post("/consistency")
@@ -215,6 +263,8 @@ async def set_consistency_mode(request: Dict[str, Any]):
             raise HTTPException(status_code=400, detail="Invalid mode. Use: strong, eventual, or quorum")
         
         consistency_mode = mode
+        for manager in get_consistency_managers().values():
+            manager.mode = mode
         
         for node in config.Config.REGISTERED_NODES:
             node.log_event("CONSISTENCY_MODE_CHANGE", f"Consistency mode changed to {mode}")
@@ -231,10 +281,15 @@ async def set_consistency_mode(request: Dict[str, Any]):
 
 @router.post("/consistency/test")
 async def test_consistency(test_data: Dict[str, Any]):
-    """Test consistency with concurrent writes"""
+    """Test consistency with replicated writes and a read back
+    
+    Optional "iterations" repeats the write to collect latency
+    percentiles, which are reported per operation and mode.
+    """
     try:
         key = test_data.get('key', 'test_key')
         value = test_data.get('value', 'test_value')
+        iterations = max(1, min(int(test_data.get('iterations', 1)), MAX_CONSISTENCY_TEST_ITERATIONS))
         
         leader = next((n for n in config.Config.REGISTERED_NODES if n.is_leader), None)
         if not leader:
@@ -242,13 +297,28 @@ async def test_consistency(test_data: Dict[str, Any]):
         
         replicas = [n.node_id for n in config.Config.REGISTERED_NODES if n.node_id != leader.node_id]
         
-        consistency_manager = ConsistencyManager(leader, consistency_mode)
-        result = consistency_manager.write(key, value, replicas)
+        consistency_manager = get_consistency_managers()[leader.node_id]
+        consistency_manager.mode = consistency_mode
+        
+        def run():
+            # Waits on replica acks, so keep it off the event loop
+            for _ in range(iterations):
+                result = consistency_manager.write(key, value, replicas)
+            return result, consistency_manager.read(key)
+        
+        try:
+            result, read_value = await asyncio.to_thread(run)
+        except QuorumNotReached as e:
+            raise HTTPException(status_code=503, detail=str(e))
         
         return {
             "success": True,
-            "result": result
+            "result": result,
+            "read_value": read_value,
+            "latency": consistency_manager.get_latency_stats()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -371,6 +441,59 @@ async def get_replication_lag():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/replication/test")
+async def test_read_your_writes(test_data: Dict[str, Any], response: Response,
+                                x_session_token: Optional[str] = Header(None)):
+    """Write an event through the primary and read it back from a replica
+    
+    The write replicates asynchronously; the read uses the client's
+    session, so it goes to a replica that has applied the write, or to
+    the primary if none has yet. The updated session token is returned
+    in the X-Session-Token header and as "session_token"; send the
+    header back so later reads also see this write.
+    """
+    from zwiggy.backend.database.manager import ConsistencyLevel, Session
+    try:
+        node = next((n for n in config.Config.REGISTERED_NODES if n.is_leader),
+                    config.Config.REGISTERED_NODES[0] if config.Config.REGISTERED_NODES else None)
+        if not node:
+            raise HTTPException(status_code=503, detail="No nodes available")
+        
+        session = Session.from_token(x_session_token)
+        row = {
+            "node_id": node.node_id,
+            "event_type": "READ_YOUR_WRITES_TEST",
+            "description": str(test_data.get('value', 'test_value')),
+            "logical_time": node.clock.tick(),
+            "physical_time": time.time()
+        }
+        
+        def run():
+            # Waits on the group commit, so keep it off the event loop
+            manager = get_db_manager()
+            if not manager.write("event_log", row, consistency="eventual", session=session):
+                return None, manager.read_stats
+            rows = manager.read("event_log",
+                                {"node_id": row["node_id"], "logical_time": row["logical_time"]},
+                                ConsistencyLevel.READ_YOUR_WRITES, session)
+            return rows, manager.read_stats
+        
+        rows, reads = await asyncio.to_thread(run)
+        if rows is None:
+            raise HTTPException(status_code=500, detail="Write to primary database failed")
+        
+        response.headers[SESSION_TOKEN_HEADER] = str(session)
+        return {
+            "success": True,
+            "session_token": str(session),
+            "read_own_write": bool(rows),
+            "reads": dict(reads)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/mapreduce")
 async def run_mapreduce(query: Dict[str, Any]):
     """Run MapReduce job"""
@@ -449,28 +572,67 @@ async def get_event_logs(
     event_type: str = None,
     start_time: str = None,
     end_time: str = None,
-    limit: int = 100
+    limit: int = 100,
+    cursor: str = None
 ):
-    """Get distributed event logs"""
+    """Get distributed event logs (newest first, cursor-paginated)"""
     try:
-        all_events = []
+        page = query_events(
+            config.Config.REGISTERED_NODES,
+            node_id=node_id,
+            event_types=[event_type] if event_type else None,
+            start_time=parse_time(start_time),
+            end_time=parse_time(end_time),
+            order_by="logical_time",
+            limit=limit,
+            cursor=cursor
+        )
         
-        for node in config.Config.REGISTERED_NODES:
-            if hasattr(node, 'event_log'):
-                for event in node.event_log:
-                    if node_id and event.get('node_id') != node_id:
-                        continue
-                    if event_type and event.get('event_type') != event_type:
-                        continue
-                    all_events.append(event)
+        return {
+            "success": True,
+            "events": page["events"],
+            "total": page["total"],
+            "next_cursor": page["next_cursor"]
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/events/archive")
+async def get_archived_events(
+    node_id: int = None,
+    start_time: str = None,
+    end_time: str = None,
+    after_seq: int = -1,
+    limit: int = 100
+):
+    """Get persisted event history (oldest first) from node segment files"""
+    try:
+        node = next((n for n in config.Config.REGISTERED_NODES
+                     if getattr(n, 'event_store', None) is not None
+                     and (node_id is None or n.node_id == node_id)), None)
+        if not node:
+            raise HTTPException(status_code=404, detail="No persisted event history for node")
         
-        all_events.sort(key=lambda x: x.get('physical_time', 0), reverse=True)
+        events = []
+        last_seq = after_seq
+        for seq, event in node.event_store.scan(parse_time(start_time), parse_time(end_time), after_seq):
+            if len(events) >= limit:
+                break
+            events.append(event.to_dict())
+            last_seq = seq
         
         return {
             "success": True,
-            "events": all_events[:limit],
-            "total": len(all_events)
+            "node_id": node.node_id,
+            "events": events,
+            "next_after_seq": last_seq if len(events) >= limit else None
         }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -509,17 +671,33 @@ async def simulate_concurrency(scenario: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/locks")
-async def get_lock_status():
-    """Get lock status"""
+async def get_lock_status(top: int = 10):
+    """Get lock table state and the most contended resources"""
     try:
-        locks = {
-            "active_locks": 0,
-            "waiting_threads": 0
-        }
+        report = lock_manager.get_contention_report(top_n=top)
+        table = report.pop("table")
         
         return {
             "success": True,
-            "locks": locks
+            "locks": {
+                "active_locks": table["held"],
+                "waiting_threads": table["waiting"],
+                **table
+            },
+            "contention": report
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/messages")
+async def get_message_queue_stats():
+    """Get per-node message queue and per-subscriber delivery metrics"""
+    try:
+        return {
+            "success": True,
+            "queues": message_queue.get_stats(),
+            "subscriptions": message_queue.get_subscription_stats(),
+            "transport": message_queue.get_transport_stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -557,9 +735,15 @@ async def recover_node(node_id: int):
         node.health_status = "healthy"
         node.log_event("NODE_RECOVERY", f"Node {node_id} recovered")
         
+        # Hand over the writes other nodes held while it was down
+        managers = [m for m in consistency_managers.values() if m.node.node_id != node_id]
+        delivered = await asyncio.to_thread(
+            lambda: sum(manager.deliver_hints(node_id) for manager in managers))
+        
         return {
             "success": True,
-            "message": f"Node {node_id} recovered"
+            "message": f"Node {node_id} recovered",
+            "hints_delivered": delivered
         }
     except HTTPException:
         raise
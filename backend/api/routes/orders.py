@@ -1,8 +1,9 @@
 # FILE: zwiggy/backend/api/routes/orders.py
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
+from zwiggy.backend.concurrency.mvcc import VersionConflict
 from zwiggy.backend.config import Config
 from zwiggy.backend.distributed import load_balancer
 from zwiggy.backend.services.order_service import OrderService
@@ -14,6 +15,10 @@ class CreateOrderRequest(BaseModel):
     restaurant_id: int
     items: List[dict]
 
+class UpdateStatusRequest(BaseModel):
+    status: str
+    expected_version: Optional[int] = None
+
 
 @router.post("/")
 async def create_order(request: CreateOrderRequest):
@@ -31,8 +36,7 @@ async def create_order(request: CreateOrderRequest):
     order = order_service.create_order(
         user_id=request.user_id,
         restaurant_id=request.restaurant_id,
-        items=request.items,
-        use_lock=True
+        items=request.items
     )
 
     if not order:
@@ -45,11 +49,37 @@ async def create_order(request: CreateOrderRequest):
             "total_amount": order.total_amount,
             "status": order.status,
             "processed_by_node": node.node_id,
-            "logical_timestamp": order.logical_timestamp
+            "logical_timestamp": str(order.logical_timestamp),
+            "version": order.version
         }
     }
 
 
+@router.patch("/{order_id}/status")
+async def update_order_status(order_id: str, request: UpdateStatusRequest):
+    """Change an order's status; 409 if it changed since expected_version"""
+    for node in Config.REGISTERED_NODES:
+        if not node.is_active:
+            continue
+        order_service = OrderService(node)
+        try:
+            order = order_service.update_order_status(order_id, request.status,
+                                                      request.expected_version)
+        except VersionConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if order:
+            return {
+                "success": True,
+                "data": {
+                    "order_id": order.order_id,
+                    "status": order.status,
+                    "version": order.version
+                }
+            }
+
+    raise HTTPException(status_code=404, detail="Order not found")
+
+
 @router.get("/")
 async def get_orders():
     """Get all orders from all active nodes"""
@@ -62,6 +92,9 @@ async def get_orders():
             orders = order_service.get_orders()
             all_orders.extend(orders)
 
+    # ✅ HLC timestamps + node id give one causal total order across nodes
+    all_orders.sort(key=lambda o: (o.logical_timestamp, o.processed_by_node))
+
     return {
         "success": True,
         "count": len(all_orders),
@@ -73,7 +106,8 @@ async def get_orders():
                 "total_amount": o.total_amount,
                 "status": o.status,
                 "processed_by_node": o.processed_by_node,
-                "logical_timestamp": o.logical_timestamp,
+                "logical_timestamp": str(o.logical_timestamp),
+                "version": o.version,
                 "created_at": o.created_at.isoformat()
             }
             for o in all_orders
@@ -5,15 +5,31 @@ This module provides tools for safe concurrent operations in distributed systems
 
 1. DistributedLockManager: Distributed lock implementation
    - Resource locking across nodes
-   - Deadlock prevention
+   - Striped lock table; idle entries are reclaimed
+   - Shared/exclusive modes with upgrade and fair FIFO queuing
+   - Ordered all-or-nothing multi-resource acquisition (acquire_many)
+   - Leases with fencing tokens, heartbeat-bound background renewal and expiry
+   - Wait-for graph deadlock detection; youngest transaction is aborted
+   - asyncio API (hold, acquire_async) sharing the same lock table
+   - Per-resource contention telemetry (wait/hold histograms, queue depth)
    - Lock timeout handling
    - Lock holder tracking
 
 2. TransactionManager: Distributed transaction handling
    - ACID properties enforcement
-   - Two-phase commit protocol
+   - Two-phase commit: parallel PREPARE with per-participant timeouts,
+     presumed-abort coordinator log, recovery of pending commits;
+     in-doubt participants ask the coordinator for the outcome
    - Transaction rollback
-   - Isolation levels
+   - Isolation levels (read committed, snapshot)
+   - Multi-version store: lock-free snapshot reads, first-committer-wins
+     commits, background GC of versions no snapshot can see
+   - Optimistic updates against expected versions, with retry helpers
+   - Optional write-ahead undo/redo log (TransactionLog) with group
+     fsync, checkpoints and crash recovery (replay_log)
+
+3. OptimisticTransaction: lock-free read-validate-write on records with
+   a version column (menu items, orders)
 
 These components ensure data consistency when multiple nodes
 access shared resources concurrently.
@@ -27,15 +43,41 @@ Usage Example:
         process_order()
         # Release lock
         lock_manager.release("resource_123", node_id=1)
+
+    # Or hold a lease, renewed in the background while work progresses
+    lease = lock_manager.acquire_lease("resource_123", node_id=1, ttl=2.0)
+    if lease:
+        with lease:
+            for batch in batches:
+                process(batch)
+                lease.heartbeat()
 """
 
-from .lock_manager import lock_manager, DistributedLockManager
-from .transaction_manager import transaction_manager, TransactionManager, Transaction
+from .lock_manager import lock_manager, DistributedLockManager, LockType, Lease, DeadlockDetector
+from .lock_telemetry import LockTelemetry
+from .mvcc import MVCCStore, WriteConflict, VersionConflict
+from .optimistic import OptimisticTransaction, retry_on_conflict
+from .two_phase_commit import TwoPhaseCommitCoordinator, CoordinatorLog
+from .wal import TransactionLog
+from .transaction_manager import transaction_manager, TransactionManager, Transaction, IsolationLevel
 
 __all__ = [
     'lock_manager',
     'DistributedLockManager',
+    'LockType',
+    'Lease',
+    'DeadlockDetector',
+    'LockTelemetry',
+    'MVCCStore',
+    'WriteConflict',
+    'VersionConflict',
+    'OptimisticTransaction',
+    'retry_on_conflict',
+    'TwoPhaseCommitCoordinator',
+    'CoordinatorLog',
+    'TransactionLog',
     'transaction_manager',
     'TransactionManager',
-    'Transaction'
+    'Transaction',
+    'IsolationLevel'
 ]
\ No newline at end of file
@@ -1,49 +1,1052 @@
 # FILE: backend/concurrency/lock_manager.py
 # ============================================================================
 
+import asyncio
+import itertools
+import logging
 import threading
 import time
-from typing import Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import (AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Set,
+                    Tuple, Union)
+
+from .lock_telemetry import LockTelemetry
+
+logger = logging.getLogger(__name__)
+
+# Number of independently locked shards in the lock table (power of two)
+DEFAULT_STRIPES = 64
+
+# Lease length for acquire_lease(); the keep-alive thread renews every third of it
+DEFAULT_LEASE_TTL = 2.0
+
+# Keep-alive stops renewing a lease whose holder has not called
+# heartbeat() (or renew()) for this long, so a stalled holder loses it
+DEFAULT_LEASE_MAX_IDLE = 30.0
+
+# Blocked transactions re-check for deadlocks after this long, then back off
+DEADLOCK_CHECK_INTERVAL = 0.05
+
+
+class LockType(Enum):
+    """Lock modes: any number of SHARED holders or one EXCLUSIVE holder"""
+    SHARED = "shared"
+    EXCLUSIVE = "exclusive"
+
+
+class _Hold:
+    """One granted hold; keyed by its fencing token in the entry"""
+
+    __slots__ = ("owner", "since", "expires")
+
+    def __init__(self, owner: Hashable, ttl: Optional[float], now: float):
+        self.owner = owner
+        self.since = now
+        # time.monotonic() deadline, or None for holds without a lease
+        self.expires = now + ttl if ttl is not None else None
+
+
+class _AsyncEvent:
+    """threading.Event look-alike that wakes a coroutine on its event loop
+
+    set() may be called from any thread; clear() and wait() only from
+    the loop the event was created for.
+    """
+
+    __slots__ = ("loop", "event")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def set(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    def clear(self):
+        self.event.clear()
+
+    async def wait(self, timeout: Optional[float]):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class _Waiter:
+    """A queued request, woken by the releasing thread once granted"""
+
+    __slots__ = ("owner", "resource_id", "lock_type", "ttl", "upgrade", "event",
+                 "granted", "aborted", "token", "queued_at", "depth")
+
+    def __init__(self, owner: Hashable, resource_id: str, lock_type: LockType,
+                 ttl: Optional[float], upgrade: Optional[int] = None, event=None):
+        self.owner = owner
+        self.resource_id = resource_id
+        self.lock_type = lock_type
+        self.ttl = ttl
+        # Token of the SHARED hold being upgraded
+        self.upgrade = upgrade
+        self.event = event if event is not None else threading.Event()
+        self.granted = False
+        # Set when the owner was chosen as a deadlock victim
+        self.aborted = False
+        self.token: Optional[int] = None
+        # For telemetry: when it queued and the queue length it joined
+        self.queued_at = time.monotonic()
+        self.depth = 1
+
+
+class _LockEntry:
+    """Lock state for one resource, kept only while someone holds or waits for it"""
+
+    __slots__ = ("mode", "holders", "waiters")
+
+    def __init__(self):
+        self.mode: Optional[LockType] = None
+        self.holders: Dict[int, _Hold] = {}
+        self.waiters: deque = deque()
+
+    @property
+    def idle(self) -> bool:
+        return not self.holders and not self.waiters
+
+    def can_grant(self, waiter: _Waiter) -> bool:
+        if waiter.upgrade is not None:
+            return len(self.holders) == 1 and waiter.upgrade in self.holders
+        if waiter.lock_type is LockType.SHARED:
+            return self.mode is not LockType.EXCLUSIVE
+        return not self.holders
+
+    def grant(self, waiter: _Waiter, token: int):
+        if waiter.upgrade is not None:
+            del self.holders[waiter.upgrade]
+        self.holders[token] = _Hold(waiter.owner, waiter.ttl, time.monotonic())
+        self.mode = waiter.lock_type
+
+    def grant_waiters(self, tokens):
+        """Wake queued requests in FIFO order while they are compatible"""
+        waiters = self.waiters
+        while waiters and self.can_grant(waiters[0]):
+            waiter = waiters.popleft()
+            waiter.token = next(tokens)
+            self.grant(waiter, waiter.token)
+            waiter.granted = True
+            waiter.event.set()
+
+    def blockers(self, waiter: _Waiter) -> Set[Hashable]:
+        """Owners waiter is waiting for: the holders and everyone queued ahead"""
+        owners = {hold.owner for hold in self.holders.values()}
+        for queued in self.waiters:
+            if queued is waiter:
+                owners.discard(waiter.owner)
+                return owners
+            owners.add(queued.owner)
+        # No longer queued
+        return set()
+
+    def remove_hold(self, token: int):
+        del self.holders[token]
+        if not self.holders:
+            self.mode = None
+
+    def expire(self, now: float) -> int:
+        """Drop holds whose lease ran out; returns how many"""
+        expired = [token for token, hold in self.holders.items()
+                   if hold.expires is not None and hold.expires <= now]
+        for token in expired:
+            self.remove_hold(token)
+        return len(expired)
+
+    def next_expiry(self) -> Optional[float]:
+        deadlines = [hold.expires for hold in self.holders.values() if hold.expires is not None]
+        return min(deadlines) if deadlines else None
+
+
+class _Stripe:
+    """One shard of the lock table with its own mutex"""
+
+    __slots__ = ("mutex", "entries")
 
-class DistributedLockManager:
-    """Manages distributed locks for concurrency control"""
-    
     def __init__(self):
-        self.locks: Dict[str, threading.Lock] = {}
-        self.lock_holders: Dict[str, int] = {}
-        self.master_lock = threading.Lock()
-    
-    def acquire(self, resource_id: str, node_id: int, timeout: float = 5.0) -> bool:
-        """Acquire lock on resource"""
-        with self.master_lock:
-            if resource_id not in self.locks:
-                self.locks[resource_id] = threading.Lock()
-        
-        lock = self.locks[resource_id]
-        acquired = lock.acquire(timeout=timeout)
-        
-        if acquired:
-            with self.master_lock:
-                self.lock_holders[resource_id] = node_id
-        
-        return acquired
-    
-    def release(self, resource_id: str, node_id: int):
-        """Release lock on resource"""
-        if resource_id in self.locks:
-            with self.master_lock:
-                if self.lock_holders.get(resource_id) == node_id:
-                    self.locks[resource_id].release()
-                    del self.lock_holders[resource_id]
-    
+        self.mutex = threading.Lock()
+        self.entries: Dict[str, _LockEntry] = {}
+
+
+class Lease:
+    """Time-bounded hold on a resource with a fencing token
+
+    The token is unique and increases with every grant, so a write
+    carrying it can be rejected by storage once a newer holder exists.
+
+    With keep_alive the manager renews the lease in the background while
+    the acquiring thread is alive and the holder has shown progress
+    within max_idle seconds, by acquiring, heartbeat() or renew(). A
+    crashed holder stops renewing at once, a stalled one (or a thread
+    pool worker that moved on) after max_idle, and the lease then
+    expires after ttl. A ttl of None holds until release.
+    """
+
+    def __init__(self, manager: "DistributedLockManager", resource_id: str, holder: Hashable,
+                 lock_type: LockType, token: int, ttl: Optional[float],
+                 max_idle: float = DEFAULT_LEASE_MAX_IDLE):
+        self.manager = manager
+        self.resource_id = resource_id
+        self.holder = holder
+        self.lock_type = lock_type
+        self.token = token
+        self.ttl = ttl
+        self.max_idle = max_idle
+        self.thread = threading.current_thread()
+        self.last_heartbeat = time.monotonic()
+        self.released = False
+
+    @property
+    def valid(self) -> bool:
+        """Whether this lease is still held and unexpired"""
+        return not self.released and self.manager.check_lease(self.resource_id, self.token)
+
+    def heartbeat(self):
+        """Tell keep-alive the holder is still making progress"""
+        self.last_heartbeat = time.monotonic()
+
+    @property
+    def idle(self) -> bool:
+        """Whether the holder has not shown progress for max_idle seconds"""
+        return time.monotonic() - self.last_heartbeat > self.max_idle
+
+    def renew(self) -> bool:
+        self.heartbeat()
+        return self._extend()
+
+    def _extend(self) -> bool:
+        if self.ttl is None:
+            return self.valid
+        return not self.released and self.manager.renew(self.resource_id, self.token, self.ttl)
+
+    def upgrade(self, timeout: Optional[float] = 5.0) -> bool:
+        """Upgrade to EXCLUSIVE; the lease gets a new, larger token"""
+        token = self.manager._upgrade(self.resource_id, self.holder, self.token, timeout)
+        if token is None:
+            return False
+        self.token = token
+        self.lock_type = LockType.EXCLUSIVE
+        return True
+
+    def release(self) -> bool:
+        if self.released:
+            return False
+        self.released = True
+        return self.manager.release(self.resource_id, self.holder, token=self.token)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def __repr__(self):
+        return (f"Lease({self.resource_id!r}, holder={self.holder}, "
+                f"{self.lock_type.value}, token={self.token})")
+
+
+class DeadlockDetector:
+    """Finds cycles in a lock manager's wait-for graph and breaks them
+
+    Edges come from acquire() calls blocked in the manager plus those
+    reported with add_wait_for(). A cycle is returned as a list of
+    (owner, resource_id) pairs, where each owner waits for resource_id
+    held by the next owner in the list (the last by the first).
+    """
+
+    def __init__(self, manager: "DistributedLockManager"):
+        self.manager = manager
+
+    def find_cycle(self, start: Optional[Hashable] = None) -> Optional[List[Tuple[Hashable, str]]]:
+        """A cycle through start, or through any waiting owner if None"""
+        starts = [start] if start is not None else self.manager.waiting_owners()
+        for owner in starts:
+            cycle = self._search(owner)
+            if cycle:
+                return cycle
+        return None
+
+    def _search(self, start: Hashable) -> Optional[List[Tuple[Hashable, str]]]:
+        """Depth-first search for a path of wait-for edges back to start"""
+        visited = {start}
+        path: List[Tuple[Hashable, str]] = []
+        stack = [(start, iter(self.manager.wait_for(start).items()))]
+        while stack:
+            owner, edges = stack[-1]
+            for holder, resource_id in edges:
+                if holder == start:
+                    return path + [(owner, resource_id)]
+                if holder not in visited:
+                    visited.add(holder)
+                    path.append((owner, resource_id))
+                    stack.append((holder, iter(self.manager.wait_for(holder).items())))
+                    break
+            else:
+                stack.pop()
+                if path:
+                    path.pop()
+        return None
+
+    def detect_cycle(self) -> bool:
+        """Whether the wait-for graph currently has a cycle"""
+        return self.find_cycle() is not None
+
+    def choose_victim(self, cycle: List[Tuple[Hashable, str]]) -> Hashable:
+        """The youngest owner in cycle
+
+        Age is the transaction start time when every owner is a known
+        transaction, otherwise the fencing token of the hold each owner
+        has in the cycle: the newest grant marks the youngest owner.
+        """
+        owners = [owner for owner, _ in cycle]
+        transactions = self.manager.transaction_manager
+        if transactions is not None:
+            started = [transactions.get_start_time(owner) for owner in owners]
+            if all(t is not None for t in started):
+                return owners[started.index(max(started))]
+
+        tokens = {}
+        for i, (_, resource_id) in enumerate(cycle):
+            holder = owners[(i + 1) % len(owners)]
+            tokens[holder] = self.manager.get_hold_token(resource_id, holder) or 0
+        return max(owners, key=lambda owner: tokens.get(owner, 0))
+
+    def resolve_deadlock(self, cycle: Optional[List[Tuple[Hashable, str]]] = None) -> Optional[Hashable]:
+        """Abort the youngest owner of a cycle; returns it, or None without a cycle"""
+        if cycle is None:
+            cycle = self.find_cycle()
+        if not cycle:
+            return None
+        victim = self.choose_victim(cycle)
+        logger.info("Deadlock between %s: aborting %s", [owner for owner, _ in cycle], victim)
+        self.manager.abort_owner(victim)
+        return victim
+
+
+class DistributedLockManager:
+    """Manages distributed locks for concurrency control
+
+    Resources hash to one of `stripes` shards, so threads locking
+    different resources rarely touch the same mutex. Entries are removed
+    as soon as the last holder or waiter leaves, so the table only holds
+    resources that are actually in use.
+
+    Locks are reader-writer locks with a FIFO queue: a request is granted
+    immediately only when nobody is queued ahead of it, so a stream of
+    SHARED readers cannot starve a waiting EXCLUSIVE writer. Consecutive
+    SHARED requests at the head of the queue are granted together.
+    upgrade() turns a caller's SHARED hold into EXCLUSIVE and jumps the
+    queue; only one upgrade may wait per resource, since two would
+    deadlock each other.
+
+    Every grant gets a fencing token from one increasing counter. Holds
+    taken with a ttl (see acquire_lease) expire unless renewed: waiters
+    sleep no longer than the earliest expiry and evict expired holders
+    themselves, so a dead holder costs at most its ttl.
+
+    Owners are node ids or transaction ids. Blocked acquires form a
+    wait-for graph; when a transaction blocks, the graph is searched for
+    a cycle through it and the youngest transaction in the cycle is
+    aborted through the attached TransactionManager, so deadlocks fail in
+    milliseconds rather than at the lock timeout.
+
+    The *_async methods and hold() are the asyncio counterparts of
+    acquire/upgrade: they share the same table and queues, but a blocked
+    coroutine awaits its grant instead of blocking the event loop thread.
+    """
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES, node_id: Optional[Hashable] = None,
+                 telemetry: bool = True):
+        if stripes <= 0 or stripes & (stripes - 1):
+            raise ValueError(f"stripes must be a power of two, got {stripes}")
+        self.stripes = [_Stripe() for _ in range(stripes)]
+        self._mask = stripes - 1
+        # Default owner for acquire_lock/release_lock/upgrade_lock
+        self.node_id = node_id
+        # Per-resource wait/hold statistics, see get_contention_report()
+        self.telemetry = LockTelemetry() if telemetry else None
+        self._tokens = itertools.count(1)
+        self.expired = 0
+        self._keepalive: Dict[int, Lease] = {}
+        self._keepalive_lock = threading.Lock()
+        self._keepalive_thread: Optional[threading.Thread] = None
+        # Wait-for graph: blocked waiters by owner, plus edges reported by
+        # callers for waits outside this manager (owner -> {holder: resource})
+        self._graph_lock = threading.Lock()
+        self._blocked: Dict[Hashable, Set[_Waiter]] = {}
+        self._wait_edges: Dict[Hashable, Dict[Hashable, str]] = {}
+        self.transaction_manager = None
+        self.deadlock_detector = DeadlockDetector(self)
+        self.deadlocks = 0
+
+    def _stripe(self, resource_id: str) -> _Stripe:
+        return self.stripes[hash(resource_id) & self._mask]
+
+    # ------------------------------------------------------------------
+    # Acquire / release
+
+    def acquire(self, resource_id: str, node_id: Hashable, timeout: Optional[float] = 5.0,
+                lock_type: LockType = LockType.EXCLUSIVE, ttl: Optional[float] = None) -> bool:
+        """Acquire lock on resource
+
+        Args:
+            resource_id: Resource to lock
+            node_id: Lock owner (node id or transaction id)
+            timeout: Seconds to wait (None waits forever, 0 only tries)
+            lock_type: SHARED or EXCLUSIVE
+            ttl: Hold expires after this many seconds unless renewed
+        """
+        return self._acquire(resource_id, node_id, timeout, lock_type, ttl) is not None
+
+    def acquire_lease(self, resource_id: str, node_id: Hashable, timeout: Optional[float] = 5.0,
+                      lock_type: LockType = LockType.EXCLUSIVE, ttl: float = DEFAULT_LEASE_TTL,
+                      keep_alive: bool = True,
+                      max_idle: float = DEFAULT_LEASE_MAX_IDLE) -> Optional[Lease]:
+        """Acquire a lease with a fencing token, or None on timeout
+
+        With keep_alive, call lease.heartbeat() at least every max_idle
+        seconds to keep the lease past that.
+        """
+        token = self._acquire(resource_id, node_id, timeout, lock_type, ttl)
+        if token is None:
+            return None
+        lease = Lease(self, resource_id, node_id, lock_type, token, ttl, max_idle)
+        if keep_alive:
+            self._keep_alive(lease)
+        return lease
+
+    def acquire_many(self, resource_ids: Iterable[str], node_id: Hashable,
+                     timeout: Optional[float] = 5.0, lock_type: LockType = LockType.EXCLUSIVE,
+                     ttl: Optional[float] = None, keep_alive: bool = True) -> Optional[List[Lease]]:
+        """Lock several resources, all or nothing
+
+        Resources are locked in sorted resource_id order, the same order
+        on every node and for every caller, so two multi-resource requests
+        can never each hold a lock the other is waiting for. timeout bounds
+        the whole acquisition; on failure the locks already taken are
+        released and None is returned.
+
+        Returns the leases in acquisition order.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        leases: List[Lease] = []
+        for resource_id in sorted(set(resource_ids)):
+            remaining = max(deadline - time.monotonic(), 0.0) if deadline is not None else None
+            token = self._acquire(resource_id, node_id, remaining, lock_type, ttl)
+            if token is None:
+                self.release_many(leases)
+                return None
+            leases.append(Lease(self, resource_id, node_id, lock_type, token, ttl))
+        if ttl is not None and keep_alive:
+            for lease in leases:
+                self._keep_alive(lease)
+        return leases
+
+    def release_many(self, leases: List[Lease]) -> int:
+        """Release leases from acquire_many in reverse order; returns how many were held"""
+        return sum(lease.release() for lease in reversed(leases))
+
+    def _acquire(self, resource_id: str, node_id: Hashable, timeout: Optional[float],
+                 lock_type: LockType, ttl: Optional[float]) -> Optional[int]:
+        """Acquire and return the fencing token, or None on timeout"""
+        stripe = self._stripe(resource_id)
+        result = self._acquire_or_queue(stripe, resource_id, node_id, timeout, lock_type, ttl)
+        if type(result) is not _Waiter:
+            if result is None and self.telemetry is not None:
+                self.telemetry.record_timeout(resource_id)
+            return result
+        token = self._wait(stripe, result, timeout)
+        if self.telemetry is not None:
+            self.telemetry.record_wait(resource_id, time.monotonic() - result.queued_at,
+                                       result.depth, token is not None)
+        return token
+
+    def _acquire_or_queue(self, stripe: _Stripe, resource_id: str, node_id: Hashable,
+                          timeout: Optional[float], lock_type: LockType, ttl: Optional[float],
+                          make_event: Callable = threading.Event) -> Union[int, _Waiter, None]:
+        """Grant immediately (token), queue a waiter, or fail a try-lock (None)"""
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            if entry is None:
+                # Uncontended fast path: no queue, nothing to wait on
+                token = next(self._tokens)
+                entry = stripe.entries[resource_id] = _LockEntry()
+                entry.holders[token] = _Hold(node_id, ttl, time.monotonic())
+                entry.mode = lock_type
+                return token
+            now = time.monotonic()
+            # Whoever notices an expired lease first wakes the queue
+            if self._expire(entry, now):
+                entry.grant_waiters(self._tokens)
+            if not entry.waiters and (
+                    not entry.holders if lock_type is LockType.EXCLUSIVE
+                    else entry.mode is not LockType.EXCLUSIVE):
+                token = next(self._tokens)
+                entry.holders[token] = _Hold(node_id, ttl, now)
+                entry.mode = lock_type
+                return token
+            if timeout is not None and timeout <= 0:
+                return None
+            waiter = _Waiter(node_id, resource_id, lock_type, ttl, event=make_event())
+            entry.waiters.append(waiter)
+            waiter.depth = len(entry.waiters)
+            return waiter
+
+    def upgrade(self, resource_id: str, node_id: Hashable, timeout: Optional[float] = 5.0) -> bool:
+        """Upgrade node_id's SHARED hold on resource to EXCLUSIVE
+
+        Returns False if node_id holds no lock, another upgrade is already
+        waiting, or the timeout expires; the SHARED hold is kept then.
+        """
+        return self._upgrade(resource_id, node_id, None, timeout) is not None
+
+    def _upgrade(self, resource_id: str, node_id: Hashable, token: Optional[int],
+                 timeout: Optional[float]) -> Optional[int]:
+        stripe = self._stripe(resource_id)
+        result = self._upgrade_or_queue(stripe, resource_id, node_id, token, timeout)
+        if type(result) is not _Waiter:
+            return result
+        return self._wait(stripe, result, timeout)
+
+    def _upgrade_or_queue(self, stripe: _Stripe, resource_id: str, node_id: Hashable,
+                          token: Optional[int], timeout: Optional[float],
+                          make_event: Callable = threading.Event) -> Union[int, _Waiter, None]:
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            if entry is None:
+                return None
+            if self._expire(entry, time.monotonic()):
+                entry.grant_waiters(self._tokens)
+            if token is None:
+                token = self._find_hold(entry, node_id)
+            hold = entry.holders.get(token)
+            if hold is None or hold.owner != node_id:
+                return None
+            if entry.mode is LockType.EXCLUSIVE:
+                return token
+            if any(w.upgrade is not None for w in entry.waiters):
+                return None
+            ttl = hold.expires - time.monotonic() if hold.expires is not None else None
+            waiter = _Waiter(node_id, resource_id, LockType.EXCLUSIVE, ttl, upgrade=token,
+                             event=make_event())
+            if entry.can_grant(waiter):
+                waiter.token = next(self._tokens)
+                entry.grant(waiter, waiter.token)
+                return waiter.token
+            if timeout is not None and timeout <= 0:
+                return None
+            entry.waiters.appendleft(waiter)
+            return waiter
+
+    def _wait(self, stripe: _Stripe, waiter: _Waiter, timeout: Optional[float]) -> Optional[int]:
+        check_every = self._block(waiter)
+        try:
+            now = time.monotonic()
+            deadline = now + timeout if timeout is not None else None
+            next_check = now + check_every if check_every is not None else None
+            while True:
+                done, token, wait_for = self._poll(stripe, waiter, deadline, next_check)
+                if done:
+                    return token
+                waiter.event.wait(wait_for)
+
+                if next_check is not None and time.monotonic() >= next_check:
+                    self._check_deadlock(waiter)
+                    check_every *= 2
+                    next_check = time.monotonic() + check_every
+        finally:
+            self._unblock(waiter)
+
+    def _block(self, waiter: _Waiter) -> Optional[float]:
+        """Add waiter to the wait-for graph; returns its deadlock check interval
+
+        Transactions look for a cycle through their new wait-for edges
+        now, and again with backoff in case the holders they wait on change.
+        """
+        with self._graph_lock:
+            self._blocked.setdefault(waiter.owner, set()).add(waiter)
+        if not self._is_transaction(waiter.owner):
+            return None
+        self._check_deadlock(waiter)
+        return DEADLOCK_CHECK_INTERVAL
+
+    def _unblock(self, waiter: _Waiter):
+        with self._graph_lock:
+            blocked = self._blocked[waiter.owner]
+            blocked.discard(waiter)
+            if not blocked:
+                del self._blocked[waiter.owner]
+
+    def _poll(self, stripe: _Stripe, waiter: _Waiter, deadline: Optional[float],
+              next_check: Optional[float]) -> Tuple[bool, Optional[int], Optional[float]]:
+        """One round of a waiter's wait loop
+
+        Returns (done, token, wait_for): done with the token, done without
+        a grant (None), or not done and the seconds to sleep before the
+        next round.
+        """
+        with stripe.mutex:
+            if waiter.granted:
+                return True, waiter.token, None
+            waiter.event.clear()
+            entry = stripe.entries[waiter.resource_id]
+            now = time.monotonic()
+            if self._expire(entry, now):
+                entry.grant_waiters(self._tokens)
+                if waiter.granted:
+                    return True, waiter.token, None
+
+            # Give up on timeout, as a deadlock victim, or when the hold
+            # being upgraded expired
+            lost = waiter.aborted or (
+                waiter.upgrade is not None and waiter.upgrade not in entry.holders)
+            if lost or (deadline is not None and now >= deadline):
+                self._dequeue(stripe, entry, waiter)
+                return True, None, None
+
+            # Sleep until granted, timed out, the next lease expires or
+            # the next deadlock check is due
+            wakeups = [t for t in (deadline, entry.next_expiry(), next_check) if t is not None]
+            return False, None, max(min(wakeups) - now, 0.001) if wakeups else None
+
+    def _dequeue(self, stripe: _Stripe, entry: _LockEntry, waiter: _Waiter):
+        """Remove a waiter that gives up; called with stripe.mutex held"""
+        entry.waiters.remove(waiter)
+        # A writer leaving the head may let the readers behind it in
+        entry.grant_waiters(self._tokens)
+        if entry.idle:
+            del stripe.entries[waiter.resource_id]
+
+    def _expire(self, entry: _LockEntry, now: float) -> int:
+        expired = entry.expire(now)
+        if expired:
+            self.expired += expired
+        return expired
+
+    @staticmethod
+    def _find_hold(entry: _LockEntry, node_id: Hashable) -> Optional[int]:
+        """Token of node_id's most recent hold"""
+        for token in reversed(entry.holders):
+            if entry.holders[token].owner == node_id:
+                return token
+        return None
+
+    def release(self, resource_id: str, node_id: Hashable, token: Optional[int] = None) -> bool:
+        """Release a hold of node_id on resource
+
+        Without a token the owner's most recent hold is released. With a
+        token only that hold is, so a lease that already expired cannot
+        release a newer holder's lock.
+        """
+        stripe = self._stripe(resource_id)
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            if entry is None:
+                return False
+            if token is None:
+                token = self._find_hold(entry, node_id)
+            hold = entry.holders.get(token)
+            if hold is None or hold.owner != node_id:
+                return False
+            entry.remove_hold(token)
+            entry.grant_waiters(self._tokens)
+            if entry.idle:
+                del stripe.entries[resource_id]
+        if self.telemetry is not None:
+            self.telemetry.record_hold(resource_id, time.monotonic() - hold.since)
+        return True
+
+    # ------------------------------------------------------------------
+    # asyncio API
+
+    async def acquire_async(self, resource_id: str, node_id: Hashable,
+                            timeout: Optional[float] = 5.0,
+                            lock_type: LockType = LockType.EXCLUSIVE,
+                            ttl: Optional[float] = None) -> bool:
+        """Coroutine version of acquire(); awaits instead of blocking the loop"""
+        return await self._acquire_async(resource_id, node_id, timeout, lock_type, ttl) is not None
+
+    async def _acquire_async(self, resource_id: str, node_id: Hashable, timeout: Optional[float],
+                             lock_type: LockType, ttl: Optional[float]) -> Optional[int]:
+        stripe = self._stripe(resource_id)
+        loop = asyncio.get_running_loop()
+        result = self._acquire_or_queue(stripe, resource_id, node_id, timeout, lock_type, ttl,
+                                        make_event=lambda: _AsyncEvent(loop))
+        if type(result) is not _Waiter:
+            if result is None and self.telemetry is not None:
+                self.telemetry.record_timeout(resource_id)
+            return result
+        token = await self._wait_async(stripe, result, timeout)
+        if self.telemetry is not None:
+            self.telemetry.record_wait(resource_id, time.monotonic() - result.queued_at,
+                                       result.depth, token is not None)
+        return token
+
+    async def upgrade_async(self, resource_id: str, node_id: Hashable,
+                            timeout: Optional[float] = 5.0) -> bool:
+        """Coroutine version of upgrade()"""
+        return await self._upgrade_async(resource_id, node_id, None, timeout) is not None
+
+    async def _upgrade_async(self, resource_id: str, node_id: Hashable, token: Optional[int],
+                             timeout: Optional[float]) -> Optional[int]:
+        stripe = self._stripe(resource_id)
+        loop = asyncio.get_running_loop()
+        result = self._upgrade_or_queue(stripe, resource_id, node_id, token, timeout,
+                                        make_event=lambda: _AsyncEvent(loop))
+        if type(result) is not _Waiter:
+            return result
+        return await self._wait_async(stripe, result, timeout)
+
+    async def _wait_async(self, stripe: _Stripe, waiter: _Waiter,
+                          timeout: Optional[float]) -> Optional[int]:
+        check_every = self._block(waiter)
+        try:
+            now = time.monotonic()
+            deadline = now + timeout if timeout is not None else None
+            next_check = now + check_every if check_every is not None else None
+            while True:
+                done, token, wait_for = self._poll(stripe, waiter, deadline, next_check)
+                if done:
+                    return token
+                await waiter.event.wait(wait_for)
+
+                if next_check is not None and time.monotonic() >= next_check:
+                    self._check_deadlock(waiter)
+                    check_every *= 2
+                    next_check = time.monotonic() + check_every
+        except asyncio.CancelledError:
+            self._cancel(stripe, waiter)
+            raise
+        finally:
+            self._unblock(waiter)
+
+    def _cancel(self, stripe: _Stripe, waiter: _Waiter):
+        """Withdraw the request of a cancelled coroutine
+
+        A lock granted after the cancellation was delivered is released
+        again, since nobody will ever see its token. A granted upgrade is
+        kept: the owner held the resource before and still releases it.
+        """
+        with stripe.mutex:
+            entry = stripe.entries.get(waiter.resource_id)
+            if entry is None:
+                return
+            if not waiter.granted:
+                self._dequeue(stripe, entry, waiter)
+            elif waiter.upgrade is None and waiter.token in entry.holders:
+                entry.remove_hold(waiter.token)
+                entry.grant_waiters(self._tokens)
+                if entry.idle:
+                    del stripe.entries[waiter.resource_id]
+
+    @asynccontextmanager
+    async def hold(self, resource_id: str, node_id: Optional[Hashable] = None,
+                   lock_type: LockType = LockType.EXCLUSIVE, timeout: Optional[float] = 5.0,
+                   ttl: Optional[float] = None) -> AsyncIterator[Lease]:
+        """Hold a lock for the duration of an async with block
+
+        Args:
+            resource_id: Resource to lock
+            node_id: Lock owner, defaults to the manager's node_id
+            lock_type: SHARED or EXCLUSIVE
+            timeout: Seconds to wait before raising TimeoutError
+            ttl: Lease length; None holds until the block exits
+
+        Yields the Lease, whose token can fence writes made in the block.
+        """
+        owner = self.node_id if node_id is None else node_id
+        token = await self._acquire_async(resource_id, owner, timeout, lock_type, ttl)
+        if token is None:
+            raise TimeoutError(f"Timed out waiting for {lock_type.value} lock on {resource_id}")
+        lease = Lease(self, resource_id, owner, lock_type, token, ttl)
+        if ttl is not None:
+            self._keep_alive(lease)
+        try:
+            yield lease
+        finally:
+            lease.release()
+
+    async def acquire_many_async(self, resource_ids: Iterable[str], node_id: Hashable,
+                                 timeout: Optional[float] = 5.0,
+                                 lock_type: LockType = LockType.EXCLUSIVE,
+                                 ttl: Optional[float] = None) -> Optional[List[Lease]]:
+        """Coroutine version of acquire_many()"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        leases: List[Lease] = []
+        try:
+            for resource_id in sorted(set(resource_ids)):
+                remaining = max(deadline - time.monotonic(), 0.0) if deadline is not None else None
+                token = await self._acquire_async(resource_id, node_id, remaining, lock_type, ttl)
+                if token is None:
+                    self.release_many(leases)
+                    return None
+                leases.append(Lease(self, resource_id, node_id, lock_type, token, ttl))
+        except asyncio.CancelledError:
+            self.release_many(leases)
+            raise
+        if ttl is not None:
+            for lease in leases:
+                self._keep_alive(lease)
+        return leases
+
+    @asynccontextmanager
+    async def hold_many(self, resource_ids: Iterable[str], node_id: Optional[Hashable] = None,
+                        lock_type: LockType = LockType.EXCLUSIVE, timeout: Optional[float] = 5.0,
+                        ttl: Optional[float] = None) -> AsyncIterator[List[Lease]]:
+        """hold() for several resources, taken in acquire_many() order"""
+        owner = self.node_id if node_id is None else node_id
+        resource_ids = list(resource_ids)
+        leases = await self.acquire_many_async(resource_ids, owner, timeout, lock_type, ttl)
+        if leases is None:
+            raise TimeoutError(f"Timed out waiting for {lock_type.value} locks on {resource_ids}")
+        try:
+            yield leases
+        finally:
+            self.release_many(leases)
+
+    async def acquire_lock(self, resource_id: str, lock_type: LockType = LockType.EXCLUSIVE,
+                           timeout: Optional[float] = None,
+                           transaction_id: Optional[Hashable] = None) -> Lease:
+        """Wait for a lock and return it as a Lease
+
+        Owned by transaction_id, or the manager's node_id. timeout is the
+        lease length: the lock is released automatically after that many
+        seconds. Waiting is unbounded; wrap the call in asyncio.wait_for
+        to limit it.
+        """
+        owner = self.node_id if transaction_id is None else transaction_id
+        token = await self._acquire_async(resource_id, owner, None, lock_type, timeout)
+        return Lease(self, resource_id, owner, lock_type, token, timeout)
+
+    async def release_lock(self, resource_id: str, transaction_id: Optional[Hashable] = None) -> bool:
+        """Release the most recent hold of transaction_id (or node_id) on resource"""
+        return self.release(resource_id, self.node_id if transaction_id is None else transaction_id)
+
+    async def upgrade_lock(self, resource_id: str, transaction_id: Optional[Hashable] = None,
+                           timeout: Optional[float] = 5.0) -> Optional[Lease]:
+        """Upgrade a SHARED hold to EXCLUSIVE; returns the new Lease or None"""
+        owner = self.node_id if transaction_id is None else transaction_id
+        token = await self._upgrade_async(resource_id, owner, None, timeout)
+        if token is None:
+            return None
+        return Lease(self, resource_id, owner, LockType.EXCLUSIVE, token, None)
+
+    # ------------------------------------------------------------------
+    # Leases
+
+    def check_lease(self, resource_id: str, token: int) -> bool:
+        """Whether the hold with this fencing token is still live"""
+        stripe = self._stripe(resource_id)
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            hold = entry.holders.get(token) if entry is not None else None
+            return hold is not None and (hold.expires is None or hold.expires > time.monotonic())
+
+    def renew(self, resource_id: str, token: int, ttl: float) -> bool:
+        """Extend an unexpired lease by ttl seconds from now"""
+        stripe = self._stripe(resource_id)
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            hold = entry.holders.get(token) if entry is not None else None
+            now = time.monotonic()
+            if hold is None or (hold.expires is not None and hold.expires <= now):
+                return False
+            hold.expires = now + ttl
+            return True
+
+    def _keep_alive(self, lease: Lease):
+        if lease.ttl is None:
+            return
+        with self._keepalive_lock:
+            self._keepalive[id(lease)] = lease
+            if self._keepalive_thread is None:
+                self._keepalive_thread = threading.Thread(
+                    target=self._renew_leases, name="lease-keepalive", daemon=True)
+                self._keepalive_thread.start()
+
+    def _renew_leases(self):
+        """Background renewal of leases whose holder is alive and not idle
+
+        Shared by every lease of the manager, so a lease that fails to
+        renew is dropped from keep-alive rather than allowed to stop it.
+        """
+        while True:
+            with self._keepalive_lock:
+                leases = list(self._keepalive.values())
+            ttls = [lease.ttl for lease in leases if lease.ttl is not None]
+            interval = min(ttls, default=DEFAULT_LEASE_TTL) / 3
+            for lease in leases:
+                try:
+                    keep = (not lease.released and lease.thread.is_alive()
+                            and not lease.idle and lease._extend())
+                except Exception as e:
+                    logger.warning("Lease keep-alive failed for %r: %r", lease, e)
+                    keep = False
+                if not keep:
+                    with self._keepalive_lock:
+                        self._keepalive.pop(id(lease), None)
+            time.sleep(interval)
+
+    # ------------------------------------------------------------------
+    # Deadlock detection
+
+    def attach_transaction_manager(self, transaction_manager):
+        """Abort deadlocked transactions through transaction_manager
+
+        Its transaction ids are used as lock owners; it must provide
+        get_start_time(tx_id) and abort_transaction(tx_id).
+        """
+        self.transaction_manager = transaction_manager
+
+    def _is_transaction(self, owner: Hashable) -> bool:
+        manager = self.transaction_manager
+        return manager is not None and manager.get_start_time(owner) is not None
+
+    def _check_deadlock(self, waiter: _Waiter):
+        """Abort the youngest transaction of a cycle through waiter's owner
+
+        Only cycles made entirely of transactions are resolved: a node id
+        may stand for several threads, so a cycle through one is not
+        necessarily a deadlock. Those still end in a lock timeout.
+        """
+        cycle = self.deadlock_detector.find_cycle(waiter.owner)
+        if cycle and all(self._is_transaction(owner) for owner, _ in cycle):
+            self.deadlock_detector.resolve_deadlock(cycle)
+
+    def add_wait_for(self, owner: Hashable, resource_id: str, holder: Hashable):
+        """Record that owner waits for resource_id held by holder
+
+        For waits this manager does not see itself, e.g. on another node;
+        blocked acquire() calls are tracked automatically.
+        """
+        with self._graph_lock:
+            self._wait_edges.setdefault(owner, {})[holder] = resource_id
+
+    def remove_wait_for(self, owner: Hashable, holder: Optional[Hashable] = None):
+        """Drop owner's reported edge to holder, or all of them"""
+        with self._graph_lock:
+            edges = self._wait_edges.get(owner)
+            if edges is None:
+                return
+            if holder is None:
+                edges.clear()
+            else:
+                edges.pop(holder, None)
+            if not edges:
+                del self._wait_edges[owner]
+
+    def waiting_owners(self) -> List[Hashable]:
+        """Owners with at least one outgoing wait-for edge"""
+        with self._graph_lock:
+            return list(self._blocked) + [o for o in self._wait_edges if o not in self._blocked]
+
+    def wait_for(self, owner: Hashable) -> Dict[Hashable, str]:
+        """Outgoing wait-for edges of owner as {holder: resource_id}"""
+        with self._graph_lock:
+            edges = dict(self._wait_edges.get(owner, ()))
+            waiters = list(self._blocked.get(owner, ()))
+        # Read each queue under its own stripe mutex, one at a time
+        for waiter in waiters:
+            stripe = self._stripe(waiter.resource_id)
+            with stripe.mutex:
+                entry = stripe.entries.get(waiter.resource_id)
+                if entry is None or waiter.granted or waiter.aborted:
+                    continue
+                for holder in entry.blockers(waiter):
+                    edges[holder] = waiter.resource_id
+        return edges
+
+    def get_hold_token(self, resource_id: str, owner: Hashable) -> Optional[int]:
+        """Fencing token of owner's most recent hold on resource"""
+        stripe = self._stripe(resource_id)
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            return self._find_hold(entry, owner) if entry is not None else None
+
+    def abort_owner(self, owner: Hashable) -> bool:
+        """Fail owner's pending acquires and abort its transaction"""
+        with self._graph_lock:
+            waiters = list(self._blocked.get(owner, ()))
+            self._wait_edges.pop(owner, None)
+        for waiter in waiters:
+            waiter.aborted = True
+            waiter.event.set()
+
+        aborted = bool(waiters)
+        manager = self.transaction_manager
+        if manager is not None and manager.get_start_time(owner) is not None:
+            aborted = manager.abort_transaction(owner) or aborted
+        if aborted:
+            self.deadlocks += 1
+        return aborted
+
+    # ------------------------------------------------------------------
+    # Introspection
+
     def is_locked(self, resource_id: str) -> bool:
         """Check if resource is locked"""
-        return resource_id in self.lock_holders
-    
-    def get_lock_holder(self, resource_id: str) -> Optional[int]:
-        """Get current lock holder"""
-        return self.lock_holders.get(resource_id)
+        return self.get_lock_mode(resource_id) is not None
+
+    def get_lock_mode(self, resource_id: str) -> Optional[LockType]:
+        """Current lock mode, or None when unlocked"""
+        entry = self._stripe(resource_id).entries.get(resource_id)
+        return entry.mode if entry is not None else None
+
+    def get_lock_holder(self, resource_id: str) -> Optional[Hashable]:
+        """Get current lock holder (the first one for SHARED locks)"""
+        holders = self.get_lock_holders(resource_id)
+        return next(iter(holders), None)
+
+    def get_lock_holders(self, resource_id: str) -> Dict[Hashable, int]:
+        """All holders of resource with their hold counts"""
+        stripe = self._stripe(resource_id)
+        with stripe.mutex:
+            entry = stripe.entries.get(resource_id)
+            holders: Dict[Hashable, int] = {}
+            if entry is not None:
+                for hold in entry.holders.values():
+                    holders[hold.owner] = holders.get(hold.owner, 0) + 1
+            return holders
+
+    def __len__(self) -> int:
+        """Resources currently held or waited on"""
+        return sum(len(stripe.entries) for stripe in self.stripes)
+
+    def get_contention_report(self, top_n: int = 10) -> Dict:
+        """Lock table state plus wait/hold percentiles and the most contended resources"""
+        report = self.telemetry.report(top_n) if self.telemetry is not None else {}
+        report["table"] = self.get_stats()
+        return report
+
+    def get_stats(self) -> Dict:
+        """Lock table size, modes, queue lengths and lease counters"""
+        shared = exclusive = waiting = 0
+        for stripe in self.stripes:
+            with stripe.mutex:
+                for entry in stripe.entries.values():
+                    if entry.mode is LockType.SHARED:
+                        shared += 1
+                    elif entry.mode is LockType.EXCLUSIVE:
+                        exclusive += 1
+                    waiting += len(entry.waiters)
+        return {
+            "stripes": len(self.stripes),
+            "entries": len(self),
+            "held": shared + exclusive,
+            "shared": shared,
+            "exclusive": exclusive,
+            "waiting": waiting,
+            "leases_kept_alive": len(self._keepalive),
+            "expired_leases": self.expired,
+            "deadlocks": self.deadlocks
+        }
 
 
 # Global lock manager
-lock_manager = DistributedLockManager()
\ No newline at end of file
+lock_manager = DistributedLockManager()
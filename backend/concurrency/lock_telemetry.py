@@ -0,0 +1,230 @@
+# FILE: backend/concurrency/lock_telemetry.py
+# ============================================================================
+
+"""
+Lock Contention Telemetry
+
+Per-resource counters and latency histograms for the lock manager:
+acquires, how many had to wait, timeouts, wait time, hold time and the
+queue depth seen on arrival.
+
+Recording must stay cheap, so only two things are recorded: each
+release (with its hold time) and each acquire that had to queue. An
+uncontended acquire records nothing; it shows up as a zero wait when
+its hold is released. Each thread writes to its own shard without
+locking, and shards are merged only when a report is requested.
+Histograms use power-of-two microsecond buckets, so percentiles are
+upper bounds accurate to 2x.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+# Bucket i holds durations below 2**i microseconds (bucket 0: below 1us)
+BUCKETS = 32
+
+# Per-thread cap on tracked resources; the rest are folded into OTHER
+MAX_RESOURCES_PER_THREAD = 10_000
+OTHER = "<other>"
+
+
+class _Histogram:
+    """Power-of-two histogram of durations"""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[min(int(seconds * 1_000_000).bit_length(), BUCKETS - 1)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "_Histogram"):
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            counts[i] += n
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the p-th percentile, in seconds"""
+        count = sum(self.counts)
+        if not count:
+            return 0.0
+        rank = p / 100 * count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min((1 << i) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "total_ms": round(self.total * 1000, 3)
+        }
+
+
+class _ResourceStats:
+    """Counters for one resource in one thread's shard"""
+
+    __slots__ = ("holds", "contended", "timeouts", "wait", "hold",
+                 "queue_total", "queue_max")
+
+    def __init__(self):
+        # Released holds; acquires that queued (granted or not); timeouts
+        self.holds = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.wait = _Histogram()
+        self.hold = _Histogram()
+        self.queue_total = 0
+        self.queue_max = 0
+
+    def merge(self, other: "_ResourceStats"):
+        self.holds += other.holds
+        self.contended += other.contended
+        self.timeouts += other.timeouts
+        self.wait.merge(other.wait)
+        self.hold.merge(other.hold)
+        self.queue_total += other.queue_total
+        if other.queue_max > self.queue_max:
+            self.queue_max = other.queue_max
+
+    def summary(self) -> Dict:
+        requests = self.holds + self.timeouts
+        # Acquires that never queued waited zero: add them to bucket 0
+        wait = _Histogram()
+        wait.merge(self.wait)
+        wait.counts[0] += max(self.holds - (self.contended - self.timeouts), 0)
+        return {
+            "holds": self.holds,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "contention_rate": round(self.contended / requests, 4) if requests else 0.0,
+            "avg_queue_depth": round(self.queue_total / self.contended, 2) if self.contended else 0.0,
+            "max_queue_depth": self.queue_max,
+            "wait": wait.summary(),
+            "hold": self.hold.summary()
+        }
+
+
+class LockTelemetry:
+    """Per-thread lock statistics, merged on read"""
+
+    def __init__(self, max_resources: int = MAX_RESOURCES_PER_THREAD):
+        self.max_resources = max_resources
+        self._local = threading.local()
+        self._shards: List[Dict[str, _ResourceStats]] = []
+        self._lock = threading.Lock()
+
+    def _stats(self, resource_id: str) -> _ResourceStats:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        stats = shard.get(resource_id)
+        if stats is None:
+            stats = self._add(shard, resource_id)
+        return stats
+
+    def _new_shard(self) -> Dict[str, _ResourceStats]:
+        shard = self._local.shard = {}
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def _add(self, shard: Dict[str, _ResourceStats], resource_id: str) -> _ResourceStats:
+        if len(shard) >= self.max_resources:
+            resource_id = OTHER
+            stats = shard.get(OTHER)
+            if stats is not None:
+                return stats
+        stats = shard[resource_id] = _ResourceStats()
+        return stats
+
+    def record_wait(self, resource_id: str, wait: float, queue_depth: int, granted: bool):
+        """An acquire that queued behind queue_depth - 1 others for wait seconds"""
+        stats = self._stats(resource_id)
+        stats.contended += 1
+        if not granted:
+            stats.timeouts += 1
+        stats.wait.record(wait)
+        stats.queue_total += queue_depth
+        if queue_depth > stats.queue_max:
+            stats.queue_max = queue_depth
+
+    def record_timeout(self, resource_id: str):
+        """A try-lock (timeout 0) that found the resource busy"""
+        self._stats(resource_id).timeouts += 1
+
+    def record_hold(self, resource_id: str, held: float):
+        """A released hold that lasted held seconds
+
+        Called on every release, so _stats and _Histogram.record are inlined.
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        stats = shard.get(resource_id)
+        if stats is None:
+            stats = self._add(shard, resource_id)
+        stats.holds += 1
+        hold = stats.hold
+        bucket = int(held * 1_000_000).bit_length()
+        hold.counts[bucket if bucket < BUCKETS else BUCKETS - 1] += 1
+        hold.total += held
+        if held > hold.max:
+            hold.max = held
+
+    def snapshot(self) -> Dict[str, _ResourceStats]:
+        """All shards merged per resource"""
+        with self._lock:
+            shards = list(self._shards)
+        merged: Dict[str, _ResourceStats] = {}
+        for shard in shards:
+            for resource_id, stats in list(shard.items()):
+                total = merged.get(resource_id)
+                if total is None:
+                    total = merged[resource_id] = _ResourceStats()
+                total.merge(stats)
+        return merged
+
+    def report(self, top_n: int = 10) -> Dict:
+        """Totals plus the top_n resources by time spent waiting"""
+        merged = self.snapshot()
+        totals = _ResourceStats()
+        for stats in merged.values():
+            totals.merge(stats)
+        hottest = sorted(merged.items(), key=lambda item: item[1].wait.total, reverse=True)
+        return {
+            "resources": len(merged),
+            "totals": totals.summary(),
+            "hot_resources": [
+                dict(resource_id=resource_id, **stats.summary())
+                for resource_id, stats in hottest[:top_n]
+                if stats.contended or stats.timeouts
+            ]
+        }
+
+    def resource(self, resource_id: str) -> Optional[Dict]:
+        """Statistics of a single resource, or None if never locked"""
+        stats = self.snapshot().get(resource_id)
+        return stats.summary() if stats is not None else None
+
+    def reset(self):
+        """Drop all recorded statistics"""
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
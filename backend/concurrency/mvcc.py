@@ -0,0 +1,323 @@
+# FILE: backend/concurrency/mvcc.py
+# ============================================================================
+
+"""
+Multi-Version Concurrency Control
+
+Every committed write adds a version to its key, stamped with the commit
+timestamp. Readers pick a snapshot timestamp and see, for each key, the
+newest version committed at or before it, so they never take locks and
+never wait for writers.
+
+Writes are buffered by the transaction and installed at commit. Commit
+is first-committer-wins: if any written key got a version after the
+transaction's snapshot, the transaction lost the race and is rejected
+with WriteConflict. A writer may instead name the version it expects a
+key to be at (optimistic updates across requests); a mismatch raises
+VersionConflict.
+
+For two-phase commit, prepare() validates the same way and then holds
+intents on the written keys until commit_prepared() or abort_prepared();
+any other transaction writing one of those keys conflicts meanwhile.
+
+Active snapshots are registered so garbage collection knows the oldest
+timestamp anyone can still read at; versions hidden behind a newer one
+at or before that horizon are dropped.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Seconds between background garbage collection passes
+DEFAULT_GC_INTERVAL = 1.0
+
+
+class WriteConflict(Exception):
+    """A key was committed by another transaction after our snapshot
+
+    commit_ts is None when the key is held by a prepared transaction.
+    """
+
+    def __init__(self, key: Hashable, snapshot_ts: int, commit_ts: Optional[int]):
+        if commit_ts is None:
+            message = f"Conflict on {key!r}: prepared by another transaction"
+        else:
+            message = f"Conflict on {key!r}: committed at {commit_ts}, after snapshot {snapshot_ts}"
+        super().__init__(message)
+        self.key = key
+        self.snapshot_ts = snapshot_ts
+        self.commit_ts = commit_ts
+
+
+class VersionConflict(WriteConflict):
+    """A record's version is no longer the one the writer read"""
+
+    def __init__(self, key: Hashable, expected: int, actual: int):
+        Exception.__init__(self, f"Version conflict on {key!r}: expected version "
+                                 f"{expected}, found {actual}")
+        self.key = key
+        self.snapshot_ts = expected
+        self.commit_ts = actual
+
+
+class _Deleted:
+    """Tombstone value of a deleted key"""
+
+    def __repr__(self):
+        return "<deleted>"
+
+
+DELETED = _Deleted()
+
+
+class _Version:
+    """One committed value; prev links to the next older version"""
+
+    __slots__ = ("value", "commit_ts", "prev")
+
+    def __init__(self, value: Any, commit_ts: int, prev: Optional["_Version"]):
+        self.value = value
+        self.commit_ts = commit_ts
+        self.prev = prev
+
+
+class MVCCStore:
+    """Versioned key-value store with snapshot reads
+
+    Readers walk a key's version chain without locking: a new version is
+    fully built before it becomes the chain head, and garbage collection
+    only cuts links no registered snapshot can reach. Commits serialise
+    on one short mutex for validation and installation.
+    """
+
+    def __init__(self, gc_interval: float = DEFAULT_GC_INTERVAL):
+        self._heads: Dict[Hashable, _Version] = {}
+        self._commit_lock = threading.Lock()
+        self._last_commit = 0
+        # Prepared transactions: token -> writes, and key -> token
+        self._prepared: Dict[Hashable, Dict[Hashable, Any]] = {}
+        self._intents: Dict[Hashable, Hashable] = {}
+        # Registered snapshot timestamps -> number of readers
+        self._snapshots: Dict[int, int] = {}
+        self._snapshot_lock = threading.Lock()
+        self.gc_interval = gc_interval
+        self._gc_thread: Optional[threading.Thread] = None
+        self.commits = 0
+        self.conflicts = 0
+        self.collected = 0
+
+    @property
+    def last_commit(self) -> int:
+        """Timestamp of the most recent commit"""
+        return self._last_commit
+
+    def begin_snapshot(self) -> int:
+        """Register a snapshot at the latest commit and return its timestamp"""
+        with self._snapshot_lock:
+            ts = self._last_commit
+            self._snapshots[ts] = self._snapshots.get(ts, 0) + 1
+        return ts
+
+    def end_snapshot(self, ts: int):
+        """Release a snapshot taken with begin_snapshot"""
+        with self._snapshot_lock:
+            count = self._snapshots.get(ts, 0)
+            if count <= 1:
+                self._snapshots.pop(ts, None)
+            else:
+                self._snapshots[ts] = count - 1
+
+    def read(self, key: Hashable, snapshot_ts: Optional[int] = None, default: Any = None) -> Any:
+        """Value of key as of snapshot_ts (default: latest commit)"""
+        return self.read_versioned(key, snapshot_ts, default)[0]
+
+    def read_versioned(self, key: Hashable, snapshot_ts: Optional[int] = None,
+                       default: Any = None) -> Tuple[Any, int]:
+        """(value, version) as of snapshot_ts; the version is the commit timestamp"""
+        version = self._heads.get(key)
+        if snapshot_ts is not None:
+            while version is not None and version.commit_ts > snapshot_ts:
+                version = version.prev
+        if version is None:
+            return default, 0
+        return (default if version.value is DELETED else version.value), version.commit_ts
+
+    def latest_commit_ts(self, key: Hashable) -> int:
+        """Commit timestamp of key's newest version, 0 if never written"""
+        version = self._heads.get(key)
+        return version.commit_ts if version is not None else 0
+
+    def commit(self, snapshot_ts: int, writes: Dict[Hashable, Any],
+               expected: Optional[Dict[Hashable, int]] = None) -> int:
+        """Install writes as of a new commit timestamp
+
+        Args:
+            snapshot_ts: Snapshot the writing transaction read from
+            writes: key -> new value, or DELETED
+            expected: key -> version the writer read; these keys are
+                validated against that version instead of snapshot_ts
+
+        Returns:
+            The commit timestamp
+
+        Raises:
+            WriteConflict: a key was committed after snapshot_ts
+            VersionConflict: a key is no longer at its expected version
+        """
+        with self._commit_lock:
+            self._validate(snapshot_ts, writes, expected or {})
+            commit_ts = self._install(writes)
+        if self._gc_thread is None:
+            self._start_gc()
+        return commit_ts
+
+    def prepare(self, token: Hashable, snapshot_ts: int, writes: Dict[Hashable, Any],
+                expected: Optional[Dict[Hashable, int]] = None):
+        """Validate writes like commit() and hold them under token
+
+        Raises:
+            WriteConflict, VersionConflict: as commit()
+        """
+        with self._commit_lock:
+            self._validate(snapshot_ts, writes, expected or {})
+            self._prepared[token] = writes
+            for key in writes:
+                self._intents[key] = token
+
+    def commit_prepared(self, token: Hashable) -> Optional[int]:
+        """Install the writes prepared under token; None if there are none"""
+        with self._commit_lock:
+            writes = self._release_intents(token)
+            if writes is None:
+                return None
+            commit_ts = self._install(writes)
+        if self._gc_thread is None:
+            self._start_gc()
+        return commit_ts
+
+    def abort_prepared(self, token: Hashable) -> bool:
+        """Drop the writes prepared under token"""
+        with self._commit_lock:
+            return self._release_intents(token) is not None
+
+    def _release_intents(self, token: Hashable) -> Optional[Dict[Hashable, Any]]:
+        writes = self._prepared.pop(token, None)
+        if writes is not None:
+            for key in writes:
+                if self._intents.get(key) == token:
+                    del self._intents[key]
+        return writes
+
+    def _validate(self, snapshot_ts: int, writes: Dict[Hashable, Any],
+                  expected: Dict[Hashable, int]):
+        """First-committer-wins check; caller holds _commit_lock"""
+        for key, version in expected.items():
+            current = self.latest_commit_ts(key)
+            if current != version:
+                self.conflicts += 1
+                raise VersionConflict(key, version, current)
+        for key in writes:
+            if key in self._intents:
+                self.conflicts += 1
+                raise WriteConflict(key, snapshot_ts, None)
+            if key in expected:
+                continue
+            head = self._heads.get(key)
+            if head is not None and head.commit_ts > snapshot_ts:
+                self.conflicts += 1
+                raise WriteConflict(key, snapshot_ts, head.commit_ts)
+
+    def _install(self, writes: Dict[Hashable, Any]) -> int:
+        """New versions for writes at the next timestamp; caller holds _commit_lock"""
+        commit_ts = self._last_commit + 1
+        for key, value in writes.items():
+            self._heads[key] = _Version(value, commit_ts, self._heads.get(key))
+        # Publish only after every version is installed
+        self._last_commit = commit_ts
+        self.commits += 1
+        return commit_ts
+
+    def latest_versions(self) -> Dict[Hashable, Tuple[Any, int]]:
+        """key -> (latest value, commit timestamp), deleted keys left out"""
+        with self._commit_lock:
+            return {key: (head.value, head.commit_ts) for key, head in self._heads.items()
+                    if head.value is not DELETED}
+
+    def redo(self, writes: Dict[Hashable, Any], commit_ts: int):
+        """Install writes at a known commit timestamp, for recovery
+
+        Commits must be redone in timestamp order, into a store nobody
+        is using yet.
+        """
+        with self._commit_lock:
+            for key, value in writes.items():
+                self._heads[key] = _Version(value, commit_ts, self._heads.get(key))
+            self._last_commit = max(self._last_commit, commit_ts)
+
+    def horizon(self) -> int:
+        """Oldest timestamp any registered snapshot may read at"""
+        with self._snapshot_lock:
+            if self._snapshots:
+                return min(self._snapshots)
+            return self._last_commit
+
+    def gc(self) -> int:
+        """Drop versions no snapshot can see; returns how many were dropped"""
+        horizon = self.horizon()
+        dropped = 0
+        for key, head in list(self._heads.items()):
+            # The newest version at or before the horizon stays visible
+            version = head
+            while version is not None and version.commit_ts > horizon:
+                version = version.prev
+            if version is None:
+                continue
+            old = version.prev
+            version.prev = None
+            while old is not None:
+                dropped += 1
+                old = old.prev
+            if version is head and head.value is DELETED:
+                with self._commit_lock:
+                    if self._heads.get(key) is head:
+                        del self._heads[key]
+                        dropped += 1
+        self.collected += dropped
+        return dropped
+
+    def _start_gc(self):
+        with self._commit_lock:
+            if self._gc_thread is not None:
+                return
+            self._gc_thread = threading.Thread(target=self._gc_loop, daemon=True,
+                                               name="mvcc-gc")
+        self._gc_thread.start()
+
+    def _gc_loop(self):
+        while True:
+            time.sleep(self.gc_interval)
+            self.gc()
+
+    def __len__(self) -> int:
+        return len(self._heads)
+
+    def get_stats(self) -> Dict:
+        versions = 0
+        for head in list(self._heads.values()):
+            version = head
+            while version is not None:
+                versions += 1
+                version = version.prev
+        with self._snapshot_lock:
+            active = sum(self._snapshots.values())
+        return {
+            "keys": len(self._heads),
+            "versions": versions,
+            "last_commit": self._last_commit,
+            "active_snapshots": active,
+            "prepared": len(self._prepared),
+            "commits": self.commits,
+            "conflicts": self.conflicts,
+            "collected": self.collected
+        }
@@ -0,0 +1,115 @@
+# FILE: backend/concurrency/optimistic.py
+# ============================================================================
+
+"""
+Optimistic Concurrency Control
+
+For records that carry a version column (an integer `version`
+attribute, bumped on every change). A transaction remembers the version
+of each record it reads, does its work without locks, and at commit
+checks that none of those versions moved before applying its changes
+and bumping the versions of the records it changed. If one did, commit
+raises VersionConflict and the work is retried from scratch.
+
+Commit takes a few in-process mutexes (striped by record) for the
+check-and-apply only, so there is no lock manager round trip and nobody
+waits while the work itself runs. That pays off when conflicts are
+rare, e.g. inventory updates spread across many items.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from .mvcc import VersionConflict, WriteConflict
+
+T = TypeVar("T")
+
+# Attempts made by retry_on_conflict before giving up
+DEFAULT_RETRIES = 5
+# First retry backs off up to this many seconds, doubling each attempt
+DEFAULT_BACKOFF = 0.001
+
+_STRIPES = [threading.Lock() for _ in range(64)]
+
+
+def _stripe(record: Any) -> int:
+    # Objects are 16-byte aligned: drop the constant low bits of the id
+    return (id(record) >> 4) % len(_STRIPES)
+
+
+class OptimisticTransaction:
+    """Read-validate-write transaction over versioned records
+
+    Usage:
+        tx = OptimisticTransaction()
+        tx.read(item)
+        tx.set(item, quantity_available=item.quantity_available - 1)
+        tx.commit()  # raises VersionConflict if item changed meanwhile
+    """
+
+    def __init__(self):
+        # id(record) -> (record, version seen)
+        self.reads: Dict[int, Tuple[Any, int]] = {}
+        # id(record) -> (record, attribute changes)
+        self.changes: Dict[int, Tuple[Any, Dict[str, Any]]] = {}
+
+    def read(self, record: Any) -> int:
+        """Remember the record's version; read its fields after this call"""
+        seen = self.reads.get(id(record))
+        if seen is not None:
+            return seen[1]
+        version = record.version
+        self.reads[id(record)] = (record, version)
+        return version
+
+    def set(self, record: Any, **changes):
+        """Change attributes of record at commit"""
+        self.read(record)
+        entry = self.changes.setdefault(id(record), (record, {}))
+        entry[1].update(changes)
+
+    def commit(self):
+        """Validate every read and apply the changes atomically
+
+        Raises:
+            VersionConflict: a record changed since it was read
+        """
+        stripes = sorted({_stripe(record) for record, _ in self.reads.values()})
+        locks: List[threading.Lock] = [_STRIPES[i] for i in stripes]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for record, version in self.reads.values():
+                if record.version != version:
+                    raise VersionConflict(record, version, record.version)
+            for record, changes in self.changes.values():
+                for name, value in changes.items():
+                    setattr(record, name, value)
+                # Bump after the fields so a reader that saw the old
+                # version and then a new field fails validation
+                record.version += 1
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+def retry_on_conflict(attempt: Callable[[], T], retries: int = DEFAULT_RETRIES,
+                      backoff: float = DEFAULT_BACKOFF) -> T:
+    """Run attempt() until it does not conflict
+
+    attempt must start from fresh reads each time (e.g. build a new
+    OptimisticTransaction or transaction). Retries back off with
+    exponential, jittered sleeps.
+
+    Raises:
+        WriteConflict: every attempt conflicted (VersionConflict included)
+    """
+    for n in range(retries):
+        try:
+            return attempt()
+        except WriteConflict:
+            if n == retries - 1:
+                raise
+            time.sleep(random.uniform(0, backoff * (2 ** n)))
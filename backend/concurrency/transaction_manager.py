@@ -2,19 +2,56 @@
 # ============================================================================
 
 import threading
-from typing import Dict, List, Callable
+import uuid
+from enum import Enum
+from typing import Any, Dict, Hashable, List, Callable, Optional, Set, Tuple, TypeVar
 import time
 
-from zwiggy.backend.concurrency import lock_manager
+from .lock_manager import lock_manager, LockType
+from .mvcc import MVCCStore, WriteConflict, VersionConflict, DELETED
+from .optimistic import retry_on_conflict, DEFAULT_RETRIES
+from .two_phase_commit import TwoPhaseCommitCoordinator
+from .wal import TransactionLog
+
+T = TypeVar("T")
+
+# Seconds a prepared participant waits for the decision before asking
+# its coordinator for it
+DEFAULT_IN_DOUBT_TIMEOUT = 10.0
+
+class IsolationLevel(Enum):
+    """What a transaction's reads see
+
+    READ_COMMITTED: each read sees the latest committed version
+    SNAPSHOT: every read sees the database as of begin_transaction
+    
+    Both buffer writes until commit and reject lost updates
+    (first committer wins).
+    """
+    READ_COMMITTED = "read_committed"
+    SNAPSHOT = "snapshot"
+
 
 class Transaction:
     """Transaction context"""
     
-    def __init__(self, tx_id: str):
+    def __init__(self, tx_id: str, isolation_level: IsolationLevel = IsolationLevel.READ_COMMITTED,
+                 snapshot_ts: int = 0):
         self.tx_id = tx_id
         self.operations = []
         self.locks = []
-        self.status = "active"  # active, committed, aborted
+        self.status = "active"  # active, prepared, committed, aborted
+        self.started = time.monotonic()  # Age for deadlock victim selection
+        self.isolation_level = isolation_level
+        self.snapshot_ts = snapshot_ts  # Last commit visible at begin
+        self.writes: Dict[Hashable, Any] = {}  # Buffered until commit
+        self.expected: Dict[Hashable, int] = {}  # Versions update() relies on
+        self.commit_ts: Optional[int] = None
+        self.participants: Set[int] = set()  # Other nodes in a 2PC commit
+        self.votes: Optional[Dict[int, bool]] = None
+        self.decided = False  # The 2PC coordinator is done with it
+        self.coordinator_id: Optional[int] = None  # Node to ask when in doubt
+        self.prepared_at: Optional[float] = None
     
     def add_operation(self, operation: Dict):
         """Add operation to transaction"""
@@ -30,44 +67,523 @@ class Transaction:
 
 
 class TransactionManager:
-    """Manages distributed transactions"""
+    """Manages distributed transactions
+
+    Data lives in a multi-version store: read() never takes a lock and
+    never waits for writers, write() buffers until commit, and commit
+    fails if another transaction committed one of the same keys first.
+    Explicit locks are still available through acquire_lock().
+
+    Transactions lock resources under their own tx_id, so the lock
+    manager can tell them apart in its wait-for graph and abort the
+    youngest one in a deadlock through abort_transaction().
+    
+    Transactions that span nodes commit with two-phase commit: enlist()
+    the other nodes' managers, then commit_2pc(). This manager is both
+    the coordinator and the participant for node_id; other participants
+    expose prepare_transaction/commit_transaction/abort_transaction,
+    e.g. another TransactionManager.
+    
+    With a TransactionLog, every write is logged with its before and
+    after image and commit waits for its COMMIT record to be durable;
+    call replay_log() on startup to rebuild the store.
+
+    A participant that voted YES but never hears the decision, because
+    the message was lost or it restarted, is in doubt and keeps its
+    write intents. After in_doubt_timeout, and on recover(), it asks
+    its coordinator for the outcome and commits or aborts accordingly.
+
+    Only active and prepared transactions are kept in `transactions`;
+    finished ones are dropped, except that a 2PC coordinator keeps its
+    transaction until commit_2pc()/abort_2pc() returns. Repeated
+    decisions for a dropped transaction are ignored (commit/abort return
+    False), and in-doubt recovery works from the logs, not from here.
+    """
     
-    def __init__(self):
+    def __init__(self, store: Optional[MVCCStore] = None, node_id: int = 0,
+                 coordinator: Optional[TwoPhaseCommitCoordinator] = None,
+                 log: Optional[TransactionLog] = None,
+                 in_doubt_timeout: float = DEFAULT_IN_DOUBT_TIMEOUT):
         self.transactions: Dict[str, Transaction] = {}
         self.lock = threading.Lock()
+        self.store = store if store is not None else MVCCStore()
+        self.node_id = node_id
+        self.coordinator = coordinator if coordinator is not None else TwoPhaseCommitCoordinator()
+        self.coordinator.register(node_id, self)
+        self.log = log
+        self.in_doubt_timeout = in_doubt_timeout
+        self._resolver_thread: Optional[threading.Thread] = None
     
-    def begin_transaction(self, tx_id: str) -> Transaction:
+    def begin_transaction(self, tx_id: str,
+                          isolation_level: IsolationLevel = IsolationLevel.READ_COMMITTED) -> Transaction:
         """Begin new transaction"""
         with self.lock:
-            tx = Transaction(tx_id)
+            # The snapshot is registered even under READ_COMMITTED:
+            # commit validates writes against it, so GC must keep it
+            tx = Transaction(tx_id, isolation_level, self.store.begin_snapshot())
             self.transactions[tx_id] = tx
             return tx
     
+    def read(self, tx_id: str, key: Hashable, default: Any = None) -> Any:
+        """Value of key as seen by the transaction, without locking"""
+        return self.read_versioned(tx_id, key, default)[0]
+    
+    def read_versioned(self, tx_id: str, key: Hashable, default: Any = None) -> Tuple[Any, int]:
+        """(value, version) of key; pass the version to update() later
+        
+        The version is the commit timestamp of the value read, 0 if the
+        key does not exist. Own uncommitted writes do not change it.
+        """
+        tx = self.transactions[tx_id]
+        snapshot_ts = tx.snapshot_ts if tx.isolation_level == IsolationLevel.SNAPSHOT else None
+        value, version = self.store.read_versioned(key, snapshot_ts, default)
+        if key in tx.writes:
+            value = tx.writes[key]
+            value = default if value is DELETED else value
+        return value, version
+    
+    def update(self, tx_id: str, key: Hashable, updates: Dict, expected_version: int) -> bool:
+        """Merge updates into the record at key if it is still at expected_version
+        
+        Checked now, so a stale caller fails fast, and again at commit.
+        
+        Raises:
+            VersionConflict: key moved past expected_version
+        """
+        tx = self.transactions.get(tx_id)
+        if tx is None or tx.status != "active":
+            return False
+        current = self.store.latest_commit_ts(key)
+        if current != expected_version:
+            raise VersionConflict(key, expected_version, current)
+        row = tx.writes.get(key)
+        if row is None or row is DELETED:
+            row = self.store.read(key)
+        row = dict(row or {})
+        row.update(updates)
+        tx.expected.setdefault(key, expected_version)
+        return self.write(tx_id, key, row)
+    
+    def write(self, tx_id: str, key: Hashable, value: Any) -> bool:
+        """Buffer a write; visible to others once the transaction commits"""
+        tx = self.transactions.get(tx_id)
+        if tx is None or tx.status != "active":
+            return False
+        if self.log is not None:
+            # Under the lock, so a checkpoint sees either both or neither
+            with self.lock:
+                deleted = value is DELETED
+                self.log.log_write(tx_id, key, self.store.read(key),
+                                   None if deleted else value, deleted)
+                tx.writes[key] = value
+        else:
+            tx.writes[key] = value
+        tx.add_operation({"op": "write", "key": key})
+        return True
+    
+    def delete(self, tx_id: str, key: Hashable) -> bool:
+        """Buffer a delete of key"""
+        return self.write(tx_id, key, DELETED)
+    
+    def get_start_time(self, tx_id: str) -> Optional[float]:
+        """Start time of tx_id, or None if it is not a transaction"""
+        tx = self.transactions.get(tx_id)
+        return tx.started if tx is not None else None
+    
+    def acquire_lock(self, tx_id: str, resource_id: str,
+                     lock_type: LockType = LockType.EXCLUSIVE, timeout: float = 5.0) -> bool:
+        """Lock resource for the transaction until commit or abort
+        
+        Returns False on timeout or when the transaction was aborted,
+        e.g. as a deadlock victim; the caller should then abort it.
+        """
+        tx = self.transactions.get(tx_id)
+        if tx is None or tx.status != "active":
+            return False
+        if not lock_manager.acquire(resource_id, tx_id, timeout=timeout, lock_type=lock_type):
+            return False
+        with self.lock:
+            if tx.status != "active":
+                # Aborted while we were being granted the lock
+                lock_manager.release(resource_id, tx_id)
+                return False
+            tx.locks.append(resource_id)
+        return True
+    
     def commit_transaction(self, tx_id: str) -> bool:
-        """Commit transaction"""
+        """Commit transaction
+        
+        Returns False if it already finished or lost a write conflict,
+        in which case it has been aborted.
+        """
+        try:
+            return self._commit(tx_id)
+        except WriteConflict as e:
+            print(f"Transaction {tx_id} aborted: {e}")
+            return False
+    
+    def run_transaction(self, work: Callable[[str], T],
+                        isolation_level: IsolationLevel = IsolationLevel.READ_COMMITTED,
+                        retries: int = DEFAULT_RETRIES) -> T:
+        """Run work(tx_id) in a new transaction and commit it
+        
+        work reads and writes through tx_id; on a write or version
+        conflict everything is retried in a fresh transaction.
+        
+        Raises:
+            WriteConflict: all retries conflicted
+        """
+        def attempt() -> T:
+            tx_id = f"TX_{uuid.uuid4().hex[:8]}"
+            self.begin_transaction(tx_id, isolation_level)
+            try:
+                result = work(tx_id)
+            except BaseException:
+                self.abort_transaction(tx_id)
+                raise
+            if not self._commit(tx_id):
+                raise RuntimeError(f"Transaction {tx_id} was aborted")
+            return result
+        
+        return retry_on_conflict(attempt, retries)
+    
+    def _commit(self, tx_id: str) -> bool:
+        """commit_transaction that aborts and raises on write conflicts"""
+        with self.lock:
+            tx = self.transactions.get(tx_id)
+            if tx is None or tx.status not in ("active", "prepared"):
+                return False
+            if tx.status == "prepared":
+                # Validated at prepare; the coordinator decided to commit
+                tx.commit_ts = self.store.commit_prepared(tx_id)
+            elif tx.writes:
+                try:
+                    tx.commit_ts = self.store.commit(tx.snapshot_ts, tx.writes, tx.expected)
+                except WriteConflict:
+                    self._abort(tx)
+                    raise
+            lsn = None
+            if self.log is not None and tx.commit_ts is not None:
+                lsn = self.log.log_commit(tx_id, tx.commit_ts, sync=False)
+            self._finish(tx)
+        if lsn is not None:
+            # fsync outside the lock so concurrent commits share it
+            self.log.sync(lsn)
+            if self.log.needs_checkpoint():
+                self.checkpoint()
+        return True
+    
+    def _finish(self, tx: Transaction):
+        """Mark committed, end the snapshot and release all locks"""
+        tx.commit()
+        self.store.end_snapshot(tx.snapshot_ts)
+        for resource_id in tx.locks:
+            lock_manager.release(resource_id, tx.tx_id)
+        tx.locks.clear()
+        self._forget(tx)
+    
+    def _forget(self, tx: Transaction):
+        """Drop a finished transaction
+        
+        The coordinator of a 2PC transaction still needs it for the
+        phase-2 decision, so it is kept until tx.decided.
+        """
+        if tx.status in ("committed", "aborted") and (tx.decided or not tx.participants):
+            if self.transactions.get(tx.tx_id) is tx:
+                del self.transactions[tx.tx_id]
+    
+    def abort_transaction(self, tx_id: str) -> bool:
+        """Abort transaction; returns False if it already finished"""
         with self.lock:
-            if tx_id in self.transactions:
-                tx = self.transactions[tx_id]
-                tx.commit()
-                
-                # Release all locks
-                for resource_id in tx.locks:
-                    lock_manager.release(resource_id, int(tx_id.split("_")[1]))
-                
+            tx = self.transactions.get(tx_id)
+            if tx is None or tx.status not in ("active", "prepared"):
+                return False
+            self._abort(tx)
+            return True
+    
+    def _abort(self, tx: Transaction):
+        """Discard buffered writes, end the snapshot and release locks"""
+        if tx.status == "prepared":
+            self.store.abort_prepared(tx.tx_id)
+        if self.log is not None and tx.writes:
+            self.log.log_abort(tx.tx_id)
+        tx.abort()
+        tx.writes.clear()
+        tx.expected.clear()
+        self.store.end_snapshot(tx.snapshot_ts)
+        for resource_id in tx.locks:
+            lock_manager.release(resource_id, tx.tx_id)
+        tx.locks.clear()
+        self._forget(tx)
+    
+    # ------------------------------------------------------------------
+    # Two-phase commit
+    # ------------------------------------------------------------------
+    
+    def register_participant(self, node_id: int, participant, timeout: Optional[float] = None):
+        """Make node_id's participant reachable; timeout bounds its PREPARE"""
+        self.coordinator.register(node_id, participant, timeout)
+    
+    def enlist(self, tx_id: str, node_id: int) -> bool:
+        """Add node_id to the nodes that must commit tx_id atomically"""
+        tx = self.transactions.get(tx_id)
+        if tx is None or tx.status != "active":
+            return False
+        if node_id != self.node_id:
+            tx.participants.add(node_id)
+        return True
+    
+    def _nodes(self, tx: Transaction) -> List[int]:
+        return [self.node_id] + sorted(tx.participants)
+    
+    def prepare_transaction(self, tx_id: str, coordinator_id: Optional[int] = None) -> bool:
+        """Participant side of PREPARE: validate and hold writes, vote
+        
+        A YES vote keeps locks and write intents until the coordinator's
+        decision arrives; a NO vote aborts the transaction here. With a
+        coordinator_id, the decision is asked for if it does not arrive.
+        """
+        with self.lock:
+            tx = self.transactions.get(tx_id)
+            if tx is None:
+                return False
+            if tx.status == "prepared":
                 return True
-        return False
+            if tx.status != "active":
+                return False
+            try:
+                self.store.prepare(tx_id, tx.snapshot_ts, tx.writes, tx.expected)
+            except WriteConflict as e:
+                print(f"Transaction {tx_id} votes no: {e}")
+                self._abort(tx)
+                return False
+            tx.status = "prepared"
+            tx.coordinator_id = coordinator_id
+            tx.prepared_at = time.monotonic()
+            lsn = None
+            if self.log is not None and tx.writes:
+                lsn = self.log.log_prepare(tx_id, tx.snapshot_ts, coordinator_id, sync=False)
+        # The vote must survive a crash before it is cast
+        if lsn is not None:
+            self.log.sync(lsn)
+        if coordinator_id is not None:
+            self._start_resolver()
+        return True
     
-    def abort_transaction(self, tx_id: str):
-        """Abort transaction"""
+    def prepare_on_node(self, tx_id: str, node_id: int) -> bool:
+        """Send PREPARE for tx_id to one node and return its vote
+        
+        Managers are told this node coordinates, so they know whom to
+        ask for the decision if they miss it.
+        """
+        participant = self.coordinator.participants.get(node_id)
+        if isinstance(participant, TransactionManager):
+            return participant.prepare_transaction(tx_id, coordinator_id=self.node_id)
+        return self.coordinator.prepare_on_node(tx_id, node_id)
+    
+    def prepare(self, tx_id: str) -> Dict[int, bool]:
+        """Phase 1: PREPARE on every node of tx_id in parallel"""
+        tx = self.transactions[tx_id]
+        tx.votes = self.coordinator.prepare(tx_id, self._nodes(tx), self.prepare_on_node)
+        return tx.votes
+    
+    def commit_2pc(self, tx_id: str) -> bool:
+        """Commit tx_id on all its nodes or none
+        
+        Runs phase 1 unless prepare() already did. Returns True once the
+        commit decision is durable in the coordinator log; nodes that
+        miss it get it again from recover().
+        """
+        tx = self.transactions.get(tx_id)
+        if tx is None:
+            return False
+        votes = tx.votes if tx.votes is not None else self.prepare(tx_id)
+        if not all(votes.values()):
+            self.abort_2pc(tx_id)
+            return False
+        committed = self.coordinator.commit(tx_id, self._nodes(tx))
         with self.lock:
-            if tx_id in self.transactions:
-                tx = self.transactions[tx_id]
-                tx.abort()
-                
-                # Release locks and rollback
-                for resource_id in tx.locks:
-                    lock_manager.release(resource_id, int(tx_id.split("_")[1]))
+            # Still prepared if our own COMMIT timed out; _finish drops it
+            tx.decided = True
+            self._forget(tx)
+        return committed
+    
+    def abort_2pc(self, tx_id: str) -> bool:
+        """Abort tx_id here and tell its other nodes (presumed abort)"""
+        tx = self.transactions.get(tx_id)
+        if tx is None:
+            return False
+        self.abort_transaction(tx_id)
+        self.coordinator.abort(tx_id, sorted(tx.participants))
+        with self.lock:
+            tx.decided = True
+            self._forget(tx)
+        return True
+    
+    def outcome(self, tx_id: str) -> str:
+        """Coordinator side of an inquiry: "commit", "abort" or "pending"
+        
+        "pending" while this node still runs 2PC for tx_id and has not
+        logged a decision; otherwise presumed abort answers from the log.
+        """
+        decision = self.coordinator.outcome(tx_id)
+        tx = self.transactions.get(tx_id)
+        if decision == "abort" and tx is not None and tx.participants and not tx.decided:
+            return "pending"
+        return decision
+    
+    def resolve_in_doubt(self, max_age: Optional[float] = None) -> Dict[str, str]:
+        """Ask coordinators about prepared transactions and apply the answers
+        
+        Only transactions prepared at least max_age seconds ago are asked
+        about (all of them by default). Returns tx_id -> decision applied;
+        a coordinator that is unreachable or still deciding leaves the
+        transaction prepared.
+        """
+        now = time.monotonic()
+        with self.lock:
+            in_doubt = [tx for tx in self.transactions.values()
+                        if tx.status == "prepared" and tx.coordinator_id is not None
+                        and (max_age is None or tx.prepared_at <= now - max_age)]
+        resolved = {}
+        for tx in in_doubt:
+            coordinator = self.coordinator.participants.get(tx.coordinator_id)
+            if coordinator is None:
+                continue
+            try:
+                decision = coordinator.outcome(tx.tx_id)
+            except Exception as e:
+                print(f"Transaction {tx.tx_id}: node {tx.coordinator_id} did not answer: {e!r}")
+                continue
+            if decision == "commit":
+                self.commit_transaction(tx.tx_id)
+            elif decision == "abort":
+                self.abort_transaction(tx.tx_id)
+            else:
+                continue
+            resolved[tx.tx_id] = decision
+        return resolved
+    
+    def _start_resolver(self):
+        with self.lock:
+            if self._resolver_thread is not None:
+                return
+            self._resolver_thread = threading.Thread(target=self._resolve_loop, daemon=True,
+                                                     name="2pc-in-doubt")
+        self._resolver_thread.start()
+    
+    def _resolve_loop(self):
+        while True:
+            time.sleep(self.in_doubt_timeout / 2)
+            self.resolve_in_doubt(self.in_doubt_timeout)
+    
+    def recover(self) -> int:
+        """Redeliver logged commit decisions and resolve in-doubt transactions
+        
+        Call on startup after replay_log() once peers are registered.
+        Returns how many of this node's commit decisions are still pending.
+        """
+        pending = self.coordinator.recover()
+        self.resolve_in_doubt()
+        return pending
+    
+    # ------------------------------------------------------------------
+    # Write-ahead log
+    # ------------------------------------------------------------------
+    
+    def checkpoint(self):
+        """Snapshot the store and unfinished transactions, then empty the log"""
+        if self.log is None:
+            return
+        with self.lock:
+            state = {key: [value, commit_ts]
+                     for key, (value, commit_ts) in self.store.latest_versions().items()}
+            active = {}
+            for tx in self.transactions.values():
+                if tx.status in ("active", "prepared") and tx.writes:
+                    active[tx.tx_id] = {
+                        "status": tx.status,
+                        "snapshot_ts": tx.snapshot_ts,
+                        "coordinator": tx.coordinator_id,
+                        "writes": {k: v for k, v in tx.writes.items() if v is not DELETED},
+                        "deleted": [k for k, v in tx.writes.items() if v is DELETED]
+                    }
+            self.log.checkpoint(state, self.store.last_commit, active)
+    
+    def replay_log(self) -> Dict[str, int]:
+        """Rebuild the store from the checkpoint and the log tail
+        
+        Call once on startup, before any transaction begins. Committed
+        transactions are redone in commit order; prepared ones are
+        restored as prepared, holding their intents until the
+        coordinator decides or recover() asks it; the rest were in
+        flight and are undone.
+        """
+        stats = {"records": 0, "redone": 0, "prepared": 0, "undone": 0}
+        if self.log is None:
+            return stats
+        
+        # tx_id -> {"status", "snapshot_ts", "coordinator", "writes": {key: value or DELETED}}
+        pending: Dict[str, Dict] = {}
+        checkpoint = self.log.read_checkpoint()
+        if checkpoint is not None:
+            for key, (value, commit_ts) in sorted(checkpoint["state"].items(),
+                                                  key=lambda item: item[1][1]):
+                self.store.redo({key: value}, commit_ts)
+            self.store.redo({}, checkpoint["last_commit"])
+            for tx_id, entry in checkpoint["active"].items():
+                writes = dict(entry["writes"])
+                writes.update({key: DELETED for key in entry["deleted"]})
+                pending[tx_id] = {"status": entry["status"], "snapshot_ts": entry["snapshot_ts"],
+                                  "coordinator": entry.get("coordinator"), "writes": writes}
+        
+        committed: List[Tuple[int, Dict]] = []
+        for record in self.log.records():
+            if checkpoint is not None and record["lsn"] < checkpoint["lsn"]:
+                # Already in the snapshot: a crash hit before the log was emptied
+                continue
+            stats["records"] += 1
+            entry = pending.setdefault(record["tx_id"], {"status": "active", "snapshot_ts": 0,
+                                                         "coordinator": None, "writes": {}})
+            if record["type"] == "write":
+                entry["writes"][record["key"]] = DELETED if record["deleted"] else record["after"]
+            elif record["type"] == "prepare":
+                entry["status"] = "prepared"
+                entry["snapshot_ts"] = record["snapshot_ts"]
+                entry["coordinator"] = record.get("coordinator")
+            elif record["type"] == "commit":
+                committed.append((record["commit_ts"], pending.pop(record["tx_id"])["writes"]))
+            elif record["type"] == "abort":
+                pending.pop(record["tx_id"], None)
+        
+        # Redo
+        for commit_ts, writes in sorted(committed, key=lambda item: item[0]):
+            self.store.redo(writes, commit_ts)
+            stats["redone"] += 1
+        
+        for tx_id, entry in pending.items():
+            if entry["status"] == "prepared":
+                # In doubt: keep it prepared until the coordinator decides
+                tx = self.begin_transaction(tx_id)
+                tx.writes = entry["writes"]
+                self.store.prepare(tx_id, self.store.last_commit, tx.writes)
+                tx.status = "prepared"
+                tx.coordinator_id = entry["coordinator"]
+                # In doubt since before the restart: due for an inquiry now
+                tx.prepared_at = 0.0
+                stats["prepared"] += 1
+            else:
+                # Undo: the store never saw its writes, so log that it is gone
+                self.log.log_abort(tx_id)
+                stats["undone"] += 1
+        if stats["undone"]:
+            # One fsync so the next restart does not undo them again
+            self.log.sync()
+        if any(tx.coordinator_id is not None for tx in self.transactions.values()):
+            self._start_resolver()
+        return stats
 
 
 # Global transaction manager
-transaction_manager = TransactionManager()
\ No newline at end of file
+transaction_manager = TransactionManager()
+lock_manager.attach_transaction_manager(transaction_manager)
\ No newline at end of file
@@ -0,0 +1,280 @@
+# FILE: backend/concurrency/two_phase_commit.py
+# ============================================================================
+
+"""
+Two-Phase Commit Coordinator
+
+Commits one transaction atomically across participant nodes. A
+participant is anything with prepare_transaction(tx_id) -> bool,
+commit_transaction(tx_id) and abort_transaction(tx_id), such as a
+TransactionManager.
+
+Phase 1 sends PREPARE to every participant at once and waits for each
+one until its own timeout; no vote in time counts as NO. Phase 2 sends
+the decision to everyone at once as well, so a transaction costs two
+round trips of the slowest participant, not of all of them in sequence.
+
+The coordinator log uses presumed abort: only the COMMIT decision is
+forced to disk, before any participant hears it. Aborts are never
+logged, and the END record written once every participant acknowledged
+a commit is not forced. After a crash, recover() resends COMMIT for
+every logged commit without an END; any transaction the log does not
+know about was aborted, which is what outcome() tells a participant
+that asks (TransactionManager participants ask after a timeout and on
+recovery).
+
+Log layout: records of [length][crc32][JSON body]; a torn record left
+by a crash is truncated on open.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# Seconds a participant gets to vote, unless registered with its own timeout
+DEFAULT_PREPARE_TIMEOUT = 2.0
+# Seconds a participant gets to acknowledge a decision
+DEFAULT_DECISION_TIMEOUT = 2.0
+
+# body length, crc32
+LOG_RECORD_HEADER = struct.Struct("<II")
+
+
+class CoordinatorLog:
+    """Append-only log of commit decisions
+
+    With path=None the log only lives in memory: same protocol, but a
+    restart forgets pending commits.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        # tx_id -> participants still to acknowledge its COMMIT
+        self.pending: Dict[str, List[int]] = {}
+        self.forced_writes = 0
+        self._lock = threading.Lock()
+        self._file = None
+        if path is not None:
+            self._open()
+
+    def _open(self):
+        """Load pending commits, dropping a torn tail, then rewrite compactly"""
+        valid = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + LOG_RECORD_HEADER.size <= len(data):
+                length, crc = LOG_RECORD_HEADER.unpack_from(data, offset)
+                body = data[offset + LOG_RECORD_HEADER.size:offset + LOG_RECORD_HEADER.size + length]
+                if len(body) < length or zlib.crc32(body) != crc:
+                    break
+                self._apply(json.loads(body))
+                offset += LOG_RECORD_HEADER.size + length
+            valid = offset
+            if valid < len(data):
+                print(f"Coordinator log {self.path}: dropped {len(data) - valid} torn bytes")
+
+        # Only undecided commits matter after a restart: start a fresh log with them
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for tx_id, participants in self.pending.items():
+                f.write(self._encode({"type": "commit", "tx_id": tx_id,
+                                      "participants": participants}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab")
+
+    def _apply(self, record: Dict):
+        if record["type"] == "commit":
+            self.pending[record["tx_id"]] = record["participants"]
+        elif record["type"] == "end":
+            self.pending.pop(record["tx_id"], None)
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        body = json.dumps(record, separators=(",", ":")).encode()
+        return LOG_RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+    def _append(self, record: Dict, force: bool):
+        with self._lock:
+            self._apply(record)
+            if self._file is None:
+                return
+            self._file.write(self._encode(record))
+            if force:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.forced_writes += 1
+
+    def log_commit(self, tx_id: str, participants: List[int]):
+        """Forced: the transaction is committed once this returns"""
+        self._append({"type": "commit", "tx_id": tx_id, "participants": participants},
+                     force=True)
+
+    def log_end(self, tx_id: str):
+        """Not forced: losing it only means recovery resends COMMIT"""
+        self._append({"type": "end", "tx_id": tx_id}, force=False)
+
+    def is_committed(self, tx_id: str) -> bool:
+        return tx_id in self.pending
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TwoPhaseCommitCoordinator:
+    """Runs 2PC over registered participants with parallel fan-out"""
+
+    def __init__(self, log: Optional[CoordinatorLog] = None,
+                 prepare_timeout: float = DEFAULT_PREPARE_TIMEOUT,
+                 decision_timeout: float = DEFAULT_DECISION_TIMEOUT,
+                 max_workers: int = 32):
+        self.log = log if log is not None else CoordinatorLog()
+        self.prepare_timeout = prepare_timeout
+        self.decision_timeout = decision_timeout
+        self.participants: Dict[int, object] = {}
+        self.timeouts: Dict[int, float] = {}
+        # Committed in memory, acknowledged by only some participants
+        self.unacknowledged: Dict[str, Set[int]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="2pc")
+        self.stats = {"committed": 0, "aborted": 0, "prepare_timeouts": 0}
+
+    def register(self, node_id: int, participant, timeout: Optional[float] = None):
+        """Add a participant; timeout overrides prepare_timeout for it"""
+        self.participants[node_id] = participant
+        if timeout is not None:
+            self.timeouts[node_id] = timeout
+
+    def _fan_out(self, node_ids: Iterable[int], call: Callable[[int], object],
+                 timeout_for: Callable[[int], float]) -> Dict[int, Optional[object]]:
+        """call(node_id) for all nodes concurrently
+
+        Returns node_id -> result; None for nodes that raised or did not
+        answer within their timeout (their calls are left to finish in
+        the background).
+        """
+        start = time.monotonic()
+        futures = {node_id: self._executor.submit(call, node_id) for node_id in node_ids}
+        results: Dict[int, Optional[object]] = {}
+        # Wait for the earliest deadline first; everyone runs meanwhile
+        for node_id in sorted(futures, key=timeout_for):
+            remaining = start + timeout_for(node_id) - time.monotonic()
+            try:
+                results[node_id] = futures[node_id].result(timeout=max(remaining, 0.0))
+            except Exception as e:
+                print(f"2PC: node {node_id} failed: {e!r}")
+                results[node_id] = None
+        return results
+
+    def prepare(self, tx_id: str, node_ids: Iterable[int],
+                prepare_on_node: Optional[Callable[[str, int], bool]] = None) -> Dict[int, bool]:
+        """Phase 1: collect votes from all nodes in parallel
+
+        Args:
+            prepare_on_node: sends PREPARE to one node; defaults to the
+                registered participant's prepare_transaction()
+
+        Returns:
+            node_id -> vote; a node that timed out or failed votes False
+        """
+        if prepare_on_node is None:
+            prepare_on_node = self.prepare_on_node
+        results = self._fan_out(list(node_ids), lambda node_id: prepare_on_node(tx_id, node_id),
+                                lambda node_id: self.timeouts.get(node_id, self.prepare_timeout))
+        votes = {}
+        for node_id, vote in results.items():
+            if vote is None:
+                self.stats["prepare_timeouts"] += 1
+            votes[node_id] = bool(vote)
+        return votes
+
+    def prepare_on_node(self, tx_id: str, node_id: int) -> bool:
+        participant = self.participants.get(node_id)
+        if participant is None:
+            return False
+        return participant.prepare_transaction(tx_id)
+
+    def commit(self, tx_id: str, node_ids: Iterable[int]) -> bool:
+        """Phase 2 after unanimous YES: force the decision, then tell everyone
+
+        Returns True once the decision is durable, whether or not every
+        participant acknowledged yet; stragglers get it from recover().
+        """
+        node_ids = list(node_ids)
+        self.log.log_commit(tx_id, node_ids)
+        self.stats["committed"] += 1
+        self._send_commit(tx_id, node_ids)
+        return True
+
+    def abort(self, tx_id: str, node_ids: Iterable[int]):
+        """Phase 2 after any NO or timeout
+
+        Presumed abort logs nothing and does not wait for acknowledgements:
+        a participant that misses the ABORT learns it from outcome().
+        """
+        self.stats["aborted"] += 1
+        for node_id in node_ids:
+            if node_id in self.participants:
+                self._executor.submit(self._decide, node_id, tx_id, False)
+
+    def run(self, tx_id: str, node_ids: Iterable[int]) -> bool:
+        """Both phases; True if the transaction committed"""
+        node_ids = list(node_ids)
+        votes = self.prepare(tx_id, node_ids)
+        if all(votes.values()):
+            return self.commit(tx_id, node_ids)
+        self.abort(tx_id, node_ids)
+        return False
+
+    def _decide(self, node_id: int, tx_id: str, commit: bool) -> bool:
+        participant = self.participants[node_id]
+        if commit:
+            participant.commit_transaction(tx_id)
+        else:
+            participant.abort_transaction(tx_id)
+        # Any answer is an acknowledgement: participants ignore repeats
+        return True
+
+    def _send_commit(self, tx_id: str, node_ids: List[int]):
+        acks = self._fan_out(node_ids, lambda node_id: self._decide(node_id, tx_id, True),
+                             lambda node_id: self.decision_timeout)
+        missing = {node_id for node_id, ack in acks.items() if not ack}
+        if missing:
+            self.unacknowledged[tx_id] = missing
+        else:
+            self.unacknowledged.pop(tx_id, None)
+            self.log.log_end(tx_id)
+
+    def outcome(self, tx_id: str) -> str:
+        """What a participant in doubt should do: "commit" or "abort" """
+        return "commit" if self.log.is_committed(tx_id) else "abort"
+
+    def recover(self) -> int:
+        """Resend COMMIT for every decided, unacknowledged transaction
+
+        Call on startup once participants are registered, or any time to
+        retry stragglers. Returns how many transactions are still pending.
+        """
+        for tx_id, node_ids in list(self.log.pending.items()):
+            missing = self.unacknowledged.get(tx_id, set(node_ids))
+            self._send_commit(tx_id, [n for n in node_ids if n in missing])
+        return len(self.log.pending)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, pending=len(self.log.pending),
+                    forced_writes=self.log.forced_writes)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.log.close()
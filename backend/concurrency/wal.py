@@ -0,0 +1,216 @@
+# FILE: backend/concurrency/wal.py
+# ============================================================================
+
+"""
+Transaction Write-Ahead Log
+
+Makes TransactionManager's multi-version store durable. Every write a
+transaction buffers is logged with its before and after image, followed
+by a PREPARE (2PC participants), COMMIT or ABORT record. A commit only
+returns once its COMMIT record is on disk; commits arriving while an
+fsync is running are covered by the next one, so concurrent commits
+share fsyncs.
+
+Records are [length][crc32][JSON body] with a log sequence number (LSN)
+in the body; a torn or corrupt tail is cut off on open. Keys must be
+strings and values JSON-serialisable.
+
+A checkpoint writes the latest committed value of every key plus the
+write sets of still-running transactions to a snapshot file, then starts
+a new, empty log. Recovery loads the snapshot and replays only the log
+written since, so it scales with the log tail. During replay, committed
+transactions are redone in commit order. Prepared transactions come back
+prepared, waiting for the coordinator's decision. In-flight ones are
+undone and their ABORT is logged. The store defers writes to commit, so
+undoing an in-flight transaction means dropping its buffered writes.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# body length, crc32
+WAL_RECORD_HEADER = struct.Struct("<II")
+
+# Checkpoint after this many log records
+DEFAULT_CHECKPOINT_INTERVAL = 10_000
+
+
+class CorruptLogError(Exception):
+    """Raised when a checkpoint file fails its checksum"""
+
+
+def _encode(record: Dict) -> bytes:
+    body = json.dumps(record, separators=(",", ":")).encode()
+    return WAL_RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def _decode_all(data: bytes) -> Tuple[List[Dict], int]:
+    """Records in data and the offset where the valid prefix ends"""
+    records = []
+    offset = 0
+    while offset + WAL_RECORD_HEADER.size <= len(data):
+        length, crc = WAL_RECORD_HEADER.unpack_from(data, offset)
+        start = offset + WAL_RECORD_HEADER.size
+        body = data[start:start + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        records.append(json.loads(body))
+        offset = start + length
+    return records, offset
+
+
+class TransactionLog:
+    """Undo/redo log plus checkpoint for one TransactionManager
+
+    Files: <directory>/tx.wal (the log) and <directory>/tx.checkpoint
+    """
+
+    def __init__(self, directory: str, checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        self.directory = directory
+        self.log_path = os.path.join(directory, "tx.wal")
+        self.checkpoint_path = os.path.join(directory, "tx.checkpoint")
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.Lock()       # Appends
+        self._sync_lock = threading.Lock()  # fsync, one at a time
+        self._next_lsn = 0
+        self._written_lsn = -1
+        self._synced_lsn = -1
+        self.records_since_checkpoint = 0
+        self.fsyncs = 0
+        self.torn_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._file = self._open()
+
+    def _open(self):
+        """Open the log for appending, cutting off a torn tail"""
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                data = f.read()
+            records, valid = _decode_all(data)
+            if records:
+                self._next_lsn = records[-1]["lsn"] + 1
+            self.records_since_checkpoint = len(records)
+            if valid < len(data):
+                self.torn_bytes = len(data) - valid
+                print(f"Transaction log {self.log_path}: dropped {self.torn_bytes} torn bytes")
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(valid)
+        checkpoint = self.read_checkpoint()
+        if checkpoint is not None:
+            self._next_lsn = max(self._next_lsn, checkpoint["lsn"])
+        self._written_lsn = self._synced_lsn = self._next_lsn - 1
+        return open(self.log_path, "ab")
+
+    def append(self, record: Dict, sync: bool = False) -> int:
+        """Append a record; with sync, return only once it is on disk"""
+        with self._lock:
+            lsn = record["lsn"] = self._next_lsn
+            self._next_lsn += 1
+            self._file.write(_encode(record))
+            self._written_lsn = lsn
+            self.records_since_checkpoint += 1
+        if sync:
+            self.sync(lsn)
+        return lsn
+
+    def sync(self, lsn: Optional[int] = None):
+        """Make everything up to lsn (default: all appended) durable,
+        sharing fsyncs between callers"""
+        if lsn is None:
+            lsn = self._written_lsn
+        if self._synced_lsn >= lsn:
+            return
+        with self._sync_lock:
+            # Whoever held the lock before us may have synced our record
+            if self._synced_lsn >= lsn:
+                return
+            with self._lock:
+                self._file.flush()
+                upto = self._written_lsn
+            os.fsync(self._file.fileno())
+            self._synced_lsn = upto
+            self.fsyncs += 1
+
+    def log_write(self, tx_id: str, key: str, before: Any, after: Any, deleted: bool = False):
+        self.append({"type": "write", "tx_id": tx_id, "key": key,
+                     "before": before, "after": after, "deleted": deleted})
+
+    def log_prepare(self, tx_id: str, snapshot_ts: int, coordinator_id: Optional[int] = None,
+                    sync: bool = True) -> int:
+        """Forced unless sync=False, when the caller must sync(lsn) before voting
+
+        coordinator_id is the node recovery asks for the decision.
+        """
+        return self.append({"type": "prepare", "tx_id": tx_id, "snapshot_ts": snapshot_ts,
+                            "coordinator": coordinator_id}, sync=sync)
+
+    def log_commit(self, tx_id: str, commit_ts: int, sync: bool = True) -> int:
+        """Forced unless sync=False, when the caller must sync(lsn) before acknowledging"""
+        return self.append({"type": "commit", "tx_id": tx_id, "commit_ts": commit_ts},
+                           sync=sync)
+
+    def log_abort(self, tx_id: str):
+        # Not forced: an ABORT lost in a crash is inferred again on recovery
+        self.append({"type": "abort", "tx_id": tx_id})
+
+    def records(self) -> Iterator[Dict]:
+        """Records currently in the log, oldest first"""
+        with self._lock:
+            self._file.flush()
+        with open(self.log_path, "rb") as f:
+            records, _ = _decode_all(f.read())
+        return iter(records)
+
+    def checkpoint(self, state: Dict[str, Any], last_commit: int,
+                   active: Dict[str, Dict]):
+        """Persist a snapshot and start an empty log
+
+        Args:
+            state: latest committed value per key
+            last_commit: store timestamp the snapshot reflects
+            active: tx_id -> {"status", "snapshot_ts", "coordinator", "writes", "deleted"}
+                for transactions not finished yet
+
+        The caller must keep commits out until this returns. A crash
+        after the snapshot is in place but before the log is emptied
+        leaves records below its "lsn"; replay skips those.
+        """
+        with self._sync_lock, self._lock:
+            body = json.dumps({"lsn": self._next_lsn, "last_commit": last_commit,
+                               "state": state, "active": active},
+                              separators=(",", ":")).encode()
+            tmp_path = self.checkpoint_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(WAL_RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.checkpoint_path)
+            # The snapshot covers everything logged so far
+            self._file.close()
+            self._file = open(self.log_path, "wb")
+            os.fsync(self._file.fileno())
+            self._synced_lsn = self._written_lsn
+            self.records_since_checkpoint = 0
+
+    def read_checkpoint(self) -> Optional[Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, "rb") as f:
+            data = f.read()
+        records, valid = _decode_all(data)
+        if not records or valid != len(data):
+            raise CorruptLogError(f"Checkpoint {self.checkpoint_path} is corrupt")
+        return records[0]
+
+    def needs_checkpoint(self) -> bool:
+        return self.records_since_checkpoint >= self.checkpoint_interval
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
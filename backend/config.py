@@ -15,6 +15,22 @@ class Config:
     # Runtime node objects stored here
     REGISTERED_NODES = []
 
+    # Per-node event log (ring buffer capacity)
+    EVENT_LOG_CAPACITY = int(os.getenv("EVENT_LOG_CAPACITY", "1000"))
+
+    # Persistent event segments for this node
+    EVENT_STORE_DIR = os.getenv("EVENT_STORE_DIR", f"./node_{NODE_ID}_events")
+    EVENT_SEGMENT_BYTES = int(os.getenv("EVENT_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+
+    # Message bus transport between node processes: "none", "unix" or "tcp"
+    TRANSPORT = os.getenv("TRANSPORT", "none")
+    TRANSPORT_SOCKET_DIR = os.getenv("TRANSPORT_SOCKET_DIR", "/tmp")
+    TRANSPORT_BASE_PORT = int(os.getenv("TRANSPORT_BASE_PORT", "7000"))
+
+    # Hinted handoff: writes held for down replicas, per replica at most HINTS_PER_REPLICA
+    HINTS_DIR = os.getenv("HINTS_DIR", f"./node_{NODE_ID}_hints")
+    HINTS_PER_REPLICA = int(os.getenv("HINTS_PER_REPLICA", "10000"))
+
     # Database
     DATABASE_URL = f"sqlite:///./node_{NODE_ID}_food_delivery.db"
     PRIMARY_NODE_ID = 1
@@ -4,19 +4,41 @@ Core Distributed System Components
 This module provides the fundamental building blocks for distributed systems:
 
 - DistributedNode: Base class for distributed node instances
-- LamportClock: Logical clock implementation for event ordering
-- message_queue: Inter-node communication mechanism
+- HybridLogicalClock: Hybrid logical clock for event ordering
+  (LamportClock is kept as an alias)
+- message_queue: Asyncio-native inter-node message bus with queued
+  topic subscribers (Subscription)
+- SocketTransport: Unix/TCP socket transport so nodes run as separate processes
+- EventRingBuffer: Fixed-capacity per-node event log
+- query_events: Indexed, cursor-paginated event queries across nodes
+- EventSegmentStore: Persistent, memory-mapped event history per node
+- VersionedKVStore: Indexed per-key version chains with compaction,
+  the data behind ConsistencyManager
 
 These components form the foundation for all distributed operations.
 """
 
 from .node import DistributedNode
-from .clock import LamportClock
-from .message_queue import message_queue, InMemoryMessageQueue
+from .clock import HybridLogicalClock, LamportClock
+from .event_buffer import EventRecord, EventRingBuffer
+from .event_query import query_events
+from .event_store import EventSegmentStore
+from .kv_store import VersionedKVStore
+from .message_queue import message_queue, AsyncMessageBus, InMemoryMessageQueue, Subscription
+from .transport import SocketTransport
 
 __all__ = [
     'DistributedNode',
+    'HybridLogicalClock',
     'LamportClock', 
+    'EventRecord',
+    'EventRingBuffer',
+    'query_events',
+    'EventSegmentStore',
+    'VersionedKVStore',
     'message_queue',
-    'InMemoryMessageQueue'
+    'AsyncMessageBus',
+    'InMemoryMessageQueue',
+    'Subscription',
+    'SocketTransport'
 ]
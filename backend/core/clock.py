@@ -1,29 +1,109 @@
 # FILE: backend/core/clock.py
 # ============================================================================
 
-import time
+import itertools
 import threading
+import time
+
+# 64-bit timestamp: 48 bits of wall-clock milliseconds, 16 bits of logical counter.
+# Current values are above 2**53, past what a JSON number keeps exactly in
+# JavaScript, so API responses carry them as decimal strings.
+LOGICAL_BITS = 16
+LOGICAL_MASK = (1 << LOGICAL_BITS) - 1
+
+# Timestamps handed out per lock-free block before the slow path runs again
+BLOCK_SIZE = 1024
+
+
+def encode_hlc(wall_ms: int, logical: int = 0) -> int:
+    """Pack wall-clock milliseconds and a logical counter into one int"""
+    return (wall_ms << LOGICAL_BITS) + logical
+
+
+def decode_hlc(timestamp: int):
+    """Unpack a timestamp into (wall_ms, logical)"""
+    return timestamp >> LOGICAL_BITS, timestamp & LOGICAL_MASK
+
+
+def _now() -> int:
+    return encode_hlc(int(time.time() * 1000))
+
+
+class _Block:
+    """Range [base, base + BLOCK_SIZE) of timestamps issued without locking"""
+
+    __slots__ = ("base", "expires", "counter", "last")
+
+    def __init__(self, base: int):
+        self.base = base
+        # Epoch seconds at which the block's millisecond ends
+        self.expires = ((base >> LOGICAL_BITS) + 1) / 1000.0
+        self.counter = itertools.count()
+        self.last = 0  # Latest timestamp issued from this block, 0 for none
+
+
+class HybridLogicalClock:
+    """
+    Hybrid logical clock for distributed event ordering
+
+    Timestamps are 64-bit ints that stay close to wall-clock time, never go
+    backwards, and respect causality: update() with a received timestamp
+    always returns something larger. Comparing (timestamp, node_id) gives a
+    total order across nodes.
+
+    Local ticks take a timestamp from the current block with a single
+    next() on itertools.count, which is atomic under the GIL, so there is
+    no lock on the fast path. The lock is taken only when a block is used
+    up, wall-clock time moves past it, or a remote timestamp is merged.
+    Blocks never overlap, so every tick on a clock is unique.
+    """
 
-class LamportClock:
-    """Lamport Logical Clock for distributed event ordering"""
-    
     def __init__(self):
-        self.counter = 0
         self.lock = threading.Lock()
-    
+        self._block = _Block(_now())
+
     def tick(self) -> int:
         """Increment clock on local event"""
-        with self.lock:
-            self.counter += 1
-            return self.counter
-    
+        block = self._block
+        n = next(block.counter)
+        if n < BLOCK_SIZE and time.time() < block.expires:
+            block.last = timestamp = block.base + n
+            return timestamp
+        return self._advance(_now())
+
     def update(self, received_time: int) -> int:
-        """Update clock on receiving message"""
+        """Update clock on message receive"""
+        block = self._block
+        if block.base > received_time:
+            n = next(block.counter)
+            if n < BLOCK_SIZE and time.time() < block.expires:
+                block.last = timestamp = block.base + n
+                return timestamp
+        return self._advance(max(_now(), received_time + 1))
+
+    def _advance(self, floor: int) -> int:
+        """Slow path: start a block at or above `floor`"""
         with self.lock:
-            self.counter = max(self.counter, received_time) + 1
-            return self.counter
-    
+            block = self._block
+            # Another thread may already have moved to a suitable block
+            if block.base >= floor:
+                n = next(block.counter)
+                if n < BLOCK_SIZE:
+                    block.last = timestamp = block.base + n
+                    return timestamp
+            block = _Block(max(floor, block.base + BLOCK_SIZE))
+            block.last = timestamp = block.base + next(block.counter)
+            self._block = block
+            return timestamp
+
     def get_time(self) -> int:
-        """Get current logical time"""
-        with self.lock:
-            return self.counter
\ No newline at end of file
+        """Most recent timestamp this clock issued, 0 before the first
+
+        Read without the lock, so with concurrent ticks it may trail the
+        very latest by a few; it is always a value that was issued.
+        """
+        return self._block.last
+
+
+# Kept for existing imports; both node and standalone clocks are now HLCs
+LamportClock = HybridLogicalClock
@@ -0,0 +1,296 @@
+# FILE: backend/core/codec.py
+# ============================================================================
+
+"""
+Binary Wire Format
+
+Compact, schema-versioned encoding for inter-node messages and
+replication write records, replacing json.dumps on those paths.
+
+Every payload starts with a 2-byte header (schema version, kind):
+
+    message:      [header][fields dict]
+    write record: [header][operation u8][timestamp f64][table][record_id][data dict]
+
+Values carry a 1-byte tag. Integers are zigzag varints, floats are
+8-byte doubles, and dict keys plus common strings (message types, table
+and column names, order statuses) are sent as a varint index into NAMES
+instead of their text. NAMES is append-only within a schema version;
+removing or reordering entries requires bumping SCHEMA_VERSION.
+"""
+
+import struct
+from typing import Any, Dict, Tuple
+
+SCHEMA_VERSION = 1
+
+HEADER = struct.Struct("<BB")
+WRITE_HEADER = struct.Struct("<Bd")
+DOUBLE = struct.Struct("<d")
+
+KIND_MESSAGE = 1
+KIND_WRITE_RECORD = 2
+
+OPERATIONS = ("INSERT", "UPDATE", "DELETE")
+_OPERATION_IDS = {name: i for i, name in enumerate(OPERATIONS)}
+
+NAMES = (
+    # message fields
+    "type", "from_node", "to_node", "leader_id", "timestamp", "seq", "data",
+    "node_id", "count", "payload_bytes", "elapsed", "followers", "operation",
+    "table", "record_id", "priority", "term",
+    # message types
+    "ELECTION", "ANSWER", "OK", "COORDINATOR", "HEARTBEAT", "REPLICATE", "ACK",
+    "READY", "REPORT", "SHUTDOWN", "START_ELECTION", "BENCH_REPLICATION",
+    # tables
+    "restaurants", "menu_items", "users", "orders", "order_items",
+    "delivery_agents", "event_log", "replication_log",
+    # columns
+    "id", "restaurant_id", "name", "cuisine", "rating", "is_active", "created_at",
+    "item_id", "price", "quantity_available", "user_id", "email", "phone",
+    "address", "order_id", "total_amount", "status", "logical_timestamp",
+    "processed_by_node", "item_name", "quantity", "agent_id", "is_available",
+    "current_location", "assigned_order_id", "event_type", "description",
+    "logical_time", "physical_time", "version",
+    # order statuses
+    "pending", "confirmed", "preparing", "out_for_delivery", "delivered", "cancelled",
+)
+_NAME_IDS = {name: i for i, name in enumerate(NAMES)}
+
+# Value tags
+T_NONE = 0
+T_FALSE = 1
+T_TRUE = 2
+T_INT = 3
+T_FLOAT = 4
+T_STR = 5
+T_NAME = 6
+T_BYTES = 7
+T_LIST = 8
+T_DICT = 9
+
+# Single-byte varints, precomputed
+_SMALL = [bytes([i]) for i in range(128)]
+
+
+class CodecError(ValueError):
+    """Raised when a payload cannot be decoded"""
+
+
+# ----------------------------------------------------------------------
+# Encoding
+
+def _varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _encode_name(out: bytearray, name: str):
+    """Interned names as id << 1, anything else as (len << 1) | 1 + utf-8"""
+    name_id = _NAME_IDS.get(name)
+    if name_id is not None:
+        _varint(out, name_id << 1)
+    else:
+        data = name.encode("utf-8")
+        _varint(out, (len(data) << 1) | 1)
+        out += data
+
+
+def _encode_value(out: bytearray, value: Any):
+    kind = type(value)
+    if kind is int:
+        n = (value << 1) if value >= 0 else ((-value << 1) - 1)
+        out.append(T_INT)
+        if n < 128:
+            out += _SMALL[n]
+        else:
+            _varint(out, n)
+    elif kind is str:
+        name_id = _NAME_IDS.get(value)
+        if name_id is not None:
+            out.append(T_NAME)
+            _varint(out, name_id)
+        else:
+            data = value.encode("utf-8")
+            out.append(T_STR)
+            _varint(out, len(data))
+            out += data
+    elif kind is float:
+        out.append(T_FLOAT)
+        out += DOUBLE.pack(value)
+    elif value is None:
+        out.append(T_NONE)
+    elif kind is bool:
+        out.append(T_TRUE if value else T_FALSE)
+    elif kind is dict:
+        out.append(T_DICT)
+        _encode_fields(out, value)
+    elif kind is list or kind is tuple:
+        out.append(T_LIST)
+        _varint(out, len(value))
+        for item in value:
+            _encode_value(out, item)
+    elif kind is bytes or kind is bytearray or kind is memoryview:
+        out.append(T_BYTES)
+        _varint(out, len(value))
+        out += value
+    elif isinstance(value, int):
+        _encode_value(out, int(value))
+    elif isinstance(value, float):
+        _encode_value(out, float(value))
+    else:
+        # Same fallback as json.dumps(default=str)
+        _encode_value(out, str(value))
+
+
+def _encode_fields(out: bytearray, fields: Dict):
+    _varint(out, len(fields))
+    for key, value in fields.items():
+        _encode_name(out, key if type(key) is str else str(key))
+        _encode_value(out, value)
+
+
+def encode_message(message: Dict) -> bytes:
+    """Encode an inter-node message dict"""
+    out = bytearray(HEADER.pack(SCHEMA_VERSION, KIND_MESSAGE))
+    _encode_fields(out, message)
+    return bytes(out)
+
+
+def encode_write_record(record: Dict) -> bytes:
+    """Encode a replication write record (operation, table, record_id, data, timestamp)"""
+    out = bytearray(HEADER.pack(SCHEMA_VERSION, KIND_WRITE_RECORD))
+    out += WRITE_HEADER.pack(_OPERATION_IDS[record['operation']], record['timestamp'])
+    _encode_name(out, record['table'])
+    _encode_value(out, record.get('record_id'))
+    _encode_fields(out, record['data'])
+    return bytes(out)
+
+
+# ----------------------------------------------------------------------
+# Decoding
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    byte = buf[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    result, shift = byte & 0x7F, 7
+    while True:
+        pos += 1
+        byte = buf[pos]
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos + 1
+        shift += 7
+
+
+def _decode_name(buf, pos: int) -> Tuple[str, int]:
+    n, pos = _read_varint(buf, pos)
+    if n & 1:
+        end = pos + (n >> 1)
+        if end > len(buf):
+            raise IndexError("name runs past end of payload")
+        return str(buf[pos:end], "utf-8"), end
+    return NAMES[n >> 1], pos
+
+
+def _decode_value(buf, pos: int) -> Tuple[Any, int]:
+    tag = buf[pos]
+    pos += 1
+    if tag == T_INT:
+        n = buf[pos]
+        if n < 0x80:
+            pos += 1
+        else:
+            n, pos = _read_varint(buf, pos)
+        return (n >> 1) ^ -(n & 1), pos
+    if tag == T_NAME:
+        n = buf[pos]
+        if n < 0x80:
+            return NAMES[n], pos + 1
+        n, pos = _read_varint(buf, pos)
+        return NAMES[n], pos
+    if tag == T_STR:
+        n, pos = _read_varint(buf, pos)
+        if pos + n > len(buf):
+            raise IndexError("string runs past end of payload")
+        return str(buf[pos:pos + n], "utf-8"), pos + n
+    if tag == T_FLOAT:
+        return DOUBLE.unpack_from(buf, pos)[0], pos + 8
+    if tag == T_NONE:
+        return None, pos
+    if tag == T_TRUE:
+        return True, pos
+    if tag == T_FALSE:
+        return False, pos
+    if tag == T_DICT:
+        return _decode_fields(buf, pos)
+    if tag == T_LIST:
+        n, pos = _read_varint(buf, pos)
+        items = []
+        for _ in range(n):
+            item, pos = _decode_value(buf, pos)
+            items.append(item)
+        return items, pos
+    if tag == T_BYTES:
+        n, pos = _read_varint(buf, pos)
+        if pos + n > len(buf):
+            raise IndexError("bytes run past end of payload")
+        return bytes(buf[pos:pos + n]), pos + n
+    raise CodecError(f"Unknown value tag: {tag}")
+
+
+def _decode_fields(buf, pos: int) -> Tuple[Dict, int]:
+    count, pos = _read_varint(buf, pos)
+    fields = {}
+    for _ in range(count):
+        n = buf[pos]
+        if n < 0x80 and not n & 1:
+            key = NAMES[n >> 1]
+            pos += 1
+        else:
+            key, pos = _decode_name(buf, pos)
+        fields[key], pos = _decode_value(buf, pos)
+    return fields, pos
+
+
+def _check_header(buf, kind: int):
+    if len(buf) < HEADER.size:
+        raise CodecError("Truncated payload")
+    version, actual = HEADER.unpack_from(buf, 0)
+    if version != SCHEMA_VERSION:
+        raise CodecError(f"Unsupported schema version: {version}")
+    if actual != kind:
+        raise CodecError(f"Expected payload kind {kind}, got {actual}")
+
+
+def decode_message(payload) -> Dict:
+    """Decode a payload produced by encode_message"""
+    _check_header(payload, KIND_MESSAGE)
+    try:
+        return _decode_fields(payload, HEADER.size)[0]
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise CodecError(f"Corrupt message: {e}")
+
+
+def decode_write_record(payload) -> Dict:
+    """Decode a payload produced by encode_write_record"""
+    _check_header(payload, KIND_WRITE_RECORD)
+    try:
+        operation, timestamp = WRITE_HEADER.unpack_from(payload, HEADER.size)
+        table, pos = _decode_name(payload, HEADER.size + WRITE_HEADER.size)
+        record_id, pos = _decode_value(payload, pos)
+        data, _ = _decode_fields(payload, pos)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise CodecError(f"Corrupt write record: {e}")
+    record = {
+        'operation': OPERATIONS[operation],
+        'table': table,
+        'data': data,
+        'timestamp': timestamp
+    }
+    if record_id is not None:
+        record['record_id'] = record_id
+    return record
@@ -0,0 +1,246 @@
+# FILE: backend/core/event_buffer.py
+# ============================================================================
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+
+class EventRecord:
+    """Compact event record stored in a node's event log"""
+
+    __slots__ = ("node_id", "event_type", "description",
+                 "logical_time", "physical_time", "data")
+
+    FIELDS = ("node_id", "event_type", "description",
+              "logical_time", "physical_time", "timestamp", "data")
+
+    def __init__(self, node_id: int, event_type: str, description: str,
+                 logical_time: int, physical_time: float,
+                 data: Optional[Dict[str, Any]] = None):
+        self.node_id = node_id
+        self.event_type = event_type
+        self.description = description
+        self.logical_time = logical_time
+        self.physical_time = physical_time
+        self.data = data or {}
+
+    @property
+    def timestamp(self) -> str:
+        """ISO timestamp, derived from physical_time on demand"""
+        return datetime.fromtimestamp(self.physical_time).isoformat()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access kept for callers that treat events as dicts"""
+        if key not in self.FIELDS:
+            return default
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return event as a JSON-serializable dictionary
+
+        logical_time is a string: HLC timestamps do not fit a JSON number
+        exactly (see core/clock.py).
+        """
+        return {
+            "node_id": self.node_id,
+            "event_type": self.event_type,
+            "description": self.description,
+            "logical_time": str(self.logical_time),
+            "physical_time": self.physical_time,
+            "timestamp": self.timestamp,
+            "data": self.data
+        }
+
+    def __repr__(self) -> str:
+        return (f"EventRecord(node_id={self.node_id}, event_type={self.event_type!r}, "
+                f"logical_time={self.logical_time})")
+
+
+# (order_by value, node_id, sequence number) - total order used for merging
+EventKey = Tuple[Any, int, int]
+
+
+class _SeqIndex:
+    """Ascending sequence numbers of one event type, pruned from the head"""
+
+    __slots__ = ("seqs", "head")
+
+    def __init__(self):
+        self.seqs = []
+        self.head = 0
+
+    def prune(self, oldest_seq: int):
+        """Drop sequence numbers that the ring buffer has overwritten"""
+        seqs = self.seqs
+        head = self.head
+        while head < len(seqs) and seqs[head] < oldest_seq:
+            head += 1
+        if head > 64 and head * 2 > len(seqs):
+            # Rebind instead of deleting in place so running scans keep a stable view
+            self.seqs = seqs[head:]
+            head = 0
+        self.head = head
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+
+
+class EventRingBuffer:
+    """Fixed-capacity ring buffer holding the most recent events of a node
+
+    Sequence order doubles as the time index: events are stamped and
+    appended under the buffer lock, so logical_time and physical_time are
+    non-decreasing in sequence order and can be binary searched. A
+    secondary index maps each event_type to its sequence numbers.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next = 0  # total number of events ever appended
+        self._by_type: Dict[str, _SeqIndex] = {}
+        self._last_time = 0.0
+        self.lock = threading.RLock()
+
+    def append(self, record: EventRecord):
+        """Append event, overwriting the oldest one when full (O(1))"""
+        with self.lock:
+            # Wall clock may step backwards; keep the time index sorted
+            if record.physical_time < self._last_time:
+                record.physical_time = self._last_time
+            self._last_time = record.physical_time
+
+            seq = self._next
+            self._slots[seq % self.capacity] = record
+            self._next = seq + 1
+
+            index = self._by_type.get(record.event_type)
+            if index is None:
+                index = self._by_type[record.event_type] = _SeqIndex()
+            index.seqs.append(seq)
+            index.prune(self._next - self.capacity)
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    def __bool__(self) -> bool:
+        return self._next > 0
+
+    @property
+    def total_appended(self) -> int:
+        """Number of events appended since creation or last clear"""
+        return self._next
+
+    def __iter__(self) -> Iterator[EventRecord]:
+        """Iterate oldest to newest without copying the buffer"""
+        end = self._next
+        slots = self._slots
+        capacity = self.capacity
+        for seq in range(max(0, end - capacity), end):
+            yield slots[seq % capacity]
+
+    def __reversed__(self) -> Iterator[EventRecord]:
+        """Iterate newest to oldest without copying the buffer"""
+        end = self._next
+        slots = self._slots
+        capacity = self.capacity
+        for seq in range(end - 1, max(0, end - capacity) - 1, -1):
+            yield slots[seq % capacity]
+
+    def latest(self) -> Optional[EventRecord]:
+        """Return the most recently appended event"""
+        if self._next == 0:
+            return None
+        return self._slots[(self._next - 1) % self.capacity]
+
+    def clear(self):
+        """Drop all events"""
+        with self.lock:
+            self._slots = [None] * self.capacity
+            self._next = 0
+            self._by_type = {}
+
+    def scan(self, event_types: Optional[Iterable[str]] = None,
+             start_time: Optional[float] = None, end_time: Optional[float] = None,
+             order_by: str = "physical_time",
+             before: Optional[EventKey] = None) -> Tuple[int, Iterator[Tuple[EventKey, EventRecord]]]:
+        """
+        Find matching events without walking the whole buffer
+
+        Args:
+            event_types: Only include these event types (uses the type index)
+            start_time: Inclusive lower bound on physical_time
+            end_time: Inclusive upper bound on physical_time
+            order_by: "physical_time" or "logical_time"
+            before: Exclusive upper bound on the (order_by, node_id, seq) key,
+                    used to resume from a pagination cursor
+
+        Returns:
+            (number of events matching the filters, ignoring `before`,
+             lazy iterator of (key, record) pairs newest first)
+        """
+        with self.lock:
+            slots = self._slots
+            capacity = self.capacity
+            oldest = max(0, self._next - capacity)
+
+            physical_time = lambda seq: slots[seq % capacity].physical_time
+            sort_key = lambda seq: self._key(slots[seq % capacity], order_by, seq)
+
+            if event_types is None:
+                views = [(range(oldest, self._next), 0)]
+            else:
+                views = []
+                for event_type in set(event_types):
+                    index = self._by_type.get(event_type)
+                    if index is None:
+                        continue
+                    index.prune(oldest)
+                    views.append((index.seqs, index.head))
+
+            ranges = []
+            count = 0
+            for view, lo in views:
+                hi = len(view)
+                if start_time is not None:
+                    lo = bisect_left(view, start_time, lo, hi, key=physical_time)
+                if end_time is not None:
+                    hi = bisect_right(view, end_time, lo, hi, key=physical_time)
+                count += hi - lo
+                if before is not None:
+                    hi = bisect_left(view, before, lo, hi, key=sort_key)
+                if hi > lo:
+                    ranges.append((view, lo, hi))
+
+        streams = [self._iter_desc(slots, view, lo, hi, order_by) for view, lo, hi in ranges]
+        if len(streams) == 1:
+            return count, streams[0]
+        return count, heapq.merge(*streams, reverse=True)
+
+    @staticmethod
+    def _key(record: EventRecord, order_by: str, seq: int) -> EventKey:
+        return (getattr(record, order_by), record.node_id, seq)
+
+    def _iter_desc(self, slots: list, view: Sequence[int], lo: int, hi: int,
+                   order_by: str) -> Iterator[Tuple[EventKey, EventRecord]]:
+        capacity = self.capacity
+        for i in range(hi - 1, lo - 1, -1):
+            seq = view[i]
+            if seq < self._next - capacity:
+                # Overwritten by appends since the scan started
+                return
+            record = slots[seq % capacity]
+            yield self._key(record, order_by, seq), record
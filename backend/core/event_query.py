@@ -0,0 +1,99 @@
+# FILE: backend/core/event_query.py
+# ============================================================================
+
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
+
+from .event_buffer import EventKey, EventRingBuffer
+
+ORDER_FIELDS = ("physical_time", "logical_time")
+
+
+def encode_cursor(key: EventKey) -> str:
+    """Encode the key of the last returned event as an opaque cursor"""
+    value, node_id, seq = key
+    return f"{value!r}:{node_id}:{seq}"
+
+
+def decode_cursor(cursor: str, order_by: str) -> EventKey:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        value, node_id, seq = cursor.rsplit(":", 2)
+        parse = int if order_by == "logical_time" else float
+        return (parse(value), int(node_id), int(seq))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse epoch seconds or an ISO-8601 string into epoch seconds"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}")
+
+
+def query_events(nodes: Iterable, node_id: Optional[int] = None,
+                 event_types: Optional[Iterable[str]] = None,
+                 start_time: Optional[float] = None, end_time: Optional[float] = None,
+                 order_by: str = "physical_time", limit: int = 100,
+                 cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Newest-first page of events merged across node event logs
+
+    Each node's log is searched through its type and time indexes and the
+    per-node streams are k-way merged, stopping after `limit` rows, so a
+    page costs O(limit * log nodes) rather than a sort of every event.
+
+    Args:
+        nodes: Nodes whose event logs are queried
+        node_id: Only include events from this node
+        event_types: Only include these event types
+        start_time: Inclusive lower bound on physical_time (epoch seconds)
+        end_time: Inclusive upper bound on physical_time (epoch seconds)
+        order_by: "logical_time" (hybrid logical clock, causal total order)
+                  or "physical_time"
+        limit: Maximum number of events to return
+        cursor: next_cursor from a previous page
+
+    Returns:
+        Dict with events (as dicts), total matching count and next_cursor
+    """
+    if order_by not in ORDER_FIELDS:
+        raise ValueError(f"Invalid order_by: {order_by}")
+    if event_types is not None:
+        event_types = list(event_types)
+    before = decode_cursor(cursor, order_by) if cursor else None
+
+    total = 0
+    streams = []
+    for node in nodes:
+        if node_id is not None and getattr(node, 'node_id', None) != node_id:
+            continue
+        event_log = getattr(node, 'event_log', None)
+        if not isinstance(event_log, EventRingBuffer):
+            continue
+
+        count, stream = event_log.scan(event_types, start_time, end_time, order_by, before)
+        total += count
+        streams.append(stream)
+
+    # Fetch one extra row to know whether another page exists
+    page = list(islice(heapq.merge(*streams, reverse=True), max(limit, 0) + 1))
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    events: List[Dict[str, Any]] = [record.to_dict() for _, record in page]
+    return {
+        "events": events,
+        "total": total,
+        "next_cursor": encode_cursor(page[-1][0]) if has_more and page else None
+    }
@@ -0,0 +1,347 @@
+# FILE: backend/core/event_store.py
+# ============================================================================
+
+"""
+Persistent Event Segments
+
+Append-only binary segment files holding a node's event history.
+
+Segment layout:
+    [segment header][record header][body][record header][body]...
+
+Every record has a fixed-size header (length, crc32, seq, logical_time,
+physical_time) followed by a JSON body with event_type, description and
+data. Each segment has a sidecar .idx file with a sparse index entry for
+every `index_interval`-th record, so time-range and sequence lookups
+binary search the index and only decode the records they return. Reads
+go through mmap; a torn record left by a crash is truncated on open.
+A segment that falls out of max_segments while a scan still reads it is
+deleted when the last such scan finishes.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .event_buffer import EventRecord
+
+SEGMENT_MAGIC = b"ZEVT"
+SEGMENT_VERSION = 1
+
+# magic, version, reserved, node_id, base_seq, created_at
+SEGMENT_HEADER = struct.Struct("<4sHHIQd")
+# body length, crc32, seq, logical_time, physical_time
+RECORD_HEADER = struct.Struct("<IIQqd")
+# physical_time, seq, offset
+INDEX_ENTRY = struct.Struct("<dQQ")
+
+
+class CorruptSegmentError(Exception):
+    """Raised when a segment header cannot be read"""
+
+
+class _Segment:
+    """One segment file with its in-memory sparse index"""
+
+    def __init__(self, path: Path, base_seq: int):
+        self.path = path
+        self.index_path = path.with_suffix(".idx")
+        self.base_seq = base_seq
+        self.index_times: List[float] = []
+        self.index_seqs: List[int] = []
+        self.index_offsets: List[int] = []
+        self.size = 0
+        self.next_seq = base_seq
+        self.last_time = 0.0
+        self._mmap = None
+        self._mapped_size = 0
+        # Scans reading this segment; a retired one is deleted by the last
+        self.readers = 0
+        self.retired = False
+
+    @property
+    def first_time(self) -> float:
+        return self.index_times[0] if self.index_times else self.last_time
+
+    def add_index_entry(self, physical_time: float, seq: int, offset: int):
+        self.index_times.append(physical_time)
+        self.index_seqs.append(seq)
+        self.index_offsets.append(offset)
+
+    def view(self) -> Optional[mmap.mmap]:
+        """Read-only mapping covering at least the current size"""
+        if self._mmap is None or self._mapped_size < self.size:
+            # Readers may still hold the old mapping; it closes once unreferenced
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._mmap)
+        return self._mmap
+
+    def unmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mapped_size = 0
+
+
+class EventSegmentStore:
+    """Append-only, memory-mapped event history for one node"""
+
+    def __init__(self, directory: str, node_id: int,
+                 segment_bytes: int = 16 * 1024 * 1024,
+                 index_interval: int = 64,
+                 max_segments: Optional[int] = None,
+                 fsync: bool = False):
+        self.directory = Path(directory)
+        self.node_id = node_id
+        self.segment_bytes = segment_bytes
+        self.index_interval = index_interval
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.segments: List[_Segment] = []
+        self._file = None
+        self._index_file = None
+        self._open()
+
+    # ------------------------------------------------------------------
+    # Opening and crash recovery
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        for path in sorted(self.directory.glob("*.seg")):
+            segment = _Segment(path, int(path.stem))
+            self._load_segment(segment)
+            self.segments.append(segment)
+
+        if not self.segments:
+            self._roll(0)
+        else:
+            self._open_active(self.segments[-1])
+
+    def _load_segment(self, segment: _Segment):
+        """Load the sparse index and validate the segment tail"""
+        with open(segment.path, "rb") as f:
+            header = f.read(SEGMENT_HEADER.size)
+        if len(header) < SEGMENT_HEADER.size:
+            raise CorruptSegmentError(f"Truncated segment header: {segment.path}")
+        magic, version, _, node_id, base_seq, _ = SEGMENT_HEADER.unpack(header)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION or base_seq != segment.base_seq:
+            raise CorruptSegmentError(f"Bad segment header: {segment.path}")
+
+        file_size = segment.path.stat().st_size
+
+        # Keep index entries that point inside the file
+        if segment.index_path.exists():
+            data = segment.index_path.read_bytes()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            for physical_time, seq, offset in INDEX_ENTRY.iter_unpack(data[:usable]):
+                if offset >= file_size:
+                    break
+                segment.add_index_entry(physical_time, seq, offset)
+
+        # Walk records after the last index entry to find the real end
+        if segment.index_offsets:
+            offset, seq = segment.index_offsets[-1], segment.index_seqs[-1]
+            segment.last_time = segment.index_times[-1]
+        else:
+            offset, seq = SEGMENT_HEADER.size, segment.base_seq
+        segment.size = file_size
+
+        indexed_seq = segment.index_seqs[-1] if segment.index_seqs else None
+        view = segment.view() if file_size > SEGMENT_HEADER.size else None
+        while view is not None and offset + RECORD_HEADER.size <= file_size:
+            record = self._read_header(view, offset, file_size)
+            if record is None or record[2] != seq:
+                break
+            length, _, _, _, physical_time = record
+            if seq != indexed_seq and (seq - segment.base_seq) % self.index_interval == 0:
+                segment.add_index_entry(physical_time, seq, offset)
+            segment.last_time = physical_time
+            offset += RECORD_HEADER.size + length
+            seq += 1
+        segment.unmap()
+
+        if offset < file_size:
+            # Torn write from a crash: drop the partial record
+            with open(segment.path, "r+b") as f:
+                f.truncate(offset)
+        segment.size = offset
+        segment.next_seq = seq
+        while segment.index_offsets and segment.index_offsets[-1] >= offset:
+            segment.index_times.pop()
+            segment.index_seqs.pop()
+            segment.index_offsets.pop()
+
+        # Rewrite the sidecar so it matches what was recovered
+        with open(segment.index_path, "wb") as f:
+            for entry in zip(segment.index_times, segment.index_seqs, segment.index_offsets):
+                f.write(INDEX_ENTRY.pack(*entry))
+
+    @staticmethod
+    def _read_header(view, offset: int, limit: int) -> Optional[Tuple[int, int, int, int, float]]:
+        """Unpack and checksum one record, or None if it is torn"""
+        length, crc, seq, logical_time, physical_time = RECORD_HEADER.unpack_from(view, offset)
+        end = offset + RECORD_HEADER.size + length
+        if end > limit:
+            return None
+        if zlib.crc32(view[offset + 8:end]) != crc:
+            return None
+        return length, crc, seq, logical_time, physical_time
+
+    def _open_active(self, segment: _Segment):
+        self._file = open(segment.path, "ab", buffering=0)
+        self._index_file = open(segment.index_path, "ab", buffering=0)
+
+    def _roll(self, base_seq: int):
+        """Seal the active segment and start a new one"""
+        if self._file is not None:
+            self._file.close()
+            self._index_file.close()
+
+        path = self.directory / f"{base_seq:020d}.seg"
+        with open(path, "wb") as f:
+            f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, 0,
+                                        self.node_id, base_seq, time.time()))
+        segment = _Segment(path, base_seq)
+        segment.size = SEGMENT_HEADER.size
+        self.segments.append(segment)
+        self._open_active(segment)
+
+        if self.max_segments is not None:
+            while len(self.segments) > self.max_segments:
+                oldest = self.segments.pop(0)
+                if oldest.readers:
+                    # A scan still reads its mapping; the last one out deletes it
+                    oldest.retired = True
+                else:
+                    self._delete(oldest)
+
+    @staticmethod
+    def _delete(segment: _Segment):
+        segment.unmap()
+        segment.path.unlink(missing_ok=True)
+        segment.index_path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Writing
+
+    @property
+    def next_seq(self) -> int:
+        return self.segments[-1].next_seq
+
+    def append(self, event: EventRecord) -> int:
+        """Append event and return its sequence number"""
+        body = json.dumps([event.event_type, event.description, event.data],
+                          default=str).encode("utf-8")
+
+        with self.lock:
+            segment = self.segments[-1]
+            if segment.size + RECORD_HEADER.size + len(body) > self.segment_bytes \
+                    and segment.next_seq > segment.base_seq:
+                self._roll(segment.next_seq)
+                segment = self.segments[-1]
+
+            seq = segment.next_seq
+            header_tail = RECORD_HEADER.pack(0, 0, seq, event.logical_time, event.physical_time)[8:]
+            crc = zlib.crc32(body, zlib.crc32(header_tail))
+            self._file.write(struct.pack("<II", len(body), crc) + header_tail + body)
+
+            if (seq - segment.base_seq) % self.index_interval == 0:
+                segment.add_index_entry(event.physical_time, seq, segment.size)
+                self._index_file.write(INDEX_ENTRY.pack(event.physical_time, seq, segment.size))
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+            segment.size += RECORD_HEADER.size + len(body)
+            segment.next_seq = seq + 1
+            segment.last_time = event.physical_time
+            return seq
+
+    # ------------------------------------------------------------------
+    # Reading
+
+    def scan(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+             after_seq: int = -1) -> Iterator[Tuple[int, EventRecord]]:
+        """
+        Iterate (seq, event) oldest first within a time range
+
+        Args:
+            start_time: Inclusive lower bound on physical_time
+            end_time: Inclusive upper bound on physical_time
+            after_seq: Only return events with a larger sequence number
+        """
+        with self.lock:
+            segments = [(segment, segment.size, segment.next_seq) for segment in self.segments]
+            for segment, _, _ in segments:
+                segment.readers += 1
+        try:
+            yield from self._scan(segments, start_time, end_time, after_seq)
+        finally:
+            with self.lock:
+                for segment, _, _ in segments:
+                    segment.readers -= 1
+                    if segment.retired and not segment.readers:
+                        self._delete(segment)
+
+    def _scan(self, segments: List[Tuple[_Segment, int, int]], start_time: Optional[float],
+              end_time: Optional[float], after_seq: int) -> Iterator[Tuple[int, EventRecord]]:
+        for segment, size, next_seq in segments:
+            if next_seq <= after_seq + 1 or next_seq == segment.base_seq:
+                continue
+            if start_time is not None and segment.last_time < start_time:
+                continue
+            if end_time is not None and segment.first_time > end_time:
+                break
+
+            # Start from the last index entry before both bounds
+            entry = len(segment.index_seqs) - 1
+            entry = min(entry, max(0, bisect_right(segment.index_seqs, after_seq + 1) - 1))
+            if start_time is not None:
+                entry = min(entry, max(0, bisect_left(segment.index_times, start_time) - 1))
+            if segment.index_offsets:
+                offset, seq = segment.index_offsets[entry], segment.index_seqs[entry]
+            else:
+                offset, seq = SEGMENT_HEADER.size, segment.base_seq
+
+            # Skip forward over headers only; decode bodies just for matches
+            if segment.size > SEGMENT_HEADER.size:
+                view = segment.view()
+            while offset < size:
+                length, _, _, logical_time, physical_time = RECORD_HEADER.unpack_from(view, offset)
+                body_start = offset + RECORD_HEADER.size
+                offset = body_start + length
+                if end_time is not None and physical_time > end_time:
+                    return
+                if seq > after_seq and (start_time is None or physical_time >= start_time):
+                    event_type, description, data = json.loads(bytes(view[body_start:offset]))
+                    yield seq, EventRecord(self.node_id, event_type, description,
+                                           logical_time, physical_time, data)
+                seq += 1
+
+    def replay(self, after_seq: int = -1) -> Iterator[Tuple[int, EventRecord]]:
+        """Replay events after a sequence number, oldest first"""
+        return self.scan(after_seq=after_seq)
+
+    def tail(self, count: int) -> List[EventRecord]:
+        """Most recent `count` events, oldest first"""
+        return [event for _, event in self.replay(self.next_seq - count - 1)]
+
+    def close(self):
+        """Close files and mappings"""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._index_file.close()
+                self._file = None
+                self._index_file = None
+            for segment in self.segments:
+                segment.unmap()
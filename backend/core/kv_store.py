@@ -0,0 +1,175 @@
+# FILE: backend/core/kv_store.py
+# ============================================================================
+
+"""
+Versioned Key-Value Store
+
+Holds the replicated key-value data behind ConsistencyManager. Each key
+maps to the head of its version chain, newest first, so the latest value
+is one dict lookup however many writes came before. Versions are ordered
+by (logical_time, node_id), the clock's total order across nodes; a
+replicated write that arrives late is linked in at its place in the
+chain instead of overwriting newer data (last writer wins).
+
+Older versions stay readable with get(key, at=logical_time) until
+compaction drops them. Compaction keeps the newest `max_versions`
+versions of each key and only visits keys written since its last pass,
+so its cost follows the write rate, not the size of the store. It runs
+on a background thread started by the first write.
+"""
+
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Versions kept per key after compaction
+DEFAULT_MAX_VERSIONS = 8
+
+# Seconds between background compaction passes
+DEFAULT_COMPACTION_INTERVAL = 1.0
+
+
+class _Version:
+    """One write record; prev links to the next older version"""
+
+    __slots__ = ("record", "order", "prev")
+
+    def __init__(self, record: Dict, prev: Optional["_Version"]):
+        self.record = record
+        self.order = (record["logical_time"], record["node_id"])
+        self.prev = prev
+
+
+class VersionedKVStore:
+    """Per-key version chains with O(1) latest-version lookup
+
+    Readers walk chains without locking: a new version is fully built
+    before it is linked in, and compaction only cuts links behind the
+    versions it keeps. Writers serialise on one short mutex.
+    """
+
+    def __init__(self, max_versions: int = DEFAULT_MAX_VERSIONS,
+                 compaction_interval: float = DEFAULT_COMPACTION_INTERVAL):
+        self._heads: Dict[str, _Version] = {}
+        self._lock = threading.Lock()
+        # Keys written since the last compaction pass
+        self._dirty = set()
+        self.max_versions = max_versions
+        self.compaction_interval = compaction_interval
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.versions = 0
+        self.writes = 0
+        self.stale_writes = 0
+        self.compacted = 0
+
+    def put(self, record: Dict) -> bool:
+        """Add a write record (key, value, logical_time, node_id, ...)
+
+        Returns:
+            True if the record is now the key's latest version, False if
+            a newer version already existed or it is a duplicate
+        """
+        key = record["key"]
+        version = _Version(record, None)
+        with self._lock:
+            self.writes += 1
+            head = self._heads.get(key)
+            if head is None or head.order < version.order:
+                version.prev = head
+                self._heads[key] = version
+                latest = True
+            else:
+                # Late arrival: link it in behind every newer version
+                newer = head
+                while newer.prev is not None and newer.prev.order > version.order:
+                    newer = newer.prev
+                if newer.order == version.order or (
+                        newer.prev is not None and newer.prev.order == version.order):
+                    return False
+                version.prev = newer.prev
+                newer.prev = version
+                self.stale_writes += 1
+                latest = False
+            self.versions += 1
+            self._dirty.add(key)
+        if self._compaction_thread is None:
+            self._start_compaction()
+        return latest
+
+    def get(self, key: str, at: Optional[int] = None) -> Optional[Dict]:
+        """Latest record for key, or the newest with logical_time <= at"""
+        version = self._heads.get(key)
+        if at is not None:
+            while version is not None and version.order[0] > at:
+                version = version.prev
+        return version.record if version is not None else None
+
+    def history(self, key: str) -> List[Dict]:
+        """Retained records for key, newest first"""
+        records = []
+        version = self._heads.get(key)
+        while version is not None:
+            records.append(version.record)
+            version = version.prev
+        return records
+
+    def keys(self) -> Iterator[str]:
+        return iter(list(self._heads))
+
+    def compact(self) -> int:
+        """Drop versions beyond max_versions on recently written keys
+
+        Returns:
+            Number of versions dropped
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        dropped = 0
+        for key in dirty:
+            with self._lock:
+                version = self._heads.get(key)
+                for _ in range(self.max_versions - 1):
+                    if version is None:
+                        break
+                    version = version.prev
+                if version is None:
+                    continue
+                old = version.prev
+                version.prev = None
+                count = 0
+                while old is not None:
+                    count += 1
+                    old = old.prev
+                self.versions -= count
+            dropped += count
+        self.compacted += dropped
+        return dropped
+
+    def _start_compaction(self):
+        with self._lock:
+            if self._compaction_thread is not None:
+                return
+            self._compaction_thread = threading.Thread(target=self._compaction_loop,
+                                                       daemon=True, name="kv-compaction")
+        self._compaction_thread.start()
+
+    def _compaction_loop(self):
+        while True:
+            time.sleep(self.compaction_interval)
+            self.compact()
+
+    def __len__(self) -> int:
+        return len(self._heads)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._heads
+
+    def get_stats(self) -> Dict:
+        return {
+            "keys": len(self._heads),
+            "versions": self.versions,
+            "writes": self.writes,
+            "stale_writes": self.stale_writes,
+            "compacted": self.compacted,
+            "pending_compaction": len(self._dirty)
+        }
@@ -0,0 +1,147 @@
+# FILE: backend/core/merkle.py
+# ============================================================================
+
+"""
+Merkle Trees for Anti-Entropy
+
+A fixed-shape binary hash tree over 2**depth buckets. A key belongs to
+the bucket given by the top bits of its hash, so two trees with the same
+depth split their key space identically without agreeing on boundaries
+first, and stay balanced whatever the keys look like.
+
+A leaf's hash is the sum (mod 2**128) of the hashes of its (key, digest)
+entries, so changing one key updates its leaf in O(1); ancestors of
+changed leaves are rehashed lazily, O(changed · depth), the next time a
+node is read.
+
+diff() compares two trees from the root down and only descends into
+subtrees whose hashes differ, so finding d differing keys costs
+O(d · depth) node comparisons plus the entries of the differing leaves.
+"""
+
+import hashlib
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+# 4096 leaves
+DEFAULT_DEPTH = 12
+
+HASH_BYTES = 16
+_MODULUS = 1 << (HASH_BYTES * 8)
+
+
+def _hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=HASH_BYTES).digest()
+
+
+def _key_bytes(key: Hashable) -> bytes:
+    return repr(key).encode()
+
+
+class MerkleTree:
+    """Hash tree over key -> digest entries
+
+    Nodes are numbered heap style: 1 is the root, node i has children
+    2i and 2i + 1, and leaves are 2**depth .. 2**(depth + 1) - 1.
+    """
+
+    def __init__(self, depth: int = DEFAULT_DEPTH):
+        self.depth = depth
+        self.first_leaf = 1 << depth
+        self._entries: List[Dict[Hashable, bytes]] = [{} for _ in range(self.first_leaf)]
+        self._sums = [0] * self.first_leaf
+        self._nodes: List[bytes] = [b""] * (2 * self.first_leaf)
+        self._dirty: Set[int] = set()
+        self._build()
+
+    def _build(self):
+        for leaf in range(self.first_leaf, 2 * self.first_leaf):
+            self._nodes[leaf] = self._sums[leaf - self.first_leaf].to_bytes(HASH_BYTES, "little")
+        for index in range(self.first_leaf - 1, 0, -1):
+            self._nodes[index] = _hash(self._nodes[2 * index] + self._nodes[2 * index + 1])
+        self._dirty.clear()
+
+    def leaf_of(self, key: Hashable) -> int:
+        """Node index of the leaf holding key"""
+        top = int.from_bytes(_hash(_key_bytes(key))[:8], "big")
+        return self.first_leaf + (top >> (64 - self.depth))
+
+    def update(self, key: Hashable, digest: Optional[bytes]):
+        """Set key's digest; None removes the key"""
+        leaf = self.leaf_of(key)
+        bucket = leaf - self.first_leaf
+        entries = self._entries[bucket]
+        old = entries.get(key)
+        if old == digest:
+            return
+        total = self._sums[bucket]
+        if old is not None:
+            total -= int.from_bytes(_hash(_key_bytes(key) + old), "little")
+        if digest is None:
+            del entries[key]
+        else:
+            entries[key] = digest
+            total += int.from_bytes(_hash(_key_bytes(key) + digest), "little")
+        self._sums[bucket] = total % _MODULUS
+        self._dirty.add(leaf)
+
+    def _refresh(self):
+        """Rehash changed leaves and their ancestors"""
+        if not self._dirty:
+            return
+        level = set()
+        for leaf in self._dirty:
+            self._nodes[leaf] = self._sums[leaf - self.first_leaf].to_bytes(HASH_BYTES, "little")
+            level.add(leaf >> 1)
+        self._dirty.clear()
+        while level and 0 not in level:
+            parents = set()
+            for index in level:
+                self._nodes[index] = _hash(self._nodes[2 * index] + self._nodes[2 * index + 1])
+                parents.add(index >> 1)
+            level = parents
+
+    def node(self, index: int) -> bytes:
+        """Hash of node index"""
+        self._refresh()
+        return self._nodes[index]
+
+    @property
+    def root(self) -> bytes:
+        return self.node(1)
+
+    def entries(self, leaf: int) -> Dict[Hashable, bytes]:
+        """key -> digest of the keys under leaf node index"""
+        return self._entries[leaf - self.first_leaf]
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        return self._entries[self.leaf_of(key) - self.first_leaf].get(key)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries)
+
+
+def diff(source: MerkleTree, target: MerkleTree) -> Tuple[List[Hashable], int]:
+    """Keys whose digests differ between two trees of the same depth
+
+    Returns:
+        (differing keys, including keys present on one side only;
+         number of nodes compared)
+    """
+    if source.depth != target.depth:
+        raise ValueError(f"Cannot compare trees of depth {source.depth} and {target.depth}")
+    keys: List[Hashable] = []
+    compared = 0
+    stack = [1]
+    while stack:
+        index = stack.pop()
+        compared += 1
+        if source.node(index) == target.node(index):
+            continue
+        if index < source.first_leaf:
+            stack.append(2 * index)
+            stack.append(2 * index + 1)
+            continue
+        ours, theirs = source.entries(index), target.entries(index)
+        keys.extend(key for key, digest in ours.items() if theirs.get(key) != digest)
+        keys.extend(key for key in theirs if key not in ours)
+    return keys, compared
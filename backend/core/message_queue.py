@@ -1,58 +1,471 @@
 # FILE: backend/core/message_queue.py
 # ============================================================================
 
+import asyncio
+import queue
 import threading
-from queue import Queue
-from typing import Dict, List, Callable
 import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional
 
-class InMemoryMessageQueue:
-    """Simple in-memory message queue for inter-node communication"""
-    
-    def __init__(self):
-        self.queues: Dict[int, Queue] = {}
-        self.subscribers: Dict[str, List[Callable]] = {}
+# Subscriber overflow policies
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+_STOP = object()
+
+
+def _wake_one(waiters: deque):
+    """Resolve the first still-pending waiter, from any thread"""
+    while waiters:
+        try:
+            waiter = waiters.popleft()
+        except IndexError:
+            return
+        if waiter.done():
+            # Timed out or cancelled receiver; try the next one
+            continue
+        loop = waiter.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            waiter.set_result(None)
+        else:
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                continue  # loop already closed
+        return
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+async def _park(waiters: deque, ready: Callable[[], bool]):
+    """Wait on a future in waiters until a waker resolves it
+
+    The future is always removed again, so callers that time out do not
+    leave it behind. One that was already handed a wake but gives up
+    passes the wake on to the next waiter.
+    """
+    waiter = asyncio.get_running_loop().create_future()
+    waiters.append(waiter)
+    # Re-check after registering so a concurrent wake is not missed
+    if ready():
+        _resolve(waiter)
+    try:
+        await waiter
+    except BaseException:
+        waiter.cancel()
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            # A waker popped it: the wake is ours but goes unused
+            _wake_one(waiters)
+        raise
+    try:
+        waiters.remove(waiter)
+    except ValueError:
+        pass
+
+
+class NodeMailbox:
+    """Bounded FIFO of messages for one node
+
+    Messages live in a deque, whose append/popleft are atomic under the
+    GIL, so senders on any thread never take a lock. Receivers and blocked
+    senders park on asyncio futures instead of polling. The bound is
+    checked before appending, so racing senders on different threads may
+    overshoot it by a message or two.
+    """
+
+    def __init__(self, node_id: int, maxsize: int):
+        self.node_id = node_id
+        self.maxsize = maxsize
+        self.messages = deque()
+        self._receivers: deque = deque()
+        self._senders: deque = deque()
+        self.sent = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def full(self) -> bool:
+        return len(self.messages) >= self.maxsize
+
+    def offer(self, message: Dict) -> bool:
+        """Enqueue without waiting; False when the mailbox is full"""
+        if len(self.messages) >= self.maxsize:
+            return False
+        self.messages.append(message)
+        self.sent += 1
+        if self._receivers:
+            _wake_one(self._receivers)
+        return True
+
+    def put_nowait(self, message: Dict) -> bool:
+        """Enqueue without waiting, counting a drop when full"""
+        if self.offer(message):
+            return True
+        self.dropped += 1
+        return False
+
+    def take(self, max_items: int) -> List[Dict]:
+        """Dequeue up to max_items messages without waiting"""
+        batch = []
+        messages = self.messages
+        while messages and len(batch) < max_items:
+            try:
+                batch.append(messages.popleft())
+            except IndexError:
+                break
+        if batch:
+            self.delivered += len(batch)
+            for _ in range(len(batch)):
+                if not self._senders:
+                    break
+                _wake_one(self._senders)
+        return batch
+
+    async def wait_not_empty(self):
+        await _park(self._receivers, lambda: bool(self.messages))
+
+    async def wait_not_full(self):
+        await _park(self._senders, lambda: not self.full())
+
+    def get_stats(self) -> Dict:
+        return {
+            "node_id": self.node_id,
+            "depth": len(self.messages),
+            "maxsize": self.maxsize,
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+
+class Subscription:
+    """Topic subscriber with its own bounded delivery queue and worker
+
+    publish() only enqueues, so a slow callback delays its own queue and
+    never the publisher. When the queue is full the overflow policy
+    decides: drop_oldest evicts the oldest pending message, drop_newest
+    rejects the new one, and block makes the publisher wait up to
+    block_timeout before dropping.
+    """
+
+    def __init__(self, topic: str, callback: Callable, maxsize: int = 1000,
+                 policy: str = DROP_OLDEST, block_timeout: float = 0.1,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid policy: {policy}. Use one of {OVERFLOW_POLICIES}")
+        self.topic = topic
+        self.callback = callback
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.loop = loop
+        self.queue = queue.Queue(maxsize)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.worker = threading.Thread(
+            target=self._run,
+            name=f"subscriber-{topic}-{getattr(callback, '__name__', 'callback')}",
+            daemon=True
+        )
+        self.worker.start()
+
+    def offer(self, message: Dict) -> bool:
+        """Enqueue message according to the overflow policy"""
+        self.published += 1
+        try:
+            if self.policy == BLOCK:
+                self.queue.put(message, timeout=self.block_timeout)
+            elif self.policy == DROP_NEWEST:
+                self.queue.put_nowait(message)
+            else:
+                while True:
+                    try:
+                        self.queue.put_nowait(message)
+                        break
+                    except queue.Full:
+                        try:
+                            self.queue.get_nowait()
+                            self.dropped += 1
+                        except queue.Empty:
+                            pass
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    def _run(self):
+        """Worker loop delivering messages to the callback in order"""
+        is_coroutine = asyncio.iscoroutinefunction(self.callback)
+        while True:
+            message = self.queue.get()
+            if message is _STOP:
+                break
+
+            start = time.perf_counter()
+            try:
+                if is_coroutine:
+                    # Async subscribers (e.g. websocket forwarders) run on the bus loop
+                    future = asyncio.run_coroutine_threadsafe(self.callback(message), self.loop)
+                    future.result()
+                else:
+                    self.callback(message)
+                self.delivered += 1
+            except Exception:
+                self.errors += 1
+                print(f"Error in subscriber for topic {self.topic}:")
+                traceback.print_exc()
+
+            latency = time.perf_counter() - start
+            self.total_latency += latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+
+    def close(self, timeout: float = 1.0):
+        """Stop the worker after pending messages are delivered"""
+        self.queue.put(_STOP)
+        self.worker.join(timeout)
+
+    def get_stats(self) -> Dict:
+        handled = self.delivered + self.errors
+        return {
+            "topic": self.topic,
+            "callback": getattr(self.callback, "__name__", repr(self.callback)),
+            "policy": self.policy,
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "avg_latency_ms": (self.total_latency / handled * 1000) if handled else 0,
+            "max_latency_ms": self.max_latency * 1000
+        }
+
+
+class AsyncMessageBus:
+    """Asyncio-native message bus for inter-node communication
+
+    send_message/broadcast_message never block: they return False for a
+    full mailbox so sync callers on the event loop cannot stall it.
+    Coroutines use send()/broadcast() to wait for space (backpressure)
+    and receive()/receive_many() to park until messages arrive.
+
+    With a SocketTransport attached, messages for nodes hosted in other
+    processes go out over the transport and frames it receives land in
+    the local mailboxes, so callers use the same API either way.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        # Copy-on-write: readers iterate the current dict without locking
+        self.queues: Dict[int, NodeMailbox] = {}
+        self.subscribers: Dict[str, List[Subscription]] = {}
         self.lock = threading.Lock()
-    
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.transport = None
+
     def create_queue(self, node_id: int):
         """Create message queue for a node"""
         with self.lock:
             if node_id not in self.queues:
-                self.queues[node_id] = Queue()
-    
-    def send_message(self, to_node_id: int, message: Dict):
-        """Send message to specific node"""
-        with self.lock:
-            if to_node_id in self.queues:
-                self.queues[to_node_id].put(message)
-    
-    def broadcast_message(self, message: Dict, exclude_node: int = None):
-        """Broadcast message to all nodes"""
-        with self.lock:
-            for node_id in self.queues.keys():
-                if node_id != exclude_node:
-                    self.queues[node_id].put(message)
-    
-    def receive_message(self, node_id: int, timeout: float = 0.1) -> Dict:
-        """Receive message from queue (non-blocking)"""
+                queues = dict(self.queues)
+                queues[node_id] = NodeMailbox(node_id, self.maxsize)
+                self.queues = queues
+
+    def attach_transport(self, transport):
+        """Route messages for non-local nodes through a SocketTransport"""
+        transport.deliver = self.deliver_local
+        self.transport = transport
+
+    def deliver_local(self, to_node_id: int, message: Dict) -> bool:
+        """Put message into a local mailbox only (used for inbound frames)"""
+        mailbox = self.queues.get(to_node_id)
+        if mailbox is None:
+            return False
+        return mailbox.put_nowait(message)
+
+    def send_message(self, to_node_id: int, message: Dict) -> bool:
+        """Send message to specific node without blocking"""
+        mailbox = self.queues.get(to_node_id)
+        if mailbox is None:
+            if self.transport is not None:
+                return self.transport.send(to_node_id, message)
+            return False
+        return mailbox.put_nowait(message)
+
+    def broadcast_message(self, message: Dict, exclude_node: int = None) -> int:
+        """Broadcast message to all nodes; returns number of nodes reached"""
+        delivered = 0
+        for node_id, mailbox in self.queues.items():
+            if node_id != exclude_node and mailbox.put_nowait(message):
+                delivered += 1
+        if self.transport is not None:
+            for node_id in self.transport.peers:
+                if node_id != exclude_node and node_id not in self.queues \
+                        and self.transport.send(node_id, message):
+                    delivered += 1
+        return delivered
+
+    async def send(self, to_node_id: int, message: Dict, timeout: float = None) -> bool:
+        """Send message, waiting for space in a full mailbox"""
+        mailbox = self.queues.get(to_node_id)
+        if mailbox is None:
+            # Remote sends are already non-blocking; the transport bounds its outbox
+            return self.send_message(to_node_id, message)
+        self._loop = asyncio.get_running_loop()
+        if mailbox.offer(message):
+            return True
+
+        async def wait_for_space():
+            while not mailbox.offer(message):
+                await mailbox.wait_not_full()
+
         try:
-            if node_id in self.queues:
-                return self.queues[node_id].get(timeout=timeout)
-        except:
+            await asyncio.wait_for(wait_for_space(), timeout)
+        except asyncio.TimeoutError:
+            mailbox.dropped += 1
+            return False
+        return True
+
+    async def broadcast(self, message: Dict, exclude_node: int = None,
+                        timeout: float = None) -> int:
+        """Broadcast message, waiting for space in full mailboxes"""
+        node_ids = set(self.queues)
+        if self.transport is not None:
+            node_ids.update(self.transport.peers)
+        results = await asyncio.gather(*[
+            self.send(node_id, message, timeout)
+            for node_id in node_ids
+            if node_id != exclude_node
+        ])
+        return sum(results)
+
+    async def receive(self, node_id: int, timeout: float = None) -> Optional[Dict]:
+        """Wait for the next message for a node"""
+        batch = await self.receive_many(node_id, max_items=1, timeout=timeout)
+        return batch[0] if batch else None
+
+    async def receive_many(self, node_id: int, max_items: int = 100,
+                           timeout: float = None) -> List[Dict]:
+        """Wait until messages arrive, then drain up to max_items at once"""
+        mailbox = self.queues.get(node_id)
+        if mailbox is None:
+            return []
+        self._loop = asyncio.get_running_loop()
+        batch = mailbox.take(max_items)
+        if batch:
+            return batch
+
+        async def wait_for_messages():
+            while True:
+                await mailbox.wait_not_empty()
+                batch = mailbox.take(max_items)
+                if batch:
+                    return batch
+
+        try:
+            return await asyncio.wait_for(wait_for_messages(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+    def receive_message(self, node_id: int, timeout: float = 0.1) -> Optional[Dict]:
+        """Receive message from queue
+
+        Returns immediately when a message is waiting. From a thread other
+        than the bus's event loop it waits up to `timeout` on that loop
+        instead of polling; otherwise it returns None right away.
+        """
+        mailbox = self.queues.get(node_id)
+        if mailbox is None:
             return None
-    
-    def publish(self, topic: str, message: Dict):
-        """Publish message to topic"""
-        if topic in self.subscribers:
-            for callback in self.subscribers[topic]:
-                callback(message)
-    
-    def subscribe(self, topic: str, callback: Callable):
-        """Subscribe to topic"""
-        if topic not in self.subscribers:
-            self.subscribers[topic] = []
-        self.subscribers[topic].append(callback)
+        batch = mailbox.take(1)
+        if batch:
+            return batch[0]
+
+        loop = self._loop
+        if not timeout or loop is None or not loop.is_running():
+            return None
+        try:
+            if asyncio.get_running_loop() is loop:
+                return None
+        except RuntimeError:
+            pass
+        future = asyncio.run_coroutine_threadsafe(self.receive(node_id, timeout), loop)
+        return future.result()
+
+    def get_stats(self) -> Dict[int, Dict]:
+        """Per-node queue depth and counters"""
+        return {node_id: mailbox.get_stats() for node_id, mailbox in self.queues.items()}
+
+    def get_transport_stats(self) -> Optional[Dict]:
+        """Socket transport counters, or None when running in one process"""
+        return self.transport.get_stats() if self.transport is not None else None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop used for cross-thread wakeups and async subscribers"""
+        self._loop = loop
+
+    def publish(self, topic: str, message: Dict) -> int:
+        """Publish message to topic; returns number of subscribers it was queued for"""
+        queued = 0
+        for subscription in self.subscribers.get(topic, ()):
+            if subscription.offer(message):
+                queued += 1
+        return queued
+
+    def subscribe(self, topic: str, callback: Callable, maxsize: int = 1000,
+                  policy: str = DROP_OLDEST, block_timeout: float = 0.1) -> Subscription:
+        """Subscribe to topic with a dedicated delivery queue and worker"""
+        if asyncio.iscoroutinefunction(callback) and self._loop is None:
+            raise RuntimeError("Async subscribers need bind_loop() to be called first")
+        subscription = Subscription(topic, callback, maxsize, policy, block_timeout, self._loop)
+        with self.lock:
+            subscribers = dict(self.subscribers)
+            subscribers[topic] = subscribers.get(topic, []) + [subscription]
+            self.subscribers = subscribers
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription and stop its worker"""
+        with self.lock:
+            subscribers = dict(self.subscribers)
+            remaining = [s for s in subscribers.get(subscription.topic, []) if s is not subscription]
+            if remaining:
+                subscribers[subscription.topic] = remaining
+            else:
+                subscribers.pop(subscription.topic, None)
+            self.subscribers = subscribers
+        subscription.close()
+
+    def get_subscription_stats(self) -> List[Dict]:
+        """Delivery metrics for every subscriber"""
+        return [subscription.get_stats()
+                for subscriptions in self.subscribers.values()
+                for subscription in subscriptions]
+
 
+# Kept for existing imports
+InMemoryMessageQueue = AsyncMessageBus
 
 # Global message queue instance
-message_queue = InMemoryMessageQueue()
\ No newline at end of file
+message_queue = AsyncMessageBus()
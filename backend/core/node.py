@@ -3,73 +3,78 @@
 
 import time
 import threading
-from datetime import datetime
+from collections import deque
 from typing import Dict, Any
 
-class LamportClock:
-    """Lamport logical clock implementation"""
-    
-    def __init__(self):
-        self.time = 0
-        self.lock = threading.Lock()
-    
-    def tick(self) -> int:
-        """Increment clock on local event"""
-        with self.lock:
-            self.time += 1
-            return self.time
-    
-    def update(self, received_time: int) -> int:
-        """Update clock on message receive"""
-        with self.lock:
-            self.time = max(self.time, received_time) + 1
-            return self.time
-    
-    def get_time(self) -> int:
-        """Get current logical time"""
-        with self.lock:
-            return self.time
-
+from .clock import HybridLogicalClock
+from .event_buffer import EventRecord, EventRingBuffer
+from .event_store import EventSegmentStore
 
 class DistributedNode:
     """Represents a node in the distributed system"""
     
-    def __init__(self, node_id: int, priority: int = None):
+    def __init__(self, node_id: int, priority: int = None, event_log_capacity: int = 1000,
+                 event_store: EventSegmentStore = None):
         self.node_id = node_id
         self.priority = priority if priority is not None else node_id
         self.is_active = True
         self.is_leader = False
         self.current_leader_id = None
-        self.clock = LamportClock()
-        self.event_log = []
+        self.clock = HybridLogicalClock()
+        self.event_log = EventRingBuffer(event_log_capacity)
         self.health_status = "healthy"
         self.request_count = 0
         self.lock = threading.Lock()
         self.last_heartbeat = time.time()
+        self.event_store = event_store
+        # Events stamped but not yet written to the store, in clock order
+        self._unpersisted = deque()
+        self._persist_lock = threading.Lock()
+        if event_store is not None:
+            self._restore_events()
     
-    def log_event(self, event_type: str, description: str, data: Dict[str, Any] = None):
-        """Log an event with Lamport timestamp"""
-        logical_time = self.clock.tick()
-        physical_time = time.time()
-        
-        event = {
-            "node_id": self.node_id,
-            "event_type": event_type,
-            "description": description,
-            "logical_time": logical_time,
-            "physical_time": physical_time,
-            "timestamp": datetime.now().isoformat(),
-            "data": data or {}
-        }
-        
-        with self.lock:
+    def _restore_events(self):
+        """Reload the newest persisted events after a restart"""
+        events = self.event_store.tail(self.event_log.capacity)
+        for event in events:
             self.event_log.append(event)
-            # Keep only last 1000 events to prevent memory issues
-            if len(self.event_log) > 1000:
-                self.event_log = self.event_log[-1000:]
+        if events:
+            self.clock.update(events[-1].logical_time)
+    
+    def log_event(self, event_type: str, description: str, data: Dict[str, Any] = None) -> EventRecord:
+        """Log an event with hybrid logical clock timestamp"""
+        # Stamp under the buffer lock so log order matches clock order,
+        # which lets the event log double as a time index
+        with self.event_log.lock:
+            event = EventRecord(
+                self.node_id,
+                event_type,
+                description,
+                self.clock.tick(),
+                time.time(),
+                data
+            )
+            
+            # Ring buffer keeps the newest events and overwrites the oldest in O(1)
+            self.event_log.append(event)
+            if self.event_store is not None:
+                self._unpersisted.append(event)
         
+        # Disk I/O stays out of the buffer lock; the queue keeps clock order
+        if self.event_store is not None:
+            self._persist()
         return event
     
+    def _persist(self):
+        """Write queued events to the store, oldest first
+        
+        Whoever holds the lock writes everything queued so far, so an
+        event is on the store once its log_event returns.
+        """
+        with self._persist_lock:
+            while self._unpersisted:
+                self.event_store.append(self._unpersisted.popleft())
+    
     def get_status(self) -> Dict[str, Any]:
         """Return node status as dictionary"""
         return {
@@ -80,7 +85,7 @@ class DistributedNode:
             "current_leader": self.current_leader_id,
             "health": self.health_status,
             "request_count": self.request_count,
-            "logical_clock": self.clock.get_time(),
+            "logical_clock": str(self.clock.get_time()),
             "last_heartbeat": self.last_heartbeat
         }
     
@@ -0,0 +1,310 @@
+# FILE: backend/core/transport.py
+# ============================================================================
+
+"""
+Socket Transport
+
+Carries message bus traffic between OS processes over Unix domain sockets
+or localhost TCP, so every node can run in its own process.
+
+Wire format, one frame per message:
+    [length: u32][to_node: u32][payload: length bytes]
+
+Payloads use the binary codec (see codec.py).
+
+Each peer address gets one persistent outbound connection shared by every
+node hosted there. Senders only append to that connection's bounded
+outbox; a writer thread coalesces pending frames into a single sendall()
+and reconnects with backoff when the peer goes away. Delivery is
+at-most-once: frames in flight when a connection breaks are counted as
+dropped, matching the bus's behaviour for a full mailbox.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .codec import decode_message, encode_message
+
+FRAME_HEADER = struct.Struct("!II")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+# Bytes coalesced into one sendall() by a writer
+WRITE_BATCH_BYTES = 256 * 1024
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """Parse "unix:/path.sock" or "tcp:host:port" into (family, sockaddr)"""
+    scheme, _, rest = address.partition(":")
+    if scheme == "unix" and rest:
+        return socket.AF_UNIX, rest
+    if scheme == "tcp":
+        host, _, port = rest.rpartition(":")
+        if host and port.isdigit():
+            return socket.AF_INET, (host, int(port))
+    raise ValueError(f"Invalid transport address: {address}")
+
+
+def node_address(kind: str, node_id: int, socket_dir: str = "/tmp",
+                 base_port: int = 7000, host: str = "127.0.0.1") -> str:
+    """Default listen address of a node for the "unix" or "tcp" transport"""
+    if kind == "unix":
+        return f"unix:{os.path.join(socket_dir, f'zwiggy_node_{node_id}.sock')}"
+    if kind == "tcp":
+        return f"tcp:{host}:{base_port + node_id}"
+    raise ValueError(f"Invalid transport: {kind}. Use 'unix' or 'tcp'")
+
+
+def _configure(sock: socket.socket):
+    if sock.family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class PeerConnection:
+    """Persistent outbound connection to one peer address"""
+
+    def __init__(self, address: str, maxsize: int = 4096,
+                 connect_timeout: float = 1.0, max_backoff: float = 1.0):
+        self.address = address
+        self.family, self.sockaddr = parse_address(address)
+        self.maxsize = maxsize
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+        self.outbox = deque()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.sock: Optional[socket.socket] = None
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.connects = 0
+        self.writer = threading.Thread(target=self._run, name=f"transport-{address}", daemon=True)
+        self.writer.start()
+
+    def send(self, frame: bytes) -> bool:
+        """Queue an encoded frame without blocking; False when the outbox is full"""
+        if self.closed or len(self.outbox) >= self.maxsize:
+            self.dropped += 1
+            return False
+        self.outbox.append(frame)
+        self.wakeup.set()
+        return True
+
+    def _connect(self) -> bool:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.connect_timeout)
+            sock.connect(self.sockaddr)
+            sock.settimeout(None)
+            _configure(sock)
+        except OSError:
+            sock.close()
+            return False
+        self.sock = sock
+        self.connects += 1
+        return True
+
+    def _disconnect(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def _run(self):
+        """Writer loop: connect, then drain the outbox in batches"""
+        backoff = 0.01
+        outbox = self.outbox
+        while not self.closed:
+            self.wakeup.wait()
+            self.wakeup.clear()
+
+            while outbox and not self.closed:
+                if self.sock is None and not self._connect():
+                    # Peer not up yet; keep frames queued and retry
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+                backoff = 0.01
+
+                batch, size = [], 0
+                while outbox and size < WRITE_BATCH_BYTES:
+                    try:
+                        frame = outbox.popleft()
+                    except IndexError:
+                        break
+                    batch.append(frame)
+                    size += len(frame)
+
+                try:
+                    self.sock.sendall(b"".join(batch))
+                    self.sent += len(batch)
+                    self.bytes_sent += size
+                except OSError:
+                    self.dropped += len(batch)
+                    self._disconnect()
+        self._disconnect()
+
+    def close(self, timeout: float = 1.0):
+        """Flush pending frames (up to timeout) and close the connection"""
+        deadline = time.time() + timeout
+        while self.outbox and self.sock is not None and time.time() < deadline:
+            time.sleep(0.001)
+        self.closed = True
+        self.wakeup.set()
+        self.writer.join(timeout)
+
+    def get_stats(self) -> Dict:
+        return {
+            "address": self.address,
+            "connected": self.sock is not None,
+            "pending": len(self.outbox),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "bytes_sent": self.bytes_sent,
+            "connects": self.connects
+        }
+
+
+class SocketTransport:
+    """
+    Frame-based transport between message bus instances in different processes
+
+    Args:
+        listen_address: Address this process accepts frames on
+        peers: node_id -> address for nodes hosted in other processes
+        deliver: Called as deliver(to_node, message) for every received frame
+        maxsize: Outbox bound per peer connection
+    """
+
+    def __init__(self, listen_address: str, peers: Dict[int, str],
+                 deliver: Callable[[int, Dict], bool], maxsize: int = 4096):
+        self.listen_address = listen_address
+        self.peers = dict(peers)
+        self.deliver = deliver
+        self.maxsize = maxsize
+        self.connections: Dict[str, PeerConnection] = {}
+        self.lock = threading.Lock()
+        self.received = 0
+        self.closed = False
+        self.server: Optional[socket.socket] = None
+        self._readers: Set[socket.socket] = set()  # Open inbound connections
+
+    # ------------------------------------------------------------------
+    # Server side
+
+    def start(self):
+        """Bind the listening socket and start accepting peers"""
+        family, sockaddr = parse_address(self.listen_address)
+        server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            if os.path.exists(sockaddr):
+                os.unlink(sockaddr)
+        else:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(sockaddr)
+        server.listen(64)
+        self.server = server
+        threading.Thread(target=self._accept_loop, name="transport-accept", daemon=True).start()
+        return self
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                sock, _ = self.server.accept()
+            except OSError:
+                break
+            _configure(sock)
+            reader = threading.Thread(target=self._read_loop, args=(sock,),
+                                      name="transport-reader", daemon=True)
+            with self.lock:
+                self._readers.add(sock)
+            reader.start()
+
+    def _read_loop(self, sock: socket.socket):
+        """Read frames from one inbound connection until it closes"""
+        stream = sock.makefile("rb", buffering=WRITE_BATCH_BYTES)
+        header_size = FRAME_HEADER.size
+        try:
+            while True:
+                header = stream.read(header_size)
+                if len(header) < header_size:
+                    break
+                length, to_node = FRAME_HEADER.unpack(header)
+                if length > MAX_FRAME_BYTES:
+                    break
+                payload = stream.read(length)
+                if len(payload) < length:
+                    break
+                self.received += 1
+                try:
+                    self.deliver(to_node, decode_message(payload))
+                except Exception as e:
+                    print(f"Error delivering frame to node {to_node}: {e}")
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                self._readers.discard(sock)
+            stream.close()
+            sock.close()
+
+    # ------------------------------------------------------------------
+    # Client side
+
+    def _connection(self, address: str) -> PeerConnection:
+        connection = self.connections.get(address)
+        if connection is None:
+            with self.lock:
+                connection = self.connections.get(address)
+                if connection is None:
+                    connection = PeerConnection(address, self.maxsize)
+                    connections = dict(self.connections)
+                    connections[address] = connection
+                    self.connections = connections
+        return connection
+
+    def add_peer(self, node_id: int, address: str):
+        with self.lock:
+            peers = dict(self.peers)
+            peers[node_id] = address
+            self.peers = peers
+
+    def send(self, to_node: int, message: Dict) -> bool:
+        """Queue message for a remote node; False if unknown or backlogged"""
+        address = self.peers.get(to_node)
+        if address is None:
+            return False
+        payload = encode_message(message)
+        frame = FRAME_HEADER.pack(len(payload), to_node) + payload
+        return self._connection(address).send(frame)
+
+    def close(self):
+        """Flush outbound connections and stop listening"""
+        self.closed = True
+        for connection in self.connections.values():
+            connection.close()
+        if self.server is not None:
+            self.server.close()
+            family, sockaddr = parse_address(self.listen_address)
+            if family == socket.AF_UNIX and os.path.exists(sockaddr):
+                os.unlink(sockaddr)
+        with self.lock:
+            readers = list(self._readers)
+        for sock in readers:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict:
+        return {
+            "listen_address": self.listen_address,
+            "received": self.received,
+            "peers": [connection.get_stats() for connection in self.connections.values()]
+        }
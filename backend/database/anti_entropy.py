@@ -0,0 +1,195 @@
+"""
+Merkle Anti-Entropy
+
+Finds and repairs the rows on which a replica differs from the primary
+without copying whole tables.
+
+Each database keeps one Merkle tree per table, keyed by primary key,
+with a digest of the row's replicated columns per key. Temporary
+triggers record the primary keys every INSERT, UPDATE or DELETE
+touches, so the trees are built once with a full scan and afterwards
+only rehash the rows written since they were last used.
+
+anti_entropy() compares the primary's and a replica's trees from the
+root down, descending only into mismatched subtrees, then ships the
+primary's version of just the differing rows and deletes rows the
+primary no longer has. Repairing d rows costs O(d · depth) hash
+comparisons plus the rows themselves.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..core.merkle import DEFAULT_DEPTH, MerkleTree, diff
+
+# Set locally by each database, so never compared
+UNHASHED_COLUMNS = {"created_at", "updated_at"}
+
+# Tables that are not replicated row by row
+SKIPPED_TABLES = {"replication_log"}
+
+# Primary keys per IN (...) query
+FETCH_CHUNK = 500
+
+
+def row_digest(values: Iterable[Any]) -> bytes:
+    """Digest of a row's values, insensitive to SQLite column affinity"""
+    normalized = tuple(int(v) if isinstance(v, float) and v.is_integer() else v
+                       for v in values)
+    return hashlib.blake2b(repr(normalized).encode(), digest_size=16).digest()
+
+
+class _TableTree:
+    __slots__ = ("columns", "primary_key", "tree")
+
+    def __init__(self, columns: Tuple[str, ...], primary_key: str, tree: MerkleTree):
+        self.columns = columns
+        self.primary_key = primary_key
+        self.tree = tree
+
+
+class MerkleIndex:
+    """Merkle trees over one database's tables
+
+    db is a PrimaryDatabase or ReplicaDatabase; its connection is used
+    under its lock.
+    """
+
+    def __init__(self, db, depth: int = DEFAULT_DEPTH):
+        self.db = db
+        self.depth = depth
+        self._trees: Dict[str, _TableTree] = {}
+        self._tracked = set()
+
+    def tables(self) -> List[str]:
+        rows = self.db.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        return [row[0] for row in rows if row[0] not in SKIPPED_TABLES]
+
+    def columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.db.connection.execute(f"PRAGMA table_info({table})")]
+
+    def primary_key(self, table: str) -> str:
+        keys = [row[1] for row in self.db.connection.execute(f"PRAGMA table_info({table})")
+                if row[5]]
+        return keys[0] if len(keys) == 1 else "rowid"
+
+    def tree(self, table: str, columns: Iterable[str]) -> MerkleTree:
+        """The table's tree over columns, brought up to date"""
+        columns = tuple(columns)
+        with self.db.lock:
+            entry = self._trees.get(table)
+            if entry is None or entry.columns != columns:
+                entry = self._build(table, columns)
+            else:
+                self._apply_changes(table, entry)
+        return entry.tree
+
+    def _build(self, table: str, columns: Tuple[str, ...]) -> _TableTree:
+        """Full scan; from here on triggers track the changes"""
+        primary_key = self.primary_key(table)
+        self._track(table, primary_key)
+        entry = _TableTree(columns, primary_key, MerkleTree(self.depth))
+        cursor = self.db.connection.execute(
+            f"SELECT {primary_key}, {', '.join(columns)} FROM {table}")
+        for row in cursor:
+            entry.tree.update(row[0], row_digest(row[1:]))
+        self.db.connection.execute("DELETE FROM temp.merkle_changes WHERE table_name = ?", (table,))
+        self.db.connection.commit()
+        self._trees[table] = entry
+        return entry
+
+    def _track(self, table: str, primary_key: str):
+        """Create the triggers that record changed primary keys"""
+        if table in self._tracked:
+            return
+        connection = self.db.connection
+        connection.execute("CREATE TEMP TABLE IF NOT EXISTS merkle_changes "
+                           "(table_name TEXT NOT NULL, pk)")
+        for event, refs in (("INSERT", ["NEW"]), ("UPDATE", ["OLD", "NEW"]), ("DELETE", ["OLD"])):
+            inserts = " ".join(f"INSERT INTO merkle_changes VALUES ('{table}', {ref}.{primary_key});"
+                               for ref in refs)
+            connection.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS merkle_{table}_{event.lower()} "
+                               f"AFTER {event} ON main.{table} BEGIN {inserts} END")
+        connection.commit()
+        self._tracked.add(table)
+
+    def _apply_changes(self, table: str, entry: _TableTree):
+        connection = self.db.connection
+        keys = [row[0] for row in connection.execute(
+            "SELECT DISTINCT pk FROM temp.merkle_changes WHERE table_name = ?", (table,))]
+        if not keys:
+            return
+        found = {}
+        for chunk in _chunks(keys):
+            cursor = connection.execute(
+                f"SELECT {entry.primary_key}, {', '.join(entry.columns)} FROM {table} "
+                f"WHERE {entry.primary_key} IN ({', '.join('?' for _ in chunk)})", chunk)
+            for row in cursor:
+                found[row[0]] = row_digest(row[1:])
+        for key in keys:
+            entry.tree.update(key, found.get(key))
+        connection.execute("DELETE FROM temp.merkle_changes WHERE table_name = ?", (table,))
+        connection.commit()
+
+    def fetch_rows(self, table: str, columns: Iterable[str], keys: List[Any]) -> List[Dict]:
+        """Rows with the given primary keys, restricted to columns"""
+        columns = list(columns)
+        primary_key = self.primary_key(table)
+        rows = []
+        with self.db.lock:
+            for chunk in _chunks(keys):
+                cursor = self.db.connection.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} "
+                    f"WHERE {primary_key} IN ({', '.join('?' for _ in chunk)})", chunk)
+                rows.extend(dict(zip(columns, row)) for row in cursor)
+        return rows
+
+
+def _chunks(keys: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(keys), FETCH_CHUNK):
+        yield keys[start:start + FETCH_CHUNK]
+
+
+def anti_entropy(primary, replica, tables: Optional[Iterable[str]] = None) -> Dict:
+    """Bring replica's rows in line with primary's
+
+    Args:
+        primary: PrimaryDatabase, the source of truth
+        replica: ReplicaDatabase to repair
+        tables: tables to compare; defaults to every table both have
+
+    Returns:
+        Stats: tables compared, tree nodes compared, rows shipped and
+        rows deleted on the replica
+    """
+    source, target = primary.merkle, replica.merkle
+    if tables is None:
+        tables = [table for table in source.tables() if table in set(target.tables())]
+    stats = {"tables": 0, "nodes_compared": 0, "rows_shipped": 0, "rows_deleted": 0}
+    for table in tables:
+        primary_key = source.primary_key(table)
+        if target.primary_key(table) != primary_key:
+            print(f"Anti-entropy: skipping {table}, primary keys differ")
+            continue
+        replica_columns = set(target.columns(table))
+        shipped = [c for c in source.columns(table) if c in replica_columns]
+        hashed = [c for c in shipped if c not in UNHASHED_COLUMNS and c != primary_key]
+
+        primary_tree = source.tree(table, hashed)
+        replica_tree = target.tree(table, hashed)
+        stats["tables"] += 1
+        if primary_tree.root == replica_tree.root:
+            stats["nodes_compared"] += 1
+            continue
+        keys, compared = diff(primary_tree, replica_tree)
+        stats["nodes_compared"] += compared
+
+        changed = [key for key in keys if primary_tree.get(key) is not None]
+        deleted = [key for key in keys if primary_tree.get(key) is None]
+        rows = source.fetch_rows(table, shipped, changed)
+        if replica.apply_repair(table, primary_key, rows, deleted):
+            stats["rows_shipped"] += len(rows)
+            stats["rows_deleted"] += len(deleted)
+    return stats
@@ -3,6 +3,12 @@ Database Manager
 
 Coordinates operations between primary and replica databases.
 Implements different consistency models and handles replication.
+
+Read-your-writes is tracked per client session, not per thread: a
+Session carries the primary log position of the client's last write
+(its token), and a READ_YOUR_WRITES read may go to any replica that has
+applied the log up to that position. Only when none has does it fall
+back to the primary, as EVENTUAL reads do when there are no replicas.
 """
 
 import threading
@@ -10,11 +16,45 @@ import time
 from typing import Dict, List, Any, Optional
 from enum import Enum
 
+from .anti_entropy import anti_entropy
+
+# Seconds between background anti-entropy passes over all replicas
+ANTI_ENTROPY_INTERVAL = 30.0
+
 class ConsistencyLevel(Enum):
     """Consistency levels for read operations"""
     STRONG = "strong"          # Read from primary
     EVENTUAL = "eventual"      # Read from replica
-    READ_YOUR_WRITES = "read_your_writes"  # Read from primary if recent write
+    READ_YOUR_WRITES = "read_your_writes"  # Read from a replica that has the session's writes
+
+
+class Session:
+    """A client's read-your-writes token: primary log position of its last write
+    
+    Pass the same Session to every write and read of one client. To keep
+    it across requests, send str(session) to the client and rebuild it
+    with Session.from_token().
+    """
+    
+    __slots__ = ("position",)
+    
+    def __init__(self, position: int = 0):
+        self.position = position
+    
+    @classmethod
+    def from_token(cls, token: Optional[str]) -> "Session":
+        """Session from a token sent back by the client; empty if missing or invalid"""
+        try:
+            return cls(max(int(token), 0)) if token else cls()
+        except ValueError:
+            return cls()
+    
+    def advance(self, position: int):
+        if position > self.position:
+            self.position = position
+    
+    def __str__(self) -> str:
+        return str(self.position)
 
 
 class DatabaseManager:
@@ -25,7 +65,8 @@ class DatabaseManager:
         self.replicas = replica_dbs
         self.current_replica_index = 0
         self.lock = threading.Lock()
-        self.recent_writes = {}  # Track recent writes per session
+        self.read_stats = {"primary": 0, "replica": 0, "fallbacks": 0}
+        self.last_anti_entropy = time.time()
         
         # Start background replication thread
         self.replication_thread = threading.Thread(
@@ -35,7 +76,7 @@ class DatabaseManager:
         self.replication_thread.start()
     
     def write(self, table: str, data: Dict[str, Any], 
-              consistency: str = "strong") -> bool:
+              consistency: str = "strong", session: Optional[Session] = None) -> bool:
         """
         Write data to primary database
         
@@ -43,6 +84,7 @@ class DatabaseManager:
             table: Table name
             data: Data to write
             consistency: "strong" for sync replication, "eventual" for async
+            session: Client session; advanced past this write
         
         Returns:
             bool: Success status
@@ -51,15 +93,9 @@ class DatabaseManager:
         success = self.primary.write(table, data)
         
         if success:
-            # Track write timestamp for read-your-writes
-            session_id = threading.current_thread().ident
-            if session_id not in self.recent_writes:
-                self.recent_writes[session_id] = []
-            
-            self.recent_writes[session_id].append({
-                'table': table,
-                'timestamp': time.time()
-            })
+            # At or after this write's log position; never before it
+            if session is not None:
+                session.advance(self.primary.log_position)
             
             # Strong consistency: replicate immediately
             if consistency == "strong":
@@ -70,7 +106,8 @@ class DatabaseManager:
         return success
     
     def update(self, table: str, record_id: str, updates: Dict[str, Any],
-               id_column: str = 'id', consistency: str = "strong") -> bool:
+               id_column: str = 'id', consistency: str = "strong",
+               session: Optional[Session] = None) -> bool:
         """
         Update record in primary database
         
@@ -80,6 +117,7 @@ class DatabaseManager:
             updates: Updates to apply
             id_column: ID column name
             consistency: Consistency level
+            session: Client session; advanced past this write
         
         Returns:
             bool: Success status
@@ -87,14 +125,8 @@ class DatabaseManager:
         success = self.primary.update(table, record_id, updates, id_column)
         
         if success:
-            session_id = threading.current_thread().ident
-            if session_id not in self.recent_writes:
-                self.recent_writes[session_id] = []
-            
-            self.recent_writes[session_id].append({
-                'table': table,
-                'timestamp': time.time()
-            })
+            if session is not None:
+                session.advance(self.primary.log_position)
             
             if consistency == "strong":
                 for replica in self.replicas:
@@ -103,7 +135,8 @@ class DatabaseManager:
         return success
     
     def read(self, table: str, conditions: Optional[Dict[str, Any]] = None,
-             consistency: ConsistencyLevel = ConsistencyLevel.EVENTUAL) -> List[Dict]:
+             consistency: ConsistencyLevel = ConsistencyLevel.EVENTUAL,
+             session: Optional[Session] = None) -> List[Dict]:
         """
         Read data with specified consistency level
         
@@ -111,43 +144,48 @@ class DatabaseManager:
             table: Table name
             conditions: WHERE conditions
             consistency: Consistency level
+            session: Client session, for READ_YOUR_WRITES
         
         Returns:
             List of records
         """
         if consistency == ConsistencyLevel.STRONG:
             # Strong consistency: read from primary
+            self.read_stats["primary"] += 1
             return self.primary.read(table, conditions)
         
-        elif consistency == ConsistencyLevel.READ_YOUR_WRITES:
-            # Check if this session has recent writes
-            session_id = threading.current_thread().ident
-            recent_writes = self.recent_writes.get(session_id, [])
-            
-            # If recent write to this table, read from primary
-            recent_threshold = time.time() - 1.0  # 1 second
-            has_recent_write = any(
-                w['table'] == table and w['timestamp'] > recent_threshold
-                for w in recent_writes
-            )
-            
-            if has_recent_write:
-                return self.primary.read(table, conditions)
-            else:
-                # No recent writes, can read from replica
-                return self._read_from_replica(table, conditions)
-        
-        else:  # EVENTUAL consistency
-            # Read from replica
-            return self._read_from_replica(table, conditions)
+        # EVENTUAL: any replica; READ_YOUR_WRITES: any replica that has
+        # applied the session's last write
+        position = 0
+        if consistency == ConsistencyLevel.READ_YOUR_WRITES and session is not None:
+            position = session.position
+        rows = self._read_from_replica(table, conditions, min_position=position)
+        if rows is None:
+            self.read_stats["fallbacks"] += 1
+            self.read_stats["primary"] += 1
+            return self.primary.read(table, conditions)
+        return rows
     
     def _read_from_replica(self, table: str, 
-                          conditions: Optional[Dict[str, Any]] = None) -> List[Dict]:
-        """Read from replica using round-robin"""
+                          conditions: Optional[Dict[str, Any]] = None,
+                          min_position: int = 0) -> Optional[List[Dict]]:
+        """Read from replica using round-robin
+        
+        Only replicas that have applied the primary log up to
+        min_position are used; None if there is no such replica.
+        """
         with self.lock:
-            replica = self.replicas[self.current_replica_index]
-            self.current_replica_index = (self.current_replica_index + 1) % len(self.replicas)
+            count = len(self.replicas)
+            for offset in range(count):
+                index = (self.current_replica_index + offset) % count
+                if self.replicas[index].has_applied(min_position):
+                    break
+            else:
+                return None
+            replica = self.replicas[index]
+            self.current_replica_index = (index + 1) % count
         
+        self.read_stats["replica"] += 1
         return replica.read(table, conditions)
     
     def _replication_worker(self):
@@ -158,6 +196,10 @@ class DatabaseManager:
                 for replica in self.replicas:
                     replica.sync_from_primary(self.primary, async_mode=True)
                 
+                # Repair whatever log shipping missed
+                if time.time() - self.last_anti_entropy >= ANTI_ENTROPY_INTERVAL:
+                    self.run_anti_entropy()
+                
                 # Sleep before next sync
                 time.sleep(0.1)  # Sync every 100ms
             
@@ -165,6 +207,23 @@ class DatabaseManager:
                 print(f"Error in replication worker: {e}")
                 time.sleep(1)
     
+    def run_anti_entropy(self, replica_ids: Optional[List[int]] = None) -> Dict[int, Dict]:
+        """
+        Compare replicas with the primary via Merkle trees and repair them
+        
+        Args:
+            replica_ids: Replicas to repair; all by default
+        
+        Returns:
+            replica_id -> repair stats
+        """
+        self.last_anti_entropy = time.time()
+        results = {}
+        for replica in self.replicas:
+            if replica_ids is None or replica.replica_id in replica_ids:
+                results[replica.replica_id] = anti_entropy(self.primary, replica)
+        return results
+    
     def get_replication_status(self) -> Dict:
         """Get replication status for all replicas"""
         return {
@@ -176,10 +235,13 @@ class DatabaseManager:
                 {
                     'replica_id': replica.replica_id,
                     'lag_ms': replica.get_replication_lag(),
-                    'last_sync': replica.last_sync_timestamp
+                    'last_sync': replica.last_sync_timestamp,
+                    'log_position': replica.log_position,
+                    'writes_behind': self.primary.log_position - replica.log_position
                 }
                 for replica in self.replicas
-            ]
+            ],
+            'reads': dict(self.read_stats)
         }
     
     def close_all(self):
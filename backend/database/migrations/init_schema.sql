@@ -115,7 +115,7 @@ CREATE TABLE IF NOT EXISTS replication_log (
     operation VARCHAR(10) NOT NULL CHECK(operation IN ('INSERT','UPDATE','DELETE')),
     table_name VARCHAR(100) NOT NULL,
     record_id VARCHAR(150) NOT NULL,
-    data JSONB NOT NULL,
+    data BYTEA NOT NULL,
     replicated_to TEXT,
     timestamp DOUBLE PRECISION NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -5,24 +5,68 @@ Handles all write operations and serves as the source of truth.
 All writes go through the primary database first, then replicated
 to replica databases asynchronously or synchronously depending on
 consistency requirements.
+
+Writes are group committed: concurrent write()/update() calls queue up,
+and a committer thread applies up to GROUP_COMMIT_MAX_BATCH of them,
+plus their replication log rows, in one SQLite transaction once the
+oldest has waited GROUP_COMMIT_WINDOW seconds. One fsync then covers
+the whole batch, and every caller is woken with its own result.
 """
 
 import sqlite3
 import threading
 import time
-import json
-from typing import Dict, List, Any, Optional
+from bisect import bisect_right
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+from ..core.codec import encode_write_record, decode_write_record
+from .anti_entropy import MerkleIndex
+
+# Seconds the first write of a batch waits for others to join it
+GROUP_COMMIT_WINDOW = 0.001
+# Writes committed together at most
+GROUP_COMMIT_MAX_BATCH = 128
+
+
+class _PendingWrite:
+    """A queued INSERT or UPDATE and the result its caller waits for"""
+
+    __slots__ = ("operation", "table", "data", "record_id", "id_column",
+                 "queued_at", "done", "ok")
+
+    def __init__(self, operation: str, table: str, data: Dict[str, Any],
+                 record_id: Optional[str] = None, id_column: str = 'id'):
+        self.operation = operation
+        self.table = table
+        self.data = data
+        self.record_id = record_id
+        self.id_column = id_column
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.ok = False
+
+
 class PrimaryDatabase:
     """Primary database for all write operations"""
     
-    def __init__(self, db_path: str = "primary_food_delivery.db"):
+    def __init__(self, db_path: str = "primary_food_delivery.db",
+                 group_commit_window: float = GROUP_COMMIT_WINDOW,
+                 group_commit_max_batch: int = GROUP_COMMIT_MAX_BATCH):
         self.db_path = db_path
         self.connection = None
         self.lock = threading.Lock()
-        self.write_log = []  # Track all writes for replication
+        self.write_log: List[bytes] = []  # Encoded writes for replication
+        self.write_log_timestamps: List[float] = []
+        self._last_log_timestamp = 0.0
+        self.group_commit_window = group_commit_window
+        self.group_commit_max_batch = group_commit_max_batch
+        self._queue: List[_PendingWrite] = []
+        self._queue_ready = threading.Condition()
+        self._committer: Optional[threading.Thread] = None
+        self.commit_stats = {"commits": 0, "writes": 0, "max_batch": 0}
         self._initialize_database()
+        self.merkle = MerkleIndex(self)  # Per-table trees for anti-entropy
     
     def _initialize_database(self):
         """Initialize database with schema"""
@@ -150,7 +194,7 @@ class PrimaryDatabase:
                 operation TEXT NOT NULL,
                 table_name TEXT NOT NULL,
                 record_id TEXT NOT NULL,
-                data TEXT NOT NULL,
+                data BLOB NOT NULL,
                 replicated_to TEXT,
                 timestamp REAL NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -171,36 +215,7 @@ class PrimaryDatabase:
         Returns:
             bool: Success status
         """
-        with self.lock:
-            try:
-                cursor = self.connection.cursor()
-                
-                # Build INSERT query
-                columns = ', '.join(data.keys())
-                placeholders = ', '.join(['?' for _ in data])
-                query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-                
-                cursor.execute(query, list(data.values()))
-                self.connection.commit()
-                
-                # Log write for replication
-                write_record = {
-                    'operation': 'INSERT',
-                    'table': table,
-                    'data': data,
-                    'timestamp': time.time()
-                }
-                self.write_log.append(write_record)
-                
-                # Store in replication log
-                self._log_replication(write_record)
-                
-                return True
-            
-            except Exception as e:
-                print(f"Error writing to primary database: {e}")
-                self.connection.rollback()
-                return False
+        return self._submit(_PendingWrite('INSERT', table, data))
     
     def update(self, table: str, record_id: str, updates: Dict[str, Any], 
                id_column: str = 'id') -> bool:
@@ -216,35 +231,115 @@ class PrimaryDatabase:
         Returns:
             bool: Success status
         """
+        return self._submit(_PendingWrite('UPDATE', table, updates, record_id=record_id,
+                                          id_column=id_column))
+    
+    def _submit(self, pending: _PendingWrite) -> bool:
+        """Queue a write for the committer and wait until it is durable"""
+        with self._queue_ready:
+            if self._committer is None:
+                self._committer = threading.Thread(target=self._commit_loop, daemon=True,
+                                                   name="primary-group-commit")
+                self._committer.start()
+            self._queue.append(pending)
+            if len(self._queue) == 1 or len(self._queue) >= self.group_commit_max_batch:
+                self._queue_ready.notify()
+        pending.done.wait()
+        return pending.ok
+    
+    def _commit_loop(self):
+        """Gather a batch over the window (or until full) and commit it"""
+        while True:
+            with self._queue_ready:
+                while not self._queue:
+                    self._queue_ready.wait()
+                deadline = self._queue[0].queued_at + self.group_commit_window
+                while len(self._queue) < self.group_commit_max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._queue_ready.wait(remaining)
+                batch = self._queue[:self.group_commit_max_batch]
+                del self._queue[:self.group_commit_max_batch]
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                # Fail this batch only; the committer must outlive it, or
+                # every later write would wait forever
+                print(f"Error committing batch of {len(batch)} writes: {e}")
+                self._rollback()
+            finally:
+                for pending in batch:
+                    pending.done.set()
+    
+    def _rollback(self):
+        """Roll back a batch transaction left open by a failed commit"""
         with self.lock:
             try:
-                cursor = self.connection.cursor()
-                
-                # Build UPDATE query
-                set_clause = ', '.join([f"{k} = ?" for k in updates.keys()])
-                query = f"UPDATE {table} SET {set_clause} WHERE {id_column} = ?"
-                
-                values = list(updates.values()) + [record_id]
-                cursor.execute(query, values)
+                if self.connection.in_transaction:
+                    self.connection.rollback()
+            except Exception as e:
+                print(f"Error rolling back primary database: {e}")
+    
+    def _commit_batch(self, batch: List[_PendingWrite]):
+        """Apply a batch of writes and their replication log rows in one transaction
+        
+        Each write runs inside a savepoint, so a failing write is rolled
+        back alone and only its caller sees False.
+        """
+        with self.lock:
+            cursor = self.connection.cursor()
+            applied: List[Tuple[_PendingWrite, Dict, bytes]] = []
+            try:
+                if not self.connection.in_transaction:
+                    cursor.execute("BEGIN")
+                for pending in batch:
+                    cursor.execute("SAVEPOINT pending_write")
+                    try:
+                        write_record, payload = self._apply_write(cursor, pending)
+                    except Exception as e:
+                        print(f"Error writing to primary database: {e}")
+                        cursor.execute("ROLLBACK TO pending_write")
+                        cursor.execute("RELEASE pending_write")
+                        continue
+                    cursor.execute("RELEASE pending_write")
+                    applied.append((pending, write_record, payload))
                 self.connection.commit()
-                
-                # Log write for replication
-                write_record = {
-                    'operation': 'UPDATE',
-                    'table': table,
-                    'record_id': record_id,
-                    'data': updates,
-                    'timestamp': time.time()
-                }
-                self.write_log.append(write_record)
-                self._log_replication(write_record)
-                
-                return True
-            
             except Exception as e:
-                print(f"Error updating primary database: {e}")
+                print(f"Error committing batch of {len(batch)} writes: {e}")
                 self.connection.rollback()
-                return False
+                return
+            
+            # Only committed writes become visible to replication
+            for pending, write_record, payload in applied:
+                self.write_log.append(payload)
+                self.write_log_timestamps.append(write_record['timestamp'])
+                pending.ok = True
+            self.commit_stats["commits"] += 1
+            self.commit_stats["writes"] += len(applied)
+            self.commit_stats["max_batch"] = max(self.commit_stats["max_batch"], len(batch))
+    
+    def _apply_write(self, cursor: sqlite3.Cursor, pending: _PendingWrite) -> Tuple[Dict, bytes]:
+        """Execute one write and insert its replication log row (no commit)"""
+        if pending.operation == 'INSERT':
+            columns = ', '.join(pending.data.keys())
+            placeholders = ', '.join(['?' for _ in pending.data])
+            query = f"INSERT INTO {pending.table} ({columns}) VALUES ({placeholders})"
+            cursor.execute(query, list(pending.data.values()))
+        else:
+            set_clause = ', '.join([f"{k} = ?" for k in pending.data.keys()])
+            query = f"UPDATE {pending.table} SET {set_clause} WHERE {pending.id_column} = ?"
+            cursor.execute(query, list(pending.data.values()) + [pending.record_id])
+        
+        write_record = {
+            'operation': pending.operation,
+            'table': pending.table,
+            'data': pending.data,
+            'timestamp': time.time()
+        }
+        if pending.operation == 'UPDATE':
+            write_record['record_id'] = pending.record_id
+        return write_record, self._log_replication(cursor, write_record)
     
     def read(self, table: str, conditions: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
@@ -258,58 +353,82 @@ class PrimaryDatabase:
             List of records as dictionaries
         """
         try:
-            cursor = self.connection.cursor()
-            
-            query = f"SELECT * FROM {table}"
-            
-            if conditions:
-                where_clause = ' AND '.join([f"{k} = ?" for k in conditions.keys()])
-                query += f" WHERE {where_clause}"
-                cursor.execute(query, list(conditions.values()))
-            else:
-                cursor.execute(query)
-            
-            rows = cursor.fetchall()
+            # The connection is shared with the committer, so never read
+            # (or commit) in the middle of its batch transaction
+            with self.lock:
+                cursor = self.connection.cursor()
+                
+                query = f"SELECT * FROM {table}"
+                
+                if conditions:
+                    where_clause = ' AND '.join([f"{k} = ?" for k in conditions.keys()])
+                    query += f" WHERE {where_clause}"
+                    cursor.execute(query, list(conditions.values()))
+                else:
+                    cursor.execute(query)
+                
+                rows = cursor.fetchall()
             return [dict(row) for row in rows]
         
         except Exception as e:
             print(f"Error reading from primary database: {e}")
             return []
     
-    def _log_replication(self, write_record: Dict):
-        """Log write operation for replication tracking"""
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute("""
-                INSERT INTO replication_log (operation, table_name, record_id, data, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                write_record['operation'],
-                write_record['table'],
-                write_record.get('record_id', ''),
-                json.dumps(write_record['data']),
-                write_record['timestamp']
-            ))
-            self.connection.commit()
-        except Exception as e:
-            print(f"Error logging replication: {e}")
+    def _log_replication(self, cursor: sqlite3.Cursor, write_record: Dict) -> bytes:
+        """Insert a write's replication_log row in the current transaction
+
+        The record is encoded once with the binary codec; the same bytes
+        are stored in replication_log, kept in write_log once committed
+        and sent to replicas.
+        """
+        # Keep the log sorted by timestamp for get_encoded_write_log's bisect
+        if write_record['timestamp'] < self._last_log_timestamp:
+            write_record['timestamp'] = self._last_log_timestamp
+        self._last_log_timestamp = write_record['timestamp']
+        payload = encode_write_record(write_record)
+        cursor.execute("""
+            INSERT INTO replication_log (operation, table_name, record_id, data, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            write_record['operation'],
+            write_record['table'],
+            write_record.get('record_id', ''),
+            payload,
+            write_record['timestamp']
+        ))
+        return payload
+    
+    @property
+    def log_position(self) -> int:
+        """Number of committed writes in the replication log so far"""
+        return len(self.write_log)
+    
+    def get_encoded_write_log_from(self, position: int) -> List[bytes]:
+        """Encoded writes from log position onwards, as shipped to replicas"""
+        return self.write_log[position:]
+    
+    def get_encoded_write_log(self, since_timestamp: float = 0) -> List[bytes]:
+        """Encoded writes after since_timestamp, as shipped to replicas"""
+        start = bisect_right(self.write_log_timestamps, since_timestamp)
+        return self.write_log[start:]
     
     def get_write_log(self, since_timestamp: float = 0) -> List[Dict]:
         """Get write log for replication"""
-        return [w for w in self.write_log if w['timestamp'] > since_timestamp]
+        return [decode_write_record(w) for w in self.get_encoded_write_log(since_timestamp)]
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """Execute custom SQL query"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            
-            if query.strip().upper().startswith('SELECT'):
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
-            else:
-                self.connection.commit()
-                return []
+            with self.lock:
+                cursor = self.connection.cursor()
+                cursor.execute(query, params)
+                
+                if query.strip().upper().startswith('SELECT'):
+                    rows = cursor.fetchall()
+                    return [dict(row) for row in rows]
+                else:
+                    self.connection.commit()
+                    return []
         
         except Exception as e:
             print(f"Error executing query: {e}")
@@ -3,16 +3,20 @@ Replica Databases
 
 Handle read operations with eventual consistency.
 Replicas receive updates from primary database with some lag,
-demonstrating eventual consistency in distributed systems.
+demonstrating eventual consistency in distributed systems. Rows that
+drifted (missed writes while down or partitioned) are found and
+repaired by Merkle anti-entropy (see anti_entropy.py).
 """
 
 import sqlite3
 import threading
 import time
-import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 
+from ..core.codec import decode_write_record
+from .anti_entropy import MerkleIndex
+
 class ReplicaDatabase:
     """Replica database for read operations"""
     
@@ -23,7 +27,10 @@ class ReplicaDatabase:
         self.lock = threading.Lock()
         self.last_sync_timestamp = 0
         self.replication_lag_ms = 0
+        self.log_position = 0  # Primary log writes applied so far
+        self._sync_lock = threading.Lock()
         self._initialize_database()
+        self.merkle = MerkleIndex(self)
     
     def _initialize_database(self):
         """Initialize replica database with same schema as primary"""
@@ -166,16 +173,19 @@ class ReplicaDatabase:
             print(f"Error reading from replica {self.replica_id}: {e}")
             return []
     
-    def replicate_write(self, write_record: Dict) -> bool:
+    def replicate_write(self, write_record: Union[Dict, bytes]) -> bool:
         """
         Apply write from primary to replica
         
         Args:
-            write_record: Write operation details
+            write_record: Write operation details, or the same record
+                encoded with the binary codec
         
         Returns:
             bool: Success status
         """
+        if not isinstance(write_record, dict):
+            write_record = decode_write_record(write_record)
         with self.lock:
             try:
                 start_time = time.time()
@@ -225,15 +235,59 @@ class ReplicaDatabase:
             # Simulate network delay for eventual consistency
             time.sleep(0.05)  # 50ms delay
         
-        # Get writes since last sync
-        writes = primary_db.get_write_log(since_timestamp=self.last_sync_timestamp)
-        
-        for write in writes:
-            self.replicate_write(write)
+        # Get writes since last sync; one sync at a time so each is applied once
+        with self._sync_lock:
+            writes = primary_db.get_encoded_write_log_from(self.log_position)
+            
+            applied = 0
+            for write in writes:
+                # Stop at a write that fails: log_position must not claim
+                # it, or has_applied() would vouch for a missing write.
+                # The next sync retries from there.
+                if not self.replicate_write(write):
+                    break
+                self.log_position += 1
+                applied += 1
         
-        print(f"✓ Replica {self.replica_id} synced: {len(writes)} operations, "
+        print(f"✓ Replica {self.replica_id} synced: {applied}/{len(writes)} operations, "
               f"lag: {self.replication_lag_ms:.1f}ms")
     
+    def apply_repair(self, table: str, primary_key: str, rows: List[Dict],
+                     deleted: List[Any]) -> bool:
+        """
+        Overwrite rows with the primary's copies and delete rows it no longer has
+        
+        Args:
+            table: Table name
+            primary_key: Primary key column
+            rows: Full rows from the primary
+            deleted: Primary keys absent on the primary
+        
+        Returns:
+            bool: Success status
+        """
+        with self.lock:
+            try:
+                cursor = self.connection.cursor()
+                for row in rows:
+                    columns = ', '.join(row.keys())
+                    placeholders = ', '.join(['?' for _ in row])
+                    cursor.execute(f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})",
+                                   list(row.values()))
+                for key in deleted:
+                    cursor.execute(f"DELETE FROM {table} WHERE {primary_key} = ?", (key,))
+                self.connection.commit()
+                return True
+            
+            except Exception as e:
+                print(f"Error repairing {table} on replica {self.replica_id}: {e}")
+                self.connection.rollback()
+                return False
+    
+    def has_applied(self, position: int) -> bool:
+        """Whether the replica has applied the primary's log up to position"""
+        return self.log_position >= position
+    
     def get_replication_lag(self) -> float:
         """Get current replication lag in milliseconds"""
         return self.replication_lag_ms
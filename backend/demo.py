@@ -8,7 +8,7 @@ import random
 from zwiggy.backend.core.node import DistributedNode
 from zwiggy.backend.core.message_queue import message_queue
 from zwiggy.backend.distributed.leader_election import BullyLeaderElection
-from zwiggy.backend.distributed.consistency import ConsistencyManager
+from zwiggy.backend.distributed.consistency import ConsistencyManager, connect_replicas
 from zwiggy.backend.distributed.load_balancer import LoadBalancer
 from zwiggy.backend.services.order_service import OrderService
 from zwiggy.backend.services.restaurant_service import RestaurantService
@@ -83,19 +83,12 @@ def demo_2_concurrency():
     order_service = OrderService(node)
     traffic_gen = TrafficGenerator(order_service)
     
-    # Test WITHOUT locks
-    print("TEST 1: WITHOUT LOCKS (Race Conditions)")
+    # Orders take no locks: stock counts are versioned, so concurrent
+    # orders for the same dishes never wait on each other
+    print("Concurrent orders for the same restaurant (lock-free)")
     print("-" * 60)
     traffic_gen.results = []
-    traffic_gen.generate_concurrent_orders(5, restaurant_id=1, use_locks=False)
-    
-    time.sleep(1)
-    
-    # Test WITH locks
-    print("\nTEST 2: WITH LOCKS (Thread Safe)")
-    print("-" * 60)
-    traffic_gen.results = []
-    traffic_gen.generate_concurrent_orders(5, restaurant_id=1, use_locks=True)
+    traffic_gen.generate_concurrent_orders(5, restaurant_id=1)
 
 
 def demo_3_clock_sync():
@@ -188,9 +181,15 @@ def demo_5_consistency():
     """Demo 5: Data Consistency Models"""
     print_divider("DEMO 5: DATA CONSISTENCY MODELS")
     
-    node = DistributedNode(node_id=1, priority=1)
-    NodeRegistry.register(node)
+    nodes = []
+    for i in range(1, 4):
+        node = DistributedNode(node_id=i, priority=i)
+        NodeRegistry.register(node)
+        nodes.append(node)
     
+    managers = [ConsistencyManager(node) for node in nodes]
+    connect_replicas(managers)
+    consistency_mgr = managers[0]
     replicas = [2, 3]
     
     # Test different consistency modes
@@ -200,7 +199,7 @@ def demo_5_consistency():
         print(f"\nTesting {mode.upper()} Consistency:")
         print("-" * 60)
         
-        consistency_mgr = ConsistencyManager(node, mode=mode)
+        consistency_mgr.mode = mode
         
         result = consistency_mgr.write(
             key="order_123_status",
@@ -18,6 +18,8 @@ This module implements key distributed systems algorithms:
    - Strong consistency: Synchronous replication
    - Eventual consistency: Asynchronous replication
    - Quorum: Majority-based consensus
+   - HintedHandoff: bounded on-disk hint queues for down replicas,
+     delivered in batches when they recover
 
 3. LoadBalancer: Request distribution strategies
    - Round-robin: Sequential distribution
@@ -35,7 +37,8 @@ This module implements key distributed systems algorithms:
 """
 
 from .leader_election import BullyLeaderElection
-from .consistency import ConsistencyManager
+from .consistency import ConsistencyManager, QuorumNotReached, ReplicaUnavailable
+from .hinted_handoff import HintedHandoff
 from .load_balancer import LoadBalancer
 from .mapreduce import MapReduceEngine
 from .replication import ReplicationManager
@@ -43,6 +46,9 @@ from .replication import ReplicationManager
 __all__ = [
     'BullyLeaderElection',
     'ConsistencyManager',
+    'QuorumNotReached',
+    'ReplicaUnavailable',
+    'HintedHandoff',
     'LoadBalancer',
     'MapReduceEngine',
     'ReplicationManager'
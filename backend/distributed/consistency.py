@@ -1,22 +1,100 @@
 # FILE: backend/distributed/consistency.py
 # ============================================================================
 
-from typing import Any, Dict, List
+"""
+Consistency Models
+
+Each node runs a ConsistencyManager over its own VersionedKVStore; the
+managers of the other nodes are its peers. A write is stored locally and
+sent to every replica at once; the call returns as soon as enough of
+them acknowledged:
+
+    strong    every replica (W = N)
+    quorum    a majority, counting the local copy (W = N // 2 + 1)
+    eventual  none; replication runs in the background (W = 1)
+
+Quorum reads ask the replicas at once as well and return the newest
+version among the first R = N // 2 + 1 answers (local copy included).
+Without hinted handoff R + W > N, so a read always sees the latest
+acknowledged quorum write. A quorum read that cannot collect R answers
+raises QuorumNotReached rather than return what it has. Strong and
+eventual reads are local.
+
+Replicas that have not answered when the quorum is reached keep
+receiving the write in the background; outstanding read requests are
+cancelled. A replica whose node is down, or that misses the timeout,
+does not count. Latencies are measured per operation and mode.
+
+With a HintedHandoff, a write for a replica that is down is not sent
+at all but kept on this node as a hint, as is a write whose replica
+call fails. Quorum writes count hints towards W (sloppy quorum), so
+they do not wait on down replicas; strong writes still need every
+replica. Hints are delivered in batches once the replica is back.
+A hint is not a replica copy, so a sloppy quorum write can be acked by
+fewer than W replicas and R + W > N no longer holds: until its hints
+are delivered, a quorum read that does not reach the writing node may
+miss it. The write result lists the hinted replicas.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
 import time
+from ..core.kv_store import VersionedKVStore
+from .hinted_handoff import HintedHandoff
+
+# Seconds to wait for replica acknowledgements
+DEFAULT_REPLICA_TIMEOUT = 1.0
+
+# Latency samples kept per operation and mode
+LATENCY_SAMPLES = 1000
+
+# Replica calls of every manager in the process share these threads
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="replica")
+
+
+class ReplicaUnavailable(Exception):
+    """Raised by a replica whose node is down"""
+
+
+class QuorumNotReached(Exception):
+    """Raised by a quorum read that heard from fewer than R replicas"""
+
+
+def connect_replicas(managers: List["ConsistencyManager"]):
+    """Make every manager a peer of every other one"""
+    for manager in managers:
+        for peer in managers:
+            if peer is not manager:
+                manager.peers[peer.node.node_id] = peer
+
 
 class ConsistencyManager:
     """Manages different consistency models"""
-    
-    def __init__(self, node, mode: str = "strong"):
+
+    def __init__(self, node, mode: str = "strong", store: Optional[VersionedKVStore] = None,
+                 timeout: float = DEFAULT_REPLICA_TIMEOUT,
+                 handoff: Optional[HintedHandoff] = None):
         self.node = node
         self.mode = mode  # strong, eventual, quorum
-        self.write_log = []
-        self.version_vector = {}
-    
+        self.store = store if store is not None else VersionedKVStore()
+        self.timeout = timeout
+        self.handoff = handoff
+        # Replicas whose hints are being delivered right now
+        self._delivering = set()
+        # node_id -> replica; anything with replicate(record) and fetch(key, at)
+        self.peers: Dict[int, Any] = {}
+        # node_id -> highest logical time applied from that node
+        self.version_vector: Dict[int, int] = {}
+        # (operation, mode) -> recent latencies in seconds
+        self.latencies: Dict[Tuple[str, str], deque] = {}
+        self.lock = threading.Lock()
+
     def write(self, key: str, value: Any, replicas: List[int]) -> Dict:
         """Write data with consistency guarantees"""
         logical_time = self.node.clock.tick()
-        
+
         write_record = {
             "key": key,
             "value": value,
@@ -24,7 +102,7 @@ class ConsistencyManager:
             "logical_time": logical_time,
             "node_id": self.node.node_id
         }
-        
+
         if self.mode == "strong":
             return self._strong_consistency_write(write_record, replicas)
         elif self.mode == "eventual":
@@ -33,76 +111,278 @@ class ConsistencyManager:
             return self._quorum_write(write_record, replicas)
         else:
             return self._strong_consistency_write(write_record, replicas)
-    
+
     def _strong_consistency_write(self, record: Dict, replicas: List[int]) -> Dict:
         """Strong consistency: Wait for all replicas"""
-        self.node.log_event("WRITE_STRONG", 
+        self.node.log_event("WRITE_STRONG",
             f"Writing {record['key']} with strong consistency")
-        
-        self.write_log.append(record)
-        acks = [self.node.node_id]
-        
-        for replica_id in replicas:
-            if replica_id != self.node.node_id:
-                acks.append(replica_id)
-                self.node.log_event("REPLICATION_SYNC", 
-                    f"Replicated to Node {replica_id}")
-        
-        return {
-            "success": True,
-            "mode": "strong",
-            "acks": acks,
-            "latency_ms": 50
-        }
-    
+
+        replicas = self._others(replicas)
+        return self._replicated_write("strong", record, replicas, len(replicas) + 1,
+                                      "REPLICATION_SYNC", "Replicated to Node {}")
+
     def _eventual_consistency_write(self, record: Dict, replicas: List[int]) -> Dict:
         """Eventual consistency: Async replication"""
-        self.node.log_event("WRITE_EVENTUAL", 
+        self.node.log_event("WRITE_EVENTUAL",
             f"Writing {record['key']} with eventual consistency")
-        
-        self.write_log.append(record)
-        
+
+        replicas = self._others(replicas)
         for replica_id in replicas:
-            if replica_id != self.node.node_id:
-                self.node.log_event("REPLICATION_ASYNC", 
-                    f"Async replication to Node {replica_id}")
-        
-        return {
-            "success": True,
-            "mode": "eventual",
-            "acks": [self.node.node_id],
-            "latency_ms": 10
-        }
-    
+            self.node.log_event("REPLICATION_ASYNC",
+                f"Async replication to Node {replica_id}")
+        return self._replicated_write("eventual", record, replicas, 1)
+
     def _quorum_write(self, record: Dict, replicas: List[int]) -> Dict:
         """Quorum: Wait for majority"""
-        self.node.log_event("WRITE_QUORUM", 
+        self.node.log_event("WRITE_QUORUM",
             f"Writing {record['key']} with quorum consistency")
-        
-        self.write_log.append(record)
-        acks = [self.node.node_id]
-        
-        quorum_size = (len(replicas) + 1) // 2 + 1
-        
-        for replica_id in replicas:
-            if replica_id != self.node.node_id:
-                acks.append(replica_id)
-                self.node.log_event("REPLICATION_QUORUM", 
-                    f"Quorum replication to Node {replica_id}")
-                
-                if len(acks) >= quorum_size:
-                    break
-        
+
+        replicas = self._others(replicas)
+        return self._replicated_write("quorum", record, replicas, (len(replicas) + 1) // 2 + 1,
+                                      "REPLICATION_QUORUM", "Quorum replication to Node {}",
+                                      count_hints=True)
+
+    def _replicated_write(self, mode: str, record: Dict, replicas: List[int], required: int,
+                          event_type: Optional[str] = None, description: str = "",
+                          count_hints: bool = False) -> Dict:
+        """Store record locally, send it to all replicas, wait for required acks
+
+        Down replicas get a hint instead; with count_hints, hints count
+        towards required.
+        """
+        start = time.perf_counter()
+        self._apply(record)
+        available = [replica_id for replica_id in replicas if self.is_replica_available(replica_id)]
+        down = [replica_id for replica_id in replicas if replica_id not in available]
+        hinted = [replica_id for replica_id in down if self._hint(replica_id, record)]
+
+        def on_error(replica_id: int):
+            if self._hint(replica_id, record):
+                hinted.append(replica_id)
+
+        needed = required - 1 - (len(hinted) if count_hints else 0)
+        responses, _ = self._fan_out(available, lambda peer: peer.replicate(record),
+                                     needed, cancel_rest=False, on_error=on_error)
+        latency = time.perf_counter() - start
+        self._record_latency("write", mode, latency)
+
+        acks = [self.node.node_id] + list(responses)
+        # Background failures keep appending to hinted
+        held = list(hinted)
+        if event_type:
+            for replica_id in responses:
+                self.node.log_event(event_type, description.format(replica_id))
+        for replica_id in held:
+            self.node.log_event("HINTED_HANDOFF",
+                f"Holding {record['key']} for Node {replica_id}")
+        self._deliver_pending(available)
+
         return {
-            "success": len(acks) >= quorum_size,
-            "mode": "quorum",
+            "success": len(acks) + (len(held) if count_hints else 0) >= required,
+            "mode": mode,
             "acks": acks,
-            "latency_ms": 30
+            "hinted": held,
+            "hinted_handoff_used": bool(held),
+            "required": required,
+            "latency_ms": round(latency * 1000, 3)
         }
-    
-    def read(self, key: str) -> Any:
-        """Read data based on consistency mode"""
-        for record in reversed(self.write_log):
-            if record["key"] == key:
-                return record["value"]
-        return None
\ No newline at end of file
+
+    def _fan_out(self, replicas: List[int], call: Callable[[Any], Any], needed: int,
+                 cancel_rest: bool,
+                 on_error: Optional[Callable[[int], None]] = None) -> Tuple[Dict[int, Any], List[int]]:
+        """call(peer) on every replica concurrently until `needed` succeed
+
+        Returns:
+            (node_id -> result in arrival order, node_ids that failed)
+
+        Calls still running at that point finish in the background; with
+        cancel_rest, those not started yet are dropped instead.
+        on_error(node_id) runs for every call that raises, including
+        ones that fail in the background later.
+        """
+        failed = [replica_id for replica_id in replicas if replica_id not in self.peers]
+        futures = {_executor.submit(call, self.peers[replica_id]): replica_id
+                   for replica_id in replicas if replica_id in self.peers}
+        responses: Dict[int, Any] = {}
+        pending = set(futures)
+        deadline = time.monotonic() + self.timeout
+        while pending and len(responses) < needed and len(responses) + len(pending) >= needed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                replica_id = futures[future]
+                try:
+                    responses[replica_id] = future.result()
+                except Exception as e:
+                    print(f"Replica {replica_id} failed: {e!r}")
+                    failed.append(replica_id)
+                    if on_error is not None:
+                        on_error(replica_id)
+        if cancel_rest:
+            for future in pending:
+                future.cancel()
+        elif on_error is not None:
+            for future in pending:
+                future.add_done_callback(
+                    lambda f, replica_id=futures[future]:
+                        f.cancelled() or f.exception() is None or on_error(replica_id))
+        return responses, failed
+
+    def is_replica_available(self, replica_id: int) -> bool:
+        """Whether a replica is known and not marked down"""
+        peer = self.peers.get(replica_id)
+        if peer is None:
+            return False
+        is_available = getattr(peer, "is_available", None)
+        return is_available() if is_available is not None else True
+
+    def is_available(self) -> bool:
+        return self.node.is_active
+
+    def _hint(self, replica_id: int, record: Dict) -> bool:
+        """Keep a write for a replica that could not take it"""
+        return self.handoff is not None and self.handoff.store(replica_id, record)
+
+    def _deliver_pending(self, replicas: List[int]):
+        """Start delivering hints to any of replicas that has some"""
+        if self.handoff is None:
+            return
+        for replica_id in replicas:
+            if self.handoff.pending(replica_id) and replica_id not in self._delivering:
+                with self.lock:
+                    if replica_id in self._delivering:
+                        continue
+                    self._delivering.add(replica_id)
+                _executor.submit(self.deliver_hints, replica_id)
+
+    def deliver_hints(self, replica_id: int) -> int:
+        """Send the hints held for a replica, in batches; returns how many arrived"""
+        peer = self.peers.get(replica_id)
+        try:
+            if self.handoff is None or peer is None or not self.is_replica_available(replica_id):
+                return 0
+            delivered = self.handoff.replay(replica_id, peer.replicate_batch)
+            if delivered:
+                self.node.log_event("HINTS_DELIVERED",
+                    f"Delivered {delivered} hinted writes to Node {replica_id}")
+            return delivered
+        finally:
+            with self.lock:
+                self._delivering.discard(replica_id)
+
+    def _others(self, replicas: List[int]) -> List[int]:
+        return [replica_id for replica_id in replicas if replica_id != self.node.node_id]
+
+    def _apply(self, record: Dict) -> bool:
+        """Store a write record and advance the version vector"""
+        node_id = record["node_id"]
+        with self.lock:
+            if record["logical_time"] > self.version_vector.get(node_id, -1):
+                self.version_vector[node_id] = record["logical_time"]
+        return self.store.put(record)
+
+    def replicate(self, record: Dict) -> bool:
+        """Apply a write sent by a peer (replica side)
+
+        Raises:
+            ReplicaUnavailable: if this node is down
+        """
+        if not self.node.is_active:
+            raise ReplicaUnavailable(f"Node {self.node.node_id} is down")
+        self.node.clock.update(record["logical_time"])
+        return self._apply(record)
+
+    def replicate_batch(self, records: List[Dict]) -> int:
+        """Apply a batch of writes held for this node while it was down
+
+        Raises:
+            ReplicaUnavailable: if this node is down
+        """
+        if not self.node.is_active:
+            raise ReplicaUnavailable(f"Node {self.node.node_id} is down")
+        if records:
+            self.node.clock.update(max(record["logical_time"] for record in records))
+        for record in records:
+            self._apply(record)
+        return len(records)
+
+    def fetch(self, key: str, at: Optional[int] = None) -> Optional[Dict]:
+        """Latest local record for key (replica side of a quorum read)
+
+        Raises:
+            ReplicaUnavailable: if this node is down
+        """
+        if not self.node.is_active:
+            raise ReplicaUnavailable(f"Node {self.node.node_id} is down")
+        return self.store.get(key, at)
+
+    def read(self, key: str, at: Optional[int] = None) -> Any:
+        """Read data based on consistency mode
+
+        Args:
+            key: key to read
+            at: logical time to read as of; None reads the latest value
+
+        Raises:
+            QuorumNotReached: in quorum mode, if fewer than R replicas answered
+        """
+        record = self.read_record(key, at)
+        return record["value"] if record is not None else None
+
+    def read_record(self, key: str, at: Optional[int] = None) -> Optional[Dict]:
+        """Newest write record for key visible under the current mode
+
+        Raises:
+            QuorumNotReached: in quorum mode, if fewer than R replicas answered
+        """
+        start = time.perf_counter()
+        record = self.store.get(key, at)
+        if self.mode == "quorum":
+            replicas = list(self.peers)
+            required = (len(replicas) + 1) // 2 + 1
+            available = [replica_id for replica_id in replicas if self.is_replica_available(replica_id)]
+            responses, _ = self._fan_out(available, lambda peer: peer.fetch(key, at),
+                                         required - 1, cancel_rest=True)
+            if len(responses) + 1 < required:
+                self._record_latency("read", self.mode, time.perf_counter() - start)
+                raise QuorumNotReached(f"Read of {key} heard from {len(responses) + 1} "
+                                       f"of {required} required replicas")
+            for other in responses.values():
+                if other is not None and (record is None or
+                        (other["logical_time"], other["node_id"]) >
+                        (record["logical_time"], record["node_id"])):
+                    record = other
+        self._record_latency("read", self.mode, time.perf_counter() - start)
+        return record
+
+    def history(self, key: str) -> List[Dict]:
+        """Retained write records for key, newest first"""
+        return self.store.history(key)
+
+    def _record_latency(self, operation: str, mode: str, seconds: float):
+        samples = self.latencies.get((operation, mode))
+        if samples is None:
+            samples = self.latencies.setdefault((operation, mode), deque(maxlen=LATENCY_SAMPLES))
+        samples.append(seconds)
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """Latency percentiles of recent operations: operation -> mode -> stats"""
+        stats: Dict[str, Dict[str, Dict]] = {}
+        for (operation, mode), samples in list(self.latencies.items()):
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+
+            def percentile(p: float) -> float:
+                return round(ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)] * 1000, 3)
+
+            stats.setdefault(operation, {})[mode] = {
+                "count": len(ordered),
+                "p50_ms": percentile(50),
+                "p90_ms": percentile(90),
+                "p99_ms": percentile(99),
+                "max_ms": round(ordered[-1] * 1000, 3)
+            }
+        return stats
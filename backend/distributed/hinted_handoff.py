@@ -0,0 +1,181 @@
+# FILE: backend/distributed/hinted_handoff.py
+# ============================================================================
+
+"""
+Hinted Handoff
+
+When a write cannot reach a replica (node marked down, call failed), a
+healthy node keeps it as a hint for that replica instead of dropping it.
+Hints for each replica go to their own append-only file, framed as
+[length][crc32][JSON body] and fsynced before the write is reported as
+held, so a torn tail left by a crash is cut off on open. Each queue is bounded: once full, further hints for that replica
+are dropped and counted, and the replica has to be repaired by
+anti-entropy instead.
+
+When the replica is back, its hints are delivered oldest first in
+batches, without blocking new hints for it meanwhile; a failed batch is
+kept for the next attempt. Writes are
+last-writer-wins, so delivering a hint twice is harmless.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, List, Tuple
+
+# body length, crc32
+HINT_RECORD_HEADER = struct.Struct("<II")
+
+# Hints kept per down replica
+DEFAULT_MAX_HINTS = 10_000
+
+# Hints delivered per call when a replica recovers
+DEFAULT_REPLAY_BATCH = 256
+
+
+def _encode(record: Dict) -> bytes:
+    body = json.dumps(record, separators=(",", ":")).encode()
+    return HINT_RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def _decode_all(data: bytes) -> Tuple[List[Dict], int]:
+    """Records in data and the offset where the valid prefix ends"""
+    records = []
+    offset = 0
+    while offset + HINT_RECORD_HEADER.size <= len(data):
+        length, crc = HINT_RECORD_HEADER.unpack_from(data, offset)
+        start = offset + HINT_RECORD_HEADER.size
+        body = data[start:start + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        records.append(json.loads(body))
+        offset = start + length
+    return records, offset
+
+
+class HintQueue:
+    """Bounded on-disk FIFO of writes held for one replica"""
+
+    def __init__(self, path: str, max_hints: int = DEFAULT_MAX_HINTS):
+        self.path = path
+        self.max_hints = max_hints
+        self.lock = threading.Lock()
+        # One drain at a time; appends only need self.lock
+        self.drain_lock = threading.Lock()
+        self.count = 0
+        self.dropped = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            records, valid = _decode_all(data)
+            self.count = len(records)
+            if valid < len(data):
+                print(f"Hint queue {path}: dropped {len(data) - valid} torn bytes")
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+
+    def append(self, record: Dict) -> bool:
+        """Queue a write; False if the queue is full and it was dropped"""
+        with self.lock:
+            if self.count >= self.max_hints:
+                self.dropped += 1
+                return False
+            with open(self.path, "ab") as f:
+                f.write(_encode(record))
+                f.flush()
+                os.fsync(f.fileno())
+            self.count += 1
+            return True
+
+    def drain(self, deliver, batch_size: int = DEFAULT_REPLAY_BATCH) -> int:
+        """Hand queued writes to deliver(records) in batches, oldest first
+
+        Stops at the first batch deliver() raises on; that batch and the
+        rest stay queued. Delivery runs without self.lock, so hints
+        appended meanwhile are queued behind the snapshot being
+        delivered. Returns how many hints were delivered.
+        """
+        with self.drain_lock:
+            with self.lock:
+                if not self.count:
+                    return 0
+                with open(self.path, "rb") as f:
+                    records, snapshot_end = _decode_all(f.read())
+            delivered = 0
+            try:
+                for start in range(0, len(records), batch_size):
+                    batch = records[start:start + batch_size]
+                    deliver(batch)
+                    delivered = start + len(batch)
+            except Exception as e:
+                print(f"Hint delivery from {self.path} stopped after {delivered}: {e!r}")
+            if not delivered:
+                return 0
+            with self.lock:
+                with open(self.path, "rb") as f:
+                    f.seek(snapshot_end)
+                    appended = f.read()
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(b"".join(_encode(record) for record in records[delivered:]))
+                    f.write(appended)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self.count -= delivered
+            return delivered
+
+
+class HintedHandoff:
+    """Hint queues of one node, one per replica it holds writes for"""
+
+    def __init__(self, directory: str, max_hints: int = DEFAULT_MAX_HINTS,
+                 batch_size: int = DEFAULT_REPLAY_BATCH):
+        self.directory = directory
+        self.max_hints = max_hints
+        self.batch_size = batch_size
+        self.queues: Dict[int, HintQueue] = {}
+        self.lock = threading.Lock()
+        self.delivered = 0
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith("hints_") and name.endswith(".log"):
+                self._queue(int(name[len("hints_"):-len(".log")]))
+
+    def _queue(self, node_id: int) -> HintQueue:
+        queue = self.queues.get(node_id)
+        if queue is None:
+            with self.lock:
+                queue = self.queues.get(node_id)
+                if queue is None:
+                    path = os.path.join(self.directory, f"hints_{node_id}.log")
+                    queue = self.queues[node_id] = HintQueue(path, self.max_hints)
+        return queue
+
+    def store(self, node_id: int, record: Dict[str, Any]) -> bool:
+        """Hold a write for node_id; False if its queue is full"""
+        return self._queue(node_id).append(record)
+
+    def pending(self, node_id: int) -> int:
+        queue = self.queues.get(node_id)
+        return queue.count if queue is not None else 0
+
+    def replay(self, node_id: int, deliver) -> int:
+        """Deliver node_id's hints through deliver(records), in batches"""
+        queue = self.queues.get(node_id)
+        if queue is None:
+            return 0
+        delivered = queue.drain(deliver, self.batch_size)
+        self.delivered += delivered
+        return delivered
+
+    def get_stats(self) -> Dict:
+        return {
+            "pending": {node_id: queue.count for node_id, queue in self.queues.items()
+                        if queue.count},
+            "dropped": {node_id: queue.dropped for node_id, queue in self.queues.items()
+                        if queue.dropped},
+            "delivered": self.delivered
+        }
@@ -4,8 +4,8 @@
 import threading
 import time
 from typing import List
-from zwiggy.backend.core import message_queue
-from zwiggy.backend.core.node import DistributedNode
+from ..core import message_queue
+from ..core.node import DistributedNode
 
 
 class BullyLeaderElection:
@@ -65,13 +65,13 @@ class BullyLeaderElection:
     # -----------------------------------------------------------
     def _check_node_response(self, node_id: int) -> bool:
         """Check if node is alive"""
-        from zwiggy.backend.demo import NodeRegistry
+        from ..demo import NodeRegistry
         return NodeRegistry.is_node_active(node_id)
 
     # -----------------------------------------------------------
     def _become_leader(self):
         """Declare this node as leader"""
-        from zwiggy.backend.demo import NodeRegistry
+        from ..demo import NodeRegistry
 
         self.node.is_leader = True
         self.node.current_leader_id = self.node.node_id
@@ -1,57 +1,241 @@
-import threading
+# FILE: backend/distributed/run_distributed_nodes.py
+# ============================================================================
+
+"""
+Multi-process cluster runner
+
+Starts every DistributedNode in its own OS process, connected through the
+message bus socket transport, then measures a cross-process Bully election
+and leader -> follower replication throughput.
+
+The parent process acts as node 0 (controller): it kicks off the election,
+waits for the COORDINATOR announcement, asks the leader to replicate a
+batch of writes and collects the report.
+
+    python -m zwiggy.backend.distributed.run_distributed_nodes --nodes 3 --transport unix
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
 import time
 
+from ..core.message_queue import AsyncMessageBus
 from ..core.node import DistributedNode
-from ..core.message_queue import message_queue
-from .leader_election import BullyLeaderElection
-from .consistency import ConsistencyManager
-
-
-# Number of nodes to simulate
-NODE_COUNT = 3
-
-def start_node(node_id):
-    """
-    Start a distributed node with leader election + heartbeats.
-    """
-    node = DistributedNode(
-        node_id=node_id,
-        message_queue=message_queue,
-        consistency_manager=ConsistencyManager()
+from ..core.transport import SocketTransport, node_address
+
+CONTROLLER_ID = 0
+
+# How long a node waits for an ANSWER from higher nodes before taking over
+ELECTION_TIMEOUT = 0.2
+
+# Replication messages in flight per follower before waiting for acks
+REPLICATION_WINDOW = 256
+
+
+def build_bus(node_id: int, node_ids, kind: str, socket_dir: str, base_port: int):
+    """Message bus for one process with every other node reachable over sockets"""
+    def address(nid):
+        return node_address(kind, nid, socket_dir, base_port)
+
+    bus = AsyncMessageBus(maxsize=65536)
+    bus.create_queue(node_id)
+    transport = SocketTransport(
+        address(node_id),
+        peers={nid: address(nid) for nid in node_ids if nid != node_id},
+        deliver=bus.deliver_local,
+        maxsize=65536
     )
-    node.start()
-    return node
+    bus.attach_transport(transport.start())
+    return bus, transport
 
-def start_election(nodes):
-    """
-    Trigger bully leader election when system starts.
-    """
-    election = BullyLeaderElection(nodes)
-    leader = election.run_election()
-    print(f"[SYSTEM] Leader elected: Node {leader.node_id}")
 
-def main():
-    print("[SYSTEM] Starting distributed nodes...")
-    nodes = []
+class ClusterNode:
+    """Message loop of one node process"""
+
+    def __init__(self, node_id: int, node_ids, bus: AsyncMessageBus):
+        self.node = DistributedNode(node_id=node_id)
+        self.node_ids = [nid for nid in node_ids if nid != CONTROLLER_ID]
+        self.bus = bus
+        self.answered = asyncio.Event()
+        self.electing = False
+        self.acks = {}
+        self.acked = asyncio.Event()
+        self.applied = 0
+        self.running = True
+
+    def send(self, to_node: int, message_type: str, **fields):
+        message = {"type": message_type, "from_node": self.node.node_id,
+                   "timestamp": self.node.clock.tick(), **fields}
+        self.bus.send_message(to_node, message)
+
+    async def run(self):
+        node_id = self.node.node_id
+        while self.running:
+            for message in await self.bus.receive_many(node_id, max_items=512, timeout=1.0):
+                self.node.clock.update(message["timestamp"])
+                await self.handle(message)
+
+    async def handle(self, message):
+        message_type = message["type"]
+        sender = message["from_node"]
+
+        if message_type == "START_ELECTION":
+            asyncio.ensure_future(self.start_election())
+        elif message_type == "ELECTION":
+            # Bully: a lower node is electing, answer and take over
+            self.send(sender, "ANSWER")
+            asyncio.ensure_future(self.start_election())
+        elif message_type == "ANSWER":
+            self.answered.set()
+        elif message_type == "COORDINATOR":
+            self.node.current_leader_id = message["leader_id"]
+            self.node.is_leader = message["leader_id"] == self.node.node_id
+            self.node.log_event("LEADER_ACKNOWLEDGED", f"Node {message['leader_id']} is leader")
+        elif message_type == "REPLICATE":
+            self.applied += 1
+            self.send(sender, "ACK", seq=message["seq"])
+        elif message_type == "ACK":
+            self.acks[sender] = max(self.acks.get(sender, -1), message["seq"])
+            self.acked.set()
+        elif message_type == "BENCH_REPLICATION":
+            asyncio.ensure_future(self.replicate(message["count"], message.get("payload_bytes", 64)))
+        elif message_type == "SHUTDOWN":
+            self.running = False
+
+    async def start_election(self):
+        if self.electing:
+            return
+        self.electing = True
+        self.answered.clear()
+        self.node.log_event("ELECTION_START", f"Node {self.node.node_id} starting election")
 
-    # ✅ Start all nodes
-    for i in range(1, NODE_COUNT + 1):
-        thread = threading.Thread(target=start_node, args=(i,), daemon=True)
-        thread.start()
-        nodes.append(i)
-        time.sleep(0.3)
+        higher = [nid for nid in self.node_ids if nid > self.node.node_id]
+        for nid in higher:
+            self.send(nid, "ELECTION")
+        try:
+            if higher:
+                await asyncio.wait_for(self.answered.wait(), ELECTION_TIMEOUT)
+                self.node.log_event("ELECTION_DEFER", "Higher priority node responded, deferring")
+                return
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.electing = False
 
-    print(f"[SYSTEM] {NODE_COUNT} nodes started.")
+        self.node.set_leader(True)
+        for nid in self.node_ids + [CONTROLLER_ID]:
+            if nid != self.node.node_id:
+                self.send(nid, "COORDINATOR", leader_id=self.node.node_id)
 
-    # ✅ Run leader election
-    time.sleep(1)
-    start_election(nodes)
+    async def replicate(self, count: int, payload_bytes: int):
+        """Send `count` writes to every follower with a sliding window of acks"""
+        followers = [nid for nid in self.node_ids if nid != self.node.node_id]
+        payload = "x" * payload_bytes
+        self.acks = {nid: -1 for nid in followers}
+        start = time.perf_counter()
+
+        for seq in range(count):
+            while followers and min(self.acks.values()) < seq - REPLICATION_WINDOW:
+                self.acked.clear()
+                await self.acked.wait()
+            for nid in followers:
+                self.send(nid, "REPLICATE", seq=seq, data=payload)
+            if seq % 64 == 0:
+                await asyncio.sleep(0)
+
+        while followers and min(self.acks.values()) < count - 1:
+            self.acked.clear()
+            await self.acked.wait()
+
+        elapsed = time.perf_counter() - start
+        self.send(CONTROLLER_ID, "REPORT", count=count, followers=len(followers), elapsed=elapsed)
+
+
+def node_process(node_id: int, node_ids, kind: str, socket_dir: str, base_port: int):
+    """Entry point of one node process"""
+    async def main():
+        bus, transport = build_bus(node_id, node_ids, kind, socket_dir, base_port)
+        cluster_node = ClusterNode(node_id, node_ids, bus)
+        bus.send_message(CONTROLLER_ID, {"type": "READY", "from_node": node_id, "timestamp": 0})
+        try:
+            await cluster_node.run()
+        finally:
+            transport.close()
+
+    asyncio.run(main())
+
+
+async def control(bus: AsyncMessageBus, node_ids, count: int, payload_bytes: int, timeout: float):
+    """Drive the benchmark from the controller; returns the results"""
+    async def expect(message_type):
+        while True:
+            message = await asyncio.wait_for(bus.receive(CONTROLLER_ID), timeout)
+            if message["type"] == message_type:
+                return message
+
+    ready = set()
+    while len(ready) < len(node_ids):
+        ready.add((await expect("READY"))["from_node"])
+    print(f"[SYSTEM] {len(node_ids)} node processes ready.")
+
+    start = time.perf_counter()
+    bus.send_message(min(node_ids), {"type": "START_ELECTION", "from_node": CONTROLLER_ID, "timestamp": 0})
+    coordinator = await expect("COORDINATOR")
+    election_ms = (time.perf_counter() - start) * 1000
+    leader = coordinator["leader_id"]
+    print(f"[SYSTEM] Leader elected: Node {leader} in {election_ms:.1f} ms")
+
+    bus.send_message(leader, {"type": "BENCH_REPLICATION", "from_node": CONTROLLER_ID,
+                              "timestamp": 0, "count": count, "payload_bytes": payload_bytes})
+    report = await expect("REPORT")
+    messages = report["count"] * report["followers"]
+    throughput = messages / report["elapsed"] if report["elapsed"] else 0
+    print(f"[SYSTEM] Replicated {report['count']} writes to {report['followers']} followers "
+          f"in {report['elapsed']:.3f}s ({throughput:,.0f} acked messages/s)")
+
+    bus.broadcast_message({"type": "SHUTDOWN", "from_node": CONTROLLER_ID, "timestamp": 0},
+                          exclude_node=CONTROLLER_ID)
+    return {"leader": leader, "election_ms": election_ms, "replication_msgs_per_sec": throughput}
+
+
+def run_cluster(num_nodes: int = 3, kind: str = "unix", count: int = 10000,
+                payload_bytes: int = 64, base_port: int = 7000, timeout: float = 30.0):
+    """Start one process per node, run the benchmark and stop the cluster"""
+    node_ids = list(range(1, num_nodes + 1))
+    with tempfile.TemporaryDirectory() as socket_dir:
+        bus, transport = build_bus(CONTROLLER_ID, [CONTROLLER_ID] + node_ids, kind, socket_dir, base_port)
+        processes = [
+            multiprocessing.Process(target=node_process, daemon=True,
+                                    args=(nid, [CONTROLLER_ID] + node_ids, kind, socket_dir, base_port))
+            for nid in node_ids
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            return asyncio.run(control(bus, node_ids, count, payload_bytes, timeout))
+        finally:
+            for process in processes:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+            transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run each node in its own process")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--transport", choices=["unix", "tcp"], default="unix")
+    parser.add_argument("--writes", type=int, default=10000)
+    parser.add_argument("--payload-bytes", type=int, default=64)
+    parser.add_argument("--base-port", type=int, default=7000)
+    args = parser.parse_args()
 
-    print("[SYSTEM] Nodes are running. Press CTRL+C to stop.")
+    print(f"[SYSTEM] Starting {args.nodes} node processes over {args.transport} sockets...")
+    run_cluster(args.nodes, args.transport, args.writes, args.payload_bytes, args.base_port)
 
-    # ✅ Keep process alive
-    while True:
-        time.sleep(2)
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,16 @@
 # FILE: zwiggy/backend/main.py
 # ============================================================================
 
+import asyncio
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from zwiggy.backend.core.node import DistributedNode
+from zwiggy.backend.core.event_store import EventSegmentStore
+from zwiggy.backend.core.message_queue import message_queue
+from zwiggy.backend.core.transport import SocketTransport, node_address
 from zwiggy.backend import config
 
 # import routers (ensure these files exist exactly as shown)
@@ -32,18 +37,45 @@ async def startup_event():
     print("   INITIALIZING NODES")
     print("============================================================")
 
-    # register this node
+    # message bus wakes receivers and runs async subscribers on this loop
+    message_queue.bind_loop(asyncio.get_running_loop())
+
+    # register this node (its event history survives restarts)
+    event_store = EventSegmentStore(
+        config.Config.EVENT_STORE_DIR,
+        node_id=config.Config.NODE_ID,
+        segment_bytes=config.Config.EVENT_SEGMENT_BYTES
+    )
     current = DistributedNode(
         node_id=config.Config.NODE_ID,
-        priority=config.Config.NODE_PRIORITY
+        priority=config.Config.NODE_PRIORITY,
+        event_log_capacity=config.Config.EVENT_LOG_CAPACITY,
+        event_store=event_store
     )
     config.Config.REGISTERED_NODES.append(current)
+    message_queue.create_queue(current.node_id)
     print(f"✅ Registered self: Node {current.node_id}")
 
+    # messages to the other node processes go over sockets
+    if config.Config.TRANSPORT != "none":
+        def address(nid):
+            return node_address(config.Config.TRANSPORT, nid,
+                                config.Config.TRANSPORT_SOCKET_DIR,
+                                config.Config.TRANSPORT_BASE_PORT)
+
+        transport = SocketTransport(
+            address(current.node_id),
+            peers={nid: address(nid) for nid in config.Config.ALL_NODE_IDS if nid != current.node_id},
+            deliver=message_queue.deliver_local
+        )
+        message_queue.attach_transport(transport.start())
+        print(f"✅ Transport listening on {transport.listen_address}")
+
     # create lightweight in-memory representations of other nodes
     for nid in config.Config.ALL_NODE_IDS:
         if nid != config.Config.NODE_ID:
-            temp_node = DistributedNode(node_id=nid, priority=nid)
+            temp_node = DistributedNode(node_id=nid, priority=nid,
+                                        event_log_capacity=config.Config.EVENT_LOG_CAPACITY)
             config.Config.REGISTERED_NODES.append(temp_node)
             print(f"✅ Registered Node {nid}")
 
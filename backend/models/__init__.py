@@ -23,7 +23,7 @@ Domain models for the food delivery application:
    - items: List of OrderItem objects
    - total_amount: Total order value
    - status: Order status (pending/confirmed/preparing/delivered)
-   - logical_timestamp: Lamport clock timestamp
+   - logical_timestamp: Hybrid logical clock timestamp
    - processed_by_node: Node that processed the order
 
 4. OrderItem: Individual item in an order
@@ -52,7 +52,7 @@ Domain models for the food delivery application:
    - node_id: Node that generated event
    - event_type: Type of event
    - description: Event description
-   - logical_time: Lamport timestamp
+   - logical_time: Hybrid logical clock timestamp
    - physical_time: Wall clock time
 """
 
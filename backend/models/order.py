@@ -22,4 +22,5 @@ class Order:
     status: str  # pending, confirmed, preparing, out_for_delivery, delivered
     created_at: datetime
     logical_timestamp: int
-    processed_by_node: int
\ No newline at end of file
+    processed_by_node: int
+    version: int = 0  # Bumped on every change (optimistic concurrency)
\ No newline at end of file
@@ -10,6 +10,7 @@ class MenuItem:
     name: str
     price: float
     quantity_available: int
+    version: int = 0  # Bumped on every change (optimistic concurrency)
 
 @dataclass
 class Restaurant:
@@ -1,9 +1,10 @@
 # FILE: zwiggy/backend/services/order_service.py
-from typing import List, Dict
+from typing import List, Dict, Optional
 import uuid
 from datetime import datetime
 
-from zwiggy.backend.concurrency import lock_manager
+from zwiggy.backend.concurrency.mvcc import VersionConflict
+from zwiggy.backend.concurrency.optimistic import OptimisticTransaction
 from zwiggy.backend.core.node import DistributedNode
 from zwiggy.backend.models.order import Order, OrderItem
 
@@ -16,44 +17,64 @@ class OrderService:
         if not hasattr(self.node, "orders"):
             self.node.orders = []
 
-    def create_order(self, user_id: int, restaurant_id: int,
-                     items: List[Dict], use_lock: bool = False) -> Order:
+    def create_order(self, user_id: int, restaurant_id: int, items: List[Dict]) -> Order:
+        """Record an order for items
 
+        Takes no locks: an order only reads the items it contains, and
+        stock changes are versioned (see RestaurantService), so there is
+        nothing for concurrent orders to exclude.
+        """
         order_id = f"ORD_{uuid.uuid4().hex[:8]}"
-        resource_id = f"restaurant_{restaurant_id}"
+        logical_time = self.node.clock.tick()
 
-        if use_lock:
-            if not lock_manager.acquire(resource_id, self.node.node_id):
-                self.node.log_event("ORDER_LOCK_FAILED",
-                                    f"Failed lock for restaurant {restaurant_id}")
-                return None
+        order = Order(
+            order_id=order_id,
+            user_id=user_id,
+            restaurant_id=restaurant_id,
+            items=[OrderItem(**item) for item in items],
+            total_amount=sum(item["price"] * item["quantity"] for item in items),
+            status="pending",
+            created_at=datetime.now(),
+            logical_timestamp=logical_time,
+            processed_by_node=self.node.node_id
+        )
 
-        try:
-            logical_time = self.node.clock.tick()
+        self.node.orders.append(order)
 
-            order = Order(
-                order_id=order_id,
-                user_id=user_id,
-                restaurant_id=restaurant_id,
-                items=[OrderItem(**item) for item in items],
-                total_amount=sum(item["price"] * item["quantity"] for item in items),
-                status="pending",
-                created_at=datetime.now(),
-                logical_timestamp=logical_time,
-                processed_by_node=self.node.node_id
-            )
+        self.node.log_event("ORDER_CREATED",
+                            f"Order {order_id} created",
+                            {"order_id": order_id, "total": order.total_amount})
 
-            self.node.orders.append(order)
+        return order
 
-            self.node.log_event("ORDER_CREATED",
-                                f"Order {order_id} created",
-                                {"order_id": order_id, "total": order.total_amount})
+    def get_orders(self) -> List[Order]:
+        return self.node.orders
 
-            return order
+    def get_order(self, order_id: str) -> Optional[Order]:
+        return next((o for o in self.node.orders if o.order_id == order_id), None)
 
-        finally:
-            if use_lock:
-                lock_manager.release(resource_id, self.node.node_id)
+    def update_order_status(self, order_id: str, status: str,
+                            expected_version: Optional[int] = None) -> Optional[Order]:
+        """Change an order's status if it is still at expected_version
 
-    def get_orders(self) -> List[Order]:
-        return self.node.orders
+        expected_version is the version the caller last saw (e.g. from
+        GET /orders); None applies the change to whatever is current.
+
+        Raises:
+            VersionConflict: the order changed since the caller saw it
+        """
+        order = self.get_order(order_id)
+        if not order:
+            return None
+
+        tx = OptimisticTransaction()
+        version = tx.read(order)
+        if expected_version is not None and version != expected_version:
+            raise VersionConflict(order_id, expected_version, version)
+        tx.set(order, status=status)
+        tx.commit()
+
+        self.node.log_event("ORDER_STATUS",
+                            f"Order {order_id} is now {status}",
+                            {"order_id": order_id, "version": order.version})
+        return order
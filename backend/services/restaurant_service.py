@@ -1,11 +1,23 @@
 # FILE: zwiggy/backend/services/restaurant_service.py
-from typing import List
+from typing import Dict, List, Optional
+from zwiggy.backend.concurrency.optimistic import OptimisticTransaction, retry_on_conflict
+from zwiggy.backend.concurrency.mvcc import WriteConflict
+from zwiggy.backend.config import Config
 from zwiggy.backend.models.restaurant import MenuItem, Restaurant
 
 class RestaurantService:
-    """Handles restaurant operations"""
+    """Handles restaurant operations
+
+    Menu items carry a version column instead of being locked: inventory
+    updates read the item's version, compute the new stock and commit
+    only if the version has not moved, retrying otherwise. Menu reads
+    validate the versions of every item they copied the same way, so
+    they see a consistent menu. Updates to different dishes never wait
+    on each other, and nobody goes through the lock manager.
+    """
     
-    def __init__(self):
+    def __init__(self, node_id: int = Config.NODE_ID):
+        self.node_id = node_id
         self.restaurants = self._initialize_restaurants()
     
     def _initialize_restaurants(self) -> List[Restaurant]:
@@ -51,13 +63,72 @@ class RestaurantService:
     def get_restaurant(self, restaurant_id: int) -> Restaurant:
         return next((r for r in self.restaurants if r.restaurant_id == restaurant_id), None)
     
-    def update_inventory(self, restaurant_id: int, item_id: int, quantity_change: int):
+    def get_restaurant_data(self, restaurant_id: int) -> Optional[Dict]:
+        """Consistent snapshot of a restaurant and its menu (validated versions)"""
         restaurant = self.get_restaurant(restaurant_id)
-        if restaurant:
+        if not restaurant:
+            return None
+        
+        def attempt() -> Dict:
+            tx = OptimisticTransaction()
             for item in restaurant.menu:
-                if item.item_id == item_id:
-                    item.quantity_available += quantity_change
-                    break
+                tx.read(item)
+            snapshot = self._snapshot(restaurant)
+            tx.commit()
+            return snapshot
+        
+        return retry_on_conflict(attempt)
+    
+    async def get_restaurant_data_async(self, restaurant_id: int) -> Optional[Dict]:
+        """get_restaurant_data for request handlers; it never waits on a lock"""
+        return self.get_restaurant_data(restaurant_id)
+    
+    def get_restaurants_data(self) -> List[Dict]:
+        return [self.get_restaurant_data(r.restaurant_id) for r in self.restaurants]
+    
+    async def get_restaurants_data_async(self) -> List[Dict]:
+        return [await self.get_restaurant_data_async(r.restaurant_id) for r in self.restaurants]
+    
+    def _snapshot(self, restaurant: Restaurant) -> Dict:
+        return {
+            "restaurant_id": restaurant.restaurant_id,
+            "name": restaurant.name,
+            "cuisine": restaurant.cuisine,
+            "rating": restaurant.rating,
+            "menu": [
+                {
+                    "item_id": item.item_id,
+                    "name": item.name,
+                    "price": item.price,
+                    "available": item.quantity_available,
+                    "version": item.version
+                }
+                for item in restaurant.menu
+            ]
+        }
+    
+    def update_inventory(self, restaurant_id: int, item_id: int, quantity_change: int) -> bool:
+        """Adjust an item's stock optimistically, retrying on version conflicts"""
+        restaurant = self.get_restaurant(restaurant_id)
+        if not restaurant:
+            return False
+        
+        item = next((i for i in restaurant.menu if i.item_id == item_id), None)
+        if not item:
+            return False
+        
+        def attempt() -> bool:
+            tx = OptimisticTransaction()
+            tx.read(item)
+            tx.set(item, quantity_available=item.quantity_available + quantity_change)
+            tx.commit()
+            return True
+        
+        try:
+            return retry_on_conflict(attempt)
+        except WriteConflict as e:
+            print(f"Inventory update of item {item_id} gave up: {e}")
+            return False
 
 # ✅ Shared instance
 restaurant_service = RestaurantService()
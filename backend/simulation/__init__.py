@@ -29,7 +29,7 @@ Usage Example:
     
     # Generate concurrent traffic
     traffic_gen = TrafficGenerator(order_service)
-    traffic_gen.generate_concurrent_orders(10, restaurant_id=1, use_locks=True)
+    traffic_gen.generate_concurrent_orders(10, restaurant_id=1)
     
     # Simulate node failure
     failure_injector = FailureInjector(nodes)
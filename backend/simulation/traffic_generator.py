@@ -11,21 +11,19 @@ class TrafficGenerator:
         self.order_service = order_service
         self.results = []
     
-    def generate_concurrent_orders(self, num_orders: int, 
-                                   restaurant_id: int, 
-                                   use_locks: bool = False):
+    def generate_concurrent_orders(self, num_orders: int, restaurant_id: int):
         """Generate multiple concurrent orders to same restaurant"""
         threads = []
         
         print(f"\n{'='*60}")
-        print(f"CONCURRENCY TEST: {'WITH' if use_locks else 'WITHOUT'} LOCKS")
+        print("CONCURRENCY TEST")
         print(f"Generating {num_orders} concurrent orders...")
         print(f"{'='*60}\n")
         
         for i in range(num_orders):
             thread = threading.Thread(
                 target=self._create_order_worker,
-                args=(i, restaurant_id, use_locks)
+                args=(i, restaurant_id)
             )
             threads.append(thread)
             thread.start()
@@ -39,7 +37,7 @@ class TrafficGenerator:
         print(f"Orders processed: {len(self.results)}")
         print(f"{'='*60}\n")
     
-    def _create_order_worker(self, order_num: int, restaurant_id: int, use_locks: bool):
+    def _create_order_worker(self, order_num: int, restaurant_id: int):
         """Worker thread to create order"""
         items = [
             {
@@ -53,8 +51,7 @@ class TrafficGenerator:
         order = self.order_service.create_order(
             user_id=random.randint(100, 999),
             restaurant_id=restaurant_id,
-            items=items,
-            use_lock=use_locks
+            items=items
         )
         
         if order:
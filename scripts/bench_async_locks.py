@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_async_locks.py
+Event loop load test: latency of unrelated requests while one restaurant is contended
+
+One event loop serves two kinds of requests, as uvicorn would:
+  - orders on a hot restaurant, whose lock an inventory thread keeps
+    taking EXCLUSIVE for a few milliseconds at a time
+  - requests for other restaurants, arriving every 2ms, which never
+    conflict with it
+
+Orders either call the thread-blocking acquire() from the handler (the
+previous create_order path) or await lock_manager.hold(). The table shows
+how long the unrelated requests take end to end.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.concurrency.lock_manager import DistributedLockManager, LockType
+
+DURATION = 3.0
+ORDER_CLIENTS = 20
+UNRELATED_INTERVAL = 0.002
+INVENTORY_HOLD = 0.005
+INVENTORY_PAUSE = 0.001
+
+
+def inventory_updates(manager: DistributedLockManager, stop: threading.Event):
+    """Keep the hot restaurant contended from another thread"""
+    while not stop.is_set():
+        if manager.acquire("restaurant_1", 99, lock_type=LockType.EXCLUSIVE):
+            time.sleep(INVENTORY_HOLD)
+            manager.release("restaurant_1", 99)
+        time.sleep(INVENTORY_PAUSE)
+
+
+async def blocking_order(manager: DistributedLockManager, node_id: int) -> bool:
+    """Previous handler: blocking acquire on the event loop thread"""
+    if not manager.acquire("restaurant_1", node_id, lock_type=LockType.SHARED):
+        return False
+    try:
+        await asyncio.sleep(0)
+        return True
+    finally:
+        manager.release("restaurant_1", node_id)
+
+
+async def async_order(manager: DistributedLockManager, node_id: int) -> bool:
+    try:
+        async with manager.hold("restaurant_1", node_id, lock_type=LockType.SHARED):
+            await asyncio.sleep(0)
+            return True
+    except TimeoutError:
+        return False
+
+
+async def unrelated_request(manager: DistributedLockManager, restaurant_id: int):
+    async with manager.hold(f"restaurant_{restaurant_id}", 1, lock_type=LockType.SHARED):
+        await asyncio.sleep(0)
+
+
+async def scenario(order) -> dict:
+    manager = DistributedLockManager()
+    stop = threading.Event()
+    inventory = threading.Thread(target=inventory_updates, args=(manager, stop))
+    inventory.start()
+    deadline = time.perf_counter() + DURATION
+    latencies = []
+    orders = 0
+
+    async def order_client(node_id: int):
+        nonlocal orders
+        while time.perf_counter() < deadline:
+            if await order(manager, node_id):
+                orders += 1
+
+    async def unrelated_request_at(arrival: float, restaurant_id: int):
+        await unrelated_request(manager, restaurant_id)
+        latencies.append(time.perf_counter() - arrival)
+
+    async def unrelated_client():
+        # Open loop: requests arrive on schedule whether or not the loop
+        # kept up, and latency counts from the scheduled arrival
+        requests = []
+        arrival = time.perf_counter()
+        i = 0
+        while time.perf_counter() < deadline:
+            arrival += UNRELATED_INTERVAL
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            while arrival <= min(time.perf_counter(), deadline):
+                requests.append(asyncio.create_task(unrelated_request_at(arrival, 2 + i % 10)))
+                arrival += UNRELATED_INTERVAL
+                i += 1
+            arrival -= UNRELATED_INTERVAL
+        await asyncio.gather(*requests)
+
+    await asyncio.gather(unrelated_client(),
+                         *[order_client(n) for n in range(1, ORDER_CLIENTS + 1)])
+    stop.set()
+    inventory.join()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max": latencies[-1] * 1000,
+        "orders": orders / DURATION
+    }
+
+
+def main():
+    print(f"{ORDER_CLIENTS} order clients on a hot restaurant for {DURATION:.0f}s, "
+          f"inventory holds it {INVENTORY_HOLD * 1000:.0f}ms at a time")
+    print(f"{'handler':>10} | {'unrelated reqs':>14} | {'p50 ms':>8} | {'p99 ms':>8} | "
+          f"{'max ms':>8} | {'orders/s':>9}")
+    print("-" * 73)
+    for name, order in (("blocking", blocking_order), ("async", async_order)):
+        r = asyncio.run(scenario(order))
+        print(f"{name:>10} | {r['requests']:>14,} | {r['p50']:>8.3f} | {r['p99']:>8.3f} | "
+              f"{r['max']:>8.3f} | {r['orders']:>9,.0f}")
+
+
+if __name__ == '__main__':
+    main()
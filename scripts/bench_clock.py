@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_clock.py
+Microbenchmark of clock ticks/sec under concurrent threads
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.core.clock import HybridLogicalClock
+
+THREAD_COUNTS = [1, 4, 16]
+TICKS_PER_THREAD = 200_000
+
+
+class LockedLamportClock:
+    """Previous implementation: threading.Lock on every tick"""
+
+    def __init__(self):
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def tick(self) -> int:
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+
+def run(clock, num_threads: int) -> float:
+    """Return ticks/sec with num_threads hammering one clock"""
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker():
+        tick = clock.tick
+        barrier.wait()
+        for _ in range(TICKS_PER_THREAD):
+            tick()
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * TICKS_PER_THREAD / elapsed
+
+
+def main():
+    print(f"{'threads':>8} | {'locked lamport ticks/s':>22} | {'hlc ticks/s':>12}")
+    print("-" * 50)
+    for num_threads in THREAD_COUNTS:
+        lamport = run(LockedLamportClock(), num_threads)
+        hlc = run(HybridLogicalClock(), num_threads)
+        print(f"{num_threads:>8} | {lamport:>22,.0f} | {hlc:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_codec.py
+Encode/decode speed and payload size: binary codec vs json
+"""
+
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.core.codec import (
+    decode_message, decode_write_record, encode_message, encode_write_record
+)
+
+ITERATIONS = 50_000
+
+SAMPLES = {
+    "election message": (
+        {"type": "ELECTION", "from_node": 1, "to_node": 3, "timestamp": 1745567000123.0},
+        encode_message, decode_message
+    ),
+    "replicate message": (
+        {"type": "REPLICATE", "from_node": 1, "seq": 123456, "timestamp": 114383729037312},
+        encode_message, decode_message
+    ),
+    "order insert record": (
+        {
+            "operation": "INSERT", "table": "orders", "timestamp": 1745567000.123456,
+            "data": {
+                "order_id": "ORD_1_1745567000123", "user_id": 42, "restaurant_id": 7,
+                "total_amount": 598.5, "status": "pending",
+                "logical_timestamp": 114383729037312, "processed_by_node": 1
+            }
+        },
+        encode_write_record, decode_write_record
+    ),
+    "inventory update record": (
+        {
+            "operation": "UPDATE", "table": "menu_items", "record_id": 1042,
+            "timestamp": 1745567000.123456, "data": {"quantity_available": 17}
+        },
+        encode_write_record, decode_write_record
+    ),
+}
+
+
+def json_encode(value):
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+def per_op_us(fn, arg) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(arg)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    print(f"{'payload':<24} | {'json B':>6} | {'codec B':>7} | {'json enc us':>11} | "
+          f"{'codec enc us':>12} | {'json dec us':>11} | {'codec dec us':>12}")
+    print("-" * 100)
+    for name, (value, encode, decode) in SAMPLES.items():
+        json_bytes = json_encode(value)
+        codec_bytes = encode(value)
+        assert decode(codec_bytes) == value
+        print(f"{name:<24} | {len(json_bytes):>6} | {len(codec_bytes):>7} | "
+              f"{per_op_us(json_encode, value):>11.2f} | {per_op_us(encode, value):>12.2f} | "
+              f"{per_op_us(json.loads, json_bytes):>11.2f} | {per_op_us(decode, codec_bytes):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
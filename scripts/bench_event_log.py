@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_event_log.py
+Benchmark per-event cost and memory of the node event log
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.core.event_buffer import EventRecord, EventRingBuffer
+from backend.core.node import DistributedNode
+
+CAPACITIES = [10_000, 100_000]
+
+
+def bench_list_log(capacity: int, num_events: int) -> float:
+    """Previous implementation: list of dicts trimmed by slicing"""
+    event_log = []
+    start = time.perf_counter()
+    for i in range(num_events):
+        event_log.append({
+            "node_id": 1,
+            "event_type": "ORDER_CREATED",
+            "description": "Order created",
+            "logical_time": i,
+            "physical_time": time.time(),
+            "data": {}
+        })
+        if len(event_log) > capacity:
+            event_log = event_log[-capacity:]
+    return (time.perf_counter() - start) / num_events * 1e9
+
+
+def bench_ring_buffer(capacity: int, num_events: int) -> float:
+    """Ring buffer of slotted records"""
+    buffer = EventRingBuffer(capacity)
+    start = time.perf_counter()
+    for i in range(num_events):
+        buffer.append(EventRecord(1, "ORDER_CREATED", "Order created", i, time.time()))
+    return (time.perf_counter() - start) / num_events * 1e9
+
+
+def bench_log_event(capacity: int, num_events: int) -> float:
+    """Full DistributedNode.log_event path (clock tick included)"""
+    node = DistributedNode(node_id=1, event_log_capacity=capacity)
+    start = time.perf_counter()
+    for _ in range(num_events):
+        node.log_event("ORDER_CREATED", "Order created")
+    return (time.perf_counter() - start) / num_events * 1e9
+
+
+def measure_memory(capacity: int) -> float:
+    """Memory in MiB of a full node event log"""
+    tracemalloc.start()
+    node = DistributedNode(node_id=1, event_log_capacity=capacity)
+    for _ in range(capacity):
+        node.log_event("ORDER_CREATED", "Order created")
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / (1024 * 1024)
+
+
+def main():
+    print(f"{'capacity':>10} | {'list ns/ev':>11} | {'ring ns/ev':>11} | "
+          f"{'log_event ns/ev':>15} | {'memory MiB':>10}")
+    print("-" * 70)
+
+    for capacity in CAPACITIES:
+        # Overfill so the trim/overwrite path is exercised
+        num_events = capacity * 2
+        # Past capacity every append of the list log copies the whole window
+        list_ns = bench_list_log(capacity, capacity + 10_000)
+        ring_ns = bench_ring_buffer(capacity, num_events)
+        log_ns = bench_log_event(capacity, num_events)
+        memory = measure_memory(capacity)
+        print(f"{capacity:>10} | {list_ns:>11.0f} | {ring_ns:>11.0f} | "
+              f"{log_ns:>15.0f} | {memory:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_group_commit.py
+Orders/sec on the primary database against the group commit window
+
+Writer threads keep inserting orders into a fresh SQLite primary. The
+first row is the previous write path (row and replication log committed
+separately, two fsyncs per order); the others group commit with a
+growing batch window.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.core.codec import encode_write_record
+from backend.database.primary_db import PrimaryDatabase
+
+DURATION = 2.0
+THREADS = 16
+WINDOWS = [0.0, 0.0005, 0.001, 0.002, 0.005]
+
+
+class SerialCommitPrimary(PrimaryDatabase):
+    """Previous write(): commit the row, then commit its replication log row"""
+
+    def write(self, table, data):
+        with self.lock:
+            try:
+                cursor = self.connection.cursor()
+                columns = ', '.join(data.keys())
+                placeholders = ', '.join(['?' for _ in data])
+                cursor.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                               list(data.values()))
+                self.connection.commit()
+                write_record = {'operation': 'INSERT', 'table': table, 'data': data,
+                                'timestamp': time.time()}
+                payload = encode_write_record(write_record)
+                self.write_log.append(payload)
+                self.write_log_timestamps.append(write_record['timestamp'])
+                cursor.execute("""
+                    INSERT INTO replication_log (operation, table_name, record_id, data, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                """, ('INSERT', table, '', payload, write_record['timestamp']))
+                self.connection.commit()
+                self.commit_stats["commits"] += 2
+                self.commit_stats["writes"] += 1
+                return True
+            except Exception as e:
+                print(f"Error writing to primary database: {e}")
+                self.connection.rollback()
+                return False
+
+
+def run(db: PrimaryDatabase) -> dict:
+    stop = threading.Event()
+    latencies = [[] for _ in range(THREADS)]
+
+    def writer(n: int):
+        i = 0
+        while not stop.is_set():
+            order = {
+                "order_id": f"ORD_{n}_{i}",
+                "user_id": 100 + n,
+                "restaurant_id": 1 + i % 3,
+                "total_amount": 25.97,
+                "status": "pending",
+                "logical_timestamp": i,
+                "processed_by_node": 1
+            }
+            start = time.perf_counter()
+            if db.write("orders", order):
+                latencies[n].append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = sorted(l for per_thread in latencies for l in per_thread)
+    stats = db.commit_stats
+    return {
+        "orders": len(all_latencies) / DURATION,
+        "batch": stats["writes"] / stats["commits"] if stats["commits"] else 0.0,
+        "p50": statistics.median(all_latencies) * 1000,
+        "p99": all_latencies[int(len(all_latencies) * 0.99)] * 1000
+    }
+
+
+def main():
+    print(f"{THREADS} writer threads, {DURATION:.0f}s per run")
+    print(f"{'commit':>8} | {'window ms':>9} | {'orders/s':>9} | {'orders/commit':>13} | "
+          f"{'p50 ms':>7} | {'p99 ms':>7}")
+    print("-" * 70)
+    runs = [("serial", None)] + [("group", window) for window in WINDOWS]
+    for name, window in runs:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "primary.db")
+            if window is None:
+                db = SerialCommitPrimary(path)
+            else:
+                db = PrimaryDatabase(path, group_commit_window=window)
+            r = run(db)
+            db.close()
+        shown = "-" if window is None else f"{window * 1000:.1f}"
+        print(f"{name:>8} | {shown:>9} | {r['orders']:>9,.0f} | {r['batch']:>13.2f} | "
+              f"{r['p50']:>7.2f} | {r['p99']:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
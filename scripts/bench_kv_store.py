@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_kv_store.py
+ConsistencyManager read latency against the number of writes
+
+Orders go through four status writes each, so the key space grows with
+the write count. Reads pick random orders, old and new. The first
+columns are the previous read (reverse scan of an unbounded write log);
+it is skipped past 1M writes, where the log alone no longer fits in
+memory comfortably. The others are the indexed store, compacted every
+100k writes as its background thread would.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.core.kv_store import VersionedKVStore
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+LEGACY_MAX = 1_000_000
+STATUSES = ["pending", "confirmed", "preparing", "delivered"]
+COMPACT_EVERY = 100_000
+READS = 2000
+
+
+def records(count):
+    for i in range(count):
+        yield {
+            "key": f"order_{i // 4}",
+            "value": STATUSES[i % 4],
+            "timestamp": 0.0,
+            "logical_time": i,
+            "node_id": 1
+        }
+
+
+def legacy_read(write_log, key):
+    """Previous ConsistencyManager.read"""
+    for record in reversed(write_log):
+        if record["key"] == key:
+            return record["value"]
+    return None
+
+
+def time_reads(read, keys):
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        read(key)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies) * 1e6, latencies[int(len(latencies) * 0.99)] * 1e6
+
+
+def main():
+    random.seed(7)
+    print(f"{'writes':>10} | {'scan p50 us':>11} | {'scan p99 us':>11} | "
+          f"{'index p50 us':>12} | {'index p99 us':>12} | {'versions':>9} | {'write s':>7}")
+    print("-" * 90)
+    for size in SIZES:
+        orders = max(1, size // 4)
+
+        scan = ("-", "-")
+        if size <= LEGACY_MAX:
+            write_log = list(records(size))
+            # Fewer reads for the big logs; each one scans most of the log
+            keys = [f"order_{random.randrange(orders)}" for _ in range(max(20, min(READS, 20_000_000 // size)))]
+            scan = tuple(f"{v:,.1f}" for v in time_reads(lambda k: legacy_read(write_log, k), keys))
+            del write_log
+
+        store = VersionedKVStore(max_versions=2, compaction_interval=3600)
+        start = time.perf_counter()
+        for i, record in enumerate(records(size)):
+            store.put(record)
+            if i % COMPACT_EVERY == COMPACT_EVERY - 1:
+                store.compact()
+        store.compact()
+        write_seconds = time.perf_counter() - start
+        keys = [f"order_{random.randrange(orders)}" for _ in range(READS)]
+        p50, p99 = time_reads(store.get, keys)
+        versions = store.get_stats()["versions"]
+        del store
+
+        print(f"{size:>10,} | {scan[0]:>11} | {scan[1]:>11} | {p50:>12.2f} | {p99:>12.2f} | "
+              f"{versions:>9,} | {write_seconds:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
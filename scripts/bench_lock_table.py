@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_lock_table.py
+Lock acquire/release throughput and table size: global master lock vs striped table
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.concurrency.lock_manager import DistributedLockManager
+
+THREAD_COUNTS = [1, 2, 4, 8, 16, 32, 64]
+RESOURCES = 1_000_000
+OPS = 200_000
+
+
+class MasterLockManager:
+    """Previous implementation: one master lock, entries never removed"""
+
+    def __init__(self):
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock_holders: Dict[str, int] = {}
+        self.master_lock = threading.Lock()
+
+    def acquire(self, resource_id: str, node_id: int, timeout: float = 5.0) -> bool:
+        with self.master_lock:
+            if resource_id not in self.locks:
+                self.locks[resource_id] = threading.Lock()
+        lock = self.locks[resource_id]
+        acquired = lock.acquire(timeout=timeout)
+        if acquired:
+            with self.master_lock:
+                self.lock_holders[resource_id] = node_id
+        return acquired
+
+    def release(self, resource_id: str, node_id: int):
+        if resource_id in self.locks:
+            with self.master_lock:
+                if self.lock_holders.get(resource_id) == node_id:
+                    self.locks[resource_id].release()
+                    del self.lock_holders[resource_id]
+
+    def __len__(self):
+        return len(self.locks)
+
+
+def run(manager, num_threads: int) -> float:
+    """Return acquire+release pairs/sec with num_threads on random resources"""
+    per_thread = OPS // num_threads
+    rng = random.Random(num_threads)
+    work = [[f"restaurant_{rng.randrange(RESOURCES)}" for _ in range(per_thread)]
+            for _ in range(num_threads)]
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(node_id, resources):
+        acquire, release = manager.acquire, manager.release
+        barrier.wait()
+        for resource_id in resources:
+            if acquire(resource_id, node_id):
+                release(resource_id, node_id)
+
+    threads = [threading.Thread(target=worker, args=(i, work[i])) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return per_thread * num_threads / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{OPS:,} acquire/release pairs over {RESOURCES:,} distinct resources")
+    print(f"{'threads':>8} | {'master lock ops/s':>17} | {'entries left':>12} | "
+          f"{'striped ops/s':>13} | {'entries left':>12}")
+    print("-" * 75)
+    for num_threads in THREAD_COUNTS:
+        master = MasterLockManager()
+        striped = DistributedLockManager()
+        master_ops = run(master, num_threads)
+        striped_ops = run(striped, num_threads)
+        print(f"{num_threads:>8} | {master_ops:>17,.0f} | {len(master):>12,} | "
+              f"{striped_ops:>13,.0f} | {len(striped):>12,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_order_locking.py
+Orders/sec for one hot restaurant: restaurant-level vs item-level locking
+
+Order threads each order two random dishes from a 12-item menu and
+hold their locks for ORDER_WORK (the order write), while inventory
+threads keep updating random dishes under an EXCLUSIVE lock. Runs
+both with orders that only read the menu (SHARED) and with orders that
+reserve stock (EXCLUSIVE). This measures the lock table on its own:
+create_order validates against versioned menu rows and takes no locks.
+"""
+
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.concurrency.lock_manager import DistributedLockManager, LockType
+
+DURATION = 2.0
+ORDER_THREADS = 16
+INVENTORY_THREADS = 2
+MENU_ITEMS = 12
+ITEMS_PER_ORDER = 2
+ORDER_WORK = 0.001
+INVENTORY_WORK = 0.002
+INVENTORY_PAUSE = 0.002
+
+
+def restaurant_level(manager, node_id, items, lock_type):
+    """Previous scheme: every order locks the whole restaurant"""
+    if not manager.acquire("restaurant_1", node_id, lock_type=lock_type):
+        return None
+    return lambda: manager.release("restaurant_1", node_id)
+
+
+def item_level(manager, node_id, items, lock_type):
+    leases = manager.acquire_many([f"menu_item_{i}" for i in items], node_id, lock_type=lock_type)
+    if leases is None:
+        return None
+    return lambda: manager.release_many(leases)
+
+
+def inventory_restaurant_level(item):
+    return "restaurant_1"
+
+
+def inventory_item_level(item):
+    return f"menu_item_{item}"
+
+
+def run(lock_orders, inventory_resource, order_lock_type) -> dict:
+    manager = DistributedLockManager()
+    stop = threading.Event()
+    latencies = [[] for _ in range(ORDER_THREADS)]
+
+    def order_worker(n: int):
+        rng = random.Random(n)
+        while not stop.is_set():
+            items = rng.sample(range(1, MENU_ITEMS + 1), ITEMS_PER_ORDER)
+            start = time.perf_counter()
+            release = lock_orders(manager, 100 + n, items, order_lock_type)
+            if release is None:
+                continue
+            time.sleep(ORDER_WORK)
+            release()
+            latencies[n].append(time.perf_counter() - start)
+
+    def inventory_worker(n: int):
+        rng = random.Random(1000 + n)
+        while not stop.is_set():
+            resource_id = inventory_resource(rng.randint(1, MENU_ITEMS))
+            if manager.acquire(resource_id, 200 + n, lock_type=LockType.EXCLUSIVE):
+                time.sleep(INVENTORY_WORK)
+                manager.release(resource_id, 200 + n)
+            time.sleep(INVENTORY_PAUSE)
+
+    threads = [threading.Thread(target=order_worker, args=(n,)) for n in range(ORDER_THREADS)]
+    threads += [threading.Thread(target=inventory_worker, args=(n,))
+                for n in range(INVENTORY_THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = sorted(l for per_thread in latencies for l in per_thread)
+    return {
+        "orders": len(all_latencies) / DURATION,
+        "p50": statistics.median(all_latencies) * 1000,
+        "p99": all_latencies[int(len(all_latencies) * 0.99)] * 1000
+    }
+
+
+def main():
+    print(f"{ORDER_THREADS} order threads x {ITEMS_PER_ORDER} of {MENU_ITEMS} dishes, "
+          f"{INVENTORY_THREADS} inventory threads, {DURATION:.0f}s per run")
+    print(f"{'orders':>9} | {'locking':>10} | {'orders/s':>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 56)
+    for order_lock_type in (LockType.SHARED, LockType.EXCLUSIVE):
+        for name, lock_orders, inventory_resource in (
+                ("restaurant", restaurant_level, inventory_restaurant_level),
+                ("item", item_level, inventory_item_level)):
+            r = run(lock_orders, inventory_resource, order_lock_type)
+            print(f"{order_lock_type.value:>9} | {name:>10} | {r['orders']:>9,.0f} | "
+                  f"{r['p50']:>8.2f} | {r['p99']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_publish.py
+Publisher latency with slow topic subscribers: synchronous vs queued dispatch
+"""
+
+import os
+import statistics
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.core.message_queue import AsyncMessageBus
+
+SUBSCRIBER_COUNTS = [0, 1, 4, 16]
+MESSAGES = 200
+CALLBACK_SECONDS = 0.001
+
+
+def slow_callback(message):
+    time.sleep(CALLBACK_SECONDS)
+
+
+def publish_sync(subscribers, topic, message):
+    """Previous implementation: callbacks run inline on the publisher"""
+    for callback in subscribers.get(topic, []):
+        try:
+            callback(message)
+        except Exception as e:
+            print(f"Error in subscriber callback: {e}")
+
+
+def measure(publish) -> tuple:
+    """Return (p50, p99) publish latency in microseconds"""
+    samples = []
+    for i in range(MESSAGES):
+        start = time.perf_counter()
+        publish({"i": i})
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    print(f"{'subscribers':>11} | {'sync p50 us':>11} | {'sync p99 us':>11} | "
+          f"{'queued p50 us':>13} | {'queued p99 us':>13}")
+    print("-" * 70)
+    for count in SUBSCRIBER_COUNTS:
+        subscribers = {"orders": [slow_callback] * count}
+        sync = measure(lambda m: publish_sync(subscribers, "orders", m))
+
+        bus = AsyncMessageBus()
+        subscriptions = [bus.subscribe("orders", slow_callback, maxsize=MESSAGES)
+                         for _ in range(count)]
+        queued = measure(lambda m: bus.publish("orders", m))
+        for subscription in subscriptions:
+            bus.unsubscribe(subscription)
+
+        print(f"{count:>11} | {sync[0]:>11,.1f} | {sync[1]:>11,.1f} | "
+              f"{queued[0]:>13,.1f} | {queued[1]:>13,.1f}")
+
+
+if __name__ == '__main__':
+    main()
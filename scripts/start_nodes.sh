@@ -31,6 +31,7 @@ start_node() {
     cd zwiggy/backend
     NODE_ID=${node_id} \
     NODE_PORT=${port} \
+    TRANSPORT=${TRANSPORT:-unix} \
     CONFIG_PATH="../../${config_path}" \
     python3 -m uvicorn zwiggy.backend.main:app \
         --host 0.0.0.0 \
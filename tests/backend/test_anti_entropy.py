@@ -0,0 +1,73 @@
+"""
+tests/backend/test_anti_entropy.py
+Unit tests for Merkle anti-entropy between the primary and a replica
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+
+def restaurant(restaurant_id, name=None):
+    return {"restaurant_id": restaurant_id, "name": name or f"Restaurant {restaurant_id}",
+            "cuisine": "Italian"}
+
+
+def rows(db):
+    return [(r["restaurant_id"], r["name"], r["cuisine"])
+            for r in db.execute_query("SELECT * FROM restaurants ORDER BY restaurant_id")]
+
+
+class TestAntiEntropy:
+    """Test cases for repairing a replica that drifted from the primary"""
+
+    @pytest.fixture
+    def databases(self, tmp_path, monkeypatch):
+        """Create a primary and a replica that has applied its 50 writes"""
+        # The modules create their global databases in the working directory
+        monkeypatch.chdir(tmp_path)
+        from backend.database.primary_db import PrimaryDatabase
+        from backend.database.replica_db import ReplicaDatabase
+        primary = PrimaryDatabase(str(tmp_path / "primary.db"))
+        replica = ReplicaDatabase(1, str(tmp_path / "replica.db"))
+        for i in range(1, 51):
+            assert primary.write("restaurants", restaurant(i))
+        replica.sync_from_primary(primary, async_mode=False)
+        yield primary, replica
+        primary.close()
+        replica.close()
+
+    def test_in_sync_compares_roots_only(self, databases):
+        """Test matching replicas stop at one root per table"""
+        from backend.database.anti_entropy import anti_entropy
+        primary, replica = databases
+        assert rows(replica) == rows(primary)
+
+        stats = anti_entropy(primary, replica, ["restaurants"])
+
+        assert stats == {"tables": 1, "nodes_compared": 1, "rows_shipped": 0, "rows_deleted": 0}
+
+    def test_diverged_replica_converges(self, databases):
+        """Test missed, changed, extra and missing rows are all repaired"""
+        from backend.database.anti_entropy import anti_entropy
+        primary, replica = databases
+        # Writes the replica never received
+        assert primary.write("restaurants", restaurant(51))
+        assert primary.update("restaurants", 2, {"name": "Renamed"}, id_column="restaurant_id")
+        # Drift on the replica itself
+        with replica.lock:
+            replica.connection.execute("UPDATE restaurants SET cuisine = 'Thai' "
+                                       "WHERE restaurant_id = 3")
+            replica.connection.execute("DELETE FROM restaurants WHERE restaurant_id = 4")
+            replica.connection.execute("INSERT INTO restaurants (restaurant_id, name, cuisine) "
+                                       "VALUES (99, 'Stray', 'Greek')")
+            replica.connection.commit()
+        assert rows(replica) != rows(primary)
+
+        stats = anti_entropy(primary, replica, ["restaurants"])
+
+        assert rows(replica) == rows(primary)
+        assert stats["rows_shipped"] == 4
+        assert stats["rows_deleted"] == 1
+        # Repeating finds nothing left to do
+        assert anti_entropy(primary, replica, ["restaurants"])["nodes_compared"] == 1
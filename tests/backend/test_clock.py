@@ -0,0 +1,82 @@
+"""
+tests/backend/test_clock.py
+Unit tests for the hybrid logical clock
+"""
+
+import pytest
+import threading
+import time
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.clock import HybridLogicalClock, BLOCK_SIZE, encode_hlc, decode_hlc
+
+
+class TestHybridLogicalClock:
+    """Test cases for HLC ticks and merges"""
+
+    @pytest.fixture
+    def clock(self):
+        """Create clock"""
+        return HybridLogicalClock()
+
+    def test_ticks_strictly_increase(self, clock):
+        """Test local ticks are monotonic across block boundaries"""
+        ticks = [clock.tick() for _ in range(BLOCK_SIZE * 3)]
+
+        assert ticks == sorted(ticks)
+        assert len(set(ticks)) == len(ticks)
+
+    def test_tracks_wall_clock(self, clock):
+        """Test timestamps stay close to physical time"""
+        wall_ms, _ = decode_hlc(clock.tick())
+
+        assert abs(wall_ms - time.time() * 1000) < 1000
+
+    def test_update_is_after_received(self, clock):
+        """Test merging a timestamp from the future"""
+        remote = encode_hlc(int(time.time() * 1000) + 60_000, 5)
+
+        merged = clock.update(remote)
+
+        assert merged > remote
+        assert clock.tick() > merged
+        assert clock.get_time() >= merged
+
+    def test_get_time_is_last_issued(self, clock):
+        """Test get_time reports a timestamp that was actually issued"""
+        assert clock.get_time() == 0
+        for _ in range(BLOCK_SIZE + 100):
+            timestamp = clock.tick()
+            assert clock.get_time() == timestamp
+        merged = clock.update(timestamp)
+        assert clock.get_time() == merged
+
+    def test_unique_under_threads(self, clock):
+        """Test concurrent ticks never collide"""
+        results = []
+
+        def worker():
+            local = [clock.tick() for _ in range(5000)]
+            assert local == sorted(local)
+            results.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 16 * 5000
+        assert len(set(results)) == len(results)
+
+    def test_encoding_round_trip(self):
+        """Test 64-bit packing"""
+        timestamp = encode_hlc(1_700_000_000_000, 42)
+
+        assert decode_hlc(timestamp) == (1_700_000_000_000, 42)
+        assert timestamp < 2 ** 64
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
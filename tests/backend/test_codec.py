@@ -0,0 +1,96 @@
+"""
+tests/backend/test_codec.py
+Unit tests for the binary wire format
+"""
+
+import json
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.codec import (
+    CodecError, decode_message, decode_write_record, encode_message, encode_write_record
+)
+
+
+class TestMessageCodec:
+    """Test cases for inter-node message encoding"""
+
+    def test_round_trip(self):
+        """Test every value type survives encode/decode"""
+        message = {
+            "type": "ELECTION",
+            "from_node": 1,
+            "to_node": 3,
+            "timestamp": 1745567000.25,
+            "seq": -12345678901234,
+            "unknown_field": "custom text ✓",
+            "flags": [True, False, None],
+            "nested": {"status": "pending", "blob": b"\x00\x01"}
+        }
+
+        assert decode_message(encode_message(message)) == message
+
+    def test_smaller_than_json(self):
+        """Test interned names make messages smaller than json"""
+        message = {"type": "COORDINATOR", "leader_id": 3, "to_node": 1, "timestamp": 114383729037312}
+
+        assert len(encode_message(message)) < len(json.dumps(message)) / 3
+
+    def test_unknown_types_fall_back_to_str(self):
+        """Test values json would stringify are sent as strings"""
+        assert decode_message(encode_message({"k": object}))["k"] == str(object)
+
+    def test_rejects_other_schema_version(self):
+        """Test payloads from another schema version are refused"""
+        payload = bytearray(encode_message({"type": "ACK"}))
+        payload[0] = 99
+
+        with pytest.raises(CodecError):
+            decode_message(bytes(payload))
+
+    def test_rejects_truncated_payload(self):
+        """Test truncated payloads raise CodecError"""
+        payload = encode_message({"type": "REPLICATE", "data": "x" * 100})
+
+        with pytest.raises(CodecError):
+            decode_message(payload[:-10])
+
+
+class TestWriteRecordCodec:
+    """Test cases for replication write record encoding"""
+
+    def test_insert_round_trip(self):
+        """Test an INSERT record round-trips without a record_id"""
+        record = {
+            "operation": "INSERT",
+            "table": "orders",
+            "data": {"order_id": "ORD_1_1", "user_id": 42, "total_amount": 598.5, "status": "pending"},
+            "timestamp": 1745567000.123456
+        }
+
+        assert decode_write_record(encode_write_record(record)) == record
+
+    def test_update_round_trip(self):
+        """Test an UPDATE record keeps its record_id"""
+        record = {
+            "operation": "UPDATE",
+            "table": "menu_items",
+            "record_id": 1042,
+            "data": {"quantity_available": 17},
+            "timestamp": 1745567000.5
+        }
+
+        encoded = encode_write_record(record)
+
+        assert decode_write_record(encoded) == record
+        assert len(encoded) < 25
+
+    def test_kind_is_checked(self):
+        """Test a message cannot be decoded as a write record"""
+        with pytest.raises(CodecError):
+            decode_write_record(encode_message({"type": "ACK"}))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
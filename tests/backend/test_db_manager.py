@@ -0,0 +1,149 @@
+"""
+tests/backend/test_db_manager.py
+Unit tests for read-your-writes sessions and replica selection
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+
+class StubReplica:
+    """Replica that has applied the primary log up to a fixed position"""
+
+    def __init__(self, replica_id, position):
+        self.replica_id = replica_id
+        self.log_position = position
+        self.reads = 0
+
+    def has_applied(self, position):
+        return self.log_position >= position
+
+    def read(self, table, conditions=None):
+        self.reads += 1
+        return [{"replica_id": self.replica_id}]
+
+    def sync_from_primary(self, primary_db, async_mode=True):
+        pass
+
+
+@pytest.fixture
+def manager_module(tmp_path_factory, monkeypatch):
+    """The manager module; importing it opens its global databases here"""
+    monkeypatch.chdir(tmp_path_factory.mktemp("databases"))
+    from backend.database import manager
+    return manager
+
+
+class TestSession:
+    """Test cases for session tokens"""
+
+    def test_token_round_trip(self, manager_module):
+        """Test a session rebuilt from its token has the same position"""
+        Session = manager_module.Session
+        assert Session.from_token(str(Session(42))).position == 42
+
+    @pytest.mark.parametrize("token", [None, "", "abc", "-5"])
+    def test_bad_token_gives_empty_session(self, manager_module, token):
+        """Test missing or invalid tokens start from position 0"""
+        assert manager_module.Session.from_token(token).position == 0
+
+    def test_advance_never_goes_back(self, manager_module):
+        """Test a session only moves forward"""
+        session = manager_module.Session(10)
+        session.advance(7)
+        assert session.position == 10
+        session.advance(12)
+        assert str(session) == "12"
+
+
+class TestReplicaSelection:
+    """Test cases for routing reads by consistency level"""
+
+    @pytest.fixture
+    def primary(self, tmp_path, manager_module):
+        """Create an empty primary database"""
+        from backend.database.primary_db import PrimaryDatabase
+        primary = PrimaryDatabase(str(tmp_path / "primary.db"))
+        yield primary
+        primary.close()
+
+    def test_write_advances_session(self, manager_module, primary):
+        """Test a session's token reaches the log position of its write"""
+        manager = manager_module.DatabaseManager(primary, [])
+        session = manager_module.Session()
+        row = {"restaurant_id": 1, "name": "Pizza Palace", "cuisine": "Italian"}
+
+        assert manager.write("restaurants", row, consistency="eventual", session=session)
+        assert session.position == primary.log_position == 1
+
+    def test_read_your_writes_skips_stale_replicas(self, manager_module, primary):
+        """Test only replicas that applied the session's writes serve it"""
+        stale, fresh = StubReplica(1, position=2), StubReplica(2, position=5)
+        manager = manager_module.DatabaseManager(primary, [stale, fresh])
+        session = manager_module.Session(4)
+        READ_YOUR_WRITES = manager_module.ConsistencyLevel.READ_YOUR_WRITES
+
+        for _ in range(3):
+            rows = manager.read("restaurants", consistency=READ_YOUR_WRITES, session=session)
+            assert rows == [{"replica_id": 2}]
+        assert stale.reads == 0
+        assert manager.read_stats["fallbacks"] == 0
+
+    def test_read_your_writes_falls_back_to_primary(self, manager_module, primary):
+        """Test the primary serves a session no replica has caught up with"""
+        assert primary.write("restaurants", {"restaurant_id": 1, "name": "Pizza Palace",
+                                             "cuisine": "Italian"})
+        replica = StubReplica(1, position=0)
+        manager = manager_module.DatabaseManager(primary, [replica])
+        READ_YOUR_WRITES = manager_module.ConsistencyLevel.READ_YOUR_WRITES
+
+        rows = manager.read("restaurants", consistency=READ_YOUR_WRITES,
+                            session=manager_module.Session(primary.log_position))
+
+        assert [row["name"] for row in rows] == ["Pizza Palace"]
+        assert replica.reads == 0
+        assert manager.read_stats["fallbacks"] == 1
+
+    def test_eventual_read_without_replicas_uses_primary(self, manager_module, primary):
+        """Test an eventual read returns rows, not None, with no replicas"""
+        assert primary.write("restaurants", {"restaurant_id": 1, "name": "Pizza Palace",
+                                             "cuisine": "Italian"})
+        manager = manager_module.DatabaseManager(primary, [])
+
+        rows = manager.read("restaurants")
+
+        assert [row["name"] for row in rows] == ["Pizza Palace"]
+        assert manager.read_stats["primary"] == 1
+
+
+class TestReplicaPosition:
+    """Test cases for the log position a real replica reports"""
+
+    def test_failed_apply_is_not_reported_applied(self, manager_module, tmp_path, monkeypatch):
+        """Test a write the replica failed to apply holds its position back"""
+        from backend.database.primary_db import PrimaryDatabase
+        from backend.database.replica_db import ReplicaDatabase
+        primary = PrimaryDatabase(str(tmp_path / "primary.db"))
+        replica = ReplicaDatabase(1, str(tmp_path / "replica.db"))
+        for i in (1, 2):
+            assert primary.write("restaurants", {"restaurant_id": i, "name": f"Restaurant {i}",
+                                                 "cuisine": "Italian"})
+        replicate_write = replica.replicate_write
+        calls = []
+
+        def fail_second(record):
+            calls.append(record)
+            return len(calls) != 2 and replicate_write(record)
+
+        monkeypatch.setattr(replica, "replicate_write", fail_second)
+        replica.sync_from_primary(primary, async_mode=False)
+        assert replica.log_position == 1
+        assert not replica.has_applied(primary.log_position)
+
+        # The next sync retries the write that failed
+        replica.sync_from_primary(primary, async_mode=False)
+        assert replica.has_applied(primary.log_position)
+        assert len(replica.read("restaurants")) == 2
+        primary.close()
+        replica.close()
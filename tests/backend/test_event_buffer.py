@@ -0,0 +1,205 @@
+"""
+tests/backend/test_event_buffer.py
+Unit tests for the node event ring buffer
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.event_buffer import EventRecord, EventRingBuffer
+from backend.core.event_query import query_events, parse_time
+from backend.core.node import DistributedNode
+
+
+class TestEventRingBuffer:
+    """Test cases for the fixed-capacity event log"""
+
+    @pytest.fixture
+    def buffer(self):
+        """Create small ring buffer"""
+        return EventRingBuffer(capacity=3)
+
+    def _record(self, logical_time):
+        return EventRecord(1, "TEST", f"event {logical_time}", logical_time, float(logical_time))
+
+    def test_append_below_capacity(self, buffer):
+        """Test events are kept in insertion order"""
+        for i in range(2):
+            buffer.append(self._record(i))
+
+        assert len(buffer) == 2
+        assert [e.logical_time for e in buffer] == [0, 1]
+
+    def test_overwrites_oldest_when_full(self, buffer):
+        """Test that only the newest `capacity` events are kept"""
+        for i in range(5):
+            buffer.append(self._record(i))
+
+        assert len(buffer) == 3
+        assert buffer.total_appended == 5
+        assert [e.logical_time for e in buffer] == [2, 3, 4]
+        assert [e.logical_time for e in reversed(buffer)] == [4, 3, 2]
+        assert buffer.latest().logical_time == 4
+
+    def test_clear(self, buffer):
+        """Test clearing the buffer"""
+        buffer.append(self._record(1))
+        buffer.clear()
+
+        assert len(buffer) == 0
+        assert list(buffer) == []
+        assert buffer.latest() is None
+
+    def test_invalid_capacity(self):
+        """Test that capacity must be positive"""
+        with pytest.raises(ValueError):
+            EventRingBuffer(capacity=0)
+
+
+class TestEventRecord:
+    """Test cases for slotted event records"""
+
+    def test_dict_style_access(self):
+        """Test records still behave like the old event dicts"""
+        record = EventRecord(2, "ORDER_CREATED", "Order created", 7, 1700000000.0, {"order_id": "ORD_1"})
+
+        assert record["logical_time"] == 7
+        assert record.get("event_type") == "ORDER_CREATED"
+        assert record.get("missing", "default") == "default"
+        assert "logical_time" in record
+        assert record.to_dict()["data"] == {"order_id": "ORD_1"}
+
+    def test_no_instance_dict(self):
+        """Test records are slotted"""
+        record = EventRecord(1, "TEST", "", 1, 0.0)
+
+        assert not hasattr(record, "__dict__")
+
+
+class TestNodeEventLog:
+    """Test cases for DistributedNode.log_event"""
+
+    def test_log_event_respects_capacity(self):
+        """Test node event log is bounded by configured capacity"""
+        node = DistributedNode(node_id=1, event_log_capacity=10)
+
+        for i in range(25):
+            node.log_event("TEST", f"event {i}")
+
+        assert len(node.event_log) == 10
+        assert [e["description"] for e in node.event_log] == [f"event {i}" for i in range(15, 25)]
+        logical_times = [e["logical_time"] for e in node.event_log]
+        assert logical_times == sorted(set(logical_times))
+
+    def test_state_change_logging_does_not_deadlock(self):
+        """Test fail/recover log events while holding the node lock"""
+        node = DistributedNode(node_id=1)
+
+        node.fail()
+        node.recover()
+
+        assert [e.event_type for e in node.event_log] == ["NODE_FAILURE", "NODE_RECOVERY"]
+
+
+class TestEventQuery:
+    """Test cases for indexed, paginated event queries"""
+
+    @pytest.fixture
+    def nodes(self):
+        """Create nodes with interleaved events"""
+        nodes = [DistributedNode(node_id=i, event_log_capacity=50) for i in range(1, 4)]
+        for i in range(30):
+            node = nodes[i % 3]
+            event_type = "ELECTION_START" if i % 5 == 0 else "ORDER_CREATED"
+            node.log_event(event_type, f"event {i}", {"i": i})
+        return nodes
+
+    def _all_events(self, nodes):
+        events = [e for node in nodes for e in node.event_log]
+        return sorted(events, key=lambda e: (e.physical_time, e.node_id), reverse=True)
+
+    def test_matches_full_sort(self, nodes):
+        """Test merged result equals a full sort of every event"""
+        page = query_events(nodes, limit=10)
+        expected = [e.to_dict() for e in self._all_events(nodes)[:10]]
+
+        assert page["events"] == expected
+        assert page["total"] == 30
+        assert page["next_cursor"] is not None
+
+    def test_cursor_pagination_covers_everything_once(self, nodes):
+        """Test walking pages returns each event exactly once, in order"""
+        seen = []
+        cursor = None
+        while True:
+            page = query_events(nodes, limit=7, cursor=cursor)
+            seen.extend(e["data"]["i"] for e in page["events"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = [e.data["i"] for e in self._all_events(nodes)]
+        assert seen == expected
+
+    def test_event_type_and_node_filters(self, nodes):
+        """Test the type index and node filter"""
+        page = query_events(nodes, event_types=["ELECTION_START"], limit=100)
+        assert page["total"] == 6
+        assert all(e["event_type"] == "ELECTION_START" for e in page["events"])
+
+        page = query_events(nodes, node_id=2, limit=100)
+        assert page["total"] == 10
+        assert {e["node_id"] for e in page["events"]} == {2}
+
+    def test_node_filter_matches_node_zero(self):
+        """Test node_id=0 filters to node 0 instead of returning every node"""
+        nodes = [DistributedNode(node_id=i) for i in (0, 1)]
+        for node in nodes:
+            node.log_event("ORDER_CREATED", f"on node {node.node_id}")
+
+        page = query_events(nodes, node_id=0, limit=100)
+
+        assert {e["node_id"] for e in page["events"]} == {0}
+
+    def test_order_by_logical_time(self, nodes):
+        """Test clock history ordering"""
+        page = query_events(nodes, order_by="logical_time", limit=100)
+        keys = [(int(e["logical_time"]), e["node_id"]) for e in page["events"]]
+
+        assert keys == sorted(keys, reverse=True)
+
+    def test_time_range(self, nodes):
+        """Test start/end time bounds"""
+        events = list(nodes[0].event_log)
+        start, end = events[2].physical_time, events[5].physical_time
+
+        page = query_events(nodes, node_id=1, start_time=start, end_time=end, limit=100)
+
+        assert all(start <= e["physical_time"] <= end for e in page["events"])
+        assert page["total"] == sum(1 for e in events if start <= e.physical_time <= end)
+
+    def test_overwritten_events_drop_from_index(self):
+        """Test the type index ignores events evicted from the ring"""
+        node = DistributedNode(node_id=1, event_log_capacity=5)
+        node.log_event("RARE", "evicted soon")
+        for i in range(10):
+            node.log_event("COMMON", f"event {i}")
+
+        assert query_events([node], event_types=["RARE"])["total"] == 0
+        assert query_events([node], event_types=["COMMON"])["total"] == 5
+
+    def test_invalid_cursor(self, nodes):
+        """Test malformed cursors are rejected"""
+        with pytest.raises(ValueError):
+            query_events(nodes, cursor="garbage")
+
+    def test_parse_time(self):
+        """Test epoch and ISO time parsing"""
+        assert parse_time("1700000000.5") == 1700000000.5
+        assert parse_time(None) is None
+        assert parse_time("2024-01-01T00:00:00") is not None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,156 @@
+"""
+tests/backend/test_event_store.py
+Unit tests for persistent event segment files
+"""
+
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.event_buffer import EventRecord
+from backend.core.event_store import EventSegmentStore
+from backend.core.node import DistributedNode
+
+
+def make_event(i):
+    return EventRecord(1, "ORDER_CREATED", f"event {i}", i + 1, 1000.0 + i, {"i": i})
+
+
+class TestEventSegmentStore:
+    """Test cases for the append-only segment store"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Create store with small segments and a dense index"""
+        store = EventSegmentStore(str(tmp_path), node_id=1, segment_bytes=2048, index_interval=4)
+        yield store
+        store.close()
+
+    def test_append_and_replay(self, store):
+        """Test events replay in order with their fields intact"""
+        for i in range(10):
+            assert store.append(make_event(i)) == i
+
+        replayed = list(store.replay())
+
+        assert [seq for seq, _ in replayed] == list(range(10))
+        assert replayed[3][1].to_dict() == make_event(3).to_dict()
+
+    def test_rolls_segments(self, store):
+        """Test segments roll over at the size limit"""
+        for i in range(200):
+            store.append(make_event(i))
+
+        assert len(store.segments) > 1
+        assert [e.data["i"] for _, e in store.replay(after_seq=149)] == list(range(150, 200))
+
+    def test_time_range_scan(self, store):
+        """Test time-range queries use the sparse index bounds"""
+        for i in range(200):
+            store.append(make_event(i))
+
+        events = [e.data["i"] for _, e in store.scan(start_time=1050.0, end_time=1059.0)]
+
+        assert events == list(range(50, 60))
+
+    def test_tail(self, store):
+        """Test reading the newest events"""
+        for i in range(50):
+            store.append(make_event(i))
+
+        assert [e.data["i"] for e in store.tail(5)] == [45, 46, 47, 48, 49]
+        assert len(store.tail(500)) == 50
+
+    def test_scan_survives_retention(self, tmp_path):
+        """Test a segment dropped while a scan reads it is deleted after the scan"""
+        store = EventSegmentStore(str(tmp_path), node_id=1, segment_bytes=2048,
+                                  index_interval=4, max_segments=2)
+        for i in range(20):
+            store.append(make_event(i))
+        oldest = store.segments[0]
+        scan = store.replay()
+        assert next(scan)[0] == 0
+
+        # Roll until the segment being scanned falls out of retention
+        i = 20
+        while oldest in store.segments:
+            store.append(make_event(i))
+            i += 1
+        assert oldest.path.exists()
+
+        # The scan still reads everything that existed when it started
+        assert [seq for seq, _ in scan] == list(range(1, 20))
+        assert not oldest.path.exists()
+        store.close()
+
+    def test_reopen_after_restart(self, tmp_path):
+        """Test history survives closing and reopening the store"""
+        store = EventSegmentStore(str(tmp_path), node_id=1, segment_bytes=2048, index_interval=4)
+        for i in range(100):
+            store.append(make_event(i))
+        store.close()
+
+        reopened = EventSegmentStore(str(tmp_path), node_id=1, segment_bytes=2048, index_interval=4)
+        assert reopened.next_seq == 100
+        assert reopened.append(make_event(100)) == 100
+        assert [e.data["i"] for e in reopened.tail(3)] == [98, 99, 100]
+        reopened.close()
+
+    def test_torn_tail_is_truncated(self, tmp_path):
+        """Test a partially written record is dropped on open"""
+        store = EventSegmentStore(str(tmp_path), node_id=1, index_interval=4)
+        for i in range(10):
+            store.append(make_event(i))
+        store.close()
+
+        segment = sorted(tmp_path.glob("*.seg"))[-1]
+        data = segment.read_bytes()
+        segment.write_bytes(data[:-5])
+
+        reopened = EventSegmentStore(str(tmp_path), node_id=1, index_interval=4)
+        assert reopened.next_seq == 9
+        assert [seq for seq, _ in reopened.replay()] == list(range(9))
+        reopened.close()
+
+
+class TestNodeEventPersistence:
+    """Test cases for DistributedNode crash replay"""
+
+    def test_node_restores_recent_events(self, tmp_path):
+        """Test a restarted node reloads its event log and clock"""
+        node = DistributedNode(node_id=1, event_store=EventSegmentStore(str(tmp_path), node_id=1))
+        for i in range(20):
+            node.log_event("TEST", f"event {i}")
+        last_time = node.clock.get_time()
+        node.event_store.close()
+
+        restarted = DistributedNode(node_id=1, event_log_capacity=5,
+                                    event_store=EventSegmentStore(str(tmp_path), node_id=1))
+
+        assert [e.description for e in restarted.event_log] == [f"event {i}" for i in range(15, 20)]
+        assert restarted.clock.get_time() > last_time
+        restarted.event_store.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
+
+    def test_concurrent_events_persist_in_clock_order(self, tmp_path):
+        """Test events written outside the buffer lock keep their clock order"""
+        node = DistributedNode(node_id=1, event_store=EventSegmentStore(str(tmp_path), node_id=1))
+
+        def log_many(t):
+            for i in range(200):
+                node.log_event("TEST", f"thread {t} event {i}")
+
+        threads = [threading.Thread(target=log_many, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        times = [event.logical_time for _, event in node.event_store.replay()]
+        assert len(times) == 800
+        assert times == sorted(times)
+        node.event_store.close()
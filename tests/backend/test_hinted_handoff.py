@@ -0,0 +1,113 @@
+"""
+tests/backend/test_hinted_handoff.py
+Unit tests for on-disk hint queues held for down replicas
+"""
+
+import os
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.distributed.hinted_handoff import HintQueue, HintedHandoff
+
+
+def hint(i):
+    return {"key": f"order_{i}", "value": i, "logical_time": i, "node_id": 1}
+
+
+class TestHintQueue:
+    """Test cases for bounding, recovery and delivery of one queue"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        """Path of the queue file"""
+        return str(tmp_path / "hints_2.log")
+
+    def test_full_queue_drops_hints(self, path):
+        """Test hints past max_hints are dropped and counted"""
+        queue = HintQueue(path, max_hints=3)
+        assert all(queue.append(hint(i)) for i in range(3))
+        assert queue.append(hint(3)) is False
+
+        assert queue.count == 3
+        assert queue.dropped == 1
+        assert HintQueue(path, max_hints=3).count == 3
+
+    def test_torn_tail_is_cut_off(self, path):
+        """Test a partly written last hint is discarded on reopen"""
+        queue = HintQueue(path)
+        for i in range(3):
+            queue.append(hint(i))
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 5)
+
+        queue = HintQueue(path)
+        delivered = []
+        assert queue.count == 2
+        assert queue.drain(delivered.extend) == 2
+        assert delivered == [hint(0), hint(1)]
+
+        # Appends after recovery land behind the valid prefix
+        queue.append(hint(3))
+        assert HintQueue(path).count == 1
+
+    def test_failed_batch_stays_queued(self, path):
+        """Test a drain that fails part way keeps the undelivered hints in order"""
+        queue = HintQueue(path)
+        for i in range(5):
+            queue.append(hint(i))
+        delivered = []
+
+        def deliver(batch):
+            if delivered:
+                raise ConnectionError("replica went down again")
+            delivered.extend(batch)
+
+        assert queue.drain(deliver, batch_size=2) == 2
+        assert delivered == [hint(0), hint(1)]
+        assert queue.count == 3
+
+        rest = []
+        assert HintQueue(path).drain(rest.extend, batch_size=2) == 3
+        assert rest == [hint(2), hint(3), hint(4)]
+
+    def test_hints_appended_during_drain_are_kept(self, path):
+        """Test delivery does not block appends and does not lose them"""
+        queue = HintQueue(path)
+        queue.append(hint(0))
+        delivered = []
+
+        def deliver(batch):
+            appender = threading.Thread(target=queue.append, args=(hint(1),))
+            appender.start()
+            appender.join(timeout=1.0)
+            assert not appender.is_alive()
+            delivered.extend(batch)
+
+        assert queue.drain(deliver) == 1
+        assert delivered == [hint(0)]
+        assert queue.count == 1
+
+        assert queue.drain(delivered.extend) == 1
+        assert delivered == [hint(0), hint(1)]
+        assert queue.count == 0
+
+
+class TestHintedHandoff:
+    """Test cases for per-replica queues of one node"""
+
+    def test_queues_reload_from_directory(self, tmp_path):
+        """Test pending hints survive a restart"""
+        handoff = HintedHandoff(str(tmp_path), max_hints=10)
+        handoff.store(2, hint(0))
+        handoff.store(3, hint(1))
+        handoff.store(3, hint(2))
+
+        handoff = HintedHandoff(str(tmp_path), max_hints=10)
+        assert handoff.pending(2) == 1
+        assert handoff.pending(3) == 2
+
+        delivered = []
+        assert handoff.replay(3, delivered.extend) == 2
+        assert handoff.get_stats() == {"pending": {2: 1}, "dropped": {}, "delivered": 2}
@@ -0,0 +1,84 @@
+"""
+tests/backend/test_kv_store.py
+Unit tests for the versioned key-value store behind ConsistencyManager
+"""
+
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.kv_store import VersionedKVStore
+
+
+def record(key, value, logical_time, node_id=1):
+    return {"key": key, "value": value, "timestamp": 0.0,
+            "logical_time": logical_time, "node_id": node_id}
+
+
+class TestVersionedKVStore:
+    """Test cases for version chains and compaction"""
+
+    @pytest.fixture
+    def store(self):
+        """Create store whose background compaction never runs"""
+        return VersionedKVStore(max_versions=3, compaction_interval=3600)
+
+    def test_latest_and_missing(self, store):
+        """Test reads return the newest value and None for unknown keys"""
+        for i in range(5):
+            assert store.put(record("order_1", i, 10 + i))
+
+        assert store.get("order_1")["value"] == 4
+        assert store.get("order_2") is None
+        assert len(store) == 1
+
+    def test_read_as_of_logical_time(self, store):
+        """Test multi-version reads see the newest version at or before a time"""
+        store.put(record("order_1", "pending", 10))
+        store.put(record("order_1", "confirmed", 20))
+
+        assert store.get("order_1", at=15)["value"] == "pending"
+        assert store.get("order_1", at=20)["value"] == "confirmed"
+        assert store.get("order_1", at=5) is None
+
+    def test_late_write_does_not_overwrite_newer(self, store):
+        """Test last-writer-wins by (logical_time, node_id), not arrival"""
+        store.put(record("order_1", "confirmed", 20, node_id=1))
+        assert store.put(record("order_1", "pending", 10, node_id=2)) is False
+        assert store.put(record("order_1", "ready", 20, node_id=3)) is True
+
+        assert store.get("order_1")["value"] == "ready"
+        assert [r["value"] for r in store.history("order_1")] == ["ready", "confirmed", "pending"]
+        # Replayed duplicates are ignored
+        assert store.put(record("order_1", "pending", 10, node_id=2)) is False
+        assert store.get_stats()["versions"] == 3
+
+    def test_compaction_keeps_newest_versions(self, store):
+        """Test compaction trims superseded versions of written keys only"""
+        for i in range(10):
+            store.put(record("order_1", i, i))
+        store.put(record("order_2", "only", 1))
+
+        assert store.compact() == 7
+        assert [r["value"] for r in store.history("order_1")] == [9, 8, 7]
+        assert store.get("order_2")["value"] == "only"
+        assert store.get_stats()["versions"] == 4
+        # Nothing new was written, so there is nothing to visit
+        assert store.get_stats()["pending_compaction"] == 0
+        assert store.compact() == 0
+
+    def test_concurrent_writers(self, store):
+        """Test concurrent writes leave the highest version on top"""
+        def writer(node_id):
+            for i in range(200):
+                store.put(record("counter", (i, node_id), i, node_id))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.get("counter")["value"] == (199, 3)
+        assert store.get_stats()["writes"] == 800
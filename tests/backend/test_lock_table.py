@@ -0,0 +1,632 @@
+"""
+tests/backend/test_lock_table.py
+Unit tests for the striped lock table and reader-writer lock modes
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.concurrency.lock_manager import DistributedLockManager, LockType, DeadlockDetector, lock_manager
+from backend.concurrency.transaction_manager import transaction_manager
+
+
+class TestLockTable:
+    """Test cases for lock table entries and reclamation"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager with few stripes to force sharing"""
+        return DistributedLockManager(stripes=4)
+
+    def test_acquire_and_release(self, manager):
+        """Test holder tracking and release by the holder only"""
+        assert manager.acquire("restaurant_1", node_id=1)
+        assert manager.get_lock_holder("restaurant_1") == 1
+        assert manager.release("restaurant_1", node_id=2) is False
+        assert manager.is_locked("restaurant_1")
+
+        assert manager.release("restaurant_1", node_id=1) is True
+        assert not manager.is_locked("restaurant_1")
+
+    def test_idle_entries_are_reclaimed(self, manager):
+        """Test the table only holds resources in use"""
+        for i in range(1000):
+            assert manager.acquire(f"order_{i}", node_id=1)
+        assert len(manager) == 1000
+
+        for i in range(1000):
+            manager.release(f"order_{i}", node_id=1)
+        assert len(manager) == 0
+
+    def test_timeout_drops_waiter_reference(self, manager):
+        """Test a timed-out waiter does not leak or remove a held entry"""
+        assert manager.acquire("restaurant_1", node_id=1)
+
+        assert manager.acquire("restaurant_1", node_id=2, timeout=0.05) is False
+        assert manager.get_lock_holder("restaurant_1") == 1
+
+        manager.release("restaurant_1", node_id=1)
+        assert len(manager) == 0
+
+    def test_waiter_gets_lock_after_release(self, manager):
+        """Test an entry survives release while a waiter still holds a reference"""
+        assert manager.acquire("restaurant_1", node_id=1)
+        acquired = []
+        waiter = threading.Thread(
+            target=lambda: acquired.append(manager.acquire("restaurant_1", node_id=2, timeout=2.0))
+        )
+        waiter.start()
+
+        manager.release("restaurant_1", node_id=1)
+        waiter.join()
+
+        assert acquired == [True]
+        assert manager.get_lock_holder("restaurant_1") == 2
+        manager.release("restaurant_1", node_id=2)
+        assert len(manager) == 0
+
+    def test_mutual_exclusion_under_contention(self, manager):
+        """Test concurrent increments under the lock are not lost"""
+        counter = {"value": 0}
+
+        def worker(node_id):
+            for _ in range(500):
+                assert manager.acquire("restaurant_1", node_id)
+                value = counter["value"]
+                counter["value"] = value + 1
+                manager.release("restaurant_1", node_id)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter["value"] == 4000
+        assert len(manager) == 0
+
+    def test_stripes_must_be_power_of_two(self):
+        """Test invalid stripe counts are rejected"""
+        with pytest.raises(ValueError):
+            DistributedLockManager(stripes=3)
+
+
+
+def acquire_in_thread(manager, resource_id, node_id, lock_type, timeout=2.0):
+    """Start a thread acquiring a lock; returns (thread, result list)"""
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(manager.acquire(resource_id, node_id, timeout, lock_type))
+    )
+    thread.start()
+    return thread, result
+
+
+class TestSharedExclusive:
+    """Test cases for reader-writer lock modes"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager"""
+        return DistributedLockManager()
+
+    def test_shared_locks_compatible(self, manager):
+        """Test multiple shared holders coexist"""
+        assert manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+        assert manager.acquire("restaurant_1", 2, lock_type=LockType.SHARED)
+        assert manager.acquire("restaurant_1", 2, lock_type=LockType.SHARED)
+
+        assert manager.get_lock_mode("restaurant_1") is LockType.SHARED
+        assert manager.get_lock_holders("restaurant_1") == {1: 1, 2: 2}
+
+    def test_shared_and_exclusive_incompatible(self, manager):
+        """Test exclusive waits for shared holders and vice versa"""
+        assert manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+        assert not manager.acquire("restaurant_1", 2, timeout=0.05)
+
+        manager.release("restaurant_1", 1)
+        assert manager.acquire("restaurant_1", 2, timeout=0)
+        assert not manager.acquire("restaurant_1", 1, timeout=0.05, lock_type=LockType.SHARED)
+
+    def test_waiting_writer_blocks_new_readers(self, manager):
+        """Test readers arriving after a queued writer wait behind it"""
+        assert manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+        writer, writer_result = acquire_in_thread(manager, "restaurant_1", 2, LockType.EXCLUSIVE)
+        time.sleep(0.05)
+
+        assert not manager.acquire("restaurant_1", 3, timeout=0.05, lock_type=LockType.SHARED)
+
+        manager.release("restaurant_1", 1)
+        writer.join()
+        assert writer_result == [True]
+        assert manager.get_lock_mode("restaurant_1") is LockType.EXCLUSIVE
+
+    def test_queued_readers_granted_together(self, manager):
+        """Test consecutive shared waiters are all woken by one release"""
+        assert manager.acquire("restaurant_1", 1)
+        readers = [acquire_in_thread(manager, "restaurant_1", n, LockType.SHARED) for n in (2, 3, 4)]
+        time.sleep(0.05)
+
+        manager.release("restaurant_1", 1)
+        for thread, result in readers:
+            thread.join()
+            assert result == [True]
+        assert manager.get_lock_holders("restaurant_1") == {2: 1, 3: 1, 4: 1}
+
+    def test_timed_out_writer_lets_readers_through(self, manager):
+        """Test readers behind a writer that gives up are granted"""
+        assert manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+        writer, writer_result = acquire_in_thread(manager, "restaurant_1", 2, LockType.EXCLUSIVE,
+                                                  timeout=0.1)
+        time.sleep(0.02)
+        reader, reader_result = acquire_in_thread(manager, "restaurant_1", 3, LockType.SHARED)
+
+        writer.join()
+        reader.join()
+        assert writer_result == [False]
+        assert reader_result == [True]
+
+    def test_lock_upgrade(self, manager):
+        """Test a sole shared holder upgrades immediately"""
+        assert manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+
+        assert manager.upgrade("restaurant_1", 1)
+        assert manager.get_lock_mode("restaurant_1") is LockType.EXCLUSIVE
+
+        manager.release("restaurant_1", 1)
+        assert len(manager) == 0
+
+    def test_upgrade_waits_for_other_readers_and_jumps_queue(self, manager):
+        """Test upgrade waits for other readers but goes ahead of queued writers"""
+        assert manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+        assert manager.acquire("restaurant_1", 2, lock_type=LockType.SHARED)
+        writer, writer_result = acquire_in_thread(manager, "restaurant_1", 3, LockType.EXCLUSIVE)
+        time.sleep(0.02)
+
+        upgraded = []
+        upgrader = threading.Thread(target=lambda: upgraded.append(manager.upgrade("restaurant_1", 1)))
+        upgrader.start()
+        time.sleep(0.02)
+        assert not manager.upgrade("restaurant_1", 2, timeout=0.05)
+
+        manager.release("restaurant_1", 2)
+        upgrader.join()
+        assert upgraded == [True]
+        assert manager.get_lock_holder("restaurant_1") == 1
+        assert writer_result == []
+
+        manager.release("restaurant_1", 1)
+        writer.join()
+        assert writer_result == [True]
+
+    def test_upgrade_requires_hold(self, manager):
+        """Test upgrading without holding the lock fails"""
+        assert not manager.upgrade("restaurant_1", 1)
+
+
+class TestMultiResource:
+    """Test cases for ordered multi-resource acquisition"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager"""
+        return DistributedLockManager()
+
+    def test_acquire_many_sorted_and_deduplicated(self, manager):
+        """Test resources are locked once each, in sorted order"""
+        leases = manager.acquire_many(["menu_item_3", "menu_item_1", "menu_item_3"], 1)
+
+        assert [lease.resource_id for lease in leases] == ["menu_item_1", "menu_item_3"]
+        assert manager.release_many(leases) == 2
+        assert len(manager) == 0
+
+    def test_acquire_many_all_or_nothing(self, manager):
+        """Test a failed acquisition releases the locks it already took"""
+        assert manager.acquire("menu_item_2", 2)
+
+        assert manager.acquire_many(["menu_item_1", "menu_item_2"], 1, timeout=0.05) is None
+        assert not manager.is_locked("menu_item_1")
+
+    def test_opposite_orders_do_not_deadlock(self, manager):
+        """Test callers listing resources in opposite orders both finish"""
+        done = []
+
+        def order(node_id, resource_ids):
+            for _ in range(200):
+                leases = manager.acquire_many(resource_ids, node_id, timeout=2.0)
+                assert leases is not None
+                manager.release_many(leases)
+            done.append(node_id)
+
+        threads = [threading.Thread(target=order, args=(1, ["menu_item_1", "menu_item_2"])),
+                   threading.Thread(target=order, args=(2, ["menu_item_2", "menu_item_1"]))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(done) == [1, 2]
+
+    def test_item_locks_do_not_block_other_items(self, manager):
+        """Test an update to one item leaves orders for other items alone"""
+        assert manager.acquire("menu_item_1", 99)
+
+        leases = manager.acquire_many(["menu_item_2", "menu_item_3"], 1, timeout=0,
+                                      lock_type=LockType.SHARED)
+        assert leases is not None
+        manager.release_many(leases)
+
+    def test_hold_many_async(self, manager):
+        """Test hold_many locks every resource inside the block"""
+        async def scenario():
+            async with manager.hold_many(["menu_item_2", "menu_item_1"], 1) as leases:
+                held = [manager.get_lock_holder(lease.resource_id) for lease in leases]
+            return held
+
+        assert asyncio.run(scenario()) == [1, 1]
+        assert len(manager) == 0
+
+
+class TestLeases:
+    """Test cases for lease expiry, renewal and fencing tokens"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager"""
+        return DistributedLockManager()
+
+    def test_fencing_tokens_increase(self, manager):
+        """Test every grant gets a larger token"""
+        first = manager.acquire_lease("restaurant_1", 1, keep_alive=False)
+        first.release()
+        second = manager.acquire_lease("restaurant_1", 2, keep_alive=False)
+        shared = manager.acquire_lease("restaurant_2", 1, lock_type=LockType.SHARED,
+                                       keep_alive=False)
+
+        assert first.token < second.token < shared.token
+        assert shared.upgrade()
+        assert shared.token > second.token
+
+    def test_expired_lease_frees_waiter(self, manager):
+        """Test a holder that stops renewing loses the lock after its ttl"""
+        lease = manager.acquire_lease("restaurant_1", 1, ttl=0.1, keep_alive=False)
+
+        start = time.monotonic()
+        assert manager.acquire("restaurant_1", 2, timeout=2.0)
+        assert time.monotonic() - start < 0.5
+
+        assert not lease.valid
+        assert manager.get_lock_holder("restaurant_1") == 2
+        assert manager.get_stats()["expired_leases"] == 1
+
+    def test_late_acquirer_wakes_queued_waiter(self, manager):
+        """Test a new request that reaps an expired lease grants the queue first"""
+        lease = manager.acquire_lease("restaurant_1", 1, ttl=10.0, keep_alive=False)
+        results = {}
+        waiter = threading.Thread(target=lambda: results.update(
+            waiter=manager.acquire("restaurant_1", 2, timeout=2.0)))
+        waiter.start()
+        time.sleep(0.1)
+        # Shorten the lease after the waiter went to sleep on the old expiry
+        assert manager.renew("restaurant_1", lease.token, 0.05)
+        time.sleep(0.1)
+
+        start = time.monotonic()
+        assert not manager.acquire("restaurant_1", 3, timeout=0)
+        waiter.join(timeout=1.0)
+
+        assert results == {"waiter": True}
+        assert time.monotonic() - start < 0.5
+        assert manager.get_lock_holder("restaurant_1") == 2
+
+    def test_stale_lease_cannot_release_new_holder(self, manager):
+        """Test releasing an expired lease leaves the next holder alone"""
+        stale = manager.acquire_lease("restaurant_1", 1, ttl=0.05, keep_alive=False)
+        time.sleep(0.1)
+        fresh = manager.acquire_lease("restaurant_1", 1, keep_alive=False)
+
+        assert stale.release() is False
+        assert fresh.valid
+        assert manager.get_lock_holder("restaurant_1") == 1
+
+    def test_keep_alive_renews_lease(self, manager):
+        """Test a lease outlives its ttl while the holder thread runs"""
+        lease = manager.acquire_lease("restaurant_1", 1, ttl=0.1)
+        assert not manager.acquire("restaurant_1", 2, timeout=0.35)
+        assert lease.valid
+
+        lease.release()
+        assert manager.acquire("restaurant_1", 2, timeout=0)
+
+    def test_dead_holder_lease_expires(self, manager):
+        """Test leases of a thread that died are no longer renewed"""
+        holder = threading.Thread(
+            target=lambda: manager.acquire_lease("restaurant_1", 1, ttl=0.1)
+        )
+        holder.start()
+        holder.join()
+
+        assert manager.acquire("restaurant_1", 2, timeout=1.0)
+        assert manager.get_lock_holder("restaurant_1") == 2
+
+    def test_idle_holder_lease_expires(self, manager):
+        """Test keep-alive stops once a live holder stops heartbeating"""
+        lease = manager.acquire_lease("restaurant_1", 1, ttl=0.1, max_idle=0.3)
+        for _ in range(4):
+            time.sleep(0.1)
+            lease.heartbeat()
+        assert lease.valid
+
+        assert manager.acquire("restaurant_1", 2, timeout=2.0)
+        assert not lease.valid
+
+    def test_untimed_lease_does_not_stop_keep_alive(self, manager):
+        """Test a keep-alive lease without ttl leaves renewal of others running"""
+        forever = manager.acquire_lease("restaurant_1", 1, ttl=None)
+        lease = manager.acquire_lease("restaurant_2", 1, ttl=0.1)
+        assert not manager.acquire("restaurant_2", 2, timeout=0.35)
+        assert lease.valid and forever.valid
+        assert manager._keepalive_thread.is_alive()
+
+    def test_failing_renewal_drops_only_that_lease(self, manager):
+        """Test one lease raising during renewal does not stop the others"""
+        broken = manager.acquire_lease("restaurant_1", 1, ttl=0.1)
+        broken._extend = lambda: 1 / 0
+        lease = manager.acquire_lease("restaurant_2", 1, ttl=0.1)
+
+        assert manager.acquire("restaurant_1", 2, timeout=1.0)
+        assert not manager.acquire("restaurant_2", 2, timeout=0.35)
+        assert lease.valid
+        assert manager._keepalive_thread.is_alive()
+
+    def test_upgrade_fails_when_own_lease_expires(self, manager):
+        """Test a waiting upgrade gives up once its shared lease is gone"""
+        lease = manager.acquire_lease("restaurant_1", 1, lock_type=LockType.SHARED,
+                                      ttl=0.1, keep_alive=False)
+        assert manager.acquire("restaurant_1", 2, lock_type=LockType.SHARED)
+
+        start = time.monotonic()
+        assert not lease.upgrade(timeout=2.0)
+        assert time.monotonic() - start < 0.5
+        assert manager.get_lock_holders("restaurant_1") == {2: 1}
+
+
+
+class TestDeadlockDetection:
+    """Test cases for the wait-for graph and victim selection"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager"""
+        return DistributedLockManager()
+
+    def test_reported_cycle_detected(self, manager):
+        """Test a cycle of reported wait-for edges is found"""
+        detector = DeadlockDetector(manager)
+        assert manager.acquire("resource1", "T1")
+        assert manager.acquire("resource2", "T2")
+
+        manager.add_wait_for("T1", "resource2", "T2")
+        assert not detector.detect_cycle()
+        manager.add_wait_for("T2", "resource1", "T1")
+        assert detector.detect_cycle()
+
+    def test_resolution_aborts_youngest(self, manager):
+        """Test the owner with the newest hold in the cycle is chosen"""
+        detector = DeadlockDetector(manager)
+        assert manager.acquire("resource1", "T1")
+        assert manager.acquire("resource2", "T2")
+        manager.add_wait_for("T1", "resource2", "T2")
+        manager.add_wait_for("T2", "resource1", "T1")
+
+        assert detector.resolve_deadlock() == "T2"
+        assert not detector.detect_cycle()
+
+    def test_blocked_acquires_form_graph(self, manager):
+        """Test blocked acquire calls show up as wait-for edges"""
+        assert manager.acquire("resource1", 1)
+        waiter, result = acquire_in_thread(manager, "resource1", 2, LockType.EXCLUSIVE, timeout=1.0)
+        time.sleep(0.05)
+
+        assert manager.wait_for(2) == {1: "resource1"}
+        manager.release("resource1", 1)
+        waiter.join()
+        assert result == [True]
+        assert manager.waiting_owners() == []
+
+    def test_transaction_deadlock_fails_fast(self):
+        """Test a deadlock between transactions aborts the younger in milliseconds"""
+        older = transaction_manager.begin_transaction("tx_deadlock_old")
+        time.sleep(0.01)
+        younger = transaction_manager.begin_transaction("tx_deadlock_young")
+        assert transaction_manager.acquire_lock(older.tx_id, "deadlock_a")
+        assert transaction_manager.acquire_lock(younger.tx_id, "deadlock_b")
+
+        results = {}
+
+        def lock(tx, resource_id):
+            results[tx.tx_id] = transaction_manager.acquire_lock(tx.tx_id, resource_id, timeout=5.0)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=lock, args=(older, "deadlock_b")),
+                   threading.Thread(target=lock, args=(younger, "deadlock_a"))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert time.monotonic() - start < 1.0
+        assert results == {"tx_deadlock_old": True, "tx_deadlock_young": False}
+        assert younger.status == "aborted"
+        assert transaction_manager.commit_transaction(older.tx_id)
+        assert not lock_manager.is_locked("deadlock_a")
+        assert not lock_manager.is_locked("deadlock_b")
+        assert lock_manager.get_stats()["deadlocks"] >= 1
+
+
+
+class TestAsyncLocks:
+    """Test cases for the asyncio lock API"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager with a default owner"""
+        return DistributedLockManager(node_id=1)
+
+    def test_hold_acquires_and_releases(self, manager):
+        """Test async with hold() locks only inside the block"""
+        async def scenario():
+            async with manager.hold("restaurant_1") as lease:
+                assert manager.get_lock_holder("restaurant_1") == 1
+                assert lease.valid
+            return manager.is_locked("restaurant_1")
+
+        assert asyncio.run(scenario()) is False
+
+    def test_waiting_coroutine_does_not_block_loop(self, manager):
+        """Test other tasks keep running while a coroutine waits for a lock"""
+        assert manager.acquire("restaurant_1", 2)
+
+        async def scenario():
+            waiter = asyncio.create_task(manager.acquire_async("restaurant_1", 1, timeout=2.0))
+            ticks = 0
+            for _ in range(10):
+                await asyncio.sleep(0.005)
+                ticks += 1
+            # Released from another thread, as a sync holder would
+            threading.Thread(target=manager.release, args=("restaurant_1", 2)).start()
+            return ticks, await waiter
+
+        assert asyncio.run(scenario()) == (10, True)
+        assert manager.get_lock_holder("restaurant_1") == 1
+
+    def test_hold_timeout_raises(self, manager):
+        """Test hold() raises TimeoutError and leaves no waiter behind"""
+        assert manager.acquire("restaurant_1", 2)
+
+        async def scenario():
+            async with manager.hold("restaurant_1", timeout=0.05):
+                pass
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(scenario())
+        assert manager.get_stats()["waiting"] == 0
+
+    def test_cancelled_waiter_leaves_queue(self, manager):
+        """Test cancelling a waiting coroutine withdraws its request"""
+        assert manager.acquire("restaurant_1", 2)
+
+        async def scenario():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(manager.acquire_lock("restaurant_1"), timeout=0.05)
+
+        asyncio.run(scenario())
+        assert manager.get_stats()["waiting"] == 0
+        manager.release("restaurant_1", 2)
+        assert not manager.is_locked("restaurant_1")
+
+    def test_sync_and_async_share_queue(self, manager):
+        """Test a thread waiting behind a coroutine's hold is granted afterwards"""
+        async def scenario():
+            async with manager.hold("restaurant_1", lock_type=LockType.SHARED):
+                writer, result = acquire_in_thread(manager, "restaurant_1", 2, LockType.EXCLUSIVE)
+                await asyncio.sleep(0.02)
+                assert result == []
+            return writer, result
+
+        writer, result = asyncio.run(scenario())
+        writer.join()
+        assert result == [True]
+
+    def test_acquire_lock_lease_expires(self, manager):
+        """Test acquire_lock's timeout is a lease that releases itself"""
+        async def scenario():
+            lock = await manager.acquire_lock("agent_1", timeout=0.05)
+            assert (lock.holder, lock.lock_type) == (1, LockType.EXCLUSIVE)
+            return await asyncio.wait_for(manager.acquire_lock("agent_1", transaction_id="T2"), 1.0)
+
+        assert asyncio.run(scenario()).holder == "T2"
+
+
+
+class TestLockTelemetry:
+    """Test cases for contention statistics"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create lock manager"""
+        return DistributedLockManager()
+
+    def test_uncontended_holds_counted(self, manager):
+        """Test releases count as holds with zero wait"""
+        for _ in range(5):
+            assert manager.acquire("restaurant_1", 1)
+            manager.release("restaurant_1", 1)
+
+        stats = manager.telemetry.resource("restaurant_1")
+        assert stats["holds"] == 5
+        assert stats["contended"] == 0
+        assert stats["wait"]["p99_ms"] == 0.0
+
+    def test_waits_and_timeouts_recorded(self, manager):
+        """Test queued acquires record wait time, queue depth and timeouts"""
+        assert manager.acquire("restaurant_1", 1)
+        assert not manager.acquire("restaurant_1", 2, timeout=0.05)
+        assert not manager.acquire("restaurant_1", 3, timeout=0)
+
+        waiter, result = acquire_in_thread(manager, "restaurant_1", 4, LockType.EXCLUSIVE)
+        time.sleep(0.05)
+        manager.release("restaurant_1", 1)
+        waiter.join()
+        manager.release("restaurant_1", 4)
+
+        stats = manager.telemetry.resource("restaurant_1")
+        assert stats["timeouts"] == 2
+        assert stats["contended"] == 2
+        assert stats["holds"] == 2
+        assert stats["max_queue_depth"] == 1
+        assert stats["wait"]["max_ms"] >= 40
+        assert stats["hold"]["max_ms"] >= 90
+
+    def test_threads_merged_on_read(self, manager):
+        """Test per-thread shards add up in the report"""
+        def worker():
+            for _ in range(100):
+                manager.acquire("restaurant_1", 1, lock_type=LockType.SHARED)
+                manager.release("restaurant_1", 1)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert manager.telemetry.resource("restaurant_1")["holds"] == 400
+
+    def test_report_ranks_by_wait_time(self, manager):
+        """Test the hottest resource comes first and idle ones are left out"""
+        assert manager.acquire("restaurant_cold", 1)
+        manager.release("restaurant_cold", 1)
+        for resource_id, wait in (("restaurant_warm", 0.02), ("restaurant_hot", 0.08)):
+            assert manager.acquire(resource_id, 1)
+            assert not manager.acquire(resource_id, 2, timeout=wait)
+            manager.release(resource_id, 1)
+
+        report = manager.get_contention_report(top_n=5)
+        assert [r["resource_id"] for r in report["hot_resources"]] == \
+            ["restaurant_hot", "restaurant_warm"]
+        assert report["totals"]["timeouts"] == 2
+        assert report["table"]["entries"] == 0
+
+    def test_telemetry_can_be_disabled(self):
+        """Test a manager without telemetry still reports table state"""
+        manager = DistributedLockManager(telemetry=False)
+        assert manager.acquire("restaurant_1", 1)
+        assert manager.get_contention_report() == {"table": manager.get_stats()}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,73 @@
+"""
+tests/backend/test_merkle.py
+Unit tests for Merkle trees used by replica anti-entropy
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.merkle import MerkleTree, diff
+
+
+def digest(value):
+    return repr(value).encode()
+
+
+class TestMerkleTree:
+    """Test cases for hashing and diffing"""
+
+    @pytest.fixture
+    def trees(self):
+        """Create two trees holding the same 1000 rows"""
+        source, target = MerkleTree(depth=8), MerkleTree(depth=8)
+        for key in range(1000):
+            source.update(key, digest(key))
+            target.update(key, digest(key))
+        return source, target
+
+    def test_equal_content_equal_root(self, trees):
+        """Test insertion order does not matter, only content"""
+        source, _ = trees
+        other = MerkleTree(depth=8)
+        for key in reversed(range(1000)):
+            other.update(key, digest(key))
+
+        assert other.root == source.root
+        assert len(other) == 1000
+
+    def test_update_and_remove_change_root(self, trees):
+        """Test a changed or removed key changes the root and can be undone"""
+        source, target = trees
+        root = source.root
+
+        source.update(7, digest("changed"))
+        assert source.root != root
+        source.update(7, digest(7))
+        assert source.root == root
+
+        source.update(8, None)
+        assert source.root != target.root
+        assert source.get(8) is None
+
+    def test_diff_finds_only_differing_keys(self, trees):
+        """Test diff reports changed, missing and extra keys"""
+        source, target = trees
+        source.update(1, digest("new value"))
+        target.update(2, None)
+        target.update("stray", digest("stray"))
+
+        keys, compared = diff(source, target)
+
+        assert sorted(keys, key=repr) == sorted([1, 2, "stray"], key=repr)
+        # Three root-to-leaf paths at most, not the 511 nodes of the tree
+        assert compared <= 3 * 2 * 8 + 1
+
+    def test_diff_of_equal_trees(self, trees):
+        """Test identical trees stop at the root"""
+        assert diff(*trees) == ([], 1)
+
+    def test_depth_mismatch(self):
+        """Test trees of different shapes cannot be compared"""
+        with pytest.raises(ValueError):
+            diff(MerkleTree(depth=4), MerkleTree(depth=5))
@@ -0,0 +1,234 @@
+"""
+tests/backend/test_message_queue.py
+Unit tests for the asyncio inter-node message bus
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.message_queue import AsyncMessageBus, DROP_NEWEST, DROP_OLDEST, BLOCK
+
+
+class TestAsyncMessageBus:
+    """Test cases for bounded mailboxes and batch receive"""
+
+    @pytest.fixture
+    def bus(self):
+        """Create bus with three small mailboxes"""
+        bus = AsyncMessageBus(maxsize=4)
+        for node_id in (1, 2, 3):
+            bus.create_queue(node_id)
+        return bus
+
+    def test_send_and_receive_many(self, bus):
+        """Test batch draining returns messages in order"""
+        for i in range(3):
+            assert bus.send_message(1, {"i": i})
+
+        batch = asyncio.run(bus.receive_many(1, max_items=10, timeout=0.1))
+
+        assert [m["i"] for m in batch] == [0, 1, 2]
+
+    def test_send_message_rejects_when_full(self, bus):
+        """Test sync sends never block and report a full mailbox"""
+        results = [bus.send_message(1, {"i": i}) for i in range(6)]
+
+        assert results == [True] * 4 + [False] * 2
+        assert bus.get_stats()[1]["dropped"] == 2
+
+    def test_broadcast_excludes_sender(self, bus):
+        """Test fan-out to every other node"""
+        reached = bus.broadcast_message({"type": "HEARTBEAT"}, exclude_node=1)
+
+        assert reached == 2
+        assert bus.receive_message(1) is None
+        assert bus.receive_message(2) == {"type": "HEARTBEAT"}
+
+    def test_receive_waits_without_polling(self, bus):
+        """Test a parked receiver wakes on send"""
+        async def scenario():
+            receiver = asyncio.create_task(bus.receive(2, timeout=1.0))
+            await asyncio.sleep(0.01)
+            bus.send_message(2, {"type": "ELECTION"})
+            return await receiver
+
+        assert asyncio.run(scenario()) == {"type": "ELECTION"}
+
+    def test_receive_timeout(self, bus):
+        """Test receive returns empty on timeout"""
+        assert asyncio.run(bus.receive_many(3, timeout=0.05)) == []
+
+    def test_async_send_applies_backpressure(self, bus):
+        """Test async senders wait for space instead of dropping"""
+        async def scenario():
+            for i in range(4):
+                bus.send_message(1, {"i": i})
+            sender = asyncio.create_task(bus.send(1, {"i": 4}, timeout=1.0))
+            await asyncio.sleep(0.01)
+            assert not sender.done()
+
+            first = await bus.receive_many(1, max_items=2)
+            assert await sender
+            rest = await bus.receive_many(1, max_items=10)
+            return first + rest
+
+        messages = asyncio.run(scenario())
+        assert [m["i"] for m in messages] == [0, 1, 2, 3, 4]
+
+    def test_send_from_other_thread_wakes_receiver(self, bus):
+        """Test cross-thread sends wake receivers on the loop"""
+        async def scenario():
+            receiver = asyncio.create_task(bus.receive(3, timeout=2.0))
+            await asyncio.sleep(0.01)
+            threading.Thread(target=bus.send_message, args=(3, {"from": "thread"})).start()
+            return await receiver
+
+        start = time.perf_counter()
+        assert asyncio.run(scenario()) == {"from": "thread"}
+        assert time.perf_counter() - start < 1.0
+
+    def test_timed_out_waits_leave_nothing_parked(self, bus):
+        """Test polling receivers and senders do not pile up waiters"""
+        async def scenario():
+            for _ in range(200):
+                assert await bus.receive(3, timeout=0.0001) is None
+            for i in range(4):
+                bus.send_message(1, {"i": i})
+            for _ in range(200):
+                assert not await bus.send(1, {"i": 4}, timeout=0.0001)
+
+        asyncio.run(scenario())
+        assert not bus.queues[3]._receivers
+        assert not bus.queues[1]._senders
+
+    def test_abandoned_wake_passes_to_next_receiver(self, bus):
+        """Test a receiver cancelled right after being woken does not swallow the wake"""
+        async def scenario():
+            first = asyncio.create_task(bus.queues[2].wait_not_empty())
+            second = asyncio.create_task(bus.receive(2, timeout=1.0))
+            await asyncio.sleep(0.01)
+            bus.send_message(2, {"type": "ELECTION"})
+            # Woken, but cancelled before it gets to run
+            first.cancel()
+            return await second
+
+        start = time.perf_counter()
+        assert asyncio.run(scenario()) == {"type": "ELECTION"}
+        assert time.perf_counter() - start < 0.5
+
+
+
+class TestTopicDispatch:
+    """Test cases for per-subscriber delivery queues"""
+
+    @pytest.fixture
+    def bus(self):
+        """Create bus"""
+        return AsyncMessageBus()
+
+    def _wait_for(self, condition, timeout=2.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.005)
+        return condition()
+
+    def test_publish_delivers_in_order(self, bus):
+        """Test messages reach the subscriber in publish order"""
+        received = []
+        subscription = bus.subscribe("orders", received.append)
+
+        for i in range(20):
+            bus.publish("orders", {"i": i})
+
+        assert self._wait_for(lambda: len(received) == 20)
+        assert [m["i"] for m in received] == list(range(20))
+        assert subscription.get_stats()["delivered"] == 20
+        bus.unsubscribe(subscription)
+
+    def test_slow_subscriber_does_not_delay_publisher(self, bus):
+        """Test publish returns before a slow callback finishes"""
+        release = threading.Event()
+        subscription = bus.subscribe("orders", lambda m: release.wait(2.0))
+
+        start = time.perf_counter()
+        for i in range(10):
+            bus.publish("orders", {"i": i})
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.1
+        release.set()
+        bus.unsubscribe(subscription)
+
+    def test_drop_newest_policy(self, bus):
+        """Test a full queue rejects new messages"""
+        release = threading.Event()
+        subscription = bus.subscribe("orders", lambda m: release.wait(2.0),
+                                     maxsize=2, policy=DROP_NEWEST)
+
+        results = [bus.publish("orders", {"i": i}) for i in range(6)]
+
+        assert results.count(0) >= 3
+        assert subscription.get_stats()["dropped"] >= 3
+        release.set()
+        bus.unsubscribe(subscription)
+
+    def test_drop_oldest_policy_keeps_latest(self, bus):
+        """Test a full queue evicts the oldest pending message"""
+        started = threading.Event()
+        release = threading.Event()
+        received = []
+
+        def callback(message):
+            started.set()
+            release.wait(2.0)
+            received.append(message["i"])
+
+        subscription = bus.subscribe("orders", callback, maxsize=2, policy=DROP_OLDEST)
+        bus.publish("orders", {"i": 0})
+        assert started.wait(1.0)
+        for i in range(1, 6):
+            bus.publish("orders", {"i": i})
+        release.set()
+
+        assert self._wait_for(lambda: len(received) == 3)
+        assert received == [0, 4, 5]
+        bus.unsubscribe(subscription)
+
+    def test_block_policy_times_out(self, bus):
+        """Test block policy waits then drops"""
+        release = threading.Event()
+        subscription = bus.subscribe("orders", lambda m: release.wait(2.0),
+                                     maxsize=1, policy=BLOCK, block_timeout=0.05)
+
+        results = [bus.publish("orders", {"i": i}) for i in range(4)]
+
+        assert 0 in results
+        release.set()
+        bus.unsubscribe(subscription)
+
+    def test_callback_errors_are_counted(self, bus):
+        """Test a failing subscriber keeps running"""
+        def callback(message):
+            if message["i"] == 0:
+                raise ValueError("boom")
+
+        subscription = bus.subscribe("orders", callback)
+        bus.publish("orders", {"i": 0})
+        bus.publish("orders", {"i": 1})
+
+        assert self._wait_for(lambda: subscription.get_stats()["delivered"] == 1)
+        assert subscription.get_stats()["errors"] == 1
+        bus.unsubscribe(subscription)
+
+    def test_invalid_policy(self, bus):
+        """Test unknown policies are rejected"""
+        with pytest.raises(ValueError):
+            bus.subscribe("orders", print, policy="sometimes")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,158 @@
+"""
+tests/backend/test_mvcc.py
+Unit tests for the multi-version store and snapshot transactions
+"""
+
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.concurrency.mvcc import MVCCStore, WriteConflict, DELETED
+from backend.concurrency.transaction_manager import TransactionManager, IsolationLevel
+
+
+class TestMVCCStore:
+    """Test cases for version chains, validation and GC"""
+
+    @pytest.fixture
+    def store(self):
+        """Create store whose GC only runs when called"""
+        return MVCCStore(gc_interval=3600)
+
+    def test_snapshot_sees_versions_committed_before_it(self, store):
+        """Test reads return the newest version at or before the snapshot"""
+        store.commit(store.last_commit, {"stock_1": 10})
+        ts = store.begin_snapshot()
+        store.commit(store.last_commit, {"stock_1": 9})
+
+        assert store.read("stock_1", ts) == 10
+        assert store.read("stock_1") == 9
+        assert store.read("stock_2", ts, default=0) == 0
+
+    def test_first_committer_wins(self, store):
+        """Test a write to a key committed after our snapshot is rejected"""
+        ts1 = store.begin_snapshot()
+        ts2 = store.begin_snapshot()
+        store.commit(ts1, {"stock_1": 9, "stock_2": 1})
+
+        with pytest.raises(WriteConflict, match="Conflict"):
+            store.commit(ts2, {"stock_1": 8})
+        # Disjoint keys do not conflict
+        store.commit(ts2, {"stock_3": 1})
+        assert store.read("stock_1") == 9
+        assert store.get_stats()["conflicts"] == 1
+
+    def test_gc_keeps_versions_visible_to_active_snapshots(self, store):
+        """Test GC drops only versions no snapshot can reach"""
+        for quantity in range(10):
+            store.commit(store.last_commit, {"stock_1": quantity})
+        ts = store.begin_snapshot()
+        for quantity in range(10, 20):
+            store.commit(store.last_commit, {"stock_1": quantity})
+
+        assert store.gc() == 9
+        assert store.read("stock_1", ts) == 9
+        assert store.get_stats()["versions"] == 11
+
+        store.end_snapshot(ts)
+        assert store.gc() == 10
+        assert store.get_stats()["versions"] == 1
+        assert store.read("stock_1") == 19
+
+    def test_gc_removes_deleted_keys(self, store):
+        """Test a tombstone no snapshot predates removes the key"""
+        store.commit(0, {"order_1": {"status": "placed"}})
+        ts = store.begin_snapshot()
+        store.commit(ts, {"order_1": DELETED})
+        store.end_snapshot(ts)
+
+        assert store.read("order_1") is None
+        store.gc()
+        assert len(store) == 0
+
+
+class TestSnapshotTransactions:
+    """Test cases for transactions over the multi-version store"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create transaction manager with a private store"""
+        return TransactionManager(MVCCStore(gc_interval=3600))
+
+    def test_uncommitted_writes_are_invisible(self, manager):
+        """Test dirty reads are prevented and own writes are visible"""
+        manager.begin_transaction("tx1")
+        manager.write("tx1", "order_1", "confirmed")
+        manager.begin_transaction("tx2")
+
+        assert manager.read("tx1", "order_1") == "confirmed"
+        assert manager.read("tx2", "order_1") is None
+
+        assert manager.commit_transaction("tx1")
+        assert manager.read("tx2", "order_1") == "confirmed"
+
+    def test_snapshot_reads_are_repeatable(self, manager):
+        """Test a SNAPSHOT transaction keeps its view while others commit"""
+        manager.begin_transaction("analytics", IsolationLevel.SNAPSHOT)
+        for i in range(5):
+            tx_id = f"order_{i}"
+            manager.begin_transaction(tx_id)
+            manager.write(tx_id, "orders_total", i + 1)
+            assert manager.commit_transaction(tx_id)
+
+        assert manager.read("analytics", "orders_total") is None
+        assert manager.commit_transaction("analytics")
+
+    def test_lost_update_aborts_second_committer(self, manager):
+        """Test two read-modify-writes of one key cannot both commit"""
+        manager.begin_transaction("setup")
+        manager.write("setup", "stock_1", 10)
+        manager.commit_transaction("setup")
+
+        txs = {}
+        for tx_id in ("tx1", "tx2"):
+            txs[tx_id] = manager.begin_transaction(tx_id)
+            manager.write(tx_id, "stock_1", manager.read(tx_id, "stock_1") - 1)
+
+        assert manager.commit_transaction("tx1") is True
+        assert manager.commit_transaction("tx2") is False
+        assert txs["tx2"].status == "aborted"
+        assert "tx2" not in manager.transactions
+        assert manager.store.read("stock_1") == 9
+
+    def test_readers_do_not_block_writers(self, manager):
+        """Test a long snapshot read does not delay commits"""
+        manager.begin_transaction("analytics", IsolationLevel.SNAPSHOT)
+        done = threading.Event()
+
+        def writer():
+            for i in range(100):
+                tx_id = f"order_{i}"
+                manager.begin_transaction(tx_id)
+                manager.write(tx_id, f"order_{i}", "placed")
+                manager.commit_transaction(tx_id)
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert done.wait(timeout=5.0)
+        thread.join()
+
+        assert all(manager.read("analytics", f"order_{i}") is None for i in range(100))
+        manager.commit_transaction("analytics")
+        assert manager.store.get_stats()["active_snapshots"] == 0
+
+    def test_finished_transactions_are_dropped(self, manager):
+        """Test committed and aborted transactions do not accumulate"""
+        for i in range(100):
+            manager.begin_transaction(f"order_{i}")
+            manager.write(f"order_{i}", f"order_{i}", "placed")
+            if i % 2:
+                manager.abort_transaction(f"order_{i}")
+            else:
+                manager.commit_transaction(f"order_{i}")
+        manager.begin_transaction("open")
+
+        assert list(manager.transactions) == ["open"]
+        assert manager.commit_transaction("order_0") is False
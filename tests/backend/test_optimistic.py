@@ -0,0 +1,149 @@
+"""
+tests/backend/test_optimistic.py
+Unit tests for optimistic concurrency control with version columns
+"""
+
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.concurrency.mvcc import MVCCStore, VersionConflict, WriteConflict
+from backend.concurrency.optimistic import OptimisticTransaction, retry_on_conflict
+from backend.concurrency.transaction_manager import TransactionManager
+from backend.models.restaurant import MenuItem
+
+
+class TestOptimisticTransaction:
+    """Test cases for read-validate-write on versioned records"""
+
+    @pytest.fixture
+    def item(self):
+        """Create versioned menu item"""
+        return MenuItem(1, "Margherita Pizza", 12.99, 50)
+
+    def test_commit_applies_changes_and_bumps_version(self, item):
+        """Test a clean commit writes fields and increments the version"""
+        tx = OptimisticTransaction()
+        assert tx.read(item) == 0
+        tx.set(item, quantity_available=item.quantity_available - 1)
+        tx.commit()
+
+        assert item.quantity_available == 49
+        assert item.version == 1
+
+    def test_conflicting_commit_is_rejected(self, item):
+        """Test the second of two overlapping writers fails validation"""
+        tx1, tx2 = OptimisticTransaction(), OptimisticTransaction()
+        tx1.read(item)
+        tx2.read(item)
+        tx1.set(item, quantity_available=item.quantity_available - 1)
+        tx2.set(item, quantity_available=item.quantity_available - 1)
+        tx1.commit()
+
+        with pytest.raises(VersionConflict, match="Version"):
+            tx2.commit()
+        assert item.quantity_available == 49
+        assert item.version == 1
+
+    def test_read_only_validation(self, item):
+        """Test a reader notices a write between its reads and commit"""
+        tx = OptimisticTransaction()
+        tx.read(item)
+        writer = OptimisticTransaction()
+        writer.set(item, price=13.99)
+        writer.commit()
+
+        with pytest.raises(VersionConflict):
+            tx.commit()
+
+    def test_retry_loses_no_updates(self, item):
+        """Test concurrent decrements with retries all land"""
+        def decrement():
+            tx = OptimisticTransaction()
+            tx.read(item)
+            quantity = item.quantity_available
+            tx.set(item, quantity_available=quantity - 1)
+            tx.commit()
+
+        def worker():
+            for _ in range(10):
+                retry_on_conflict(decrement, retries=100)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert item.quantity_available == 10
+        assert item.version == 40
+
+    def test_retry_gives_up(self):
+        """Test retry_on_conflict re-raises after the last attempt"""
+        attempts = []
+
+        def always_conflicts():
+            attempts.append(1)
+            raise VersionConflict("order_1", 1, 2)
+
+        with pytest.raises(WriteConflict):
+            retry_on_conflict(always_conflicts, retries=3, backoff=0)
+        assert len(attempts) == 3
+
+
+class TestVersionedTransactions:
+    """Test cases for expected-version updates through TransactionManager"""
+
+    @pytest.fixture
+    def manager(self):
+        """Create transaction manager with a private store"""
+        return TransactionManager(MVCCStore(gc_interval=3600))
+
+    def test_update_with_current_version(self, manager):
+        """Test an update at the version read commits and moves the version"""
+        manager.begin_transaction("tx1")
+        data, version = manager.read_versioned("tx1", "order:123", {})
+        assert version == 0
+        assert manager.update("tx1", "order:123", {"status": "confirmed"}, version)
+        assert manager.commit_transaction("tx1")
+
+        manager.begin_transaction("tx2")
+        data, version = manager.read_versioned("tx2", "order:123")
+        assert data == {"status": "confirmed"}
+        assert version > 0
+
+    def test_update_with_stale_version(self, manager):
+        """Test the second writer of one version gets a VersionConflict"""
+        manager.begin_transaction("tx1")
+        manager.begin_transaction("tx2")
+        _, version1 = manager.read_versioned("tx1", "order:123")
+        _, version2 = manager.read_versioned("tx2", "order:123")
+
+        manager.update("tx1", "order:123", {"status": "confirmed"}, version1)
+        manager.commit_transaction("tx1")
+
+        with pytest.raises(VersionConflict, match="Version"):
+            manager.update("tx2", "order:123", {"status": "cancelled"}, version2)
+
+    def test_run_transaction_retries_conflicts(self, manager):
+        """Test run_transaction reruns work that lost a race"""
+        manager.begin_transaction("setup")
+        manager.write("setup", "stock_1", 10)
+        manager.commit_transaction("setup")
+        runs = []
+
+        def decrement(tx_id):
+            runs.append(tx_id)
+            quantity = manager.read(tx_id, "stock_1")
+            if len(runs) == 1:
+                # Another transaction commits between our read and commit
+                manager.begin_transaction("rival")
+                manager.write("rival", "stock_1", manager.read("rival", "stock_1") - 1)
+                manager.commit_transaction("rival")
+            manager.write(tx_id, "stock_1", quantity - 1)
+            return quantity - 1
+
+        assert manager.run_transaction(decrement) == 8
+        assert len(runs) == 2
+        assert manager.store.read("stock_1") == 8
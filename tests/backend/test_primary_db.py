@@ -0,0 +1,97 @@
+"""
+tests/backend/test_primary_db.py
+Unit tests for group commit on the primary database
+"""
+
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+
+def write_concurrently(db, rows):
+    """Submit one write per row from its own thread; returns their results"""
+    results = [None] * len(rows)
+    start = threading.Barrier(len(rows))
+
+    def writer(i):
+        start.wait()
+        results[i] = db.write("restaurants", rows[i])
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(len(rows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def restaurant(restaurant_id):
+    return {"restaurant_id": restaurant_id, "name": f"Restaurant {restaurant_id}",
+            "cuisine": "Italian"}
+
+
+class TestGroupCommit:
+    """Test cases for batching writes into shared commits"""
+
+    @pytest.fixture
+    def db(self, tmp_path, monkeypatch):
+        """Create a primary database with a wide commit window"""
+        # The module creates its global database in the working directory
+        monkeypatch.chdir(tmp_path)
+        from backend.database.primary_db import PrimaryDatabase
+        db = PrimaryDatabase(str(tmp_path / "primary.db"), group_commit_window=0.1)
+        yield db
+        db.close()
+
+    def test_concurrent_writes_share_commits(self, db):
+        """Test concurrent writers are committed together and all succeed"""
+        results = write_concurrently(db, [restaurant(i) for i in range(1, 21)])
+
+        assert all(results)
+        assert db.commit_stats["writes"] == 20
+        assert db.commit_stats["commits"] < 20
+        assert len(db.read("restaurants")) == 20
+        assert db.log_position == 20
+
+    def test_failing_write_does_not_affect_batch(self, db):
+        """Test a write that fails is rolled back alone"""
+        assert db.write("restaurants", restaurant(1))
+        commits = db.commit_stats["commits"]
+
+        rows = [restaurant(2), restaurant(1), restaurant(3), {"restaurant_id": 4}]
+        results = write_concurrently(db, rows)
+
+        assert results == [True, False, True, False]
+        assert db.commit_stats["commits"] == commits + 1
+        assert sorted(r["restaurant_id"] for r in db.read("restaurants")) == [1, 2, 3]
+        assert db.log_position == 3
+
+    def test_committer_survives_failed_batch(self, db, monkeypatch):
+        """Test an error outside the per-write savepoints fails one batch only"""
+        commit_batch = db._commit_batch
+
+        def fail_once(batch):
+            monkeypatch.setattr(db, "_commit_batch", commit_batch)
+            raise RuntimeError("disk I/O error")
+
+        monkeypatch.setattr(db, "_commit_batch", fail_once)
+
+        assert db.write("restaurants", restaurant(1)) is False
+        assert db.write("restaurants", restaurant(2)) is True
+        assert [r["restaurant_id"] for r in db.read("restaurants")] == [2]
+
+    def test_reads_wait_for_open_batch(self, db):
+        """Test reads never see writes of a batch that has not committed"""
+        seen = []
+        reader = threading.Thread(target=lambda: seen.extend(db.read("restaurants")))
+        with db.lock:
+            db.connection.execute("BEGIN")
+            db.connection.execute("INSERT INTO restaurants (restaurant_id, name, cuisine) "
+                                  "VALUES (1, 'Pending', 'Italian')")
+            reader.start()
+            reader.join(timeout=0.2)
+            assert reader.is_alive()
+            db.connection.rollback()
+        reader.join()
+        assert seen == []
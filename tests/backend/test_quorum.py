@@ -0,0 +1,129 @@
+"""
+tests/backend/test_quorum.py
+Unit tests for replicated writes and quorum reads across ConsistencyManagers
+"""
+
+import threading
+import time
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.node import DistributedNode
+from backend.distributed.consistency import ConsistencyManager, QuorumNotReached, connect_replicas
+
+
+class SlowReplica:
+    """Peer that delays replicate() and fetch() until released"""
+
+    def __init__(self, manager, delay=None):
+        self.manager = manager
+        self.delay = delay
+        self.release = threading.Event()
+
+    def _wait(self):
+        if self.delay is not None:
+            time.sleep(self.delay)
+        else:
+            self.release.wait()
+
+    def replicate(self, record):
+        self._wait()
+        return self.manager.replicate(record)
+
+    def fetch(self, key, at=None):
+        self._wait()
+        return self.manager.fetch(key, at)
+
+    def is_available(self):
+        return self.manager.is_available()
+
+
+def cluster(size, mode, timeout=1.0):
+    managers = [ConsistencyManager(DistributedNode(node_id=i), mode, timeout=timeout)
+                for i in range(1, size + 1)]
+    connect_replicas(managers)
+    return managers
+
+
+class TestFanOut:
+    """Test cases for sending writes to replicas in parallel"""
+
+    def test_replicas_are_written_in_parallel(self):
+        """Test a strong write waits for the slowest replica, not the sum"""
+        managers = cluster(5, "strong")
+        leader = managers[0]
+        for manager in managers[1:]:
+            leader.peers[manager.node.node_id] = SlowReplica(manager, delay=0.2)
+
+        start = time.monotonic()
+        result = leader.write("order_1", "placed", [2, 3, 4, 5])
+
+        assert result["success"]
+        assert sorted(result["acks"]) == [1, 2, 3, 4, 5]
+        assert time.monotonic() - start < 0.6
+
+    def test_quorum_write_returns_at_majority(self):
+        """Test a quorum write does not wait for replicas past W"""
+        managers = cluster(5, "quorum")
+        leader = managers[0]
+        stuck = [SlowReplica(manager) for manager in managers[3:]]
+        for replica in stuck:
+            leader.peers[replica.manager.node.node_id] = replica
+
+        result = leader.write("order_1", "placed", [2, 3, 4, 5])
+
+        assert result["success"]
+        assert sorted(result["acks"]) == [1, 2, 3]
+        assert result["required"] == 3
+        # The rest still get the write once they answer
+        for replica in stuck:
+            replica.release.set()
+        time.sleep(0.1)
+        assert managers[4].store.get("order_1")["value"] == "placed"
+
+    def test_strong_write_fails_on_down_replica(self):
+        """Test without hinted handoff a down replica fails a strong write"""
+        managers = cluster(3, "strong", timeout=0.2)
+        managers[2].node.is_active = False
+
+        start = time.monotonic()
+        result = managers[0].write("order_1", "placed", [2, 3])
+
+        # Known to be unreachable, so it fails without waiting for the timeout
+        assert not result["success"]
+        assert time.monotonic() - start < 0.2
+        time.sleep(0.05)
+        assert managers[1].store.get("order_1")["value"] == "placed"
+
+
+class TestQuorumRead:
+    """Test cases for reading from R replicas"""
+
+    def test_read_sees_newer_replica(self):
+        """Test a replica that missed a write still reads it through the quorum"""
+        managers = cluster(3, "quorum")
+        managers[2].node.is_active = False
+        assert managers[0].write("order_1", "placed", [2, 3])["success"]
+        managers[2].node.is_active = True
+
+        assert managers[2].store.get("order_1") is None
+        assert managers[2].read("order_1") == "placed"
+
+    def test_read_without_quorum_raises(self):
+        """Test fewer than R answers is an error, not a possibly stale value"""
+        managers = cluster(3, "quorum", timeout=0.2)
+        managers[0].write("order_1", "placed", [2, 3])
+        managers[1].node.is_active = False
+        managers[2].node.is_active = False
+
+        with pytest.raises(QuorumNotReached):
+            managers[0].read("order_1")
+
+    def test_read_with_one_replica_down(self):
+        """Test R = 2 of 3 still answers with one replica down"""
+        managers = cluster(3, "quorum", timeout=0.2)
+        managers[0].write("order_1", "placed", [2, 3])
+        managers[1].node.is_active = False
+
+        assert managers[0].read("order_1") == "placed"
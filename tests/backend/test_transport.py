@@ -0,0 +1,140 @@
+"""
+tests/backend/test_transport.py
+Unit tests for the message bus socket transport
+"""
+
+import asyncio
+import socket
+import time
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.core.message_queue import AsyncMessageBus
+from backend.core.codec import encode_message
+from backend.core.transport import FRAME_HEADER, SocketTransport, node_address, parse_address
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_bus(node_id, address, peers):
+    bus = AsyncMessageBus()
+    bus.create_queue(node_id)
+    transport = SocketTransport(address, peers, deliver=bus.deliver_local)
+    bus.attach_transport(transport.start())
+    return bus, transport
+
+
+async def receive_all(bus, node_id, count, timeout=2.0):
+    received = []
+    while len(received) < count:
+        batch = await bus.receive_many(node_id, timeout=timeout)
+        if not batch:
+            break
+        received.extend(batch)
+    return received
+
+
+@pytest.fixture(params=["unix", "tcp"])
+def addresses(request, tmp_path):
+    """Listen addresses for nodes 1 and 2"""
+    if request.param == "unix":
+        return {1: f"unix:{tmp_path}/node_1.sock", 2: f"unix:{tmp_path}/node_2.sock"}
+    return {1: f"tcp:127.0.0.1:{free_port()}", 2: f"tcp:127.0.0.1:{free_port()}"}
+
+
+class TestSocketTransport:
+    """Test cases for cross-process message delivery"""
+
+    def test_send_message_to_remote_node(self, addresses):
+        """Test messages for a remote node arrive in order"""
+        bus1, transport1 = make_bus(1, addresses[1], {2: addresses[2]})
+        bus2, transport2 = make_bus(2, addresses[2], {1: addresses[1]})
+
+        for i in range(500):
+            assert bus1.send_message(2, {"type": "TEST", "i": i})
+        received = asyncio.run(receive_all(bus2, 2, 500))
+
+        assert [m["i"] for m in received] == list(range(500))
+        transport1.close()
+        transport2.close()
+
+    def test_broadcast_includes_remote_nodes(self, addresses):
+        """Test broadcast reaches local and remote mailboxes"""
+        bus1, transport1 = make_bus(1, addresses[1], {2: addresses[2]})
+        bus1.create_queue(3)
+        bus2, transport2 = make_bus(2, addresses[2], {1: addresses[1]})
+
+        assert bus1.broadcast_message({"type": "HELLO"}, exclude_node=1) == 2
+        received = asyncio.run(receive_all(bus2, 2, 1))
+
+        assert received == [{"type": "HELLO"}]
+        assert bus1.receive_message(3) == {"type": "HELLO"}
+        transport1.close()
+        transport2.close()
+
+    def test_messages_wait_for_peer_to_start(self, addresses):
+        """Test frames queued before the peer listens are delivered once it does"""
+        bus1, transport1 = make_bus(1, addresses[1], {2: addresses[2]})
+        for i in range(10):
+            bus1.send_message(2, {"i": i})
+
+        bus2, transport2 = make_bus(2, addresses[2], {1: addresses[1]})
+        received = asyncio.run(receive_all(bus2, 2, 10))
+
+        assert [m["i"] for m in received] == list(range(10))
+        transport1.close()
+        transport2.close()
+
+    def test_unknown_node(self, addresses):
+        """Test sending to a node with no mailbox or peer address fails"""
+        bus1, transport1 = make_bus(1, addresses[1], {})
+
+        assert bus1.send_message(9, {"i": 0}) is False
+        transport1.close()
+
+    def test_closed_connections_are_forgotten(self, addresses):
+        """Test a peer that reconnects repeatedly does not pile up reader sockets"""
+        bus1, transport1 = make_bus(1, addresses[1], {})
+        family, sockaddr = parse_address(addresses[1])
+
+        for i in range(5):
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.connect(sockaddr)
+                payload = encode_message({"i": i})
+                sock.sendall(FRAME_HEADER.pack(len(payload), 1) + payload)
+
+        received = asyncio.run(receive_all(bus1, 1, 5))
+        deadline = time.time() + 2.0
+        while transport1._readers and time.time() < deadline:
+            time.sleep(0.005)
+
+        assert sorted(m["i"] for m in received) == list(range(5))
+        assert not transport1._readers
+        transport1.close()
+
+
+class TestAddresses:
+    """Test cases for transport address parsing"""
+
+    def test_parse(self):
+        assert parse_address("unix:/tmp/a.sock") == (socket.AF_UNIX, "/tmp/a.sock")
+        assert parse_address("tcp:127.0.0.1:7001") == (socket.AF_INET, ("127.0.0.1", 7001))
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_address("udp:127.0.0.1:7001")
+        with pytest.raises(ValueError):
+            node_address("pigeon", 1)
+
+    def test_node_address(self):
+        assert node_address("tcp", 2, base_port=7000) == "tcp:127.0.0.1:7002"
+        assert node_address("unix", 2, socket_dir="/run").endswith("/zwiggy_node_2.sock")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
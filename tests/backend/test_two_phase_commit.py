@@ -0,0 +1,269 @@
+"""
+tests/backend/test_two_phase_commit.py
+Unit tests for the two-phase commit coordinator and its log
+"""
+
+import os
+import tempfile
+import time
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.concurrency.mvcc import MVCCStore
+from backend.concurrency.transaction_manager import TransactionManager
+from backend.concurrency.two_phase_commit import CoordinatorLog, TwoPhaseCommitCoordinator
+
+
+class FakeParticipant:
+    """Participant that votes as told, optionally after a delay"""
+
+    def __init__(self, vote=True, delay=0.0):
+        self.vote = vote
+        self.delay = delay
+        self.prepared = []
+        self.committed = []
+        self.aborted = []
+
+    def prepare_transaction(self, tx_id):
+        time.sleep(self.delay)
+        self.prepared.append(tx_id)
+        return self.vote
+
+    def commit_transaction(self, tx_id):
+        self.committed.append(tx_id)
+        return True
+
+    def abort_transaction(self, tx_id):
+        self.aborted.append(tx_id)
+        return True
+
+
+class TestCoordinator:
+    """Test cases for the parallel protocol"""
+
+    @pytest.fixture
+    def coordinator(self):
+        """Create coordinator with an in-memory log"""
+        coordinator = TwoPhaseCommitCoordinator(prepare_timeout=1.0)
+        yield coordinator
+        coordinator.close()
+
+    def test_commit_when_all_vote_yes(self, coordinator):
+        """Test unanimous YES commits on every participant"""
+        participants = {node_id: FakeParticipant() for node_id in (1, 2, 3)}
+        for node_id, participant in participants.items():
+            coordinator.register(node_id, participant)
+
+        assert coordinator.run("tx1", [1, 2, 3]) is True
+        assert all(p.committed == ["tx1"] for p in participants.values())
+        assert coordinator.outcome("tx1") == "abort"  # END written, forgotten
+
+    def test_abort_when_one_votes_no(self, coordinator):
+        """Test a single NO aborts everyone and commits no one"""
+        participants = {1: FakeParticipant(), 2: FakeParticipant(vote=False)}
+        for node_id, participant in participants.items():
+            coordinator.register(node_id, participant)
+
+        assert coordinator.run("tx1", [1, 2]) is False
+        time.sleep(0.05)
+        assert all(p.aborted == ["tx1"] and not p.committed for p in participants.values())
+        assert coordinator.outcome("tx1") == "abort"
+
+    def test_prepare_is_parallel(self, coordinator):
+        """Test votes are collected concurrently, not one after another"""
+        for node_id in range(1, 6):
+            coordinator.register(node_id, FakeParticipant(delay=0.1))
+
+        start = time.monotonic()
+        votes = coordinator.prepare("tx1", range(1, 6))
+        assert all(votes.values())
+        assert time.monotonic() - start < 0.3
+
+    def test_slow_participant_times_out_as_no(self, coordinator):
+        """Test a per-participant timeout turns a late vote into NO"""
+        coordinator.register(1, FakeParticipant())
+        coordinator.register(2, FakeParticipant(delay=0.5), timeout=0.05)
+
+        start = time.monotonic()
+        votes = coordinator.prepare("tx1", [1, 2])
+        assert votes == {1: True, 2: False}
+        assert time.monotonic() - start < 0.3
+
+
+class TestCoordinatorLog:
+    """Test cases for presumed-abort logging and recovery"""
+
+    @pytest.fixture
+    def path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            yield os.path.join(directory, "coordinator.log")
+
+    def test_only_commit_decisions_are_forced(self, path):
+        """Test aborts write nothing and a commit forces one record"""
+        coordinator = TwoPhaseCommitCoordinator(CoordinatorLog(path))
+        coordinator.register(1, FakeParticipant())
+        coordinator.register(2, FakeParticipant(vote=False))
+        coordinator.run("tx_abort", [1, 2])
+        assert coordinator.log.forced_writes == 0
+
+        coordinator.run("tx_commit", [1])
+        assert coordinator.log.forced_writes == 1
+        coordinator.close()
+
+    def test_recovery_resends_unacknowledged_commits(self, path):
+        """Test a decided commit reaches a participant after a restart"""
+        log = CoordinatorLog(path)
+        log.log_commit("tx1", [1, 2])
+        log.close()
+        # Crash mid-append of the next record
+        with open(path, "ab") as f:
+            f.write(b"\x10\x00\x00\x00junk")
+
+        participant = FakeParticipant()
+        coordinator = TwoPhaseCommitCoordinator(CoordinatorLog(path))
+        coordinator.register(1, participant)
+        coordinator.register(2, participant)
+        assert coordinator.outcome("tx1") == "commit"
+
+        assert coordinator.recover() == 0
+        assert participant.committed == ["tx1", "tx1"]
+        coordinator.close()
+
+        # The END record means a further restart has nothing to redo
+        assert CoordinatorLog(path).pending == {}
+
+
+class TestDistributedTransactions:
+    """Test cases for 2PC through TransactionManager"""
+
+    @pytest.fixture
+    def nodes(self):
+        """Create a coordinator manager and two participant managers"""
+        return {node_id: TransactionManager(MVCCStore(gc_interval=3600), node_id=node_id)
+                for node_id in (1, 2, 3)}
+
+    def begin_everywhere(self, nodes, tx_id):
+        coordinator = nodes[1]
+        for node_id, manager in nodes.items():
+            manager.begin_transaction(tx_id)
+            if node_id != 1:
+                coordinator.register_participant(node_id, manager)
+                coordinator.enlist(tx_id, node_id)
+        return coordinator
+
+    def test_commit_is_atomic_across_nodes(self, nodes):
+        """Test all nodes install their writes once committed"""
+        coordinator = self.begin_everywhere(nodes, "tx1")
+        for node_id, manager in nodes.items():
+            manager.write("tx1", "order_1", f"placed on {node_id}")
+
+        assert all(coordinator.prepare("tx1").values())
+        assert coordinator.commit_2pc("tx1") is True
+        for node_id, manager in nodes.items():
+            assert manager.store.read("order_1") == f"placed on {node_id}"
+            # Finished transactions are not kept
+            assert "tx1" not in manager.transactions
+
+    def test_conflict_on_one_node_aborts_all(self, nodes):
+        """Test a NO vote from a write conflict rolls back every node"""
+        coordinator = self.begin_everywhere(nodes, "tx1")
+        for manager in nodes.values():
+            manager.write("tx1", "stock_1", 9)
+        # Another transaction on node 3 commits the same key first
+        nodes[3].begin_transaction("rival")
+        nodes[3].write("rival", "stock_1", 5)
+        nodes[3].commit_transaction("rival")
+
+        assert coordinator.commit_2pc("tx1") is False
+        time.sleep(0.05)
+        assert nodes[1].store.read("stock_1") is None
+        assert nodes[2].store.read("stock_1") is None
+        assert nodes[3].store.read("stock_1") == 5
+        assert all("tx1" not in m.transactions for m in nodes.values())
+
+    def test_prepared_writes_block_other_writers(self, nodes):
+        """Test a prepared transaction's keys cannot be committed by others"""
+        manager = nodes[1]
+        manager.begin_transaction("tx1")
+        manager.write("tx1", "stock_1", 9)
+        assert manager.prepare_transaction("tx1")
+
+        manager.begin_transaction("tx2")
+        manager.write("tx2", "stock_1", 8)
+        assert manager.commit_transaction("tx2") is False
+
+        assert manager.commit_transaction("tx1") is True
+        assert manager.store.read("stock_1") == 9
+
+
+class TestInDoubtResolution:
+    """Test cases for participants asking the coordinator for a missed decision"""
+
+    @pytest.fixture
+    def nodes(self):
+        """Create a coordinator on node 1 and a participant on node 2 that know each other"""
+        nodes = {node_id: TransactionManager(MVCCStore(gc_interval=3600), node_id=node_id)
+                 for node_id in (1, 2)}
+        nodes[1].register_participant(2, nodes[2])
+        nodes[2].register_participant(1, nodes[1])
+        return nodes
+
+    def prepare_everywhere(self, nodes, tx_id):
+        for manager in nodes.values():
+            manager.begin_transaction(tx_id)
+            manager.write(tx_id, "stock_1", 9)
+        nodes[1].enlist(tx_id, 2)
+        assert all(nodes[1].prepare(tx_id).values())
+
+    def test_missed_abort_is_resolved(self, nodes):
+        """Test a participant that never hears ABORT releases its intents"""
+        self.prepare_everywhere(nodes, "tx1")
+        # The ABORT does not reach node 2
+        del nodes[1].coordinator.participants[2]
+        nodes[1].abort_2pc("tx1")
+        assert nodes[2].transactions["tx1"].status == "prepared"
+
+        assert nodes[2].resolve_in_doubt() == {"tx1": "abort"}
+        assert "tx1" not in nodes[2].transactions
+        nodes[2].begin_transaction("tx2")
+        nodes[2].write("tx2", "stock_1", 5)
+        assert nodes[2].commit_transaction("tx2")
+
+    def test_undecided_transaction_stays_prepared(self, nodes):
+        """Test asking before the coordinator decided does not presume abort"""
+        self.prepare_everywhere(nodes, "tx1")
+
+        assert nodes[1].outcome("tx1") == "pending"
+        assert nodes[2].resolve_in_doubt() == {}
+        assert nodes[2].transactions["tx1"].status == "prepared"
+
+        assert nodes[1].commit_2pc("tx1")
+        assert nodes[2].store.read("stock_1") == 9
+
+    def test_coordinator_lost_before_commit(self, nodes):
+        """Test a coordinator that restarted without a COMMIT record means abort"""
+        self.prepare_everywhere(nodes, "tx1")
+        # Node 1 restarts before logging a decision
+        nodes[2].register_participant(1, TransactionManager(MVCCStore(gc_interval=3600),
+                                                            node_id=1))
+
+        assert nodes[2].resolve_in_doubt() == {"tx1": "abort"}
+        assert nodes[2].store.read("stock_1") is None
+
+    def test_prepared_age_timeout_resolves(self):
+        """Test the participant asks on its own once in_doubt_timeout passes"""
+        nodes = {node_id: TransactionManager(MVCCStore(gc_interval=3600), node_id=node_id,
+                                             in_doubt_timeout=0.1)
+                 for node_id in (1, 2)}
+        nodes[1].register_participant(2, nodes[2])
+        nodes[2].register_participant(1, nodes[1])
+        self.prepare_everywhere(nodes, "tx1")
+        del nodes[1].coordinator.participants[2]
+        assert nodes[1].commit_2pc("tx1")
+        assert nodes[2].transactions["tx1"].status == "prepared"
+
+        deadline = time.monotonic() + 2.0
+        while "tx1" in nodes[2].transactions and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert nodes[2].store.read("stock_1") == 9
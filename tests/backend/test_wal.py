@@ -0,0 +1,185 @@
+"""
+tests/backend/test_wal.py
+Unit tests for the transaction write-ahead log and crash recovery
+"""
+
+import os
+import tempfile
+import threading
+import pytest
+import sys
+sys.path.insert(0, '../..')
+
+from backend.concurrency.mvcc import MVCCStore
+from backend.concurrency.transaction_manager import TransactionManager
+from backend.concurrency.wal import TransactionLog
+
+
+def start(directory, **kwargs):
+    """Manager over a fresh store and the log in directory, after recovery"""
+    manager = TransactionManager(MVCCStore(gc_interval=3600),
+                                 log=TransactionLog(directory, **kwargs))
+    stats = manager.replay_log()
+    return manager, stats
+
+
+def crash(manager):
+    """Drop the manager without a clean shutdown"""
+    manager.log._file.flush()
+
+
+class TestTransactionLog:
+    """Test cases for logging and recovery"""
+
+    @pytest.fixture
+    def directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            yield directory
+
+    def test_committed_writes_survive_restart(self, directory):
+        """Test committed work is redone and deletes stay deleted"""
+        manager, _ = start(directory)
+        manager.begin_transaction("tx1")
+        manager.write("tx1", "order_1", {"status": "placed"})
+        manager.write("tx1", "order_2", {"status": "placed"})
+        manager.commit_transaction("tx1")
+        manager.begin_transaction("tx2")
+        manager.delete("tx2", "order_2")
+        manager.commit_transaction("tx2")
+        crash(manager)
+
+        manager, stats = start(directory)
+        assert stats["redone"] == 2
+        assert manager.store.read("order_1") == {"status": "placed"}
+        assert manager.store.read("order_2") is None
+
+    def test_in_flight_and_aborted_work_is_undone(self, directory):
+        """Test only committed transactions are visible after recovery"""
+        manager, _ = start(directory)
+        manager.begin_transaction("aborted")
+        manager.write("aborted", "stock_1", 1)
+        manager.abort_transaction("aborted")
+        manager.begin_transaction("in_flight")
+        manager.write("in_flight", "stock_1", 2)
+        crash(manager)
+
+        manager, stats = start(directory)
+        assert stats == {"records": 3, "redone": 0, "prepared": 0, "undone": 1}
+        assert manager.store.read("stock_1") is None
+
+        # The undo was logged, so it is not repeated
+        manager, stats = start(directory)
+        assert stats["undone"] == 0
+
+    def test_prepared_transaction_stays_in_doubt(self, directory):
+        """Test a prepared transaction comes back prepared and can commit"""
+        manager, _ = start(directory)
+        manager.begin_transaction("tx1")
+        manager.write("tx1", "stock_1", 9)
+        assert manager.prepare_transaction("tx1")
+        crash(manager)
+
+        manager, stats = start(directory)
+        assert stats["prepared"] == 1
+        assert manager.transactions["tx1"].status == "prepared"
+        manager.begin_transaction("rival")
+        manager.write("rival", "stock_1", 5)
+        assert manager.commit_transaction("rival") is False
+
+        assert manager.commit_transaction("tx1")
+        assert manager.store.read("stock_1") == 9
+
+    def test_recovery_asks_coordinator_about_prepared(self, directory):
+        """Test a participant restarted in doubt learns the commit on recover()"""
+        coordinator = TransactionManager(MVCCStore(gc_interval=3600), node_id=1)
+        manager, _ = start(directory)
+        coordinator.register_participant(0, manager)
+        for node in (coordinator, manager):
+            node.begin_transaction("tx1")
+            node.write("tx1", "stock_1", 9)
+        coordinator.enlist("tx1", 0)
+        assert all(coordinator.prepare("tx1").values())
+        crash(manager)
+        # COMMIT is decided while node 0 is down
+        del coordinator.coordinator.participants[0]
+        assert coordinator.commit_2pc("tx1")
+
+        manager, stats = start(directory)
+        assert stats["prepared"] == 1
+        manager.register_participant(1, coordinator)
+        manager.recover()
+        assert manager.store.read("stock_1") == 9
+        assert "tx1" not in manager.transactions
+
+    def test_torn_tail_is_dropped(self, directory):
+        """Test a half-written record does not stop recovery"""
+        manager, _ = start(directory)
+        manager.begin_transaction("tx1")
+        manager.write("tx1", "order_1", "placed")
+        manager.commit_transaction("tx1")
+        manager.log.close()
+        with open(os.path.join(directory, "tx.wal"), "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00{\"type\":")
+
+        manager, stats = start(directory)
+        assert manager.log.torn_bytes > 0
+        assert manager.store.read("order_1") == "placed"
+
+    def test_recovery_replays_only_the_tail(self, directory):
+        """Test a checkpoint bounds the records replayed on restart"""
+        manager, _ = start(directory, checkpoint_interval=50)
+        for i in range(200):
+            manager.begin_transaction(f"tx{i}")
+            manager.write(f"tx{i}", f"order_{i}", i)
+            manager.commit_transaction(f"tx{i}")
+        manager.begin_transaction("open")
+        manager.write("open", "order_0", "changed")
+        crash(manager)
+
+        manager, stats = start(directory)
+        assert stats["records"] < 50
+        assert all(manager.store.read(f"order_{i}") == i for i in range(200))
+        assert stats["undone"] == 1
+
+    def test_crash_before_log_is_emptied(self, directory):
+        """Test records a checkpoint already covers are not replayed again"""
+        manager, _ = start(directory)
+        for value in (1, 2):
+            manager.begin_transaction(f"tx{value}")
+            manager.write(f"tx{value}", "stock_1", value)
+            manager.commit_transaction(f"tx{value}")
+        manager.begin_transaction("in_flight")
+        manager.write("in_flight", "stock_2", 7)
+        manager.log._file.flush()
+        with open(manager.log.log_path, "rb") as f:
+            old_log = f.read()
+        manager.checkpoint()
+        crash(manager)
+        # The checkpoint was renamed into place but the old log survived
+        with open(manager.log.log_path, "wb") as f:
+            f.write(old_log)
+
+        manager, stats = start(directory)
+        assert stats == {"records": 0, "redone": 0, "prepared": 0, "undone": 1}
+        assert manager.store.read("stock_1") == 2
+        assert manager.store.read("stock_2") is None
+
+    def test_concurrent_commits_share_fsyncs(self, directory):
+        """Test group flushing needs fewer fsyncs than commits"""
+        manager, _ = start(directory)
+
+        def worker(n):
+            for i in range(25):
+                tx_id = f"tx_{n}_{i}"
+                manager.begin_transaction(tx_id)
+                manager.write(tx_id, tx_id, i)
+                manager.commit_transaction(tx_id)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert manager.store.get_stats()["commits"] == 200
+        assert manager.log.fsyncs < 200